@@ -0,0 +1,70 @@
+''' Benchmark of the per-call overhead of the raw data interpretation for small raw data chunks (e.g., online monitoring).
+
+    Synthetic raw data is interpreted in chunks of 1000 raw data words. The interpreter state is passed to the kernels as a single object
+    (see raw_data_interpreter._InterpreterState), the overhead per call is measured with empty raw data chunks. With copy=False, the hits
+    are returned as read-only views of the internal buffers. With preallocated output arrays, the hits are written to the same arrays for each chunk.
+'''
+
+import logging
+import time
+
+import numpy as np
+
+from pymosa_mimosa26_interpreter import raw_data_interpreter
+from pymosa_mimosa26_interpreter.testing.tools.test_tools import create_raw_data
+
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - [%(levelname)-8s] (%(threadName)-10s) %(message)s")
+
+
+def benchmark(raw_data, chunk_size=1000, copy=True, output_arrays=False, n_repetitions=5):
+    ''' Interpret the raw data in small chunks and return the shortest time per call of several repetitions.
+
+    Parameters
+    ----------
+    raw_data : numpy.ndarray
+        Array with the raw data words.
+    chunk_size : int
+        Number of raw data words which are interpreted at once.
+    copy : bool
+        If False, the hits are returned as views of the internal buffers.
+    output_arrays : bool
+        If True, the hits and the telescope data are written to preallocated output arrays.
+    n_repetitions : int
+        Number of repetitions.
+
+    Returns
+    -------
+    float
+        Interpretation time per call in seconds.
+    int
+        Number of hits.
+    '''
+    chunks = [raw_data[index:index + chunk_size] for index in range(0, raw_data.shape[0], chunk_size)]
+    durations = []
+    for _ in range(n_repetitions):
+        interpreter = raw_data_interpreter.RawDataInterpreter()
+        if output_arrays:
+            hits_out = np.empty(shape=10 * chunk_size, dtype=raw_data_interpreter.hits_dtype)
+            telescope_data_out = np.empty(shape=10 * chunk_size, dtype=raw_data_interpreter.telescope_data_dtype)
+        else:
+            hits_out, telescope_data_out = None, None
+        n_hits = 0
+        start_time = time.perf_counter()
+        for chunk in chunks:
+            hits, _ = interpreter.interpret_raw_data(raw_data=chunk, copy=copy, hits_out=hits_out, telescope_data_out=telescope_data_out)
+            n_hits += hits.shape[0]
+        durations.append((time.perf_counter() - start_time) / len(chunks))
+    return min(durations), n_hits
+
+
+if __name__ == "__main__":
+    benchmark(create_raw_data(n_frames=100), n_repetitions=1)  # Compile the interpreter
+    duration, _ = benchmark(np.zeros(shape=100000, dtype=np.uint32), chunk_size=1, n_repetitions=3)  # Unknown words only, no hits
+    logging.info('Overhead per call (1 raw data word): %.2f us' % (duration * 1e6))
+    raw_data = create_raw_data(n_frames=5000)
+    for copy in (True, False):
+        duration, n_hits = benchmark(raw_data, chunk_size=1000, copy=copy)
+        logging.info('Chunk size 1000, copy %s: %d raw data words, %d hits, %.2f us per call' % (copy, raw_data.shape[0], n_hits, duration * 1e6))
+    duration, n_hits = benchmark(raw_data, chunk_size=1000, output_arrays=True)
+    logging.info('Chunk size 1000, output arrays: %d raw data words, %d hits, %.2f us per call' % (raw_data.shape[0], n_hits, duration * 1e6))
@@ -0,0 +1,84 @@
+''' Benchmark of the raw data interpretation for Mimosa26 raw data with a high rate of data loss.
+
+    Synthetic raw data is created where one Mimosa26 plane (flaky plane) loses the frame trailer for a fraction of the frames.
+    The hits of these incomplete frames have to be flagged with the DATA_ERROR status bit. The interpretation speed
+    should not depend on the fraction of incomplete frames.
+'''
+
+import logging
+import time
+
+import numpy as np
+
+from pymosa_mimosa26_interpreter import raw_data_interpreter
+from pymosa_mimosa26_interpreter.testing.tools.test_tools import create_raw_data
+
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - [%(levelname)-8s] (%(threadName)-10s) %(message)s")
+
+
+def create_data_loss_raw_data(data_loss_fraction, flaky_plane=6, n_frames=20000, trigger_rate=0.02, seed=0):
+    ''' Create synthetic raw data where the frame trailer of the flaky plane is removed for a fraction of the frames.
+
+    Parameters
+    ----------
+    data_loss_fraction : float
+        Fraction of the frames of the flaky plane which are incomplete.
+    flaky_plane : int
+        Mimosa26 header ID of the flaky plane.
+    n_frames : int
+        Number of Mimosa26 frames for each plane.
+    trigger_rate : float
+        Mean number of triggers per Mimosa26 frame. A low trigger rate increases the number of buffered hits.
+    seed : int
+        Seed of the random number generator.
+
+    Returns
+    -------
+    numpy.ndarray
+        Array with the raw data words (uint32).
+    '''
+    raw_data = create_raw_data(n_frames=n_frames, trigger_rate=trigger_rate, n_noise_hits=5.0, error_rate=0.0, seed=seed)
+    rng = np.random.RandomState(seed)
+    is_frame_trailer1 = raw_data == (0x20000000 | (flaky_plane << 20) | 0xaa50 | flaky_plane)
+    remove = is_frame_trailer1 & (rng.uniform(size=raw_data.shape[0]) < data_loss_fraction)
+    return raw_data[~remove]
+
+
+def benchmark(raw_data, chunk_size=100000, multithreading=False):
+    ''' Interpret the raw data and return the interpretation time.
+
+    Parameters
+    ----------
+    raw_data : numpy.ndarray
+        Array with the raw data words.
+    chunk_size : int
+        Number of raw data words which are interpreted at once.
+    multithreading : bool
+        If True, the Mimosa26 planes are interpreted in parallel threads.
+
+    Returns
+    -------
+    float
+        Interpretation time in seconds.
+    int
+        Number of hits.
+    '''
+    interpreter = raw_data_interpreter.RawDataInterpreter()
+    interpreter.multithreading = multithreading
+    n_hits = 0
+    start_time = time.time()
+    for index in range(0, raw_data.shape[0], chunk_size):
+        hits, _ = interpreter.interpret_raw_data(raw_data=raw_data[index:index + chunk_size])
+        n_hits += hits.shape[0]
+    hits, _ = interpreter.interpret_raw_data(raw_data=None, build_all_events=True)
+    n_hits += hits.shape[0]
+    return time.time() - start_time, n_hits
+
+
+if __name__ == "__main__":
+    benchmark(create_data_loss_raw_data(data_loss_fraction=0.0, n_frames=100))  # Compile the interpreter
+    for data_loss_fraction in (0.0, 0.5, 0.9, 1.0):
+        raw_data = create_data_loss_raw_data(data_loss_fraction=data_loss_fraction)
+        duration, n_hits = benchmark(raw_data)
+        logging.info('Data loss fraction %.1f: %d raw data words, %d hits, %.2f s, %.2f MWords/s' % (data_loss_fraction, raw_data.shape[0], n_hits, duration, raw_data.shape[0] / duration / 1e6))
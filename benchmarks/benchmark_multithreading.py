@@ -0,0 +1,65 @@
+''' Benchmark of the multithreaded raw data interpretation (Mimosa26 planes are interpreted in parallel threads).
+
+    Synthetic raw data with different hit rates is interpreted with and without multithreading. With multithreading, the raw data words
+    are demultiplexed by plane, the planes are interpreted in parallel and the hits of all planes are merged into the telescope data.
+    The number of threads is given by numba (NUMBA_NUM_THREADS).
+'''
+
+import logging
+import time
+
+import numba
+
+from pymosa_mimosa26_interpreter import raw_data_interpreter
+from pymosa_mimosa26_interpreter.testing.tools.test_tools import create_raw_data
+
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - [%(levelname)-8s] (%(threadName)-10s) %(message)s")
+
+
+def benchmark(raw_data, chunk_size=1000000, multithreading=False, n_repetitions=3):
+    ''' Interpret the raw data and return the shortest interpretation time of several repetitions.
+
+    Parameters
+    ----------
+    raw_data : numpy.ndarray
+        Array with the raw data words.
+    chunk_size : int
+        Number of raw data words which are interpreted at once.
+    multithreading : bool
+        If True, the Mimosa26 planes are interpreted in parallel threads.
+    n_repetitions : int
+        Number of repetitions.
+
+    Returns
+    -------
+    float
+        Interpretation time in seconds.
+    int
+        Number of hits.
+    '''
+    durations = []
+    for _ in range(n_repetitions):
+        interpreter = raw_data_interpreter.RawDataInterpreter()
+        interpreter.multithreading = multithreading
+        n_hits = 0
+        start_time = time.time()
+        for index in range(0, raw_data.shape[0], chunk_size):
+            hits, _ = interpreter.interpret_raw_data(raw_data=raw_data[index:index + chunk_size])
+            n_hits += hits.shape[0]
+        hits, _ = interpreter.interpret_raw_data(raw_data=None, build_all_events=True)
+        n_hits += hits.shape[0]
+        durations.append(time.time() - start_time)
+    return min(durations), n_hits
+
+
+if __name__ == "__main__":
+    for multithreading in (False, True):  # Compile the interpreter
+        benchmark(create_raw_data(n_frames=100), multithreading=multithreading, n_repetitions=1)
+    logging.info('Using %d threads' % numba.config.NUMBA_NUM_THREADS)
+    for n_noise_hits in (2.0, 20.0):
+        raw_data = create_raw_data(n_frames=20000, n_noise_hits=n_noise_hits, error_rate=0.0)
+        for chunk_size in (100000, 1000000):
+            for multithreading in (False, True):
+                duration, n_hits = benchmark(raw_data, chunk_size=chunk_size, multithreading=multithreading)
+                logging.info('%.0f noise hits per frame, chunk size %d, multithreading %s: %d raw data words, %d hits, %.3f s, %.2f MWords/s' % (n_noise_hits, chunk_size, multithreading, raw_data.shape[0], n_hits, duration, raw_data.shape[0] / duration / 1e6))
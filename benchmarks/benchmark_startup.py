@@ -0,0 +1,86 @@
+''' Benchmark of the startup time of the raw data interpretation (time to first hit).
+
+A fresh Python process is started which imports the interpreter and interprets raw data until the first hits are returned.
+The startup time is measured with an empty on-disk cache of the numba kernels (every process compiles the kernels) and after
+precompiling the kernels into the cache (see pymosa_mimosa26_interpreter.precompile).
+'''
+
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from pymosa_mimosa26_interpreter.testing.tools.test_tools import create_raw_data
+
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - [%(levelname)-8s] (%(threadName)-10s) %(message)s")
+
+first_hit_script = '''
+import sys
+import time
+start_time = time.time()
+import numpy as np
+from pymosa_mimosa26_interpreter import raw_data_interpreter
+raw_data = np.load(sys.argv[1])
+interpreter = raw_data_interpreter.RawDataInterpreter()
+interpreter.multithreading = sys.argv[2] == '1'
+for index in range(0, raw_data.shape[0], 10000):
+    hits, _ = interpreter.interpret_raw_data(raw_data=raw_data[index:index + 10000])
+    if hits.shape[0]:
+        break
+print(time.time() - start_time)
+'''
+
+
+def time_to_first_hit(raw_data_file, cache_dir, multithreading=False):
+    ''' Start a new process and return the time from the process start until the first hits are returned.
+
+    Parameters
+    ----------
+    raw_data_file : string
+        Filename of the raw data (.npy).
+    cache_dir : string
+        Folder of the numba cache (NUMBA_CACHE_DIR).
+    multithreading : bool
+        If True, the Mimosa26 planes are interpreted in parallel threads.
+
+    Returns
+    -------
+    float
+        Time to first hit in seconds, measured inside the process (after the interpreter start).
+    float
+        Wall time of the process in seconds.
+    '''
+    env = dict(os.environ, NUMBA_CACHE_DIR=cache_dir)
+    start_time = time.time()
+    output = subprocess.check_output([sys.executable, '-c', first_hit_script, raw_data_file, '1' if multithreading else '0'], env=env)
+    return float(output.decode().split()[-1]), time.time() - start_time
+
+
+def precompile(cache_dir):
+    ''' Precompile the kernels into the cache folder and return the wall time of the process. '''
+    env = dict(os.environ, NUMBA_CACHE_DIR=cache_dir)
+    start_time = time.time()
+    subprocess.check_call([sys.executable, '-m', 'pymosa_mimosa26_interpreter.precompile'], env=env)
+    return time.time() - start_time
+
+
+if __name__ == "__main__":
+    temp_folder = tempfile.mkdtemp()
+    try:
+        raw_data_file = os.path.join(temp_folder, 'raw_data.npy')
+        np.save(raw_data_file, create_raw_data(n_frames=1000, trigger_rate=0.5))
+        for multithreading in (False, True):
+            cache_dir = tempfile.mkdtemp(dir=temp_folder)
+            cold, cold_wall = time_to_first_hit(raw_data_file, cache_dir=cache_dir, multithreading=multithreading)  # empty cache
+            shutil.rmtree(cache_dir)
+            precompile_time = precompile(cache_dir=cache_dir)
+            warm, warm_wall = time_to_first_hit(raw_data_file, cache_dir=cache_dir, multithreading=multithreading)
+            logging.info('Multithreading %s: time to first hit without cache %.2f s (process %.2f s), with precompiled cache %.2f s (process %.2f s), precompiling %.2f s' % (multithreading, cold, cold_wall, warm, warm_wall, precompile_time))
+    finally:
+        shutil.rmtree(temp_folder)
@@ -0,0 +1,100 @@
+''' Benchmark of the write path of the analyzed data file (compression, chunk shape, Blosc threads and flush interval of the DataInterpreter).
+
+    A synthetic raw data file is interpreted with different write settings. The interpretation time without hit table (only the error histogram
+    is filled) is subtracted from the total time to obtain the overhead of writing the hits. The write throughput (MB/s of uncompressed hits
+    interpreted and written) and the size of the analyzed data file are reported for each setting.
+'''
+
+import logging
+import os
+import shutil
+import tempfile
+import time
+
+import tables as tb
+
+from pymosa_mimosa26_interpreter import data_interpreter
+from pymosa_mimosa26_interpreter.testing.tools.test_tools import create_raw_data_file
+
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - [%(levelname)-8s] (%(threadName)-10s) %(message)s")
+
+settings = [
+    ('blosc level 5 (default)', dict()),
+    ('blosc level 5, flush every 10 chunks', dict(flush_interval=10)),
+    ('blosc level 5, expected rows 10000', dict(expected_rows=10000)),
+    ('blosc level 5, chunkshape 65536', dict(chunkshape=(65536,))),
+    ('blosc:lz4 level 1', dict(filters=tb.Filters(complib='blosc:lz4', complevel=1, shuffle=True))),
+    ('blosc:lz4 level 5, bitshuffle', dict(filters=tb.Filters(complib='blosc:lz4', complevel=5, bitshuffle=True))),
+    ('blosc:zstd level 3', dict(filters=tb.Filters(complib='blosc:zstd', complevel=3, shuffle=True))),
+    ('blosc:zstd level 6', dict(filters=tb.Filters(complib='blosc:zstd', complevel=6, shuffle=True))),
+    ('blosc:zstd level 3, 1 Blosc thread', dict(filters=tb.Filters(complib='blosc:zstd', complevel=3, shuffle=True), blosc_threads=1)),
+    ('blosc:zstd level 3, 4 Blosc threads', dict(filters=tb.Filters(complib='blosc:zstd', complevel=3, shuffle=True), blosc_threads=4)),
+    ('no compression', dict(filters=tb.Filters(complevel=0)))]
+
+
+def benchmark(raw_data_file, analyzed_data_file, chunk_size=1000000, n_repetitions=3, **kwargs):
+    ''' Interpret the raw data file and write the hit table, return the shortest time of several repetitions.
+
+    Parameters
+    ----------
+    raw_data_file : string
+        Filename of the raw data file.
+    analyzed_data_file : string
+        Filename of the analyzed data file.
+    chunk_size : int
+        Number of raw data words which are interpreted at once.
+    n_repetitions : int
+        Number of repetitions.
+    kwargs
+        Write settings of the DataInterpreter (filters, chunkshape, expected_rows, blosc_threads, flush_interval).
+
+    Returns
+    -------
+    float
+        Interpretation time in seconds.
+    int
+        Size of the hits in bytes (uncompressed).
+    int
+        Size of the analyzed data file in bytes.
+    '''
+    durations = []
+    for _ in range(n_repetitions):
+        interpreter = data_interpreter.DataInterpreter(raw_data_file=raw_data_file, analyzed_data_file=analyzed_data_file, chunk_size=chunk_size, **kwargs)
+        start_time = time.time()
+        interpreter.interpret_word_table()
+        durations.append(time.time() - start_time)
+    with tb.open_file(analyzed_data_file, 'r') as in_file_h5:
+        hits_size = in_file_h5.root.Hits.nrows * in_file_h5.root.Hits.dtype.itemsize
+    return min(durations), hits_size, os.path.getsize(analyzed_data_file)
+
+
+def benchmark_interpretation(raw_data_file, analyzed_data_file, chunk_size=1000000, n_repetitions=3):
+    ''' Interpret the raw data file without hit table and return the shortest interpretation time of several repetitions.
+    '''
+    durations = []
+    for _ in range(n_repetitions):
+        interpreter = data_interpreter.DataInterpreter(raw_data_file=raw_data_file, analyzed_data_file=analyzed_data_file, chunk_size=chunk_size)
+        interpreter.create_hit_table = False
+        interpreter.create_error_hist = True  # The events are built and the hits are histogrammed only
+        start_time = time.time()
+        interpreter.interpret_word_table()
+        durations.append(time.time() - start_time)
+    return min(durations)
+
+
+if __name__ == "__main__":
+    temp_folder = tempfile.mkdtemp()
+    try:
+        raw_data_file = os.path.join(temp_folder, 'raw_data.h5')
+        analyzed_data_file = os.path.join(temp_folder, 'raw_data_interpreted.h5')
+        create_raw_data_file(raw_data_file, n_frames=100)
+        benchmark(raw_data_file, analyzed_data_file, n_repetitions=1)  # Compile the interpreter
+        n_words = create_raw_data_file(raw_data_file, n_frames=10000, n_noise_hits=20.0, error_rate=0.0).shape[0]
+        interpretation_duration = benchmark_interpretation(raw_data_file, analyzed_data_file)
+        logging.info('%d raw data words, interpretation without hit table: %.3f s' % (n_words, interpretation_duration))
+        for name, kwargs in settings:
+            duration, hits_size, file_size = benchmark(raw_data_file, analyzed_data_file, **kwargs)
+            logging.info('%s: %.3f s (writing overhead %+.3f s), write throughput %.1f MB/s, file size %.1f MB (%.1f%% of the hits)' % (name, duration, duration - interpretation_duration, hits_size / duration / 1e6, file_size / 1e6, file_size * 100.0 / hits_size))
+    finally:
+        shutil.rmtree(temp_folder)
@@ -0,0 +1,286 @@
+''' Interpretation of many raw data files in parallel worker processes (command line tool pymosa-interpret).
+
+The raw data files are interpreted with the DataInterpreter, one file per worker process. The files are assigned to the workers largest file first,
+so that the longest jobs do not end up at the end of the batch. For each file the throughput or the failure is summarized.
+
+    pymosa-interpret --jobs 8 --memory-limit 4000 --summary summary.csv /data/run_*.h5
+'''
+
+import argparse
+import csv
+import glob
+import logging
+import multiprocessing
+import multiprocessing.connection
+import os
+import time
+import traceback
+
+import tables as tb
+
+from pymosa_mimosa26_interpreter import data_interpreter
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+
+logger = logging.getLogger(__name__)
+
+summary_fields = ('raw_data_file', 'analyzed_data_file', 'status', 'n_words', 'n_hits', 'duration', 'throughput', 'error')
+
+
+def get_raw_data_files(patterns, file_lists=None):
+    ''' Expanding the file name patterns (globs) and reading the file lists (one file name per line).
+    Duplicate files are removed, the files are sorted by size (largest file first).
+
+    Parameters
+    ----------
+    patterns : list
+        File names or glob patterns of the raw data files.
+    file_lists : list
+        File names of text files containing the raw data file names (one per line).
+
+    Returns
+    -------
+    list
+        List of raw data files.
+    '''
+    raw_data_files = []
+    for pattern in patterns:
+        files = sorted(glob.glob(pattern))
+        if not files:
+            logger.warning('No raw data file matching %s' % pattern)
+        raw_data_files.extend(files)
+    for file_list in (file_lists or []):
+        with open(file_list, 'r') as f:
+            raw_data_files.extend(line.strip() for line in f if line.strip() and not line.strip().startswith('#'))
+    raw_data_files = list(dict.fromkeys(os.path.abspath(raw_data_file) for raw_data_file in raw_data_files))
+    return sorted(raw_data_files, key=lambda raw_data_file: os.path.getsize(raw_data_file) if os.path.isfile(raw_data_file) else 0, reverse=True)
+
+
+def set_memory_limit(memory_limit):
+    ''' Limiting the address space of the worker process (in MB). Allocations beyond the limit fail with a MemoryError
+    or terminate the worker process, instead of exhausting the memory of the machine. Both are reported as failure in the summary.
+    '''
+    if memory_limit is None:
+        return
+    if resource is None:
+        logger.warning('Memory limit is not supported on this platform')
+        return
+    resource.setrlimit(resource.RLIMIT_AS, (int(memory_limit * 1024**2), int(memory_limit * 1024**2)))
+
+
+def interpret_file(raw_data_file, analyzed_data_file=None, output_folder=None, create_occupancy_hist=True, create_error_hist=True, resume=False, **kwargs):
+    ''' Interpreting a single raw data file. Exceptions are caught and reported in the summary.
+
+    Parameters
+    ----------
+    raw_data_file : string
+        The filename of the input raw data file.
+    analyzed_data_file : string
+        The filename of the output analyzed data file. If None, the filename is generated from the raw data filename.
+    output_folder : string
+        Folder of the generated output filename. If None, the output file is stored next to the raw data file.
+    create_occupancy_hist, create_error_hist : bool
+        If True, create the occupancy and event status histograms.
+    resume : bool
+        If True, resume the interpretation from the last checkpoint in the output file.
+    kwargs
+        Parameters of the DataInterpreter.
+
+    Returns
+    -------
+    dict
+        Summary of the interpretation (see summary_fields).
+    '''
+    summary = get_summary(raw_data_file, {'analyzed_data_file': analyzed_data_file, 'output_folder': output_folder})
+    analyzed_data_file = summary['analyzed_data_file']
+    start_time = time.time()
+    try:
+        with tb.open_file(raw_data_file, 'r') as in_file_h5:
+            summary['n_words'] = int(in_file_h5.root.raw_data.shape[0])
+        with data_interpreter.DataInterpreter(raw_data_file=raw_data_file, analyzed_data_file=analyzed_data_file, **kwargs) as interpreter:
+            interpreter.create_occupancy_hist = create_occupancy_hist
+            interpreter.create_error_hist = create_error_hist
+            interpreter.interpret_word_table(resume=resume)
+        with tb.open_file(interpreter.analyzed_data_file, 'r') as out_file_h5:
+            summary['n_hits'] = int(out_file_h5.root.Hits.nrows) if 'Hits' in out_file_h5.root else 0
+        summary['status'] = 'ok'
+    except Exception as e:
+        logger.error('Interpretation of %s failed: %s' % (raw_data_file, traceback.format_exc()))
+        summary['error'] = '%s: %s' % (type(e).__name__, e)
+    summary['duration'] = time.time() - start_time
+    summary['throughput'] = summary['n_words'] / summary['duration'] / 1e6 if summary['status'] == 'ok' else 0.0  # MWords/s
+    return summary
+
+
+def _interpret_file_job(connection, raw_data_file, memory_limit, kwargs):
+    ''' Worker process: interpreting the raw data file and sending the summary.
+    '''
+    set_memory_limit(memory_limit)
+    connection.send(interpret_file(raw_data_file, **kwargs))
+    connection.close()
+
+
+def get_summary(raw_data_file, kwargs):
+    ''' Returning the initial summary (status failed) of a raw data file. The output filename is taken from kwargs (analyzed_data_file, output_folder).
+    '''
+    analyzed_data_file = kwargs.get('analyzed_data_file')
+    if analyzed_data_file is None:
+        analyzed_data_file = os.path.splitext(raw_data_file)[0] + '_interpreted.h5'
+        if kwargs.get('output_folder') is not None:
+            analyzed_data_file = os.path.join(kwargs['output_folder'], os.path.basename(analyzed_data_file))
+    return {'raw_data_file': raw_data_file, 'analyzed_data_file': analyzed_data_file, 'status': 'failed', 'n_words': 0, 'n_hits': 0, 'duration': 0.0, 'throughput': 0.0, 'error': ''}
+
+
+def interpret_files(raw_data_files, n_jobs=1, memory_limit=None, summary_file=None, **kwargs):
+    ''' Interpreting the raw data files in a pool of worker processes (one file per process).
+
+    Parameters
+    ----------
+    raw_data_files : list
+        The filenames of the input raw data files. The files are processed in the given order (see get_raw_data_files()).
+    n_jobs : int
+        Number of worker processes. If None, the number of CPUs is used.
+    memory_limit : float
+        Memory limit (address space) for each worker process in MB. If None, the memory is not limited.
+    summary_file : string
+        If not None, write the summary to a CSV file.
+    kwargs
+        Parameters of interpret_file().
+
+    Returns
+    -------
+    list
+        Summary for each file (see summary_fields), in the order of the raw data files.
+    '''
+    if n_jobs is None:
+        n_jobs = multiprocessing.cpu_count()
+    if n_jobs < 1:
+        raise ValueError('Number of jobs must be larger than 0.')
+    logger.info('Interpreting %d raw data files using %d worker processes...' % (len(raw_data_files), n_jobs))
+    context = multiprocessing.get_context('spawn')  # forking is not safe after numba threads were started
+    pending_files = list(enumerate(raw_data_files))
+    jobs = {}  # Running worker processes (one process per file, the memory is released after each file)
+    summaries = {}
+    try:
+        while pending_files or jobs:
+            while pending_files and len(jobs) < n_jobs:
+                index, raw_data_file = pending_files.pop(0)
+                receiver, sender = context.Pipe(duplex=False)
+                process = context.Process(target=_interpret_file_job, args=(sender, raw_data_file, memory_limit, kwargs))
+                process.start()
+                sender.close()
+                jobs[index] = (raw_data_file, process, receiver)
+            multiprocessing.connection.wait([receiver for _, _, receiver in jobs.values()] + [process.sentinel for _, process, _ in jobs.values()])
+            for index, (raw_data_file, process, receiver) in list(jobs.items()):
+                if receiver.poll():
+                    try:
+                        summary = receiver.recv()
+                    except EOFError:  # Worker process died
+                        summary = None
+                elif not process.is_alive():
+                    summary = None
+                else:
+                    continue
+                process.join()
+                receiver.close()
+                del jobs[index]
+                if summary is None:
+                    summary = dict(get_summary(raw_data_file, kwargs), error='Worker process terminated with exit code %s' % process.exitcode)
+                logger.info('%s: %s (%.1f s, %.2f MWords/s)%s' % (summary['raw_data_file'], summary['status'], summary['duration'], summary['throughput'], ' ' + summary['error'] if summary['error'] else ''))
+                summaries[index] = summary
+    finally:
+        for _, process, _ in jobs.values():
+            process.terminate()
+    summaries = [summaries[index] for index in range(len(raw_data_files))]
+
+    write_summary(summaries, summary_file)
+    return summaries
+
+
+def write_summary(summaries, summary_file=None):
+    ''' Logging the failed files and writing the summaries to a CSV file.
+
+    Parameters
+    ----------
+    summaries : list
+        Summary for each file (see summary_fields).
+    summary_file : string
+        If not None, write the summary to a CSV file.
+    '''
+    n_failed = sum(summary['status'] != 'ok' for summary in summaries)
+    logger.info('Interpreted %d raw data files (%d failed)' % (len(summaries), n_failed))
+    for summary in summaries:
+        if summary['status'] != 'ok':
+            logger.error('Failed: %s (%s)' % (summary['raw_data_file'], summary['error']))
+    if summary_file is not None:
+        with open(summary_file, 'w') as f:
+            writer = csv.DictWriter(f, fieldnames=summary_fields, extrasaction='ignore')
+            writer.writeheader()
+            writer.writerows(summaries)
+
+
+def add_interpreter_arguments(parser):
+    ''' Adding the command line arguments of the DataInterpreter settings to the parser (see get_interpreter_kwargs()).
+    '''
+    parser.add_argument('--header-ids', type=int, nargs='+', default=None, help='Mimosa26 header IDs to interpret')
+    parser.add_argument('--timing-offset', type=_timing_offset, default=None, help="Timing offset between Mimosa26 and R/O system clock ('auto': calibrate for each file)")
+    parser.add_argument('--add-missing-events', action='store_true', help='Add missing events (due to missing trigger words)')
+    parser.add_argument('--chunk-size', type=int, default=1000000, help='Number of raw data words which are interpreted at once')
+    parser.add_argument('--multithreading', action='store_true', help='Interpret the Mimosa26 planes in parallel threads')
+    parser.add_argument('--create-pdf', action='store_true', help='Create a PDF with plots for each file')
+    parser.add_argument('--checkpoint-interval', type=int, default=None, help='Store a checkpoint every N chunks')
+    parser.add_argument('--decoded-data-cache', action='store_true', help='Build the events from a cache of the decoded data (<raw data file>_decoded.h5), the cache is created if needed')
+
+
+def _timing_offset(value):
+    return value if value == 'auto' else int(value)
+
+
+def get_interpreter_kwargs(args):
+    ''' Returning the DataInterpreter settings from the parsed command line arguments (see add_interpreter_arguments()).
+    '''
+    return dict(
+        analyze_m26_header_ids=args.header_ids,
+        timing_offset=args.timing_offset,
+        add_missing_events=args.add_missing_events,
+        chunk_size=args.chunk_size,
+        multithreading=args.multithreading,
+        create_pdf=args.create_pdf,
+        checkpoint_interval=args.checkpoint_interval,
+        decoded_data_cache=args.decoded_data_cache)
+
+
+def main(args=None):
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - [%(levelname)-8s] (%(threadName)-10s) %(message)s")
+    parser = argparse.ArgumentParser(description='Interpret Mimosa26 raw data files recorded with pymosa.')
+    parser.add_argument('files', nargs='*', help='Raw data files or glob patterns')
+    parser.add_argument('-l', '--file-list', action='append', help='Text file with raw data files (one per line)')
+    parser.add_argument('-j', '--jobs', type=int, default=1, help='Number of files interpreted in parallel (default: 1)')
+    parser.add_argument('--memory-limit', type=float, default=None, help='Memory limit for each worker process in MB')
+    parser.add_argument('-o', '--output-folder', default=None, help='Folder of the output files (default: folder of the raw data file)')
+    parser.add_argument('-s', '--summary', default=None, help='Write the summary to a CSV file')
+    parser.add_argument('--resume', action='store_true', help='Resume from the last checkpoint in the output file')
+    add_interpreter_arguments(parser)
+    args = parser.parse_args(args)
+
+    raw_data_files = get_raw_data_files(args.files, args.file_list)
+    if not raw_data_files:
+        parser.error('No raw data files given')
+    if args.output_folder is not None and not os.path.isdir(args.output_folder):
+        os.makedirs(args.output_folder)
+    summaries = interpret_files(
+        raw_data_files=raw_data_files,
+        n_jobs=args.jobs,
+        memory_limit=args.memory_limit,
+        summary_file=args.summary,
+        output_folder=args.output_folder,
+        resume=args.resume,
+        **get_interpreter_kwargs(args))
+    return 1 if any(summary['status'] != 'ok' for summary in summaries) else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
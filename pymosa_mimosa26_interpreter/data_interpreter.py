@@ -4,7 +4,15 @@
 from __future__ import division
 
 import os
+import sys
+import contextlib
 import logging
+import multiprocessing
+import shutil
+import tempfile
+import time
+import threading
+import queue
 
 import numpy as np
 import tables as tb
@@ -16,10 +24,22 @@ except ImportError:
     pass
 
 from pymosa_mimosa26_interpreter import raw_data_interpreter
+from pymosa_mimosa26_interpreter import parallel_interpreter
+from pymosa_mimosa26_interpreter import raw_data_index
+from pymosa_mimosa26_interpreter import decoded_data_cache
+from pymosa_mimosa26_interpreter import event_index
+from pymosa_mimosa26_interpreter import plane_hits
+from pymosa_mimosa26_interpreter import timing_calibration
 try:
     from pymosa_mimosa26_interpreter import plotting
 except ImportError:
     pass
+try:
+    import h5py  # Reading the raw data file in SWMR mode (see DataInterpreter.follow_word_table())
+except ImportError:
+    h5py = None
+
+timing_offset_sweep_dtype = [('timing_offset', np.int64), ('n_events', np.int64), ('n_hits', np.int64), ('hits_per_event', np.float64), ('empty_events', np.float64), ('correlation', np.float64)]
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - [%(levelname)-8s] (%(threadName)-10s) %(message)s")
 
@@ -28,7 +48,7 @@ class DataInterpreter(object):
     ''' Class to provide an easy to use interface to encapsulate the interpretation and event building process.
     '''
 
-    def __init__(self, raw_data_file, analyzed_data_file=None, analyze_m26_header_ids=None, trigger_data_format=2, add_missing_events=False, timing_offset=None, pure_python=False, create_pdf=False, chunk_size=1000000):
+    def __init__(self, raw_data_file, analyzed_data_file=None, analyze_m26_header_ids=None, trigger_data_format=2, add_missing_events=False, timing_offset=None, pure_python=False, create_pdf=False, chunk_size=1000000, n_workers=1, multithreading=False, prefetch_depth=0, checkpoint_interval=None, decoded_data_cache=False, hits_format=None, filters=None, chunkshape=None, expected_rows=None, blosc_threads=None, flush_interval=1):
         '''
         Parameters
         ----------
@@ -50,13 +70,48 @@ class DataInterpreter(object):
             If True, add (silently) missing events (due to missing trigger words). Default is False.
         timing_offset : int
             Offset between Mimosa26 40 MHz clock and 40 MHz from R/O system. If None, use default value which was obtained
-            by maximizing correlation between Mimosa26 telescope and time reference.
+            by maximizing correlation between Mimosa26 telescope and time reference. If 'auto', the timing offset is obtained from the
+            beginning of the raw data file before the interpretation (see calibrate_timing_offset()).
         pure_python : bool
             If True, disable JIT compiler. The (n)jit decorator act as if it performs no operation.
         create_pdf : bool
             If True, create PDF containing several ouput plots.
         chunk_size : integer
             Chunk size of the data when reading from file. The larger the chunk size, the more RAM is consumed.
+        n_workers : integer
+            Number of worker processes. If larger than 1, the raw data is split into segments which are interpreted in parallel.
+            The result is identical to the interpretation with a single process. If None, the number of CPUs is used.
+        multithreading : bool
+            If True, the raw data words of the Mimosa26 planes are interpreted in parallel threads. The result is identical to the single-threaded interpretation.
+        prefetch_depth : integer
+            If larger than 0, reading the raw data, interpreting the raw data and writing the hits is pipelined: a reader thread reads up to prefetch_depth chunks
+            in advance and a writer thread writes the hits of up to prefetch_depth chunks to the output file while the actual chunk is interpreted.
+            The threads are blocked when the queues are full, at most 2 * prefetch_depth + 1 chunks are held in memory. Only used if n_workers is 1.
+        checkpoint_interval : integer
+            If not None, a checkpoint (interpreter state, histograms and position in the raw data) is stored in the output file every checkpoint_interval chunks.
+            An interrupted interpretation can be resumed from the last checkpoint with interpret_word_table(resume=True).
+            Only supported for n_workers = 1 and prefetch_depth = 0.
+        decoded_data_cache : bool
+            If True, the decoded telescope data and trigger data is stored in a cache file (<raw data file>_decoded.h5) and the events are built from the cache
+            (see decoded_data_cache). The cache is created if it is missing or outdated. The events can be built again with a different timing offset or
+            add_missing_events without decoding the raw data again. Only supported for n_workers = 1, prefetch_depth = 0 and without checkpoints.
+        hits_format : string, list or np.dtype
+            The columns and types of the hit table (see raw_data_interpreter.get_hits_dtype()), e.g., 'compact' or a list of column names.
+            Only the selected columns are written. The error histogram (create_error_hist) requires the column event_status.
+        filters : tables.Filters
+            The compression of the output tables and histograms, e.g., tb.Filters(complib='blosc:lz4', complevel=1, shuffle=True) or complib='blosc:zstd'.
+            If None, Blosc (blosclz) with compression level 5 is used.
+        chunkshape : integer
+            The number of hits per HDF5 chunk of the hit table. If None, the chunk shape is chosen by PyTables from the expected number of hits (expected_rows).
+        expected_rows : integer
+            The expected number of hits, used by PyTables to choose the chunk shape and the B-tree size of the hit table and the plane hit files.
+            If None, the number of hits is estimated from the number of raw data words (one hit per raw data word).
+        blosc_threads : integer
+            The number of threads which are used by Blosc for compressing the output (tables.set_blosc_max_threads()) during the interpretation.
+            If None, the number of threads is not changed.
+        flush_interval : integer
+            The hit table and the other hit outputs (event table, event index and plane hit files) are flushed every flush_interval appended hit chunks.
+            The outputs are always flushed before storing a checkpoint and when the interpretation is finished.
         '''
         # Activate pure python mode by setting the environment variable NUMBA_DISABLE_JIT
         if pure_python:
@@ -97,23 +152,70 @@ class DataInterpreter(object):
         for plane_index, plane_id in enumerate(self.analyze_m26_header_ids):
             self.plane_id_to_index[plane_id] = plane_index
         logging.info('Interpreting Mimosa26 planes with header IDs: %s' % ', '.join([str(id) for id in self.analyze_m26_header_ids]))
-        self.interpreter = raw_data_interpreter.RawDataInterpreter(analyze_m26_header_ids=self.analyze_m26_header_ids)
+        self.interpreter = raw_data_interpreter.RawDataInterpreter(analyze_m26_header_ids=self.analyze_m26_header_ids, hits_format=hits_format)
         if add_missing_events is not None:
             self.interpreter.add_missing_events = add_missing_events
-        if timing_offset is not None:
+        if timing_offset is not None and timing_offset != 'auto':
             self.interpreter.timing_offset = timing_offset
+        self.interpreter.multithreading = multithreading
 
         # Std. settings
         self.chunk_size = chunk_size
+        if n_workers is None:
+            n_workers = multiprocessing.cpu_count()
+        if n_workers < 1:
+            raise ValueError('Number of workers must be larger than 0.')
+        self.n_workers = n_workers
+        self.n_segment_reruns = 0  # Number of segments which were interpreted again since the interpreter state did not match after the warm-up (see parallel_interpreter)
+        if prefetch_depth < 0:
+            raise ValueError('Prefetch depth must not be negative.')
+        self.prefetch_depth = prefetch_depth
+        if checkpoint_interval is not None:
+            if checkpoint_interval < 1:
+                raise ValueError('Checkpoint interval must be larger than 0.')
+            if self.n_workers > 1 or self.prefetch_depth > 0:
+                raise ValueError('Checkpoints are only supported for n_workers = 1 and prefetch_depth = 0.')
+        self.checkpoint_interval = checkpoint_interval
+        if decoded_data_cache and (self.n_workers > 1 or self.prefetch_depth > 0 or self.checkpoint_interval is not None):
+            raise ValueError('The decoded data cache is only supported for n_workers = 1, prefetch_depth = 0 and without checkpoints.')
+        self.decoded_data_cache = decoded_data_cache
+        # Write path of the output file (see _create_output())
+        self.filters = filters if filters is not None else tb.Filters(complib='blosc', complevel=5, fletcher32=False)
+        self.chunkshape = chunkshape
+        if expected_rows is not None and expected_rows < 1:
+            raise ValueError('Expected number of rows must be larger than 0.')
+        self.expected_rows = expected_rows
+        if blosc_threads is not None and blosc_threads < 1:
+            raise ValueError('Number of Blosc threads must be larger than 0.')
+        self.blosc_threads = blosc_threads
+        if flush_interval < 1:
+            raise ValueError('Flush interval must be larger than 0.')
+        self.flush_interval = flush_interval
+        self._n_hit_appends = 0  # Number of appended hit chunks, used for flushing the outputs every flush_interval appends (see _append_hits())
+        # Output arrays which are reused for each raw data chunk if the hits are written and histogrammed in the calling thread (see _interpret_chunk())
+        self._hits_buffer = np.zeros(shape=0, dtype=self.interpreter.hits_dtype)
+        self._telescope_data_buffer = np.zeros(shape=0, dtype=raw_data_interpreter.telescope_data_dtype)
+        self._event_table = None  # Event table of the output file, the hit rows refer to the hit table (see _create_output())
+        self._event_index = None  # Writer of the event index of the hit table (see event_index.EventIndexWriter)
+        self._plane_hits_writer = None  # Writer of the plane hit files (see _open_plane_hit_files())
+        self.plane_hit_files = None  # Filenames of the plane hit files (see create_plane_hit_files), if None: <analyzed data file>_header_id_<header ID>.h5
+        self._start_index = 0  # Raw data word index of the first chunk (see seek())
+        self._start_event_number = None  # Hits of earlier events are discarded (see seek())
+        self._stop_event_number = None  # Hits of this and later events are discarded, the interpretation stops when all earlier events are built (see select_range())
         if trigger_data_format != 2:
             raise ValueError('Trigger data format different than 2 is not yet supported. For event building a trigger timestamp is required!')
 
         self.set_standard_settings()
+        if timing_offset == 'auto':
+            self.calibrate_timing_offset()
 
     def set_standard_settings(self):
         self.create_occupancy_hist = False
         self.create_error_hist = False
         self.create_hit_table = True
+        self.create_event_table = False
+        self.create_event_index = False
+        self.create_plane_hit_files = False
 
     @property
     def create_occupancy_hist(self):
@@ -139,104 +241,1178 @@ class DataInterpreter(object):
     def create_hit_table(self, value):
         self._create_hit_table = bool(value)
 
+    @property
+    def create_event_table(self):
+        return self._create_event_table
+
+    @create_event_table.setter
+    def create_event_table(self, value):
+        self._create_event_table = bool(value)
+
+    @property
+    def create_event_index(self):
+        return self._create_event_index
+
+    @create_event_index.setter
+    def create_event_index(self, value):
+        self._create_event_index = bool(value)
+
+    @property
+    def create_plane_hit_files(self):
+        ''' If True, the hits of each plane are written to a separate file (plane_hit_files) in the hit format of the test beam analysis
+        while interpreting the raw data (see plane_hits). The plane hit files do not require the hit table (create_hit_table).
+        '''
+        return self._create_plane_hit_files
+
+    @create_plane_hit_files.setter
+    def create_plane_hit_files(self, value):
+        self._create_plane_hit_files = bool(value)
+
     def __enter__(self):
         return self
 
     def __exit__(self, *exc_info):
         return self
 
-    def interpret_word_table(self):
+    def interpret_word_table(self, resume=False):
+        ''' Interpreting the raw data file and storing the hits and histograms in the output file.
+
+        Parameters
+        ----------
+        resume : bool
+            If True, resume the interpretation from the last checkpoint in the output file (see checkpoint_interval).
+            If the output file has no checkpoint, the interpretation starts from the beginning.
+        '''
+        if resume and (self.n_workers > 1 or self.prefetch_depth > 0):
+            raise ValueError('Resuming is only supported for n_workers = 1 and prefetch_depth = 0.')
+        if resume and self._start_event_number is not None:
+            raise ValueError('Resuming is not supported after seek().')
+        if self.decoded_data_cache and (self._start_index > 0 or self._start_event_number is not None or self._stop_event_number is not None):
+            raise ValueError('The decoded data cache is not supported after seek() and select_range().')
+        resume = resume and self._has_checkpoint()
         logging.info('Opening raw data file %s...' % self.raw_data_file)
         with tb.open_file(self.raw_data_file, 'r') as in_file_h5:
-            logging.info('Creating analyzed data file %s...' % self.analyzed_data_file)
-            with tb.open_file(self.analyzed_data_file, 'w') as out_file_h5:
-                if self.create_hit_table:
-                    hit_table = out_file_h5.create_table(
-                        where=out_file_h5.root,
-                        name='Hits',
-                        description=raw_data_interpreter.hits_dtype,
-                        title='hit_data',
-                        filters=tb.Filters(
-                            complib='blosc',
-                            complevel=5,
-                            fletcher32=False))
-
-                if self.create_occupancy_hist:
-                    occupancy_hist = np.zeros(shape=(len(self.analyze_m26_header_ids), 1152, 576), dtype=np.int32)  # for each plane
-
-                if self.create_error_hist:
-                    event_status_hist = np.zeros(shape=(len(self.analyze_m26_header_ids), 32), dtype=np.int32)  # for TLU and each plane
+            logging.info('%s analyzed data file %s...' % ('Opening' if resume else 'Creating', self.analyzed_data_file))
+            with tb.open_file(self.analyzed_data_file, 'a' if resume else 'w') as out_file_h5, self._set_blosc_threads(), self._open_plane_hit_files(resume=resume, n_words=in_file_h5.root.raw_data.shape[0] - self._start_index):
+                if resume:
+                    hit_table, occupancy_hist, event_status_hist, start_index = self._load_checkpoint(out_file_h5)
+                    logging.info('Resuming from checkpoint at raw data word %d' % start_index)
+                else:
+                    hit_table, occupancy_hist, event_status_hist = self._create_output(out_file_h5, n_words=in_file_h5.root.raw_data.shape[0] - self._start_index)
+                    start_index = self._start_index
 
                 logging.info("Interpreting raw data...")
-                pbar = tqdm(total=in_file_h5.root.raw_data.shape[0], ncols=80)
-                for i in range(0, in_file_h5.root.raw_data.shape[0], self.chunk_size):  # Loop over all words in the actual raw data file in chunks
-                    raw_data_chunk = in_file_h5.root.raw_data.read(i, i + self.chunk_size)
-                    hits, telescope_data = self.interpreter.interpret_raw_data(raw_data=raw_data_chunk)
-                    if self.create_hit_table:
-                        hit_table.append(hits)
+                if self.n_workers > 1:
+                    self._interpret_segments(in_file_h5=in_file_h5, hit_table=hit_table, occupancy_hist=occupancy_hist, event_status_hist=event_status_hist)
+                elif self.prefetch_depth > 0:
+                    self._interpret_pipelined(in_file_h5=in_file_h5, hit_table=hit_table, occupancy_hist=occupancy_hist, event_status_hist=event_status_hist)
+                elif self.decoded_data_cache:
+                    if not self._interpret_decoded_data_cache(hit_table=hit_table, occupancy_hist=occupancy_hist, event_status_hist=event_status_hist):
+                        self._interpret_raw_data_words(in_file_h5=in_file_h5, out_file_h5=out_file_h5, start_index=start_index, hit_table=hit_table, occupancy_hist=occupancy_hist, event_status_hist=event_status_hist)
+                elif hit_table is None and self._plane_hits_writer is None and event_status_hist is None and self.checkpoint_interval is None and start_index == 0 and self._stop_event_number is None:
+                    self._decode_only(in_file_h5=in_file_h5, occupancy_hist=occupancy_hist)
+                else:
+                    self._interpret_raw_data_words(in_file_h5=in_file_h5, out_file_h5=out_file_h5, start_index=start_index, hit_table=hit_table, occupancy_hist=occupancy_hist, event_status_hist=event_status_hist)
+
+                self._close_event_index(hit_table)
+                self._store_histograms(out_file_h5, occupancy_hist, event_status_hist)
+
+    def _interpret_raw_data_words(self, in_file_h5, out_file_h5, start_index, hit_table, occupancy_hist, event_status_hist):
+        ''' Interpreting the raw data words chunk by chunk starting at start_index and filling the outputs.
+        '''
+        pbar = tqdm(total=in_file_h5.root.raw_data.shape[0], initial=start_index, ncols=80)
+        for chunk_index, i in enumerate(range(start_index, in_file_h5.root.raw_data.shape[0], self.chunk_size)):  # Loop over all words in the actual raw data file in chunks
+            raw_data_chunk = in_file_h5.root.raw_data.read(i, i + self.chunk_size)
+            self._interpret_chunk(raw_data_chunk, hit_table, occupancy_hist, event_status_hist)
+            if self.checkpoint_interval is not None and (chunk_index + 1) % self.checkpoint_interval == 0:
+                self._store_checkpoint(out_file_h5, i + raw_data_chunk.shape[0], hit_table, occupancy_hist, event_status_hist)
+            pbar.update(raw_data_chunk.shape[0])
+            if self._is_range_finished():
+                break
+        pbar.close()
+
+        # get last incomplete events
+        self._interpret_chunk(None, hit_table, occupancy_hist, event_status_hist)
+        self._remove_checkpoint(out_file_h5)
+
+    def calibrate_timing_offset(self, n_words=2000000, timing_offset_range=(-raw_data_interpreter.FRAME_UNIT_CYCLE, raw_data_interpreter.FRAME_UNIT_CYCLE)):
+        ''' Obtaining the timing offset from the first raw data words of the raw data file (see timing_calibration.calibrate_timing_offset())
+        and using it for the interpretation. The timing offset is not changed if the readout window of the triggers is not found.
+        Has to be called before seek() and select_range().
+
+        Parameters
+        ----------
+        n_words : int
+            Number of raw data words which are used for the calibration.
+        timing_offset_range : tuple
+            Range of the timing offsets (min, max).
+
+        Returns
+        -------
+        timing_offset : int
+            The timing offset which is used for the interpretation.
+        '''
+        if self._start_event_number is not None or self._stop_event_number is not None:
+            raise ValueError('The timing offset has to be calibrated before seek() and select_range().')
+        logging.info('Calibrating timing offset with %d raw data words...' % n_words)
+        with tb.open_file(self.raw_data_file, 'r') as in_file_h5:
+            timing_offset = timing_calibration.calibrate_timing_offset(raw_data=in_file_h5.root.raw_data.read(0, n_words), analyze_m26_header_ids=self.analyze_m26_header_ids, timing_offset_range=timing_offset_range, chunk_size=self.chunk_size)
+        if timing_offset is not None:
+            self.interpreter.timing_offset = timing_offset
+        else:
+            logging.warning('Using timing offset %d' % self.interpreter.timing_offset)
+        return self.interpreter.timing_offset
+
+    def sweep_timing_offsets(self, timing_offsets, create_hit_tables=False, max_distance=5):
+        ''' Interpreting the raw data for several timing offsets in one pass to find the best timing offset.
+        The raw data is decoded once and the events are built for each timing offset (see RawDataInterpreter.interpret_raw_data_timing_offsets()).
+        For each timing offset a summary is created: the number of hits per event, the fraction of events without hits and the correlation of the
+        hits of neighbouring planes (fraction of events with hits in neighbouring planes which differ by at most max_distance columns and rows,
+        averaged over all neighbouring planes). The correct timing offset has the largest correlation.
+
+        Parameters
+        ----------
+        timing_offsets : list
+            The timing offsets.
+        create_hit_tables : bool
+            If True, the hits of each timing offset are stored in the output file (tables Hits_0, Hits_1, ... in the order of the timing offsets)
+            together with the summary (table TimingOffsetSweep).
+        max_distance : int
+            Maximum column and row difference of correlated hits in neighbouring planes.
+
+        Returns
+        -------
+        summary : np.array
+            Array with the summary (timing_offset_sweep_dtype) for each timing offset.
+        '''
+        timing_offsets = [int(timing_offset) for timing_offset in timing_offsets]
+        if not timing_offsets or len(set(timing_offsets)) != len(timing_offsets):
+            raise ValueError('Timing offsets must be unique and at least one timing offset must be given.')
+        if self.n_workers > 1:
+            raise ValueError('The timing offset sweep is only supported for n_workers = 1.')
+        if 'column' not in self.interpreter.hits_dtype.names or 'row' not in self.interpreter.hits_dtype.names:
+            raise ValueError('The timing offset sweep requires the columns column and row in the hit format.')
+        n_hits = np.zeros(shape=len(timing_offsets), dtype=np.int64)
+        n_events_with_hits = np.zeros(shape=len(timing_offsets), dtype=np.int64)
+        correlation_hist = np.zeros(shape=(len(timing_offsets), max(len(self.analyze_m26_header_ids) - 1, 0)), dtype=np.int64)
+
+        def interpret_chunk(raw_data_chunk, hit_tables):
+            hits, _ = self.interpreter.interpret_raw_data_timing_offsets(timing_offsets=timing_offsets, raw_data=raw_data_chunk, build_all_events=raw_data_chunk is None)
+            for index, timing_offset_hits in enumerate(hits):
+                timing_offset_hits = self._select_events(timing_offset_hits)
+                n_hits[index] += timing_offset_hits.shape[0]
+                n_events_with_hits[index] += fill_correlation_hist(correlation_hist[index], timing_offset_hits, self.plane_id_to_index, max_distance)
+                if hit_tables:
+                    hit_tables[index].append(timing_offset_hits)
+            if hit_tables:  # The hit tables are flushed every flush_interval chunks (see _append_hits())
+                self._n_hit_appends += 1
+                if self._n_hit_appends % self.flush_interval == 0:
+                    for hit_table in hit_tables:
                         hit_table.flush()
-                    if self.create_occupancy_hist:
-                        # Use pure telescope data to create occupancy histograms (hits are data corresponding to events and do not correspond to pure data from Mimosa26)
-                        fill_occupancy_hist(occupancy_hist, telescope_data, self.plane_id_to_index)
-                    if self.create_error_hist:
-                        fill_event_status_hist(event_status_hist, hits, self.plane_id_to_index)
+
+        out_file_h5 = tb.open_file(self.analyzed_data_file, 'w') if create_hit_tables else None
+        try:
+            if out_file_h5 is not None:
+                logging.info('Creating analyzed data file %s...' % self.analyzed_data_file)
+                hit_tables = [out_file_h5.create_table(
+                    where=out_file_h5.root,
+                    name='Hits_%d' % index,
+                    description=self.interpreter.hits_dtype,
+                    title='hit_data timing_offset=%d' % timing_offset,
+                    filters=self.filters) for index, timing_offset in enumerate(timing_offsets)]
+            else:
+                hit_tables = None
+            logging.info('Interpreting raw data for %d timing offsets...' % len(timing_offsets))
+            with tb.open_file(self.raw_data_file, 'r') as in_file_h5:
+                pbar = tqdm(total=in_file_h5.root.raw_data.shape[0], initial=self._start_index, ncols=80)
+                for i in range(self._start_index, in_file_h5.root.raw_data.shape[0], self.chunk_size):  # Loop over all words in the actual raw data file in chunks
+                    raw_data_chunk = in_file_h5.root.raw_data.read(i, i + self.chunk_size)
+                    interpret_chunk(raw_data_chunk, hit_tables)
                     pbar.update(raw_data_chunk.shape[0])
+                    if self._is_range_finished():
+                        break
                 pbar.close()
+            # get last incomplete events
+            interpret_chunk(None, hit_tables)
 
-                # get last incomplete events
-                hits, _ = self.interpreter.interpret_raw_data(raw_data=None, build_all_events=True)
-                if self.create_hit_table:
-                    hit_table.append(hits)
-                    hit_table.flush()
-                if self.create_error_hist:
-                    fill_event_status_hist(event_status_hist, hits, self.plane_id_to_index)
+            # Every trigger is an event
+            n_events = self.interpreter.event_number + 1
+            if self._stop_event_number is not None:
+                n_events = min(n_events, self._stop_event_number)
+            n_events -= self._start_event_number or 0
+            summary = np.zeros(shape=len(timing_offsets), dtype=timing_offset_sweep_dtype)
+            summary['timing_offset'] = timing_offsets
+            summary['n_events'] = n_events
+            summary['n_hits'] = n_hits
+            with np.errstate(divide='ignore', invalid='ignore'):
+                summary['hits_per_event'] = n_hits / n_events
+                summary['empty_events'] = 1.0 - n_events_with_hits / n_events
+                summary['correlation'] = correlation_hist.mean(axis=1) / n_events if correlation_hist.shape[1] else np.nan
+            for row in summary:
+                logging.info('Timing offset %d: %.2f hits per event, %.1f%% empty events, correlation %.3f' % (row['timing_offset'], row['hits_per_event'], row['empty_events'] * 100.0, row['correlation']))
+            if out_file_h5 is not None:
+                out_file_h5.create_table(
+                    where=out_file_h5.root,
+                    name='TimingOffsetSweep',
+                    obj=summary,
+                    title='Timing offset sweep')
+        finally:
+            if out_file_h5 is not None:
+                out_file_h5.close()
+        return summary
+
+    def follow_word_table(self, poll_interval=1.0, timeout=60.0, stop_event=None):
+        ''' Interpreting the raw data file while it is still written by the DAQ (follow mode).
+        The newly appended raw data words are interpreted periodically. The hits are appended to the output file incrementally.
+        The interpreter state is kept between the polls. Only complete raw data chunks (chunk_size) are interpreted while the run is ongoing,
+        the remaining raw data words are interpreted when the run has ended. Thus, the output is identical to interpret_word_table() with the same chunk_size.
+        When the run has ended, the remaining events are built (build_all_events) and the histograms are stored.
 
-                # Add histograms to data file and create plots
-                for plane_index, plane in enumerate(self.analyze_m26_header_ids):
-                    # store occupancy map for all Mimosa26 planes
-                    logging.info('Storing histograms %sfor Mimosa26 plane with header ID %d.' % ('and creating plots ' if self.output_pdf else '', plane))
+        Note: The raw data file is read with h5py in SWMR mode (single writer multiple reader, HDF5 >= 1.10). The DAQ has to write the raw data file
+        in SWMR mode (file created with libver='latest' and SWMR writing enabled after creating the raw_data array). The HDF5 file locking prevents
+        reading a raw data file which is written without SWMR, IOError is raised if the raw data file cannot be opened within timeout seconds.
 
-                    if self.create_occupancy_hist:
-                        out_file_h5.create_carray(
-                            where=out_file_h5.root,
-                            name='HistOcc_plane%d' % plane,
+        Parameters
+        ----------
+        poll_interval : float
+            Time in seconds between checking the raw data file for new raw data words.
+        timeout : float
+            The run is considered to have ended if no new raw data words were appended for timeout seconds.
+        stop_event : threading.Event
+            If given, the run has ended when the event is set (and all raw data words are interpreted).
+        '''
+        if h5py is None:
+            raise ImportError('The follow mode requires h5py for reading the raw data file in SWMR mode.')
+        logging.info('Creating analyzed data file %s...' % self.analyzed_data_file)
+        with tb.open_file(self.analyzed_data_file, 'w') as out_file_h5, self._set_blosc_threads(), self._open_plane_hit_files():
+            hit_table, occupancy_hist, event_status_hist = self._create_output(out_file_h5)
+
+            logging.info('Following raw data file %s...' % self.raw_data_file)
+            in_file_h5 = None
+            try:
+                index = self._start_index  # Index of the next raw data word
+                n_words_total = 0  # Size of the raw data array
+                last_data_time = time.time()
+                while True:
+                    if in_file_h5 is None:
+                        in_file_h5 = self._open_swmr(raise_error=time.time() - last_data_time > timeout)
+                    if in_file_h5 is None:
+                        n_words = 0
+                    else:
+                        n_words, size = self._interpret_appended_words(in_file_h5['raw_data'], index, hit_table, occupancy_hist, event_status_hist)
+                        if size > n_words_total:
+                            n_words_total = size
+                            last_data_time = time.time()
+                    index += n_words
+                    if n_words:
+                        logging.info('Interpreted %d raw data words (%d in total)' % (n_words, index))
+                    elif in_file_h5 is not None and ((stop_event is not None and stop_event.is_set()) or time.time() - last_data_time > timeout):
+                        index += self._interpret_appended_words(in_file_h5['raw_data'], index, hit_table, occupancy_hist, event_status_hist, run_ended=True)[0]  # The incomplete last chunk
+                        break
+                    else:
+                        time.sleep(poll_interval)
+            finally:
+                if in_file_h5 is not None:
+                    in_file_h5.close()
+            logging.info('Run has ended, interpreted %d raw data words' % index)
+
+            # get last incomplete events
+            self._interpret_chunk(None, hit_table, occupancy_hist, event_status_hist)
+
+            self._close_event_index(hit_table)
+            self._store_histograms(out_file_h5, occupancy_hist, event_status_hist)
+
+    def _open_swmr(self, raise_error=False):
+        ''' Opening the raw data file in SWMR read mode. Returns None if the raw data file does not exist or cannot be opened (not yet created by the DAQ,
+        not yet written in SWMR mode or without raw data array). If raise_error is True, IOError is raised instead.
+        '''
+        try:
+            in_file_h5 = h5py.File(self.raw_data_file, 'r', libver='latest', swmr=True)
+        except (IOError, OSError) as e:
+            if raise_error:
+                raise IOError('Cannot open raw data file %s in SWMR mode, the DAQ has to write the raw data file in SWMR mode (%s)' % (self.raw_data_file, e))
+            return None
+        if 'raw_data' not in in_file_h5:
+            in_file_h5.close()
+            if raise_error:
+                raise IOError('Raw data file %s has no raw data array' % self.raw_data_file)
+            return None
+        return in_file_h5
+
+    def _interpret_appended_words(self, raw_data, index, hit_table, occupancy_hist, event_status_hist, run_ended=False):
+        ''' Interpreting the raw data words appended to the raw data array (h5py dataset opened in SWMR mode) starting at index.
+        The raw data words after the last complete raw data chunk are interpreted only if run_ended is True (same chunks as interpret_word_table()).
+        Returns the number of interpreted raw data words and the size of the raw data array.
+        '''
+        raw_data.refresh()  # Update the size of the raw data array (SWMR)
+        size = raw_data.shape[0]
+        n_words = size if run_ended else max(index, size - (size - index) % self.chunk_size)
+        for i in range(index, n_words, self.chunk_size):
+            raw_data_chunk = raw_data[i:min(n_words, i + self.chunk_size)]
+            self._interpret_chunk(raw_data_chunk, hit_table, occupancy_hist, event_status_hist)
+        return max(0, n_words - index), size
+
+    def seek(self, trigger_number=None, timestamp=None, event_number=None, index_file=None):
+        ''' Starting the interpretation at a trigger, without interpreting the raw data from the beginning.
+        The position of the trigger is taken from the seek index of the raw data file (see raw_data_index). If the index does not exist or is outdated, it is created.
+        The interpreter is warmed up in front of the chunk containing the trigger word and the interpreter state is corrected with the index.
+        The following interpretation (interpret_word_table(), iter_hits()) starts at this chunk, the hits of earlier events are discarded.
+        Thus, the hits are identical to the hits of the interpretation from the beginning (starting with the event of the trigger).
+
+        The interpreter state after the warm-up is checked with the index (see raw_data_index.check_state()), if the buffered triggers or hits
+        are not recovered, the warm-up is repeated from an earlier resync point.
+
+        Note: The occupancy histogram contains the hits of all Mimosa26 frames in the raw data, starting with the chunk containing the trigger word.
+        Seeking is not supported if add_missing_events is True: the missing triggers are only added if the trigger buffer is not empty
+        (see raw_data_interpreter.RawDataInterpreter), thus the event numbers depend on the event building of all earlier triggers.
+
+        Parameters
+        ----------
+        trigger_number : int
+            Start at the first trigger with a trigger number equal or larger than trigger_number (including the overflow carries of the 16 bit trigger number).
+        timestamp : int
+            Start at the first trigger with a trigger timestamp equal or larger than timestamp (in units of 40 MHz clock cycles, including the overflow carries).
+        event_number : int
+            Start at the first trigger with an event number equal or larger than event_number.
+        index_file : string
+            The filename of the index file. If None, the index is searched in the raw data file and the sidecar file (see raw_data_index.read_index()).
+
+        Returns
+        -------
+        int
+            Event number of the trigger.
+        '''
+        if self.n_workers > 1:
+            raise ValueError('Seeking is only supported for n_workers = 1.')
+        if self.interpreter.add_missing_events:
+            raise ValueError('Seeking is not supported if add_missing_events is True.')
+        trigger_index, frame_index = raw_data_index.get_index(self.raw_data_file, index_file=index_file, analyze_m26_header_ids=self.analyze_m26_header_ids)
+        trigger = raw_data_index.get_trigger(trigger_index, trigger_number=trigger_number, timestamp=timestamp, event_number=event_number)
+        self._seek_trigger(trigger_index, frame_index, trigger)
+        return self._start_event_number
+
+    def select_range(self, trigger_numbers=None, event_numbers=None, timestamps=None, index_file=None):
+        ''' Restricting the interpretation to a range of trigger numbers, event numbers or trigger timestamps.
+        The interpretation starts in front of the first trigger of the range (see seek()) and stops as soon as all events of the range are built.
+        Thus, the interpretation time scales with the size of the range (the index is created once for the whole raw data file, if it does not exist).
+        The hits are identical to the hits of the interpretation from the beginning within the range. The range selection is not supported if
+        add_missing_events is True (see seek()).
+
+        Parameters
+        ----------
+        trigger_numbers : tuple
+            Range (start, stop) of the trigger numbers (including the overflow carries), stop is excluded. Start or stop can be None (no limit).
+        event_numbers : tuple
+            Range (start, stop) of the event numbers.
+        timestamps : tuple
+            Range (start, stop) of the trigger timestamps (in units of 40 MHz clock cycles of the Mimosa26 timestamp, including the overflow carries).
+        index_file : string
+            The filename of the index file (see seek()).
+
+        Returns
+        -------
+        tuple
+            Range (start, stop) of the event numbers. Stop is None, if the range ends after the last trigger.
+        '''
+        if self.n_workers > 1:
+            raise ValueError('Range selection is only supported for n_workers = 1.')
+        if self.interpreter.add_missing_events:
+            raise ValueError('Range selection is not supported if add_missing_events is True.')
+        ranges = [(name, value) for name, value in (('trigger_number', trigger_numbers), ('event_number', event_numbers), ('timestamp', timestamps)) if value is not None]
+        if len(ranges) != 1:
+            raise ValueError('Either trigger_numbers, event_numbers or timestamps must be given.')
+        name, (start, stop) = ranges[0]
+        if start is not None and stop is not None and stop <= start:
+            raise ValueError('Empty range.')
+        trigger_index, frame_index = raw_data_index.get_index(self.raw_data_file, index_file=index_file, analyze_m26_header_ids=self.analyze_m26_header_ids)
+        if start is None:  # Start from the beginning
+            self.interpreter.set_state(raw_data_interpreter.RawDataInterpreter(analyze_m26_header_ids=self.analyze_m26_header_ids).get_state())
+            self._start_index = 0
+            self._start_event_number = None
+        else:
+            self._seek_trigger(trigger_index, frame_index, raw_data_index.get_trigger(trigger_index, **{name: start}))
+        self._stop_event_number = None
+        if stop is not None:
+            try:
+                self._stop_event_number = raw_data_index.get_trigger(trigger_index, **{name: stop})  # Without missing events, the event number is the index of the trigger
+            except ValueError:  # Range ends after the last trigger
+                pass
+        logging.info('Interpreting events %s to %s' % (self._start_event_number or 0, 'end' if self._stop_event_number is None else self._stop_event_number - 1))
+        return self._start_event_number or 0, self._stop_event_number
+
+    def _seek_trigger(self, trigger_index, frame_index, trigger):
+        ''' Warming up the interpreter in front of the chunk containing the trigger word (see seek()).
+        '''
+        start_index = int(trigger_index['word_index'][trigger] - trigger_index['word_index'][trigger] % self.chunk_size)  # same chunks as serial interpretation
+        n_triggers = parallel_interpreter.RESYNC_N_TRIGGERS
+        while True:
+            resync_index = raw_data_index.get_resync_index(trigger_index, frame_index, index=start_index, analyze_m26_header_ids=self.analyze_m26_header_ids, n_frames=parallel_interpreter.RESYNC_N_FRAMES, n_triggers=n_triggers)
+            resync_index -= resync_index % self.chunk_size
+            logging.info('Seeking trigger number %d at raw data word %d (warm-up from raw data word %d)...' % (trigger_index['trigger_number'][trigger], trigger_index['word_index'][trigger], resync_index))
+
+            # Warm-up: recover interpreter state, the data is discarded
+            self.interpreter.set_state(raw_data_interpreter.RawDataInterpreter(analyze_m26_header_ids=self.analyze_m26_header_ids).get_state())
+            with tb.open_file(self.raw_data_file, 'r') as in_file_h5:
+                for i in range(resync_index, start_index, self.chunk_size):
+                    self.interpreter.interpret_raw_data(raw_data=in_file_h5.root.raw_data.read(i, min(start_index, i + self.chunk_size)))
+            state = self.interpreter.get_state()
+            offsets = raw_data_index.get_state_offsets(state, trigger_index, frame_index, index=start_index, analyze_m26_header_ids=self.analyze_m26_header_ids)
+            state = parallel_interpreter.apply_state_offsets(state, offsets, self.plane_id_to_index)
+            # The buffered triggers and hits must be recovered by the warm-up, otherwise warming up again from an earlier resync point
+            if raw_data_index.check_state(state, trigger_index, frame_index, resync_index=resync_index, index=start_index, analyze_m26_header_ids=self.analyze_m26_header_ids, n_frames=parallel_interpreter.RESYNC_N_FRAMES):
+                break
+            n_triggers *= 2
+            logging.warning('Interpreter state mismatch after the warm-up, warming up again with %d trigger words...' % n_triggers)
+        self.interpreter.set_state(state)
+
+        self._start_index = start_index
+        self._start_event_number = trigger  # Without missing events, the event number is the index of the trigger
+
+    def _is_range_finished(self):
+        ''' Returns True if all events before the stop event (see select_range()) are built.
+        '''
+        if self._stop_event_number is None:
+            return False
+        if self.interpreter.trigger_data_index >= 0:  # Event number of the first event which is not yet built
+            next_event_number = self.interpreter.trigger_data[0]['event_number']
+        else:
+            next_event_number = self.interpreter.event_number + 1
+        return next_event_number >= self._stop_event_number
+
+    def _interpret_raw_data(self, raw_data, build_all_events=False, reuse_buffers=False, return_events=False):
+        ''' Interpreting a raw data chunk (see RawDataInterpreter.interpret_raw_data()). The hits of the events outside of the selected range (see seek() and select_range()) are discarded.
+        If reuse_buffers is True, the hits and the telescope data are written to output arrays which are reused for the next chunk, the results are only valid until the next call.
+        Returns the hits, the telescope data and the events (None if return_events is False).
+        '''
+        if reuse_buffers:
+            result = self.interpreter.interpret_raw_data(raw_data=raw_data, build_all_events=build_all_events, hits_out=self._hits_buffer, telescope_data_out=self._telescope_data_buffer, return_events=return_events)
+            self._hits_buffer = _get_output_buffer(self._hits_buffer, result[0].shape[0])
+            self._telescope_data_buffer = _get_output_buffer(self._telescope_data_buffer, result[1].shape[0])
+        else:
+            result = self.interpreter.interpret_raw_data(raw_data=raw_data, build_all_events=build_all_events, return_events=return_events)
+        if return_events:
+            hits, events = self._select_events(result[0], result[2])
+            return hits, result[1], events
+        return self._select_events(result[0]), result[1], None
+
+    def _select_events(self, hits, events=None):
+        ''' Returns the hits of the events inside of the selected range (see seek() and select_range()).
+        If events is given, the selected events are returned in addition. Their hit rows are shifted to refer to the selected hits.
+        '''
+        if self._start_event_number is not None and hits.shape[0] and hits[0]['event_number'] < self._start_event_number:
+            hits = hits[np.searchsorted(hits['event_number'], self._start_event_number):]
+        if self._stop_event_number is not None and hits.shape[0] and hits[-1]['event_number'] >= self._stop_event_number:
+            hits = hits[:np.searchsorted(hits['event_number'], self._stop_event_number)]
+        if events is None:
+            return hits
+        if self._start_event_number is not None and events.shape[0] and events[0]['event_number'] < self._start_event_number:
+            events = events[np.searchsorted(events['event_number'], self._start_event_number):]
+        if self._stop_event_number is not None and events.shape[0] and events[-1]['event_number'] >= self._stop_event_number:
+            events = events[:np.searchsorted(events['event_number'], self._stop_event_number)]
+        if events.shape[0] and events[0]['hit_start_row'] != 0:  # Hits of earlier events were discarded
+            n_discarded_hits = events[0]['hit_start_row']
+            events['hit_start_row'] -= n_discarded_hits
+            events['hit_stop_row'] -= n_discarded_hits
+        return hits, events
+
+    def _create_output(self, out_file_h5, n_words=None):
+        ''' Creating the hit table in the output file and the histograms. Returns None for the disabled outputs.
+        The event table and the event index are kept in _event_table and _event_index (None if disabled), they are written together with the hit table.
+        The number of raw data words (n_words) is used to estimate the number of hits if expected_rows is None, if unknown the PyTables default is used.
+        '''
+        if self.create_error_hist and 'event_status' not in self.interpreter.hits_dtype.names:
+            raise ValueError('The error histogram requires the column event_status in the hit format.')
+        if self.create_event_table and not self.create_hit_table:
+            raise ValueError('The event table requires the hit table (create_hit_table).')
+        if self.create_event_table and self.n_workers > 1:
+            raise ValueError('The event table is only supported for n_workers = 1.')
+        if self.create_event_index and not self.create_hit_table:
+            raise ValueError('The event index requires the hit table (create_hit_table).')
+        if self.create_hit_table:
+            hit_table = out_file_h5.create_table(
+                where=out_file_h5.root,
+                name='Hits',
+                description=self.interpreter.hits_dtype,
+                title='hit_data',
+                filters=self.filters,
+                expectedrows=self._get_expected_rows(n_words) or tb.parameters.EXPECTED_ROWS_TABLE,
+                chunkshape=self.chunkshape)
+        else:
+            hit_table = None
+
+        if self.create_event_table:
+            self._event_table = out_file_h5.create_table(
+                where=out_file_h5.root,
+                name='Events',
+                description=raw_data_interpreter.get_events_dtype(len(self.analyze_m26_header_ids)),
+                title='event_data',
+                filters=self.filters,
+                expectedrows=self._get_expected_events(n_words) or tb.parameters.EXPECTED_ROWS_TABLE)
+        else:
+            self._event_table = None
+
+        if self.create_event_index:
+            self._event_index = event_index.EventIndexWriter(out_file_h5.create_table(
+                where=out_file_h5.root,
+                name='EventIndex',
+                description=event_index.event_index_dtype,
+                title='event_index',
+                filters=self.filters,
+                expectedrows=self._get_expected_events(n_words) or tb.parameters.EXPECTED_ROWS_TABLE), start_event_number=self._start_event_number or 0)
+        else:
+            self._event_index = None
+
+        if self.create_occupancy_hist:
+            occupancy_hist = np.zeros(shape=(len(self.analyze_m26_header_ids), 1152, 576), dtype=np.int32)  # for each plane
+        else:
+            occupancy_hist = None
+
+        if self.create_error_hist:
+            event_status_hist = np.zeros(shape=(len(self.analyze_m26_header_ids), 32), dtype=np.int32)  # for TLU and each plane
+        else:
+            event_status_hist = None
+        return hit_table, occupancy_hist, event_status_hist
+
+    @contextlib.contextmanager
+    def _open_plane_hit_files(self, resume=False, n_words=None):
+        ''' Opening the plane hit files (see create_plane_hit_files) during the interpretation. The writer is kept in _plane_hits_writer (None if disabled).
+        If resume is True, the hits are appended to the existing files, the hits written after the checkpoint are removed by _load_checkpoint().
+        '''
+        if not self.create_plane_hit_files:
+            self._plane_hits_writer = None
+            yield
+            return
+        if not set(('plane', 'event_number', 'column', 'row')).issubset(self.interpreter.hits_dtype.names):
+            raise ValueError('The plane hit files require the columns plane, event_number, column and row in the hit format.')
+        filenames = self.plane_hit_files if self.plane_hit_files is not None else plane_hits.get_plane_hit_files(self.analyzed_data_file, self.analyze_m26_header_ids)
+        self._plane_hits_writer = plane_hits.PlaneHitsWriter(filenames, self.analyze_m26_header_ids, resume=resume, filters=self.filters, expected_rows=self._get_expected_events(n_words))
+        try:
+            yield
+        finally:
+            self._plane_hits_writer.close()
+
+    @contextlib.contextmanager
+    def _set_blosc_threads(self):
+        ''' Setting the number of Blosc threads (blosc_threads) during the interpretation, the previous number of threads is restored afterwards.
+        '''
+        if self.blosc_threads is None:
+            yield
+            return
+        previous_blosc_threads = tb.set_blosc_max_threads(self.blosc_threads)
+        try:
+            yield
+        finally:
+            tb.set_blosc_max_threads(previous_blosc_threads)
+
+    def _get_expected_rows(self, n_words=None):
+        ''' Returns the expected number of hits (expected_rows), estimated from the number of raw data words if not given. Returns None if unknown.
+        '''
+        if self.expected_rows is not None:
+            return self.expected_rows
+        if n_words:
+            return int(n_words)
+        return None
+
+    def _get_expected_events(self, n_words=None):
+        ''' Returns the expected number of events (rows of the event table and of the event index) and of hits of each plane:
+        the expected number of hits (see _get_expected_rows()) divided by the number of planes (a track has one hit in each plane). Returns None if unknown.
+        '''
+        expected_rows = self._get_expected_rows(n_words)
+        if expected_rows is None:
+            return None
+        return max(expected_rows // len(self.analyze_m26_header_ids), 1)
+
+    def _get_segment_expected_rows(self, n_words, start, stop):
+        ''' Returns the expected number of hits of the raw data segment from start to stop (see _get_expected_rows()).
+        '''
+        if self.expected_rows is not None:
+            return max(1, self.expected_rows * (stop - start) // max(n_words, 1))
+        return self._get_expected_rows(stop - start)
+
+    def _interpret_chunk(self, raw_data_chunk, hit_table, occupancy_hist, event_status_hist):
+        ''' Interpreting a raw data chunk and filling the outputs. If raw_data_chunk is None, all remaining events are built.
+        '''
+        hits, telescope_data, events = self._interpret_raw_data(raw_data=raw_data_chunk, build_all_events=raw_data_chunk is None, reuse_buffers=True, return_events=self._event_table is not None)
+        self._fill_output(hits, telescope_data, hit_table, occupancy_hist, event_status_hist, events=events)
+
+    def _interpret_decoded_data_cache(self, hit_table, occupancy_hist, event_status_hist):
+        ''' Building the events from the cache of the decoded data and filling the outputs (see decoded_data_cache). The cache is created if it is missing or outdated.
+        Returns False if the events cannot be built from the cache because of outdated hits, the outputs are cleared in this case.
+        '''
+        cache_file = decoded_data_cache.get_cache(self.raw_data_file, analyze_m26_header_ids=self.analyze_m26_header_ids, chunk_size=self.chunk_size, multithreading=self.interpreter.multithreading)
+        logging.info('Building events from decoded data cache %s...' % cache_file)
+        try:
+            for result in decoded_data_cache.build_events(cache_file, timing_offset=self.interpreter.timing_offset, add_missing_events=self.interpreter.add_missing_events, hits_format=self.interpreter.hits_dtype, return_events=self._event_table is not None):
+                self._fill_output(hits=result[0], telescope_data=result[1], hit_table=hit_table, occupancy_hist=occupancy_hist, event_status_hist=event_status_hist, events=result[2] if len(result) > 2 else None)
+        except decoded_data_cache.OutdatedHitsError as e:
+            logging.warning('%s Interpreting the raw data...' % e)
+            if hit_table is not None:
+                hit_table.truncate(0)
+            if self._event_table is not None:
+                self._event_table.truncate(0)
+            if self._event_index is not None:
+                self._event_index.index_table.truncate(0)
+                self._event_index = event_index.EventIndexWriter(self._event_index.index_table)
+            if self._plane_hits_writer is not None:
+                self._plane_hits_writer.truncate([0] * len(self.analyze_m26_header_ids))
+            if occupancy_hist is not None:
+                occupancy_hist[:] = 0
+            if event_status_hist is not None:
+                event_status_hist[:] = 0
+            return False
+        return True
+
+    def _decode_only(self, in_file_h5, occupancy_hist):
+        ''' Decoding the raw data without building the events (see raw_data_interpreter.Decoder), used if only the occupancy histograms
+        are created (e.g., noise runs).
+        '''
+        decoder = raw_data_interpreter.Decoder(analyze_m26_header_ids=self.analyze_m26_header_ids)
+        decoder.multithreading = self.interpreter.multithreading
+        pbar = tqdm(total=in_file_h5.root.raw_data.shape[0], ncols=80)
+        for i in list(range(0, in_file_h5.root.raw_data.shape[0], self.chunk_size)) + [None]:
+            raw_data_chunk = in_file_h5.root.raw_data.read(i, i + self.chunk_size) if i is not None else None  # Last chunk: finish the actual frames
+            decoded_data = decoder.decode(raw_data=raw_data_chunk, flush=raw_data_chunk is None, telescope_data_out=self._telescope_data_buffer)
+            self._telescope_data_buffer = _get_output_buffer(self._telescope_data_buffer, decoded_data.telescope_data.shape[0])
+            if occupancy_hist is not None:
+                fill_occupancy_hist(occupancy_hist, decoded_data.telescope_data, self.plane_id_to_index)
+            if raw_data_chunk is not None:
+                pbar.update(raw_data_chunk.shape[0])
+        pbar.close()
+        counters = decoder.get_counters()
+        logging.info('Decoded %d raw data words (%.1f MWords/s), %d hits and %d triggers' % (counters['n_words'], counters['words_per_second'] / 1e6, counters['n_hits'], counters['n_triggers']))
+
+    def _fill_output(self, hits, telescope_data, hit_table, occupancy_hist, event_status_hist, events=None):
+        ''' Appending the hits (and the events) to the output tables and filling the histograms.
+        '''
+        if hit_table is not None or self._plane_hits_writer is not None:
+            self._append_hits(hits, hit_table, events)
+        if occupancy_hist is not None:
+            # Use pure telescope data to create occupancy histograms (hits are data corresponding to events and do not correspond to pure data from Mimosa26)
+            fill_occupancy_hist(occupancy_hist, telescope_data, self.plane_id_to_index)
+        if event_status_hist is not None:
+            fill_event_status_hist(event_status_hist, hits, self.plane_id_to_index)
+
+    def _append_hits(self, hits, hit_table, events=None):
+        ''' Appending the hits to the hit table (if not None) and to the plane hit files and adding the events of the hits to the event index (if enabled).
+        If events is given, the events are appended to the event table and their hit rows are shifted to refer to the hit table.
+        '''
+        if self._plane_hits_writer is not None:
+            self._plane_hits_writer.append(hits)
+        if hit_table is not None:
+            if self._event_index is not None:
+                self._event_index.append(hits['event_number'], hit_table.nrows)
+            if events is not None:
+                events['hit_start_row'] += hit_table.nrows
+                events['hit_stop_row'] += hit_table.nrows
+                self._event_table.append(events)
+            hit_table.append(hits)
+        self._n_hit_appends += 1
+        if self._n_hit_appends % self.flush_interval == 0:
+            self._flush_hits(hit_table)
+
+    def _flush_hits(self, hit_table):
+        ''' Flushing the hit table and the other hit outputs (event table, event index and plane hit files).
+        '''
+        if hit_table is not None:
+            hit_table.flush()
+        if self._event_table is not None:
+            self._event_table.flush()
+        if self._event_index is not None:
+            self._event_index.index_table.flush()
+        if self._plane_hits_writer is not None:
+            self._plane_hits_writer.flush()
+
+    def _close_event_index(self, hit_table):
+        ''' Adding the remaining events to the event index after all hits are written (see event_index.EventIndexWriter.close()).
+        '''
+        if self._event_index is None:
+            return
+        stop_event_number = self.interpreter.event_number + 1
+        if self._stop_event_number is not None:
+            stop_event_number = min(stop_event_number, self._stop_event_number)
+        self._event_index.close(stop_event_number, hit_table.nrows)
+
+    def _has_checkpoint(self):
+        ''' Returns True if the output file has a complete checkpoint.
+        '''
+        if not os.path.isfile(self.analyzed_data_file):
+            return False
+        try:
+            with tb.open_file(self.analyzed_data_file, 'r') as out_file_h5:
+                return any(name in out_file_h5.root and 'complete' in out_file_h5.get_node(out_file_h5.root, name)._v_attrs for name in ('Checkpoint', 'Checkpoint_tmp'))
+        except (IOError, tb.HDF5ExtError):
+            logging.warning('Cannot read output file %s, starting from the beginning' % self.analyzed_data_file)
+            return False
+
+    def _store_checkpoint(self, out_file_h5, index, hit_table, occupancy_hist, event_status_hist):
+        ''' Storing the interpreter state, the histograms, the number of stored hits and the raw data index of the next chunk in the group Checkpoint of the output file.
+        The checkpoint is written to a temporary group first and renamed when it is complete. Thus, there is always one complete checkpoint.
+        '''
+        self._flush_hits(hit_table)
+        if 'Checkpoint_tmp' in out_file_h5.root:
+            out_file_h5.remove_node(out_file_h5.root, 'Checkpoint_tmp', recursive=True)
+        checkpoint = out_file_h5.create_group(out_file_h5.root, 'Checkpoint_tmp', title='Checkpoint of the interpretation')
+        for name, value in self.interpreter.get_state().items():
+            if value.ndim == 0:
+                checkpoint._v_attrs[name] = value
+            elif value.dtype.names:  # trigger and telescope data
+                out_file_h5.create_table(checkpoint, name, obj=value)
+            else:
+                out_file_h5.create_array(checkpoint, name, obj=value)
+        for name, hist in (('occupancy_hist', occupancy_hist), ('event_status_hist', event_status_hist)):
+            if hist is not None:
+                out_file_h5.create_carray(checkpoint, name, obj=hist, filters=self.filters)
+        checkpoint._v_attrs.index = index
+        checkpoint._v_attrs.n_hits = hit_table.nrows if hit_table is not None else 0
+        checkpoint._v_attrs.n_events = self._event_table.nrows if self._event_table is not None else 0
+        checkpoint._v_attrs.n_index_rows = self._event_index.index_table.nrows if self._event_index is not None else 0
+        if self._plane_hits_writer is not None:
+            checkpoint._v_attrs.n_plane_hits = self._plane_hits_writer.nrows
+        checkpoint._v_attrs.chunk_size = self.chunk_size  # The event building depends on the chunk boundaries
+        checkpoint._v_attrs.analyze_m26_header_ids = self.analyze_m26_header_ids
+        checkpoint._v_attrs.add_missing_events = self.interpreter.add_missing_events
+        checkpoint._v_attrs.timing_offset = self.interpreter.timing_offset
+        checkpoint._v_attrs.complete = True
+        out_file_h5.flush()
+        if 'Checkpoint' in out_file_h5.root:
+            out_file_h5.remove_node(out_file_h5.root, 'Checkpoint', recursive=True)
+        out_file_h5.rename_node(checkpoint, 'Checkpoint')
+        out_file_h5.flush()
+
+    def _load_checkpoint(self, out_file_h5):
+        ''' Restoring the interpreter state and the histograms from the last checkpoint. The hits (and events) stored after the checkpoint are removed (also from the plane hit files).
+        Returns the hit table, the histograms and the raw data index of the next chunk.
+        '''
+        if 'Checkpoint' in out_file_h5.root and 'complete' in out_file_h5.root.Checkpoint._v_attrs:
+            checkpoint = out_file_h5.root.Checkpoint
+        else:  # Interrupted while renaming the new checkpoint
+            checkpoint = out_file_h5.root.Checkpoint_tmp
+        attrs = checkpoint._v_attrs
+        if attrs.chunk_size != self.chunk_size or not np.array_equal(attrs.analyze_m26_header_ids, self.analyze_m26_header_ids) or attrs.add_missing_events != self.interpreter.add_missing_events or attrs.timing_offset != self.interpreter.timing_offset:
+            raise ValueError('Checkpoint was created with different settings (chunk_size, analyze_m26_header_ids, add_missing_events, timing_offset).')
+        if self.create_hit_table != ('Hits' in out_file_h5.root) or self.create_event_table != ('Events' in out_file_h5.root) or self.create_event_index != ('EventIndex' in out_file_h5.root) or self.create_plane_hit_files != ('n_plane_hits' in attrs) or self.create_occupancy_hist != ('occupancy_hist' in checkpoint) or self.create_error_hist != ('event_status_hist' in checkpoint):
+            raise ValueError('Checkpoint was created with different outputs (create_hit_table, create_event_table, create_event_index, create_plane_hit_files, create_occupancy_hist, create_error_hist).')
+        if self.create_hit_table and out_file_h5.root.Hits.dtype != self.interpreter.hits_dtype:
+            raise ValueError('Checkpoint was created with a different hit format (hits_format).')
+        state = {name: node.read() for name, node in checkpoint._v_children.items() if name not in ('occupancy_hist', 'event_status_hist')}
+        for name in raw_data_interpreter._state_scalars:
+            state[name] = attrs[name]
+        self.interpreter.set_state(state)
+
+        if self.create_hit_table:
+            hit_table = out_file_h5.root.Hits
+            hit_table.truncate(attrs.n_hits)
+        else:
+            hit_table = None
+        if self.create_event_table:
+            self._event_table = out_file_h5.root.Events
+            self._event_table.truncate(attrs.n_events)
+        else:
+            self._event_table = None
+        if self.create_event_index:
+            out_file_h5.root.EventIndex.truncate(attrs.n_index_rows)
+            self._event_index = event_index.EventIndexWriter(out_file_h5.root.EventIndex)
+        else:
+            self._event_index = None
+        if self.create_plane_hit_files:
+            self._plane_hits_writer.truncate(attrs.n_plane_hits)
+        occupancy_hist = checkpoint.occupancy_hist.read() if self.create_occupancy_hist else None
+        event_status_hist = checkpoint.event_status_hist.read() if self.create_error_hist else None
+        return hit_table, occupancy_hist, event_status_hist, attrs.index
+
+    def _remove_checkpoint(self, out_file_h5):
+        ''' Removing the checkpoint after the interpretation is finished.
+        '''
+        for name in ('Checkpoint', 'Checkpoint_tmp'):
+            if name in out_file_h5.root:
+                out_file_h5.remove_node(out_file_h5.root, name, recursive=True)
+
+    def _store_histograms(self, out_file_h5, occupancy_hist, event_status_hist):
+        ''' Adding the histograms to the output file and creating the plots.
+        '''
+        for plane_index, plane in enumerate(self.analyze_m26_header_ids):
+            # store occupancy map for all Mimosa26 planes
+            logging.info('Storing histograms %sfor Mimosa26 plane with header ID %d.' % ('and creating plots ' if self.output_pdf else '', plane))
+
+            if self.create_occupancy_hist:
+                out_file_h5.create_carray(
+                    where=out_file_h5.root,
+                    name='HistOcc_plane%d' % plane,
+                    title='Occupancy histogram for Mimosa26 plane with header ID %d' % plane,
+                    obj=occupancy_hist[plane_index, :, :],
+                    filters=self.filters)
+                if self.output_pdf:
+                    # plot fancy occupancy histogram
+                    try:
+                        plotting.plot_fancy_occupancy(
+                            hist=occupancy_hist[plane_index].T,
                             title='Occupancy histogram for Mimosa26 plane with header ID %d' % plane,
-                            obj=occupancy_hist[plane_index, :, :],
-                            filters=tb.Filters(complib='blosc',
-                                               complevel=5,
-                                               fletcher32=False))
-                        if self.output_pdf:
-                            # plot fancy occupancy histogram
-                            try:
-                                plotting.plot_fancy_occupancy(
-                                    hist=occupancy_hist[plane_index].T,
-                                    title='Occupancy histogram for Mimosa26 plane with header ID %d' % plane,
-                                    z_max=np.ceil(np.percentile(occupancy_hist[plane_index], q=99.00)),
-                                    filename=self.output_pdf)
-                            except Exception:
-                                logging.warning('Could not create occupancy plot!')
-
-                    if self.create_error_hist:
-                        # plot event status histogram
-                        if self.output_pdf:
-                            try:
-                                n_words = np.sum(event_status_hist[plane_index].T)
-                                plotting.plot_event_status(
-                                    hist=event_status_hist[plane_index].T,
-                                    title='Event status for Mimosa26 plane with header ID %d ($\Sigma = % i$)' % (plane, n_words),
-                                    filename=self.output_pdf)
-                            except Exception:
-                                logging.warning('Could not create event status plot!')
+                            z_max=np.ceil(np.percentile(occupancy_hist[plane_index], q=99.00)),
+                            filename=self.output_pdf)
+                    except Exception:
+                        logging.warning('Could not create occupancy plot!')
 
+            if self.create_error_hist:
+                # plot event status histogram
                 if self.output_pdf:
-                    logging.info('Closing output PDF file: %s' % self.output_pdf._file.fh.name)
                     try:
-                        self.output_pdf.close()
+                        n_words = np.sum(event_status_hist[plane_index].T)
+                        plotting.plot_event_status(
+                            hist=event_status_hist[plane_index].T,
+                            title='Event status for Mimosa26 plane with header ID %d ($\Sigma = % i$)' % (plane, n_words),
+                            filename=self.output_pdf)
                     except Exception:
+                        logging.warning('Could not create event status plot!')
+
+        if self.output_pdf:
+            logging.info('Closing output PDF file: %s' % self.output_pdf._file.fh.name)
+            try:
+                self.output_pdf.close()
+            except Exception:
+                pass
+
+    def iter_hits(self, max_batch_size=None):
+        ''' Interpreting the raw data and yielding the hits without writing an output file.
+        The raw data is read in chunks of chunk_size words. After the last chunk, the remaining events in the buffers are built (build_all_events).
+
+        Parameters
+        ----------
+        max_batch_size : int
+            Maximum number of hits (and telescope data) per batch. The results of a raw data chunk which exceed max_batch_size are split into several batches.
+            If None, one batch is yielded for each raw data chunk.
+
+        Yields
+        ------
+        hits : np.array
+            Array with the hits (hits_dtype) assigned to events.
+        telescope_data : np.array
+            Array with the hits (telescope_data_dtype) of the Mimosa26 planes without assignment to events.
+        '''
+        if max_batch_size is not None and max_batch_size < 1:
+            raise ValueError('Maximum batch size must be larger than 0.')
+        with tb.open_file(self.raw_data_file, 'r') as in_file_h5:
+            for i in range(self._start_index, in_file_h5.root.raw_data.shape[0], self.chunk_size):  # Loop over all words in the actual raw data file in chunks
+                raw_data_chunk = in_file_h5.root.raw_data.read(i, i + self.chunk_size)
+                hits, telescope_data, _ = self._interpret_raw_data(raw_data=raw_data_chunk)
+                for batch in _split_batches(hits, telescope_data, max_batch_size):
+                    yield batch
+                if self._is_range_finished():
+                    break
+        # get last incomplete events
+        hits, telescope_data, _ = self._interpret_raw_data(raw_data=None, build_all_events=True)
+        for batch in _split_batches(hits, telescope_data, max_batch_size):
+            yield batch
+
+    def _interpret_pipelined(self, in_file_h5, hit_table, occupancy_hist, event_status_hist):
+        ''' Interpreting the raw data with a reader thread and a writer thread (see _PipelineThread).
+        The raw data chunks and the hits are passed through bounded queues, the interpretation runs in the calling thread.
+        '''
+        n_words = in_file_h5.root.raw_data.shape[0]
+        hdf5_lock = threading.Lock()  # The HDF5 library is not thread-safe
+        stop_event = threading.Event()
+        range_finished = threading.Event()  # All events of the selected range are built, the reader stops (see select_range())
+        raw_data_queue = queue.Queue(maxsize=self.prefetch_depth)
+        hits_queue = queue.Queue(maxsize=self.prefetch_depth)
+
+        def read_raw_data():
+            for i in range(self._start_index, n_words, self.chunk_size):
+                if range_finished.is_set():
+                    break
+                with hdf5_lock:
+                    raw_data_chunk = in_file_h5.root.raw_data.read(i, i + self.chunk_size)
+                if not _put(raw_data_queue, raw_data_chunk, stop_event):
+                    return
+            _put(raw_data_queue, None, stop_event)
+
+        def write_hits():
+            while True:
+                item = _get(hits_queue, stop_event)
+                if item is None:
+                    return
+                with hdf5_lock:
+                    self._append_hits(item[0], hit_table, item[1])
+
+        write_hits_queue = hit_table is not None or self._plane_hits_writer is not None
+        threads = [_PipelineThread(target=read_raw_data, stop_event=stop_event, name='Reader')]
+        if write_hits_queue:
+            threads.append(_PipelineThread(target=write_hits, stop_event=stop_event, name='Writer'))
+        for thread in threads:
+            thread.start()
+        try:
+            pbar = tqdm(total=n_words, initial=self._start_index, ncols=80)
+            while True:
+                raw_data_chunk = _get(raw_data_queue, stop_event)
+                if raw_data_chunk is None:
+                    break
+                hits, telescope_data, events = self._interpret_raw_data(raw_data=raw_data_chunk, return_events=self._event_table is not None)
+                if write_hits_queue:
+                    _put(hits_queue, (hits, events), stop_event)
+                if occupancy_hist is not None:
+                    fill_occupancy_hist(occupancy_hist, telescope_data, self.plane_id_to_index)
+                if event_status_hist is not None:
+                    fill_event_status_hist(event_status_hist, hits, self.plane_id_to_index)
+                pbar.update(raw_data_chunk.shape[0])
+                if self._is_range_finished():
+                    range_finished.set()
+                    while _get(raw_data_queue, stop_event) is not None:  # Unblocking the reader
                         pass
+                    break
+            pbar.close()
+
+            if not stop_event.is_set():
+                # get last incomplete events
+                hits, _, events = self._interpret_raw_data(raw_data=None, build_all_events=True, return_events=self._event_table is not None)
+                if write_hits_queue:
+                    _put(hits_queue, (hits, events), stop_event)
+                    _put(hits_queue, None, stop_event)
+                if event_status_hist is not None:
+                    fill_event_status_hist(event_status_hist, hits, self.plane_id_to_index)
+        except BaseException:
+            stop_event.set()
+            raise
+        finally:
+            for thread in threads:
+                thread.join()
+        for thread in threads:
+            if thread.exc_info is not None:
+                raise thread.exc_info[1]
+
+    def _interpret_segments(self, in_file_h5, hit_table, occupancy_hist, event_status_hist):
+        ''' Interpreting the raw data segments in parallel (see parallel_interpreter) and stitching the results.
+        '''
+        n_words = in_file_h5.root.raw_data.shape[0]
+        segments = parallel_interpreter.get_segments(n_words=n_words, chunk_size=self.chunk_size, n_segments=self.n_workers)
+        self.n_segment_reruns = 0
+        logging.info('Interpreting %d raw data segments using %d worker processes...' % (len(segments), self.n_workers))
+        temp_folder = tempfile.mkdtemp(dir=os.path.dirname(os.path.abspath(self.analyzed_data_file)))
+        pool = None
+        try:
+            pool = multiprocessing.get_context('spawn').Pool(min(self.n_workers, len(segments)))  # forking is not safe after numba threads were started
+            results = []
+            for segment_index, (start, stop) in enumerate(segments):
+                results.append(pool.apply_async(interpret_segment, kwds=dict(
+                    raw_data_file=self.raw_data_file,
+                    output_file=os.path.join(temp_folder, 'segment_%d.h5' % segment_index),
+                    start=start,
+                    stop=stop,
+                    chunk_size=self.chunk_size,
+                    analyze_m26_header_ids=self.analyze_m26_header_ids,
+                    add_missing_events=self.interpreter.add_missing_events,
+                    timing_offset=self.interpreter.timing_offset,
+                    multithreading=self.interpreter.multithreading,
+                    build_all_events=(segment_index == len(segments) - 1),
+                    resync=(segment_index != 0),
+                    create_occupancy_hist=occupancy_hist is not None,
+                    hits_format=self.interpreter.hits_dtype,
+                    filters=self.filters,
+                    chunkshape=self.chunkshape,
+                    expected_rows=self._get_segment_expected_rows(n_words, start, stop))))
+            pool.close()
+
+            pbar = tqdm(total=n_words, ncols=80)
+            reference_state = self.interpreter.get_state()
+            for segment_index, ((start, stop), result) in enumerate(zip(segments, results)):
+                segment_file = os.path.join(temp_folder, 'segment_%d.h5' % segment_index)
+                segment_result = result.get()
+                offsets = parallel_interpreter.get_state_offsets(segment_result['start_state'], reference_state, self.plane_id_to_index)
+                if offsets is None:  # Interpreter state at the resync point does not match, interpreting segment starting from the reference state
+                    logging.warning('Interpreter state mismatch at beginning of segment %d, interpreting segment again...' % segment_index)
+                    self.n_segment_reruns += 1
+                    segment_file = os.path.join(temp_folder, 'segment_%d_rerun.h5' % segment_index)
+                    segment_result = interpret_segment(
+                        raw_data_file=self.raw_data_file,
+                        output_file=segment_file,
+                        start=start,
+                        stop=stop,
+                        chunk_size=self.chunk_size,
+                        analyze_m26_header_ids=self.analyze_m26_header_ids,
+                        add_missing_events=self.interpreter.add_missing_events,
+                        timing_offset=self.interpreter.timing_offset,
+                        multithreading=self.interpreter.multithreading,
+                        build_all_events=(segment_index == len(segments) - 1),
+                        state=reference_state,
+                        create_occupancy_hist=occupancy_hist is not None,
+                        hits_format=self.interpreter.hits_dtype,
+                        filters=self.filters,
+                        chunkshape=self.chunkshape,
+                        expected_rows=self._get_segment_expected_rows(n_words, start, stop))
+                    offsets = parallel_interpreter.get_state_offsets(segment_result['start_state'], reference_state, self.plane_id_to_index)
+                reference_state = parallel_interpreter.apply_state_offsets(segment_result['stop_state'], offsets, self.plane_id_to_index)
+
+                with tb.open_file(segment_file, 'r') as segment_file_h5:
+                    segment_hit_table = segment_file_h5.root.Hits
+                    for i in range(0, segment_hit_table.nrows, self.chunk_size):
+                        hits = segment_hit_table.read(i, i + self.chunk_size)
+                        parallel_interpreter.apply_hits_offsets(hits, offsets, self.plane_id_to_index)
+                        if hit_table is not None or self._plane_hits_writer is not None:
+                            self._append_hits(hits, hit_table)
+                        if event_status_hist is not None:
+                            fill_event_status_hist(event_status_hist, hits, self.plane_id_to_index)
+                if occupancy_hist is not None:
+                    occupancy_hist += segment_result['occupancy_hist']
+                pbar.update(stop - start)
+            pbar.close()
+            self.interpreter.set_state(reference_state)
+            if self.n_segment_reruns:
+                logging.warning('%d of %d segments were interpreted again, consider increasing parallel_interpreter.RESYNC_N_FRAMES and RESYNC_N_TRIGGERS' % (self.n_segment_reruns, len(segments)))
+        finally:
+            if pool is not None:  # The workers may still write segment files if the stitching failed
+                pool.terminate()
+                pool.join()
+            shutil.rmtree(temp_folder)
 
 
-@njit
+def interpret_segment(raw_data_file, output_file, start, stop, chunk_size, analyze_m26_header_ids, add_missing_events, timing_offset, multithreading=False, build_all_events=False, state=None, resync=True, create_occupancy_hist=False, hits_format=None, filters=None, chunkshape=None, expected_rows=None):
+    ''' Interpreting a segment of the raw data. The hits are written to a temporary output file.
+
+    Parameters
+    ----------
+    raw_data_file : string
+        The filename of the input raw data file.
+    output_file : string
+        The filename of the temporary output file.
+    start, stop : int
+        Start and stop index of the segment.
+    chunk_size : int
+        Chunk size of the data when reading from file.
+    analyze_m26_header_ids : list
+        List of Mimosa26 header IDs that will be interpreted.
+    add_missing_events : boolean
+        If True, add (silently) missing events (due to missing trigger words).
+    timing_offset : int
+        Offset between Mimosa26 40 MHz clock and 40 MHz from R/O system.
+    multithreading : bool
+        If True, the raw data words of the Mimosa26 planes are interpreted in parallel threads.
+    build_all_events : bool
+        If True, build all events from the remaining data at the end of the segment.
+    state : dict
+        Interpreter state at the beginning of the segment. If None, the interpretation starts at a resync point in front of the segment.
+    resync : bool
+        If False, start the interpretation at the beginning of the segment with a reset interpreter (no warm-up).
+    create_occupancy_hist : bool
+        If True, create the occupancy histogram of the segment.
+    hits_format : string, list or np.dtype
+        The columns and types of the hits (see raw_data_interpreter.get_hits_dtype()).
+    filters : tables.Filters
+        The compression of the temporary hit table. If None, Blosc with compression level 5 is used.
+    chunkshape : tuple
+        The chunk shape of the temporary hit table. If None, the chunk shape is computed by PyTables from expected_rows.
+    expected_rows : int
+        The expected number of hits of the segment. If None, the PyTables default is used.
+
+    Returns
+    -------
+    dict
+        Interpreter state at the beginning (start_state) and at the end (stop_state) of the segment, occupancy histogram (occupancy_hist) and number of hits (n_hits).
+    '''
+    interpreter = raw_data_interpreter.RawDataInterpreter(analyze_m26_header_ids=analyze_m26_header_ids, hits_format=hits_format)
+    interpreter.add_missing_events = add_missing_events
+    interpreter.timing_offset = timing_offset
+    interpreter.multithreading = multithreading
+    if create_occupancy_hist:
+        occupancy_hist = np.zeros(shape=(len(interpreter.analyze_m26_header_ids), 1152, 576), dtype=np.int32)
+    else:
+        occupancy_hist = None
+    n_hits = 0
+    with tb.open_file(raw_data_file, 'r') as in_file_h5:
+        raw_data = in_file_h5.root.raw_data
+        if state is not None:
+            interpreter.set_state(state)
+        elif resync:
+            # Warm-up: recover interpreter state, the data is discarded
+            resync_index = parallel_interpreter.get_resync_index(raw_data=raw_data, index=start, analyze_m26_header_ids=interpreter.analyze_m26_header_ids)
+            resync_index -= resync_index % chunk_size  # same chunks as serial interpretation
+            for i in range(resync_index, start, chunk_size):
+                interpreter.interpret_raw_data(raw_data=raw_data.read(i, min(start, i + chunk_size)))
+        start_state = interpreter.get_state()
+        with tb.open_file(output_file, 'w') as out_file_h5:
+            hit_table = out_file_h5.create_table(
+                where=out_file_h5.root,
+                name='Hits',
+                description=interpreter.hits_dtype,
+                title='hit_data',
+                filters=filters if filters is not None else tb.Filters(complib='blosc', complevel=5, fletcher32=False),
+                expectedrows=expected_rows if expected_rows is not None else tb.parameters.EXPECTED_ROWS_TABLE,
+                chunkshape=chunkshape)
+            for i in range(start, stop, chunk_size):
+                hits, telescope_data = interpreter.interpret_raw_data(raw_data=raw_data.read(i, min(stop, i + chunk_size)))
+                hit_table.append(hits)
+                n_hits += hits.shape[0]
+                if create_occupancy_hist:
+                    fill_occupancy_hist(occupancy_hist, telescope_data, interpreter.plane_id_to_index)
+            if build_all_events:
+                hits, _ = interpreter.interpret_raw_data(raw_data=None, build_all_events=True)
+                hit_table.append(hits)
+                n_hits += hits.shape[0]
+            hit_table.flush()
+    return {'start_state': start_state, 'stop_state': interpreter.get_state(), 'occupancy_hist': occupancy_hist, 'n_hits': n_hits}
+
+
+def _get_output_buffer(buffer, size):
+    ''' Returning the output array for the next raw data chunk (see DataInterpreter._interpret_raw_data()).
+    If the output array is smaller than size, a new array with 25 % headroom is returned.
+    '''
+    if size > buffer.shape[0]:
+        return np.empty(shape=size + size // 4, dtype=buffer.dtype)
+    return buffer
+
+
+def _split_batches(hits, telescope_data, max_batch_size):
+    ''' Splitting the hits and telescope data into batches with at most max_batch_size entries each.
+    The batches are views of the input arrays. If max_batch_size is None, the input arrays are returned as single batch.
+    '''
+    if max_batch_size is None:
+        return [(hits, telescope_data)]
+    n_batches = max(1, -(-max(hits.shape[0], telescope_data.shape[0]) // max_batch_size))
+    return [(hits[i * max_batch_size:(i + 1) * max_batch_size], telescope_data[i * max_batch_size:(i + 1) * max_batch_size]) for i in range(n_batches)]
+
+
+class _PipelineThread(threading.Thread):
+    ''' Thread of the pipelined interpretation. If an exception is raised, the stop event is set to stop all threads of the pipeline.
+    The exception is stored in exc_info and re-raised by the calling thread.
+    '''
+
+    def __init__(self, target, stop_event, name):
+        super(_PipelineThread, self).__init__(name=name)
+        self.daemon = True
+        self.pipeline_target = target
+        self.stop_event = stop_event
+        self.exc_info = None
+
+    def run(self):
+        try:
+            self.pipeline_target()
+        except Exception:
+            self.exc_info = sys.exc_info()
+            self.stop_event.set()
+
+
+def _put(item_queue, item, stop_event):
+    ''' Putting an item into a bounded queue. Blocks while the queue is full (back-pressure).
+    Returns False if the pipeline was stopped.
+    '''
+    while not stop_event.is_set():
+        try:
+            item_queue.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+
+def _get(item_queue, stop_event):
+    ''' Getting an item from a queue. Blocks while the queue is empty.
+    Returns None if the pipeline was stopped.
+    '''
+    while not stop_event.is_set():
+        try:
+            return item_queue.get(timeout=0.1)
+        except queue.Empty:
+            pass
+    return None
+
+
+@njit(cache=True, nogil=True)
 def fill_occupancy_hist(hist, hits, plane_id_to_index):
     for hit_index in range(hits.shape[0]):
         col = hits[hit_index]['column']
@@ -247,7 +1423,35 @@ def fill_occupancy_hist(hist, hits, plane_id_to_index):
     return hist
 
 
-@njit
+@njit(cache=True, nogil=True)
+def fill_correlation_hist(hist, hits, plane_id_to_index, max_distance):
+    ''' Counting the events with correlated hits in neighbouring planes. hist[plane index] is increased by one if the event has a hit in plane
+    and a hit in plane + 1 with a column and row difference of at most max_distance. The hits have to be sorted by event number.
+    Returns the number of events with hits.
+    '''
+    n_events = 0
+    event_start_index = 0
+    correlated = np.zeros(shape=hist.shape[0], dtype=np.bool_)
+    for hit_index in range(hits.shape[0]):
+        if hit_index == hits.shape[0] - 1 or hits[hit_index + 1]['event_number'] != hits[hit_index]['event_number']:  # last hit of the event
+            n_events += 1
+            correlated[:] = False
+            for i in range(event_start_index, hit_index + 1):
+                plane_index = plane_id_to_index[hits[i]['plane']]
+                if plane_index >= hist.shape[0] or correlated[plane_index]:
+                    continue
+                for j in range(event_start_index, hit_index + 1):
+                    if plane_id_to_index[hits[j]['plane']] == plane_index + 1 and abs(np.int32(hits[i]['column']) - np.int32(hits[j]['column'])) <= max_distance and abs(np.int32(hits[i]['row']) - np.int32(hits[j]['row'])) <= max_distance:
+                        correlated[plane_index] = True
+                        break
+            for plane_index in range(hist.shape[0]):
+                if correlated[plane_index]:
+                    hist[plane_index] += 1
+            event_start_index = hit_index + 1
+    return n_events
+
+
+@njit(cache=True, nogil=True)
 def fill_event_status_hist(hist, hits, plane_id_to_index):
     for hit_index in range(hits.shape[0]):
         event_status = hits[hit_index]['event_status']
@@ -0,0 +1,200 @@
+''' Cache of the decoded Mimosa26 raw data (telescope data and trigger data).
+
+The decoding of the raw data does not depend on the event building parameters (timing offset, adding of missing events). The decoded telescope
+data (hits of the Mimosa26 planes) and the decoded trigger data are stored in compressed tables, so that the events can be built again with different
+parameters without decoding the raw data again (see build_events()). The cache stores the output of the Decoder for each raw data chunk
+(see raw_data_interpreter.Decoder) together with the index of the last decoded hit, the trigger data and the state of the Mimosa26 planes
+after the chunk. The events are built by the EventBuilder which replays the event building of the RawDataInterpreter for each chunk. Thus, the hits
+are identical to the interpretation of the raw data with the same chunk size. If the buffer contains outdated hits (no trigger for more than
+MAX_BUFFER_TIME_SLIP seconds), the removal of these hits cannot be replayed and OutdatedHitsError is raised (the raw data has to be interpreted).
+
+The cache is stored in the group DecodedData of a sidecar file (<raw data file>_decoded.h5). The cache is identified by the number of raw data words
+and a checksum of the first and last raw data words of the raw data file as well as by the version of the decoder (DECODER_VERSION), outdated caches
+are created again.
+'''
+
+import logging
+import os
+import zlib
+
+import numpy as np
+import tables as tb
+from tqdm import tqdm
+
+from pymosa_mimosa26_interpreter import raw_data_interpreter
+from pymosa_mimosa26_interpreter.raw_data_interpreter import telescope_data_dtype, trigger_data_dtype
+
+
+logger = logging.getLogger(__name__)
+
+CHECKSUM_N_WORDS = 1000000  # Number of raw data words at the beginning and at the end of the raw data which are used for the checksum
+
+
+class OutdatedHitsError(RuntimeError):
+    ''' Raised by build_events() if the events cannot be built from the cache because of outdated hits in the buffer.
+    '''
+    pass
+
+
+def get_chunk_dtype(n_planes):
+    ''' Returning the dtype of the table with the decoder state after each raw data chunk.
+    '''
+    return np.dtype([
+        ('n_telescope_data', '<i8'),  # Number of hits returned by the decoder (stored hits)
+        ('telescope_data_index', '<i8'),  # Index of the last decoded hit
+        ('trigger_data_index', '<i8'),  # Index of the last trigger returned by the decoder
+        ('last_completed_m26_frame_ids', '<i8', (n_planes,)),
+        ('m26_timestamps', '<i8', (n_planes,))])
+
+
+def get_cache_file(raw_data_file):
+    ''' Returning the filename of the sidecar cache file of a raw data file.
+    '''
+    return os.path.splitext(raw_data_file)[0] + '_decoded.h5'
+
+
+def get_checksum(raw_data):
+    ''' Returning the checksum of the first and last CHECKSUM_N_WORDS raw data words.
+    '''
+    checksum = zlib.adler32(np.ascontiguousarray(raw_data[:CHECKSUM_N_WORDS], dtype=np.uint32).tobytes())
+    return zlib.adler32(np.ascontiguousarray(raw_data[max(0, raw_data.shape[0] - CHECKSUM_N_WORDS):], dtype=np.uint32).tobytes(), checksum)
+
+
+def create_cache(raw_data_file, cache_file=None, analyze_m26_header_ids=None, chunk_size=1000000, multithreading=False):
+    ''' Decoding the raw data file and storing the decoded telescope data and trigger data.
+
+    Parameters
+    ----------
+    raw_data_file : string
+        The filename of the input raw data file.
+    cache_file : string
+        The filename of the cache file. If None, the sidecar file is used (see get_cache_file()).
+    analyze_m26_header_ids : list
+        List of Mimosa26 header IDs that will be decoded.
+    chunk_size : int
+        Number of raw data words which are decoded at once. The events are built for the same chunks (see build_events()).
+    multithreading : bool
+        If True, the Mimosa26 planes are decoded in parallel threads.
+
+    Returns
+    -------
+    string
+        The filename of the cache file.
+    '''
+    if cache_file is None:
+        cache_file = get_cache_file(raw_data_file)
+    decoder = raw_data_interpreter.Decoder(analyze_m26_header_ids=analyze_m26_header_ids)
+    decoder.multithreading = multithreading
+    logger.info('Creating decoded data cache of raw data file %s...' % raw_data_file)
+    with tb.open_file(raw_data_file, 'r') as in_file_h5:
+        raw_data = in_file_h5.root.raw_data
+        with tb.open_file(cache_file, 'w') as cache_file_h5:
+            cache_group = cache_file_h5.create_group(cache_file_h5.root, 'DecodedData', title='Decoded telescope data and trigger data')
+            filters = tb.Filters(complib='blosc', complevel=5, fletcher32=False)
+            telescope_data_table = cache_file_h5.create_table(cache_group, 'TelescopeData', description=telescope_data_dtype, filters=filters)
+            trigger_data_table = cache_file_h5.create_table(cache_group, 'TriggerData', description=trigger_data_dtype, filters=filters)
+            chunk_table = cache_file_h5.create_table(cache_group, 'Chunks', description=get_chunk_dtype(len(decoder.analyze_m26_header_ids)), filters=filters)
+            chunk = np.zeros(shape=1, dtype=chunk_table.dtype)
+            pbar = tqdm(total=raw_data.shape[0], ncols=80)
+            for i in list(range(0, raw_data.shape[0], chunk_size)) + [None]:
+                raw_data_chunk = raw_data.read(i, i + chunk_size) if i is not None else None  # Last chunk: finish the actual frames
+                decoded_data = decoder.decode(raw_data=raw_data_chunk, flush=raw_data_chunk is None)
+                telescope_data_table.append(decoded_data.telescope_data)
+                trigger_data_table.append(decoded_data.trigger_data)
+                chunk['n_telescope_data'] = telescope_data_table.nrows
+                chunk['telescope_data_index'] = decoded_data.telescope_data_index
+                chunk['trigger_data_index'] = trigger_data_table.nrows - 1
+                chunk['last_completed_m26_frame_ids'] = decoded_data.last_completed_m26_frame_ids
+                chunk['m26_timestamps'] = decoded_data.m26_timestamps
+                chunk_table.append(chunk)
+                if raw_data_chunk is not None:
+                    pbar.update(raw_data_chunk.shape[0])
+            pbar.close()
+            cache_group._v_attrs.decoder_version = raw_data_interpreter.DECODER_VERSION
+            cache_group._v_attrs.n_words = raw_data.shape[0]
+            cache_group._v_attrs.checksum = get_checksum(raw_data)
+            cache_group._v_attrs.chunk_size = chunk_size
+            cache_group._v_attrs.analyze_m26_header_ids = decoder.analyze_m26_header_ids
+    logger.info('Cached %d hits and %d triggers' % (decoder.n_hits, decoder.n_triggers))
+    return cache_file
+
+
+def is_valid_cache(raw_data_file, cache_file=None, analyze_m26_header_ids=None, chunk_size=None):
+    ''' Returning True if the cache exists and if it was created from the raw data file with the actual decoder (and with the given settings).
+    '''
+    if cache_file is None:
+        cache_file = get_cache_file(raw_data_file)
+    if analyze_m26_header_ids is None:
+        analyze_m26_header_ids = raw_data_interpreter.DEFAULT_PYMOSA_M26_HEADER_IDS
+    if not os.path.isfile(cache_file):
+        return False
+    with tb.open_file(cache_file, 'r') as cache_file_h5:
+        if 'DecodedData' not in cache_file_h5.root:
+            return False
+        attrs = cache_file_h5.root.DecodedData._v_attrs
+        if 'checksum' not in attrs or attrs.decoder_version != raw_data_interpreter.DECODER_VERSION or not np.array_equal(attrs.analyze_m26_header_ids, analyze_m26_header_ids):
+            return False
+        if chunk_size is not None and attrs.chunk_size != chunk_size:
+            return False
+        with tb.open_file(raw_data_file, 'r') as in_file_h5:
+            return attrs.n_words == in_file_h5.root.raw_data.shape[0] and attrs.checksum == get_checksum(in_file_h5.root.raw_data)
+
+
+def get_cache(raw_data_file, cache_file=None, analyze_m26_header_ids=None, chunk_size=1000000, multithreading=False):
+    ''' Returning the filename of the cache of the raw data file. The cache is created if it is missing or outdated.
+    '''
+    if cache_file is None:
+        cache_file = get_cache_file(raw_data_file)
+    if not is_valid_cache(raw_data_file, cache_file=cache_file, analyze_m26_header_ids=analyze_m26_header_ids, chunk_size=chunk_size):
+        create_cache(raw_data_file, cache_file=cache_file, analyze_m26_header_ids=analyze_m26_header_ids, chunk_size=chunk_size, multithreading=multithreading)
+    return cache_file
+
+
+def build_events(cache_file, timing_offset=None, add_missing_events=False, hits_format=None, return_events=False):
+    ''' Building the events from the cached telescope data and trigger data (without decoding the raw data, see raw_data_interpreter.EventBuilder).
+    The hits are identical to the interpretation of the raw data with the same settings (see RawDataInterpreter.interpret_raw_data()).
+    OutdatedHitsError is raised if the buffer contains outdated hits (see raw_data_interpreter.EventBuilder).
+
+    Parameters
+    ----------
+    cache_file : string
+        The filename of the cache file (see create_cache()).
+    timing_offset : int
+        Offset between Mimosa26 40 MHz clock and 40 MHz from R/O system. If None, the default value is used.
+    add_missing_events : bool
+        If True, add missing events (due to missing trigger words).
+    hits_format : string, list or np.dtype
+        The columns and types of the hits (see raw_data_interpreter.get_hits_dtype()).
+    return_events : bool
+        If True, the built events are yielded in addition (see raw_data_interpreter.get_events_dtype()).
+
+    Yields
+    ------
+    hits : np.array
+        Array with the hits (hits_dtype, see hits_format) assigned to events.
+    telescope_data : np.array
+        Array with the hits (telescope_data_dtype) of the Mimosa26 planes which were decoded in the raw data chunk.
+    events : np.array
+        Array with the events, the hit rows refer to the yielded hits. Only yielded if return_events is True.
+    '''
+    with tb.open_file(cache_file, 'r') as cache_file_h5:
+        cache_group = cache_file_h5.root.DecodedData
+        event_builder = raw_data_interpreter.EventBuilder(analyze_m26_header_ids=cache_group._v_attrs.analyze_m26_header_ids, timing_offset=timing_offset, add_missing_events=add_missing_events, hits_format=hits_format)
+        n_telescope_data, trigger_data_index = 0, -1
+        chunks = cache_group.Chunks[:]
+        for chunk_index, chunk in enumerate(chunks):
+            decoded_data = raw_data_interpreter.DecodedData(
+                telescope_data=cache_group.TelescopeData.read(n_telescope_data, chunk['n_telescope_data']),
+                trigger_data=cache_group.TriggerData.read(trigger_data_index + 1, chunk['trigger_data_index'] + 1),
+                telescope_data_index=chunk['telescope_data_index'],
+                last_completed_m26_frame_ids=chunk['last_completed_m26_frame_ids'],
+                m26_timestamps=chunk['m26_timestamps'])
+            n_telescope_data, trigger_data_index = chunk['n_telescope_data'], chunk['trigger_data_index']
+            result = event_builder.build_events(decoded_data, build_all_events=chunk_index == chunks.shape[0] - 1, return_events=return_events)
+            if event_builder.outdated_hits:
+                raise OutdatedHitsError('Outdated hits in the buffer (no trigger for more than %d s), the events cannot be built from the cache.' % raw_data_interpreter.MAX_BUFFER_TIME_SLIP)
+            if return_events:
+                hits, events = result
+                yield hits, decoded_data.telescope_data, events
+            else:
+                yield result, decoded_data.telescope_data
@@ -0,0 +1,333 @@
+''' Distributed interpretation of many raw data files on several nodes with a shared file system (command line tool pymosa-distributed).
+
+No scheduler is needed, the jobs are coordinated with files in the job folder:
+ - manifest.json: the jobs (raw data file and output file) and the DataInterpreter settings, written by create_manifest()
+ - claims/<job ID>.<attempt>.claim: a job is claimed by creating the claim file of the next attempt (os.open with O_CREAT | O_EXCL, atomic).
+   While the job is running, the worker updates the modification time of the claim file (heartbeat). If the claim file is not updated for
+   stale_timeout seconds, the worker is considered dead and the job is claimed again (next attempt).
+ - done/<job ID>.json: the summary of the finished job (see batch_interpreter.summary_fields).
+
+Each attempt writes to a temporary output file which is renamed to the output file when the job is finished.
+A worker which finds its attempt superseded by a later attempt discards its output. Finally, merge() verifies all outputs.
+
+    pymosa-distributed create /shared/jobs /shared/raw/run_*.h5 --output-folder /shared/interpreted
+    pymosa-distributed worker /shared/jobs  # on each node, as many workers as needed
+    pymosa-distributed merge /shared/jobs --summary summary.csv
+'''
+
+import argparse
+import json
+import logging
+import os
+import socket
+import threading
+import time
+
+import tables as tb
+
+from pymosa_mimosa26_interpreter import batch_interpreter
+
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILENAME = 'manifest.json'
+
+
+def create_manifest(job_folder, raw_data_files, output_folder=None, max_attempts=3, **kwargs):
+    ''' Creating the job folder and the job manifest.
+
+    Parameters
+    ----------
+    job_folder : string
+        Folder of the manifest, the claim files and the done records. Must be located on the shared file system.
+    raw_data_files : list
+        The filenames of the input raw data files. The jobs are claimed in the given order (see batch_interpreter.get_raw_data_files()).
+    output_folder : string
+        Folder of the output files. If None, the output file is stored next to the raw data file.
+    max_attempts : int
+        Maximum number of attempts of a job. A job which was claimed max_attempts times by workers which died is marked as failed.
+    kwargs
+        Parameters of the DataInterpreter.
+
+    Returns
+    -------
+    dict
+        The job manifest.
+    '''
+    if os.path.isfile(os.path.join(job_folder, MANIFEST_FILENAME)):
+        raise ValueError('Job folder %s already contains a manifest.' % job_folder)
+    jobs = []
+    for index, raw_data_file in enumerate(raw_data_files):
+        summary = batch_interpreter.get_summary(os.path.abspath(raw_data_file), {'output_folder': os.path.abspath(output_folder) if output_folder is not None else None})
+        jobs.append({'job_id': 'job_%05d' % index, 'raw_data_file': summary['raw_data_file'], 'analyzed_data_file': summary['analyzed_data_file']})
+    manifest = {'jobs': jobs, 'max_attempts': max_attempts, 'settings': kwargs}
+    for folder in (job_folder, os.path.join(job_folder, 'claims'), os.path.join(job_folder, 'done')):
+        if not os.path.isdir(folder):
+            os.makedirs(folder)
+    if output_folder is not None and not os.path.isdir(output_folder):
+        os.makedirs(output_folder)
+    _write_json(os.path.join(job_folder, MANIFEST_FILENAME), manifest)
+    logger.info('Created manifest with %d jobs in %s' % (len(jobs), job_folder))
+    return manifest
+
+
+def read_manifest(job_folder):
+    ''' Reading the job manifest.
+    '''
+    with open(os.path.join(job_folder, MANIFEST_FILENAME), 'r') as f:
+        return json.load(f)
+
+
+def run_worker(job_folder, stale_timeout=600.0, heartbeat_interval=60.0, poll_interval=30.0, memory_limit=None):
+    ''' Claiming and interpreting jobs until all jobs are done.
+    If all open jobs are claimed by other workers, the worker waits and claims the jobs of dead workers (stale claims).
+
+    Parameters
+    ----------
+    job_folder : string
+        Folder of the job manifest.
+    stale_timeout : float
+        Time in seconds after which a claim without heartbeat is considered stale.
+    heartbeat_interval : float
+        Time in seconds between the heartbeats of the claim file. Must be much smaller than stale_timeout.
+    poll_interval : float
+        Time in seconds between checking for stale claims, if all open jobs are claimed.
+    memory_limit : float
+        Memory limit (address space) of the worker in MB. If None, the memory is not limited.
+
+    Returns
+    -------
+    int
+        Number of jobs interpreted by this worker.
+    '''
+    if heartbeat_interval >= stale_timeout:
+        raise ValueError('Heartbeat interval must be smaller than the stale timeout.')
+    manifest = read_manifest(job_folder)
+    batch_interpreter.set_memory_limit(memory_limit)
+    worker_name = '%s:%d' % (socket.gethostname(), os.getpid())
+    n_jobs = 0
+    while True:
+        job, attempt, n_open_jobs = _claim_job(job_folder, manifest, stale_timeout, worker_name)
+        if job is not None:
+            _run_job(job_folder, manifest, job, attempt, worker_name, heartbeat_interval)
+            n_jobs += 1
+        elif n_open_jobs:
+            logger.info('%d jobs are running on other workers, waiting...' % n_open_jobs)
+            time.sleep(poll_interval)
+        else:
+            break
+    logger.info('All jobs are done, worker %s interpreted %d jobs' % (worker_name, n_jobs))
+    return n_jobs
+
+
+def merge(job_folder, summary_file=None):
+    ''' Verifying the outputs of all jobs: the job is done, the interpretation succeeded and the output file contains the reported number of hits.
+
+    Parameters
+    ----------
+    job_folder : string
+        Folder of the job manifest.
+    summary_file : string
+        If not None, write the summary to a CSV file.
+
+    Returns
+    -------
+    list
+        Summary for each job (see batch_interpreter.summary_fields). The status is 'ok', 'failed', 'missing' (job not done) or 'invalid' (verification failed).
+    '''
+    manifest = read_manifest(job_folder)
+    summaries = []
+    for job in manifest['jobs']:
+        summary = _read_done_record(job_folder, job)
+        if summary is None:
+            summary = dict(batch_interpreter.get_summary(job['raw_data_file'], job), status='missing', error='Job is not done')
+        elif summary['status'] == 'ok':
+            try:
+                with tb.open_file(job['analyzed_data_file'], 'r') as out_file_h5:
+                    n_hits = out_file_h5.root.Hits.nrows
+                if n_hits != summary['n_hits']:
+                    summary.update(status='invalid', error='Output file has %d hits, expected %d' % (n_hits, summary['n_hits']))
+            except Exception as e:
+                summary.update(status='invalid', error='Cannot read output file: %s: %s' % (type(e).__name__, e))
+        summaries.append(summary)
+    batch_interpreter.write_summary(summaries, summary_file)
+    return summaries
+
+
+def _claim_job(job_folder, manifest, stale_timeout, worker_name):
+    ''' Claiming the next open job. Returns the job and the attempt (None, None if no job can be claimed) and the number of open jobs
+    of the manifest (not done, including the claimed job).
+    '''
+    attempts = {}  # Last attempt of each job
+    for claim_file in os.listdir(os.path.join(job_folder, 'claims')):
+        if claim_file.endswith('.claim'):
+            job_id, attempt, _ = claim_file.rsplit('.', 2)
+            attempts[job_id] = max(attempts.get(job_id, 0), int(attempt))
+    now = _get_file_system_time(job_folder, worker_name)
+    n_open_jobs = 0
+    claimed_job, claimed_attempt = None, None
+    for job in manifest['jobs']:
+        if os.path.isfile(_get_done_record_file(job_folder, job)):
+            continue
+        n_open_jobs += 1
+        if claimed_job is not None:  # Counting the remaining open jobs
+            continue
+        attempt = attempts.get(job['job_id'], 0)
+        if attempt:
+            try:
+                heartbeat = os.path.getmtime(_get_claim_file(job_folder, job, attempt))
+            except OSError:  # claim file removed
+                continue
+            if now - heartbeat < stale_timeout:  # job is running
+                continue
+            logger.warning('Claim of %s (attempt %d) is stale' % (job['job_id'], attempt))
+            if attempt >= manifest['max_attempts']:
+                summary = dict(batch_interpreter.get_summary(job['raw_data_file'], job), job_id=job['job_id'], error='Workers died in %d attempts' % attempt)
+                _write_json(_get_done_record_file(job_folder, job), summary)
+                n_open_jobs -= 1
+                continue
+        try:  # atomic claim, fails if another worker claimed the attempt
+            fd = os.open(_get_claim_file(job_folder, job, attempt + 1), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except OSError:
+            continue
+        with os.fdopen(fd, 'w') as f:
+            f.write(worker_name)
+        claimed_job, claimed_attempt = job, attempt + 1
+    if claimed_job is not None:
+        logger.info('Worker %s claimed %s (attempt %d, %d open jobs)' % (worker_name, claimed_job['job_id'], claimed_attempt, n_open_jobs))
+    return claimed_job, claimed_attempt, n_open_jobs
+
+
+def _run_job(job_folder, manifest, job, attempt, worker_name, heartbeat_interval):
+    ''' Interpreting the raw data file of the claimed job into a temporary output file and recording the completion.
+    '''
+    claim_file = _get_claim_file(job_folder, job, attempt)
+    stop_event = threading.Event()
+    heartbeat_thread = threading.Thread(target=_heartbeat, name='Heartbeat', args=(claim_file, heartbeat_interval, stop_event))
+    heartbeat_thread.daemon = True
+    heartbeat_thread.start()
+    temp_file = os.path.splitext(job['analyzed_data_file'])[0] + '_attempt%d.h5' % attempt
+    try:
+        summary = batch_interpreter.interpret_file(job['raw_data_file'], analyzed_data_file=temp_file, **manifest['settings'])
+    finally:
+        stop_event.set()
+        heartbeat_thread.join()
+
+    if _is_superseded(job_folder, job, attempt):
+        logger.warning('Attempt %d of %s was superseded, discarding output' % (attempt, job['job_id']))
+        _remove_outputs(temp_file)
+        return
+    for previous_attempt in range(1, attempt):  # Outputs of dead workers
+        _remove_outputs(os.path.splitext(job['analyzed_data_file'])[0] + '_attempt%d.h5' % previous_attempt)
+    if summary['status'] == 'ok':
+        os.replace(temp_file, job['analyzed_data_file'])
+        if os.path.isfile(os.path.splitext(temp_file)[0] + '.pdf'):
+            os.replace(os.path.splitext(temp_file)[0] + '.pdf', os.path.splitext(job['analyzed_data_file'])[0] + '.pdf')
+        summary['analyzed_data_file'] = job['analyzed_data_file']
+    else:
+        _remove_outputs(temp_file)
+    summary.update(job_id=job['job_id'], attempt=attempt, worker=worker_name)
+    _write_json(_get_done_record_file(job_folder, job), summary)
+
+
+def _heartbeat(claim_file, heartbeat_interval, stop_event):
+    ''' Updating the modification time of the claim file every heartbeat_interval seconds until stop_event is set.
+    Failed heartbeats are logged, the claim becomes stale if the heartbeats fail for stale_timeout seconds. Returns the number of failed heartbeats.
+    '''
+    n_failed_heartbeats = 0
+    while not stop_event.wait(heartbeat_interval):
+        try:
+            os.utime(claim_file, None)
+        except OSError as e:
+            n_failed_heartbeats += 1
+            logger.error('Heartbeat of claim file %s failed (%d times): %s' % (claim_file, n_failed_heartbeats, e))
+    return n_failed_heartbeats
+
+
+def _is_superseded(job_folder, job, attempt):
+    ''' Returns True if the job was claimed again (stale claim) or is already done.
+    '''
+    return os.path.isfile(_get_claim_file(job_folder, job, attempt + 1)) or os.path.isfile(_get_done_record_file(job_folder, job))
+
+
+def _remove_outputs(temp_file):
+    for filename in (temp_file, os.path.splitext(temp_file)[0] + '.pdf'):
+        if os.path.isfile(filename):
+            os.remove(filename)
+
+
+def _get_claim_file(job_folder, job, attempt):
+    return os.path.join(job_folder, 'claims', '%s.%d.claim' % (job['job_id'], attempt))
+
+
+def _get_done_record_file(job_folder, job):
+    return os.path.join(job_folder, 'done', '%s.json' % job['job_id'])
+
+
+def _read_done_record(job_folder, job):
+    try:
+        with open(_get_done_record_file(job_folder, job), 'r') as f:
+            return json.load(f)
+    except (IOError, ValueError):
+        return None
+
+
+def _get_file_system_time(job_folder, worker_name):
+    ''' Returning the actual time of the (shared) file system. The heartbeats are compared to this time, so the clocks of the nodes do not need to be synchronized.
+    '''
+    clock_file = os.path.join(job_folder, 'claims', '%s.clock' % worker_name)
+    with open(clock_file, 'w'):
+        pass
+    try:
+        return os.path.getmtime(clock_file)
+    finally:
+        os.remove(clock_file)
+
+
+def _write_json(filename, obj):
+    ''' Writing the JSON file atomically (temporary file and rename).
+    '''
+    temp_filename = '%s.%s_%d.tmp' % (filename, socket.gethostname(), os.getpid())
+    with open(temp_filename, 'w') as f:
+        json.dump(obj, f, indent=2)
+    os.replace(temp_filename, filename)
+
+
+def main(args=None):
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - [%(levelname)-8s] (%(threadName)-10s) %(message)s")
+    parser = argparse.ArgumentParser(description='Interpret Mimosa26 raw data files on several nodes with a shared file system.')
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.required = True
+    create_parser = subparsers.add_parser('create', help='Create the job manifest')
+    create_parser.add_argument('job_folder', help='Job folder on the shared file system')
+    create_parser.add_argument('files', nargs='*', help='Raw data files or glob patterns')
+    create_parser.add_argument('-l', '--file-list', action='append', help='Text file with raw data files (one per line)')
+    create_parser.add_argument('-o', '--output-folder', default=None, help='Folder of the output files (default: folder of the raw data file)')
+    create_parser.add_argument('--max-attempts', type=int, default=3, help='Maximum number of attempts of a job (default: 3)')
+    batch_interpreter.add_interpreter_arguments(create_parser)
+    worker_parser = subparsers.add_parser('worker', help='Run a worker')
+    worker_parser.add_argument('job_folder', help='Job folder on the shared file system')
+    worker_parser.add_argument('--stale-timeout', type=float, default=600.0, help='Time in seconds without heartbeat after which a job is claimed again (default: 600)')
+    worker_parser.add_argument('--heartbeat-interval', type=float, default=60.0, help='Time in seconds between heartbeats (default: 60)')
+    worker_parser.add_argument('--poll-interval', type=float, default=30.0, help='Time in seconds between checks for stale jobs (default: 30)')
+    worker_parser.add_argument('--memory-limit', type=float, default=None, help='Memory limit of the worker in MB')
+    merge_parser = subparsers.add_parser('merge', help='Verify the outputs of all jobs')
+    merge_parser.add_argument('job_folder', help='Job folder on the shared file system')
+    merge_parser.add_argument('-s', '--summary', default=None, help='Write the summary to a CSV file')
+    args = parser.parse_args(args)
+
+    if args.command == 'create':
+        raw_data_files = batch_interpreter.get_raw_data_files(args.files, args.file_list)
+        if not raw_data_files:
+            parser.error('No raw data files given')
+        create_manifest(args.job_folder, raw_data_files, output_folder=args.output_folder, max_attempts=args.max_attempts, **batch_interpreter.get_interpreter_kwargs(args))
+    elif args.command == 'worker':
+        run_worker(args.job_folder, stale_timeout=args.stale_timeout, heartbeat_interval=args.heartbeat_interval, poll_interval=args.poll_interval, memory_limit=args.memory_limit)
+    else:
+        summaries = merge(args.job_folder, summary_file=args.summary)
+        return 1 if any(summary['status'] != 'ok' for summary in summaries) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,147 @@
+''' Event index of the hit table (see DataInterpreter.create_event_index).
+
+The index contains one row for each event number with the rows of the hits of the event in the hit table (start_row to stop_row, excluding the stop row).
+The index is dense: all event numbers from the first event number are indexed, also events without hits (start_row = stop_row).
+Thus, the index row of an event is the event number minus the first event number and the hits of a single event or of an event range
+are read with one contiguous read from the hit table, without searching the event numbers of the hits:
+
+    with EventReader('run_interpreted.h5') as reader:
+        hits = reader.read_event(42)
+        hits = reader.read_events(1000, 2000)
+
+The index is stored in the table EventIndex next to the hit table and is written while the hits are appended (see EventIndexWriter).
+'''
+
+import numpy as np
+import tables as tb
+
+
+event_index_dtype = np.dtype([
+    ('event_number', '<i8'),
+    ('start_row', '<i8'),
+    ('stop_row', '<i8')])
+
+
+class EventIndexWriter(object):
+    ''' Writing the event index while the hits are appended to the hit table. The hits have to be appended in the order of the event numbers.
+    The index row of the last event of the appended hits is written with the next hits or by close(), since its hits may continue in the next hits.
+    The index table is not flushed by the writer.
+    '''
+
+    def __init__(self, index_table, start_event_number=0):
+        '''
+        Parameters:
+        -----------
+        index_table : tables.Table
+            The index table (event_index_dtype). If the table is not empty (e.g., resuming the interpretation), the index is continued.
+            The hits after the last indexed row must be in the hit table.
+        start_event_number : int
+            The event number of the first index row, used if the table is empty.
+        '''
+        self.index_table = index_table
+        if index_table.nrows:
+            last_index = index_table[-1]
+            self.next_event_number = int(last_index['event_number']) + 1  # The event number of the next index row
+            self.stop_row = int(last_index['stop_row'])  # The hit row after the last indexed event
+        else:
+            self.next_event_number = int(start_event_number)
+            self.stop_row = 0
+        self.last_event_number = self.next_event_number - 1  # The event number of the last appended hit
+
+    def append(self, event_numbers, row_offset):
+        ''' Adding the events of the hits which are appended to the hit table at row_offset (number of rows before appending the hits).
+
+        Parameters:
+        -----------
+        event_numbers : np.array
+            The event numbers of the appended hits.
+        row_offset : int
+            The hit row of the first appended hit.
+        '''
+        if not event_numbers.shape[0]:
+            return
+        self.last_event_number = max(self.last_event_number, int(event_numbers[-1]))
+        self._write(event_numbers, row_offset, stop_event_number=event_numbers[-1])
+
+    def close(self, stop_event_number, n_rows):
+        ''' Adding the remaining events after all hits are appended. The events after the last hit up to stop_event_number (excluding) have no hits.
+
+        Parameters:
+        -----------
+        stop_event_number : int
+            The event number after the last event.
+        n_rows : int
+            The number of rows of the hit table.
+        '''
+        self._write(np.zeros(shape=0, dtype=np.int64), n_rows, stop_event_number=max(int(stop_event_number), self.last_event_number + 1))
+
+    def _write(self, event_numbers, row_offset, stop_event_number):
+        ''' Appending the index rows of the events from next_event_number to stop_event_number (excluding).
+        '''
+        index = np.zeros(shape=max(0, stop_event_number - self.next_event_number), dtype=event_index_dtype)
+        if not index.shape[0]:
+            return
+        index['event_number'] = np.arange(self.next_event_number, stop_event_number)
+        index['stop_row'] = row_offset + np.searchsorted(event_numbers, index['event_number'], side='right')
+        # The hits of consecutive events are consecutive, the hits of the first event may start before row_offset
+        index['start_row'][0] = self.stop_row
+        index['start_row'][1:] = index['stop_row'][:-1]
+        self.index_table.append(index)
+        self.next_event_number = int(stop_event_number)
+        self.stop_row = int(index['stop_row'][-1])
+
+
+class EventReader(object):
+    ''' Reading the hits of single events or event ranges from an analyzed data file with an event index (see DataInterpreter.create_event_index).
+    Events outside of the index (e.g., before the selected range of the interpretation) have no hits in the hit table.
+    '''
+
+    def __init__(self, analyzed_data_file):
+        '''
+        Parameters:
+        -----------
+        analyzed_data_file : string
+            The filename of the analyzed data file with the tables Hits and EventIndex.
+        '''
+        self.analyzed_data_file = analyzed_data_file
+        self._file_h5 = tb.open_file(analyzed_data_file, 'r')
+        if 'Hits' not in self._file_h5.root or 'EventIndex' not in self._file_h5.root:
+            self._file_h5.close()
+            raise ValueError('File %s has no hit table with event index (create_event_index).' % analyzed_data_file)
+        self.hit_table = self._file_h5.root.Hits
+        self.index_table = self._file_h5.root.EventIndex
+        self.start_event_number = int(self.index_table[0]['event_number']) if self.index_table.nrows else 0  # First indexed event
+        self.stop_event_number = self.start_event_number + self.index_table.nrows  # Event number after the last indexed event
+
+    def close(self):
+        self._file_h5.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def get_rows(self, start_event_number, stop_event_number=None):
+        ''' Returning the hit rows (start_row, stop_row) of the events from start_event_number to stop_event_number (excluding).
+        If stop_event_number is None, the rows of the single event start_event_number are returned.
+        '''
+        if stop_event_number is None:
+            stop_event_number = start_event_number + 1
+        start_index = min(max(start_event_number - self.start_event_number, 0), self.index_table.nrows)
+        stop_index = min(max(stop_event_number - self.start_event_number, start_index), self.index_table.nrows)
+        if start_index == stop_index:
+            row = int(self.index_table[start_index]['start_row']) if start_index < self.index_table.nrows else self.hit_table.nrows
+            return row, row
+        return int(self.index_table[start_index]['start_row']), int(self.index_table[stop_index - 1]['stop_row'])
+
+    def read_event(self, event_number):
+        ''' Returning the hits of the event.
+        '''
+        return self.read_events(event_number, event_number + 1)
+
+    def read_events(self, start_event_number, stop_event_number):
+        ''' Returning the hits of the events from start_event_number to stop_event_number (excluding), read with one contiguous read.
+        '''
+        start_row, stop_row = self.get_rows(start_event_number, stop_event_number)
+        return self.hit_table.read(start_row, stop_row)
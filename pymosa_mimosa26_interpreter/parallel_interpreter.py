@@ -0,0 +1,222 @@
+''' Functions for the parallel interpretation of Mimosa26 raw data.
+
+The raw data is split into segments at chunk boundaries. Each segment is interpreted by a separate RawDataInterpreter in a worker process.
+The interpretation of a segment starts at a resync point in front of the segment (warm-up). The warm-up contains several trigger words and
+several frame headers of all Mimosa26 planes in front of the first of these trigger words (see get_resync_index()). After the warm-up, the state of the interpreter is identical to the state of the serial interpretation
+except for the overflow carries of the timestamps, frame IDs and trigger numbers and the offset of the event number.
+When stitching the segments, these offsets are obtained by comparing the interpreter state at the beginning of the segment with the interpreter
+state at the end of the previous segment. The offsets are applied to the hits of the segment. If the interpreter states do not match
+(e.g., the warm-up was too short), the segment is interpreted again starting from the interpreter state at the end of the previous segment
+(counted by DataInterpreter.n_segment_reruns).
+Thus, the result is identical to the serial interpretation.
+'''
+
+import numpy as np
+
+TIMESTAMP_CARRY = 2**32  # Overflow of the Mimosa26 timestamp
+FRAME_ID_CARRY = 2**32  # Overflow of the Mimosa26 frame ID
+TRIGGER_NUMBER_CARRY = 2**16  # Overflow of the trigger number
+RESYNC_N_FRAMES = 10  # Number of frame headers for each plane in the warm-up
+RESYNC_N_TRIGGERS = 3  # Number of trigger words in the warm-up
+
+
+def get_segments(n_words, chunk_size, n_segments):
+    ''' Splitting the raw data into segments. The segment boundaries are aligned to the chunk size.
+
+    Parameters
+    ----------
+    n_words : int
+        Number of raw data words.
+    chunk_size : int
+        Chunk size of the data when reading from file.
+    n_segments : int
+        Maximum number of segments.
+
+    Returns
+    -------
+    list of tuples
+        Start and stop index of each segment.
+    '''
+    n_chunks = max(1, int(np.ceil(n_words / chunk_size)))
+    chunk_indices = np.linspace(0, n_chunks, num=min(n_segments, n_chunks) + 1).astype(np.int64)
+    return [(int(start * chunk_size), int(min(n_words, stop * chunk_size))) for start, stop in zip(chunk_indices[:-1], chunk_indices[1:])]
+
+
+def get_resync_index(raw_data, index, analyze_m26_header_ids, n_frames=RESYNC_N_FRAMES, n_triggers=RESYNC_N_TRIGGERS, block_size=100000):
+    ''' Searching backwards from index for a resync point. Between the resync point and the index, at least n_triggers trigger words are present
+    and each Mimosa26 plane has at least n_frames frame headers in front of the first of these trigger words. Thus, the warm-up covers the hits
+    which are buffered for the last triggers, also for low trigger rates. If no such point is found, 0 is returned.
+
+    Parameters
+    ----------
+    raw_data : np.array, tables.EArray
+        The raw data words.
+    index : int
+        The index from which the search is started.
+    analyze_m26_header_ids : list
+        List of Mimosa26 header IDs that will be interpreted.
+    n_frames : int
+        Minimum number of frame headers for each plane in front of the trigger words.
+    n_triggers : int
+        Minimum number of trigger words.
+    block_size : int
+        Number of words which are read at once.
+
+    Returns
+    -------
+    int
+        Index of the resync point.
+    '''
+    trigger_index = _find_words(raw_data, index, {None: n_triggers}, block_size)
+    if trigger_index is None:
+        return 0
+    resync_index = _find_words(raw_data, trigger_index, {plane_id: n_frames for plane_id in analyze_m26_header_ids}, block_size)
+    if resync_index is None:
+        return 0
+    return resync_index
+
+
+def _find_words(raw_data, index, n_missing, block_size):
+    ''' Searching backwards from index until the given number of frame headers for each plane (key is the Mimosa26 header ID) or trigger words
+    (key is None) are found. Returns the index of the earliest of these words or None if not all words are found.
+    '''
+    n_missing = dict(n_missing)
+    resync_index = index
+    stop = index
+    while stop > 0 and any(n_missing.values()):
+        start = max(0, stop - block_size)
+        raw_data_block = np.asarray(raw_data[start:stop], dtype=np.uint32)
+        is_frame_header = ((raw_data_block & 0xff000000) == 0x20000000) & ((raw_data_block & 0x00010000) != 0)
+        plane_ids = (raw_data_block >> 20) & 0xf
+        for plane_id in n_missing:
+            if not n_missing[plane_id]:
+                continue
+            if plane_id is None:
+                indices = np.flatnonzero(raw_data_block & 0x80000000)
+            else:
+                indices = np.flatnonzero(is_frame_header & (plane_ids == plane_id))
+            if indices.shape[0] >= n_missing[plane_id]:
+                resync_index = min(resync_index, start + int(indices[-n_missing[plane_id]]))
+                n_missing[plane_id] = 0
+            else:
+                n_missing[plane_id] -= indices.shape[0]
+        stop = start
+    if any(n_missing.values()):
+        return None
+    return resync_index
+
+
+def get_state_offsets(state, reference_state, plane_id_to_index):
+    ''' Calculating the offsets (event number, overflow carries) between the interpreter state of a segment and the reference interpreter state
+    (state at the end of the previous segment). Returns None, if the interpreter states cannot be matched.
+
+    Parameters
+    ----------
+    state : dict
+        Interpreter state.
+    reference_state : dict
+        Reference interpreter state.
+    plane_id_to_index : np.array
+        Mapping of the Mimosa26 header IDs to the plane index.
+
+    Returns
+    -------
+    dict
+    '''
+    offsets = {
+        'event_number': reference_state['event_number'] - state['event_number'],
+        'trigger_number': reference_state['trigger_number'] - state['trigger_number'],
+        'time_stamp': reference_state['trigger_timestamp'] - state['trigger_timestamp'],
+        'frame_id': reference_state['m26_frame_ids'] - state['m26_frame_ids']}
+    if offsets['trigger_number'] % TRIGGER_NUMBER_CARRY or offsets['time_stamp'] % TIMESTAMP_CARRY or np.any(offsets['frame_id'] % FRAME_ID_CARRY):
+        return None
+    if not is_equal_state(apply_state_offsets(state, offsets, plane_id_to_index), reference_state):
+        return None
+    return offsets
+
+
+def apply_state_offsets(state, offsets, plane_id_to_index):
+    ''' Applying the offsets to a copy of the interpreter state.
+
+    Parameters
+    ----------
+    state : dict
+        Interpreter state.
+    offsets : dict
+        Offsets obtained by get_state_offsets().
+    plane_id_to_index : np.array
+        Mapping of the Mimosa26 header IDs to the plane index.
+
+    Returns
+    -------
+    dict
+    '''
+    state = {name: np.copy(value) for name, value in state.items()}
+    trigger_data = state['trigger_data']
+    trigger_data['event_number'] += offsets['event_number']
+    trigger_data['trigger_number'] += offsets['trigger_number']
+    trigger_data['trigger_time_stamp'][trigger_data['trigger_time_stamp'] != -1] += offsets['time_stamp']  # skip missing events
+    telescope_data = state['telescope_data']
+    telescope_data['time_stamp'] += offsets['time_stamp']
+    telescope_data['frame_id'] += offsets['frame_id'][plane_id_to_index[telescope_data['plane']]]
+    state['m26_frame_ids'] += offsets['frame_id']
+    completed = state['last_completed_m26_frame_ids'] != -1
+    state['last_completed_m26_frame_ids'][completed] += offsets['frame_id'][completed]
+    state['m26_timestamps'] += offsets['time_stamp']
+    state['last_m26_timestamps'] += offsets['time_stamp']
+    state['trigger_timestamp'] += offsets['time_stamp']
+    state['trigger_number'] += offsets['trigger_number']
+    state['event_number'] += offsets['event_number']
+    return state
+
+
+def apply_hits_offsets(hits, offsets, plane_id_to_index):
+    ''' Applying the offsets to the hits (in-place).
+
+    Parameters
+    ----------
+    hits : np.array
+        The hits array.
+    offsets : dict
+        Offsets obtained by get_state_offsets().
+    plane_id_to_index : np.array
+        Mapping of the Mimosa26 header IDs to the plane index.
+    '''
+    names = hits.dtype.names  # The columns depend on the hit format (see raw_data_interpreter.get_hits_dtype())
+    if 'event_number' in names:
+        _add_offset(hits['event_number'], offsets['event_number'])
+    if 'trigger_number' in names:
+        _add_offset(hits['trigger_number'], offsets['trigger_number'])
+    if 'trigger_time_stamp' in names:
+        selection = hits['trigger_time_stamp'] != -1  # skip missing events
+        hits['trigger_time_stamp'][selection] = _add_offset(hits['trigger_time_stamp'][selection], offsets['time_stamp'])
+    if 'row_time_stamp' in names:
+        _add_offset(hits['row_time_stamp'], offsets['time_stamp'])
+    if 'frame_id' in names:
+        _add_offset(hits['frame_id'], offsets['frame_id'][plane_id_to_index[hits['plane']]])
+
+
+def _add_offset(column, offset):
+    ''' Adding the offset to a hit column (in-place), also for narrower integer types of the column.
+    '''
+    return np.add(column, offset, out=column, casting='unsafe')
+
+
+def is_equal_state(state, other_state):
+    ''' Comparing two interpreter states.
+
+    Parameters
+    ----------
+    state, other_state : dict
+        Interpreter states.
+
+    Returns
+    -------
+    bool
+    '''
+    if set(state) != set(other_state):
+        return False
+    for name in state:
+        if state[name].shape != other_state[name].shape or state[name].dtype != other_state[name].dtype or not np.all(state[name] == other_state[name]):
+            return False
+    return True
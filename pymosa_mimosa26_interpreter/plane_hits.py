@@ -0,0 +1,132 @@
+''' Hits of each Mimosa26 plane in the hit format of the test beam analysis (see DataInterpreter.create_plane_hit_files).
+
+The hits are split by plane while they are written during the interpretation, one output file with the table Hits for each plane:
+event number, frame, column and row (starting at 1) and charge (beam_telescope_analysis.hit_analysis.default_hits_dtype).
+The hits of a chunk are grouped by plane in one pass (see split_hits_by_plane()) and each plane is written with one append.
+'''
+
+import os
+
+import numpy as np
+import tables as tb
+from numba import njit
+
+
+plane_hits_dtype = np.dtype([
+    ('event_number', '<i8'),
+    ('frame', '<u1'),
+    ('column', '<u2'),
+    ('row', '<u2'),
+    ('charge', '<u2')])
+
+
+def get_plane_hit_files(analyzed_data_file, analyze_m26_header_ids):
+    ''' Returns the default filenames of the plane hit files: <analyzed data file>_header_id_<header ID>.h5.
+    '''
+    return [os.path.splitext(analyzed_data_file)[0] + '_header_id_%d.h5' % plane_header_id for plane_header_id in analyze_m26_header_ids]
+
+
+class PlaneHitsWriter(object):
+    ''' Writing the hits of each plane to the plane hit files. The files are opened when the writer is created and closed by close().
+    '''
+
+    def __init__(self, filenames, analyze_m26_header_ids, resume=False, filters=None, expected_rows=None):
+        '''
+        Parameters:
+        -----------
+        filenames : list of strings
+            The filenames of the plane hit files (in the order of analyze_m26_header_ids).
+        analyze_m26_header_ids : list
+            The Mimosa26 header IDs of the planes.
+        resume : bool
+            If True, the hits are appended to the existing plane hit files (see truncate()). Otherwise, the files are created.
+        filters : tables.Filters
+            The compression of the hit tables. If None, Blosc with compression level 5 is used.
+        expected_rows : int
+            The expected number of hits of each plane (see tables.File.create_table()). If None, the PyTables default is used.
+        '''
+        if len(filenames) != len(analyze_m26_header_ids):
+            raise ValueError('Plane hit files must be a list of length %d.' % len(analyze_m26_header_ids))
+        self.filenames = list(filenames)
+        self.analyze_m26_header_ids = np.asarray(analyze_m26_header_ids)
+        self.plane_id_to_index = -1 * np.ones(shape=max(self.analyze_m26_header_ids) + 1, dtype=np.int32)
+        for plane_index, plane_id in enumerate(self.analyze_m26_header_ids):
+            self.plane_id_to_index[plane_id] = plane_index
+        self._plane_hits_buffer = np.zeros(shape=0, dtype=plane_hits_dtype)  # Reused for each call of append()
+        if filters is None:
+            filters = tb.Filters(complib='blosc', complevel=5, fletcher32=False)
+        self._files_h5 = []
+        self.hit_tables = []
+        try:
+            for filename in self.filenames:
+                self._files_h5.append(tb.open_file(filename, 'a' if resume else 'w'))
+                if resume:
+                    if 'Hits' not in self._files_h5[-1].root:
+                        raise ValueError('Plane hit file %s has no hit table.' % filename)
+                    self.hit_tables.append(self._files_h5[-1].root.Hits)
+                else:
+                    self.hit_tables.append(self._files_h5[-1].create_table(
+                        where=self._files_h5[-1].root,
+                        name='Hits',
+                        description=plane_hits_dtype,
+                        title='Hits for test beam analysis',
+                        filters=filters,
+                        expectedrows=expected_rows if expected_rows is not None else tb.parameters.EXPECTED_ROWS_TABLE))
+        except BaseException:
+            self.close()
+            raise
+
+    @property
+    def nrows(self):
+        ''' The number of hits of each plane.
+        '''
+        return [hit_table.nrows for hit_table in self.hit_tables]
+
+    def append(self, hits):
+        ''' Appending the hits (with the columns plane, event_number, column and row) to the hit tables of the planes. The hit tables are flushed by flush().
+        '''
+        if self._plane_hits_buffer.shape[0] < hits.shape[0]:
+            self._plane_hits_buffer = np.zeros(shape=hits.shape[0], dtype=plane_hits_dtype)
+        plane_hits, plane_start_indices = split_hits_by_plane(hits, self.plane_id_to_index, len(self.hit_tables), self._plane_hits_buffer)
+        for plane_index, hit_table in enumerate(self.hit_tables):
+            hit_table.append(plane_hits[plane_start_indices[plane_index]:plane_start_indices[plane_index + 1]])
+
+    def flush(self):
+        for hit_table in self.hit_tables:
+            hit_table.flush()
+
+    def truncate(self, n_rows):
+        ''' Removing the hits after n_rows (list with the number of hits of each plane, see nrows).
+        '''
+        for hit_table, n in zip(self.hit_tables, n_rows):
+            hit_table.truncate(n)
+
+    def close(self):
+        for file_h5 in self._files_h5:
+            file_h5.close()
+        self._files_h5 = []
+        self.hit_tables = []
+
+
+@njit(cache=True, nogil=True)
+def split_hits_by_plane(hits, plane_id_to_index, n_planes, plane_hits_out):
+    ''' Grouping the hits by plane with one pass to count the hits of each plane and one pass to copy the hits (counting sort).
+    The hits are converted to the test beam analysis format (plane_hits_dtype, column and row start at 1) and stored in plane_hits_out,
+    the order of the hits of each plane is kept. Returns the plane hits and the index of the first hit of each plane (n_planes + 1 indices).
+    '''
+    plane_start_indices = np.zeros(shape=n_planes + 1, dtype=np.int64)
+    for hit_index in range(hits.shape[0]):
+        plane_start_indices[plane_id_to_index[hits[hit_index]['plane']] + 1] += 1
+    for plane_index in range(n_planes):
+        plane_start_indices[plane_index + 1] += plane_start_indices[plane_index]
+    plane_hits_index = plane_start_indices[:-1].copy()
+    for hit_index in range(hits.shape[0]):
+        plane_index = plane_id_to_index[hits[hit_index]['plane']]
+        plane_hit_index = plane_hits_index[plane_index]
+        plane_hits_out[plane_hit_index]['event_number'] = hits[hit_index]['event_number']
+        plane_hits_out[plane_hit_index]['frame'] = 0
+        plane_hits_out[plane_hit_index]['column'] = hits[hit_index]['column'] + 1
+        plane_hits_out[plane_hit_index]['row'] = hits[hit_index]['row'] + 1
+        plane_hits_out[plane_hit_index]['charge'] = 0
+        plane_hits_index[plane_index] += 1
+    return plane_hits_out[:hits.shape[0]], plane_start_indices
@@ -0,0 +1,126 @@
+''' Precompiling the numba kernels of the interpreter.
+
+All kernels are compiled with cache=True. The machine code is stored on disk and loaded by later processes instead of compiling the kernels again.
+The cache is located in the __pycache__ folder of the package or, if the package folder is not writable, in the user-wide cache folder of numba.
+The location can be set with the environment variable NUMBA_CACHE_DIR.
+
+Calling precompile() compiles the kernels which are called from Python for the signatures used by the interpreter (record dtypes hits_dtype,
+telescope_data_dtype and trigger_data_dtype), without any raw data. This can be done at installation or when building a container image:
+
+    python -m pymosa_mimosa26_interpreter.precompile
+'''
+
+import logging
+import time
+
+import numba
+from numba import types
+
+from pymosa_mimosa26_interpreter import raw_data_interpreter
+from pymosa_mimosa26_interpreter import data_interpreter
+from pymosa_mimosa26_interpreter import plane_hits
+from pymosa_mimosa26_interpreter import timing_calibration
+
+
+logger = logging.getLogger(__name__)
+
+hits_type = numba.from_dtype(raw_data_interpreter.hits_dtype)
+telescope_data_type = numba.from_dtype(raw_data_interpreter.telescope_data_dtype)
+trigger_data_type = numba.from_dtype(raw_data_interpreter.trigger_data_dtype)
+events_type = numba.from_dtype(raw_data_interpreter.get_events_dtype(len(raw_data_interpreter.DEFAULT_PYMOSA_M26_HEADER_IDS)))
+plane_hits_type = numba.from_dtype(plane_hits.plane_hits_dtype)
+
+# Interpreter state (see raw_data_interpreter._InterpreterState)
+_state_buffers_types = (
+    trigger_data_type[::1],  # trigger_data
+    types.int64,  # trigger_data_index
+    telescope_data_type[::1],  # telescope_data
+    types.int64,  # telescope_data_start_index
+    types.int64,  # telescope_data_index
+    hits_type[::1],  # hits
+    types.int64,  # hits_index
+    events_type[::1],  # events
+    types.int64,  # events_index
+    types.int64,  # event_number
+    types.int64,  # trigger_number
+    types.int64)  # trigger_timestamp
+
+_state_fields_types = _state_buffers_types + (
+    types.int64[::1],  # m26_frame_ids
+    types.uint32[::1],  # m26_frame_length
+    types.boolean[::1],  # m26_data_loss
+    types.uint32[::1],  # m26_word_index
+    types.int64[::1],  # m26_timestamps
+    types.int64[::1],  # last_m26_timestamps
+    types.uint32[::1],  # m26_n_words
+    types.uint32[::1],  # m26_rows
+    types.uint32[::1],  # m26_frame_status
+    types.int64[::1],  # last_completed_m26_frame_ids
+    types.int64[::1],  # m26_frame_start_indices
+    types.uint16[::1],  # analyze_m26_header_ids
+    types.int32[::1])  # plane_id_to_index
+
+interpreter_state_type = raw_data_interpreter._InterpreterStateType(list(zip(raw_data_interpreter._state_fields, _state_fields_types)))
+
+_build_events_signature = (
+    trigger_data_type[::1],  # trigger_data
+    types.int64,  # trigger_data_index
+    telescope_data_type[::1],  # telescope_data
+    types.int64,  # telescope_data_start_index
+    types.int64,  # telescope_data_index
+    hits_type[::1],  # hits
+    types.int64,  # hits_index
+    events_type[::1],  # events
+    types.int64,  # events_index
+    types.boolean,  # create_events
+    types.int64[::1],  # last_completed_m26_frame_ids
+    types.int64,  # timing_offset
+    types.boolean,  # build_all_events
+    types.uint16[::1],  # analyze_m26_header_ids
+    types.int32[::1])  # plane_id_to_index
+
+# Kernels which are called from Python and their signatures
+signatures = [
+    (raw_data_interpreter._new_interpreter_state, _state_fields_types),
+    (raw_data_interpreter._get_state_buffers, (interpreter_state_type,)),
+    (raw_data_interpreter._set_state_buffers, (interpreter_state_type,) + _state_buffers_types),
+    (raw_data_interpreter._decode_state, (interpreter_state_type, types.uint32[::1], types.boolean, types.boolean, types.boolean)),
+    (raw_data_interpreter._interpret_state, (interpreter_state_type, types.uint32[::1], types.int64, types.boolean, types.boolean, types.boolean, types.boolean, hits_type[::1], telescope_data_type[::1], types.boolean)),
+    (raw_data_interpreter._decode_chunk_state, (interpreter_state_type, types.uint32[::1], types.boolean, types.boolean, telescope_data_type[::1])),
+    (raw_data_interpreter._build_events, _build_events_signature),
+    (raw_data_interpreter._get_ring_buffer_data, (telescope_data_type[::1], types.int64, types.int64)),
+    (raw_data_interpreter._extend_ring_buffer, (telescope_data_type[::1], types.int64, types.int64, types.int64)),
+    (raw_data_interpreter._add_triggers, (trigger_data_type[::1], types.int64, trigger_data_type[::1], types.int64, types.boolean)),
+    (raw_data_interpreter._remove_outdated_hits, (telescope_data_type[::1], types.int64, types.int64, types.int64[::1], types.int32[::1])),
+    (data_interpreter.fill_occupancy_hist, (types.int32[:, :, ::1], telescope_data_type[::1], types.int32[::1])),
+    (data_interpreter.fill_event_status_hist, (types.int32[:, ::1], hits_type[::1], types.int32[::1])),
+    (data_interpreter.fill_correlation_hist, (types.int64[::1], hits_type[::1], types.int32[::1], types.int64)),
+    (plane_hits.split_hits_by_plane, (hits_type[::1], types.int32[::1], types.int64, plane_hits_type[::1])),
+    (timing_calibration.fill_time_difference_hist, (types.int64[::1], types.int64[::1], types.int64[::1], types.int64))]
+
+
+def precompile():
+    ''' Compiling the interpreter kernels for the signatures used by the interpreter.
+    If the kernels are already in the on-disk cache, they are loaded from the cache.
+
+    Returns
+    -------
+    float
+        Compilation time in seconds.
+    '''
+    start_time = time.time()
+    for kernel, signature in signatures:
+        logger.info('Compiling %s...' % kernel.py_func.__name__)
+        kernel.compile(signature)
+    duration = time.time() - start_time
+    logger.info('Compiled %d kernels in %.1f s' % (len(signatures), duration))
+    return duration
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - [%(levelname)-8s] (%(threadName)-10s) %(message)s")
+    precompile()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,432 @@
+''' Seek index of the Mimosa26 raw data (command line tool pymosa-index).
+
+The index contains the raw data word index of each trigger word (with the decoded trigger number and trigger timestamp)
+and of each frame header of the Mimosa26 planes (with the decoded frame ID and timestamp). The trigger numbers, frame IDs and timestamps
+are decoded including the overflow carries, as by the RawDataInterpreter. The index is created in a single pass over the raw data
+(vectorized with numpy, only the trigger timestamps are calculated in a loop over the trigger words and frame headers).
+
+With the index, the interpretation can be started at any trigger without interpreting the raw data from the beginning (see DataInterpreter.seek()):
+the resync point in front of the trigger is taken from the index (see get_resync_index()) and after the warm-up, the overflow carries and
+the event number of the interpreter state are corrected with the values from the index (see get_state_offsets()).
+
+The index is stored in the group RawDataIndex of a sidecar file (<raw data file>_index.h5) or of the raw data file itself:
+
+    pymosa-index /data/run_*.h5
+'''
+
+import argparse
+import glob
+import logging
+import os
+
+import numpy as np
+import tables as tb
+from numba import njit
+
+from pymosa_mimosa26_interpreter import raw_data_interpreter
+from pymosa_mimosa26_interpreter import parallel_interpreter
+
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 1  # Increase if the content of the index changes, outdated indices are created again
+
+trigger_index_dtype = np.dtype([
+    ('word_index', '<i8'),
+    ('trigger_number', '<i8'),
+    ('trigger_time_stamp', '<i8')])
+
+frame_index_dtype = np.dtype([
+    ('word_index', '<i8'),
+    ('plane', '<u1'),
+    ('frame_id', '<i8'),
+    ('time_stamp', '<i8')])
+
+
+def get_index_file(raw_data_file):
+    ''' Returning the filename of the sidecar index file of a raw data file.
+    '''
+    return os.path.splitext(raw_data_file)[0] + '_index.h5'
+
+
+def build_index(raw_data, analyze_m26_header_ids=None, block_size=10000000):
+    ''' Creating the index of the trigger words and frame headers in a single pass over the raw data.
+
+    Parameters
+    ----------
+    raw_data : np.array, tables.EArray
+        The raw data words.
+    analyze_m26_header_ids : list
+        List of Mimosa26 header IDs that will be indexed. The trigger timestamps depend on the frame headers of the interpreted planes.
+        If None, the value defaults to the global value raw_data_interpreter.DEFAULT_PYMOSA_M26_HEADER_IDS.
+    block_size : int
+        Number of words which are read at once.
+
+    Returns
+    -------
+    trigger_index : np.array
+        Trigger words (trigger_index_dtype).
+    frame_index : np.array
+        Frame headers of the Mimosa26 planes (frame_index_dtype), ordered by raw data word index.
+    '''
+    if analyze_m26_header_ids is None:
+        analyze_m26_header_ids = raw_data_interpreter.DEFAULT_PYMOSA_M26_HEADER_IDS
+    analyze_m26_header_ids = np.asarray(analyze_m26_header_ids, dtype=np.uint16)
+    n_planes = analyze_m26_header_ids.shape[0]
+    n_words = raw_data.shape[0]
+    # Decoder state, carried over the blocks (initial state of the RawDataInterpreter)
+    m26_timestamps = np.zeros(shape=n_planes, dtype=np.int64)
+    last_m26_timestamps = np.zeros(shape=n_planes, dtype=np.int64)
+    m26_frame_ids = np.zeros(shape=n_planes, dtype=np.int64)
+    trigger_number = np.int64(-1)
+    trigger_timestamp = np.int64(0)
+
+    trigger_indices = []
+    frame_indices = []
+    start = 0
+    while start < n_words:
+        stop = min(n_words, start + block_size)
+        raw_data_block = np.asarray(raw_data[start:stop], dtype=np.uint32)
+        is_m26_word = (raw_data_block & 0xff000000) == 0x20000000
+        plane_ids = (raw_data_block >> 20) & 0xf
+        n_unknown_words = np.cumsum(~is_m26_word & ((raw_data_block & 0x80000000) == 0))  # An unknown word sets the data loss flag of all planes
+        # The frame header is decoded from the first 4 words of the frame (timestamp and frame ID). Frame headers at the end of the block are indexed
+        # with the next block, which starts at the first incomplete frame header (if within the last half of the block, otherwise the frame header is skipped).
+        next_start = stop
+        plane_headers = []
+        for plane_id in analyze_m26_header_ids:
+            plane_word_indices = np.flatnonzero(is_m26_word & (plane_ids == plane_id))
+            header_indices = np.flatnonzero(raw_data_block[plane_word_indices] & 0x00010000)
+            complete = header_indices + 3 < plane_word_indices.shape[0]
+            if stop < n_words and not np.all(complete) and plane_word_indices[header_indices[~complete][0]] >= (stop - start) // 2:
+                next_start = min(next_start, start + int(plane_word_indices[header_indices[~complete][0]]))
+            plane_headers.append((plane_word_indices, header_indices[complete]))
+
+        frames = []
+        frame_plane_indices = []
+        for plane_index, (plane_word_indices, header_indices) in enumerate(plane_headers):
+            header_indices = header_indices[plane_word_indices[header_indices] < next_start - start]
+            frame_words = [raw_data_block[plane_word_indices[header_indices + offset]] for offset in range(4)]
+            # A word of the frame header is valid, if the frame was not interrupted by a new frame header, a data loss or an unknown word (see _interpret_m26_word()).
+            # Otherwise, the interpreter keeps the value of the previous frame.
+            valid = np.ones(shape=header_indices.shape[0], dtype=np.bool_)
+            valid_words = []
+            for offset in range(1, 4):
+                valid &= (frame_words[offset] & 0x00030000) == 0
+                valid &= n_unknown_words[plane_word_indices[header_indices + offset]] == n_unknown_words[plane_word_indices[header_indices]]
+                valid_words.append(valid.copy())
+            timestamp_low = (frame_words[0] & 0x0000ffff).astype(np.int64)
+            timestamp_high = _forward_fill((frame_words[1] & 0x0000ffff).astype(np.int64), valid_words[0], (m26_timestamps[plane_index] >> 16) & 0xffff)
+            frame_id_low = _forward_fill((frame_words[2] & 0x0000ffff).astype(np.int64), valid_words[1], m26_frame_ids[plane_index] & 0xffff)
+            frame_id_high = _forward_fill((frame_words[3] & 0x0000ffff).astype(np.int64), valid_words[2], (m26_frame_ids[plane_index] >> 16) & 0xffff)
+            plane_frames = np.zeros(shape=header_indices.shape[0], dtype=frame_index_dtype)
+            plane_frames['word_index'] = start + plane_word_indices[header_indices]
+            plane_frames['plane'] = analyze_m26_header_ids[plane_index]
+            # 32 bit overflow, if the high word is smaller than the high word of the previous frame
+            plane_frames['time_stamp'] = _add_carries(timestamp_high, m26_timestamps[plane_index], parallel_interpreter.TIMESTAMP_CARRY) | timestamp_low
+            plane_frames['frame_id'] = _add_carries(frame_id_high, m26_frame_ids[plane_index], parallel_interpreter.FRAME_ID_CARRY) | frame_id_low
+            if plane_frames.shape[0]:
+                m26_frame_ids[plane_index] = plane_frames['frame_id'][-1]
+            frames.append(plane_frames)
+            frame_plane_indices.append(np.full(shape=plane_frames.shape[0], fill_value=plane_index, dtype=np.int64))
+        frames = np.concatenate(frames)
+        frame_plane_indices = np.concatenate(frame_plane_indices)
+        order = np.argsort(frames['word_index'], kind='stable')
+        frames, frame_plane_indices = frames[order], frame_plane_indices[order]
+
+        trigger_word_indices = np.flatnonzero(raw_data_block[:next_start - start] & 0x80000000)
+        triggers = np.zeros(shape=trigger_word_indices.shape[0], dtype=trigger_index_dtype)
+        triggers['word_index'] = start + trigger_word_indices
+        if triggers.shape[0]:
+            # 16 bit overflow, if the trigger number is not larger than the previous trigger number (see _interpret_trigger_word())
+            trigger_number_low = (raw_data_block[trigger_word_indices] & 0x0000ffff).astype(np.int64)
+            overflows = trigger_number_low <= np.r_[trigger_number & 0xffff, trigger_number_low[:-1]]
+            if trigger_number < 0:  # first trigger
+                overflows[0] = False
+            triggers['trigger_number'] = ((max(trigger_number, 0) >> 16) + np.cumsum(overflows)) * parallel_interpreter.TRIGGER_NUMBER_CARRY + trigger_number_low
+            trigger_number = triggers['trigger_number'][-1]
+        triggers['trigger_time_stamp'], trigger_timestamp = _get_trigger_timestamps(
+            trigger_words=raw_data_block[trigger_word_indices],
+            trigger_word_indices=triggers['word_index'],
+            frame_word_indices=frames['word_index'],
+            frame_plane_indices=frame_plane_indices,
+            frame_timestamps=frames['time_stamp'],
+            m26_timestamps=m26_timestamps,
+            last_m26_timestamps=last_m26_timestamps,
+            trigger_timestamp=trigger_timestamp)
+        trigger_indices.append(triggers)
+        frame_indices.append(frames)
+        start = next_start
+
+    trigger_index = np.concatenate(trigger_indices) if trigger_indices else np.zeros(shape=0, dtype=trigger_index_dtype)
+    frame_index = np.concatenate(frame_indices) if frame_indices else np.zeros(shape=0, dtype=frame_index_dtype)
+    return trigger_index, frame_index
+
+
+def _forward_fill(values, valid, last_value):
+    ''' Replacing the invalid values by the previous valid value. If there is no previous valid value, last_value is used.
+    '''
+    indices = np.maximum.accumulate(np.where(valid, np.arange(values.shape[0]), -1)) if values.shape[0] else np.zeros(shape=0, dtype=np.int64)
+    return np.where(indices >= 0, values[np.maximum(indices, 0)], last_value)
+
+
+def _add_carries(high_words, last_value, carry):
+    ''' Returning the values (high word shifted by 16 bit) with the overflow carries. An overflow occurs if the high word is smaller than the
+    high word of the previous value. The first value is compared to last_value.
+    '''
+    overflows = high_words < np.r_[(last_value >> 16) & 0xffff, high_words[:-1]]
+    return ((last_value // carry) + np.cumsum(overflows)) * carry + (high_words << 16)
+
+
+@njit(cache=True)
+def _get_trigger_timestamps(trigger_words, trigger_word_indices, frame_word_indices, frame_plane_indices, frame_timestamps, m26_timestamps, last_m26_timestamps, trigger_timestamp):
+    ''' Calculating the 63 bit trigger timestamps from the 15 bit timestamps of the trigger words and the timestamps of the preceding frame headers (see _interpret_trigger_word()).
+    The timestamps of the planes (m26_timestamps, last_m26_timestamps) are updated in-place. Returns the trigger timestamps and the last trigger timestamp.
+    '''
+    trigger_timestamps = np.empty(shape=trigger_words.shape[0], dtype=np.int64)
+    frame_index = 0
+    for trigger_index in range(trigger_words.shape[0] + 1):
+        while frame_index < frame_word_indices.shape[0] and (trigger_index == trigger_words.shape[0] or frame_word_indices[frame_index] < trigger_word_indices[trigger_index]):
+            plane_index = frame_plane_indices[frame_index]
+            last_m26_timestamps[plane_index] = m26_timestamps[plane_index]
+            m26_timestamps[plane_index] = frame_timestamps[frame_index]
+            frame_index += 1
+        if trigger_index == trigger_words.shape[0]:
+            break
+        last_trigger_timestamp = trigger_timestamp
+        for plane_index in range(last_m26_timestamps.shape[0]):
+            if last_m26_timestamps[plane_index] > trigger_timestamp:
+                trigger_timestamp = last_m26_timestamps[plane_index]
+        trigger_timestamp = (0x7fffffffffff8000 & trigger_timestamp) | raw_data_interpreter.get_trigger_timestamp(trigger_words[trigger_index])
+        if last_trigger_timestamp >= 0 and trigger_timestamp <= last_trigger_timestamp:
+            trigger_timestamp = np.int64(2**15) + trigger_timestamp
+        trigger_timestamps[trigger_index] = trigger_timestamp
+    return trigger_timestamps, trigger_timestamp
+
+
+def create_index(raw_data_file, index_file=None, analyze_m26_header_ids=None):
+    ''' Creating the index of a raw data file.
+
+    Parameters
+    ----------
+    raw_data_file : string
+        The filename of the input raw data file.
+    index_file : string
+        The filename of the index file. If None, the index is stored in the sidecar file (see get_index_file()).
+        If the filename of the raw data file is given, the index is stored in the raw data file.
+    analyze_m26_header_ids : list
+        List of Mimosa26 header IDs that will be indexed.
+
+    Returns
+    -------
+    string
+        The filename of the index file.
+    '''
+    if index_file is None:
+        index_file = get_index_file(raw_data_file)
+    if analyze_m26_header_ids is None:
+        analyze_m26_header_ids = raw_data_interpreter.DEFAULT_PYMOSA_M26_HEADER_IDS
+    in_raw_data_file = os.path.abspath(index_file) == os.path.abspath(raw_data_file)
+    logger.info('Creating index of raw data file %s...' % raw_data_file)
+    with tb.open_file(raw_data_file, 'a' if in_raw_data_file else 'r') as in_file_h5:
+        n_words = in_file_h5.root.raw_data.shape[0]
+        trigger_index, frame_index = build_index(in_file_h5.root.raw_data, analyze_m26_header_ids=analyze_m26_header_ids)
+        with (in_file_h5 if in_raw_data_file else tb.open_file(index_file, 'a')) as index_file_h5:
+            if 'RawDataIndex' in index_file_h5.root:
+                index_file_h5.remove_node(index_file_h5.root, 'RawDataIndex', recursive=True)
+            index_group = index_file_h5.create_group(index_file_h5.root, 'RawDataIndex', title='Index of the trigger words and frame headers')
+            for name, index in (('Triggers', trigger_index), ('Frames', frame_index)):
+                index_file_h5.create_table(index_group, name, obj=index, filters=tb.Filters(complib='blosc', complevel=5, fletcher32=False))
+            index_group._v_attrs.version = INDEX_VERSION
+            index_group._v_attrs.n_words = n_words
+            index_group._v_attrs.analyze_m26_header_ids = np.asarray(analyze_m26_header_ids, dtype=np.uint16)
+    logger.info('Indexed %d trigger words and %d frame headers' % (trigger_index.shape[0], frame_index.shape[0]))
+    return index_file
+
+
+def read_index(raw_data_file, index_file=None, analyze_m26_header_ids=None):
+    ''' Reading the index of a raw data file. The index is searched in the given index file, in the raw data file and in the sidecar file.
+    If the index is missing or outdated (e.g., the raw data file has grown), None is returned.
+
+    Returns
+    -------
+    trigger_index, frame_index : np.array
+        See build_index().
+    '''
+    if analyze_m26_header_ids is None:
+        analyze_m26_header_ids = raw_data_interpreter.DEFAULT_PYMOSA_M26_HEADER_IDS
+    with tb.open_file(raw_data_file, 'r') as in_file_h5:
+        n_words = in_file_h5.root.raw_data.shape[0]
+    for filename in ([index_file] if index_file is not None else [raw_data_file, get_index_file(raw_data_file)]):
+        if not os.path.isfile(filename):
+            continue
+        with tb.open_file(filename, 'r') as index_file_h5:
+            if 'RawDataIndex' not in index_file_h5.root:
+                continue
+            index_group = index_file_h5.root.RawDataIndex
+            if index_group._v_attrs.version != INDEX_VERSION or index_group._v_attrs.n_words != n_words or not np.array_equal(index_group._v_attrs.analyze_m26_header_ids, analyze_m26_header_ids):
+                logger.warning('Index in %s is outdated' % filename)
+                continue
+            return index_group.Triggers.read(), index_group.Frames.read()
+    return None
+
+
+def get_index(raw_data_file, index_file=None, analyze_m26_header_ids=None):
+    ''' Reading the index of a raw data file (see read_index()). If the index is missing or outdated, the index is created (see create_index()).
+    '''
+    index = read_index(raw_data_file, index_file=index_file, analyze_m26_header_ids=analyze_m26_header_ids)
+    if index is None:
+        create_index(raw_data_file, index_file=index_file, analyze_m26_header_ids=analyze_m26_header_ids)
+        index = read_index(raw_data_file, index_file=index_file, analyze_m26_header_ids=analyze_m26_header_ids)
+    return index
+
+
+def get_trigger(trigger_index, trigger_number=None, timestamp=None, event_number=None, add_missing_events=False):
+    ''' Returning the index of the first trigger with a trigger number (or trigger timestamp or event number) equal or larger than the given value.
+
+    Parameters
+    ----------
+    trigger_index : np.array
+        Trigger words (see build_index()).
+    trigger_number : int
+        Trigger number (including the overflow carries).
+    timestamp : int
+        Trigger timestamp in units of 40 MHz clock cycles (including the overflow carries).
+    event_number : int
+        Event number (see get_event_numbers()).
+    add_missing_events : bool
+        If True, the missing trigger numbers are counted as events.
+
+    Returns
+    -------
+    int
+        Index of the trigger in the trigger index.
+    '''
+    if sum(value is not None for value in (trigger_number, timestamp, event_number)) != 1:
+        raise ValueError('Either trigger_number, timestamp or event_number must be given.')
+    if trigger_number is not None:
+        triggers = np.flatnonzero(trigger_index['trigger_number'] >= trigger_number)
+    elif timestamp is not None:
+        triggers = np.flatnonzero(trigger_index['trigger_time_stamp'] >= timestamp)
+    else:
+        triggers = np.flatnonzero(get_event_numbers(trigger_index, add_missing_events=add_missing_events) >= event_number)
+    if not triggers.shape[0]:
+        name, value = [(name, value) for name, value in (('trigger number', trigger_number), ('timestamp', timestamp), ('event number', event_number)) if value is not None][0]
+        raise ValueError('No trigger found with %s %d or later.' % (name, value))
+    return int(triggers[0])
+
+
+def get_event_numbers(trigger_index, add_missing_events=False):
+    ''' Returning the event number of each trigger. If add_missing_events is True, the missing trigger numbers are counted as events.
+    '''
+    event_numbers = np.arange(trigger_index.shape[0], dtype=np.int64)
+    if add_missing_events and trigger_index.shape[0]:
+        event_numbers[1:] += np.cumsum(np.maximum(np.diff(trigger_index['trigger_number']) - 1, 0))
+    return event_numbers
+
+
+def get_resync_index(trigger_index, frame_index, index, analyze_m26_header_ids, n_frames=parallel_interpreter.RESYNC_N_FRAMES, n_triggers=parallel_interpreter.RESYNC_N_TRIGGERS):
+    ''' Returning the resync point in front of index from the index (see parallel_interpreter.get_resync_index()).
+    Between the resync point and the index, at least n_triggers trigger words are present and each Mimosa26 plane has at least n_frames frame headers
+    in front of the first of these trigger words. If no such point exists, 0 is returned.
+    '''
+    n_triggers_before = np.searchsorted(trigger_index['word_index'], index)
+    if n_triggers_before < n_triggers:
+        return 0
+    trigger_word_index = trigger_index['word_index'][n_triggers_before - n_triggers]
+    resync_index = trigger_word_index
+    for plane_id in analyze_m26_header_ids:
+        plane_frames = frame_index['word_index'][frame_index['plane'] == plane_id]
+        n_frames_before = np.searchsorted(plane_frames, trigger_word_index)
+        if n_frames_before < n_frames:
+            return 0
+        resync_index = min(resync_index, plane_frames[n_frames_before - n_frames])
+    return int(resync_index)
+
+
+def get_state_offsets(state, trigger_index, frame_index, index, analyze_m26_header_ids, add_missing_events=False):
+    ''' Calculating the offsets (event number, overflow carries) between the interpreter state at index after a warm-up and the interpreter state
+    of the interpretation from the beginning of the raw data (see parallel_interpreter.get_state_offsets()). The offsets are applied with parallel_interpreter.apply_state_offsets().
+
+    Parameters
+    ----------
+    state : dict
+        Interpreter state at index.
+    trigger_index, frame_index : np.array
+        The index (see build_index()).
+    index : int
+        Raw data word index.
+    analyze_m26_header_ids : list
+        List of Mimosa26 header IDs that will be interpreted.
+    add_missing_events : bool
+        If True, the missing trigger numbers are counted as events.
+
+    Returns
+    -------
+    dict
+    '''
+    offsets = {'event_number': np.int64(0), 'trigger_number': np.int64(0), 'time_stamp': np.int64(0), 'frame_id': np.zeros(shape=len(analyze_m26_header_ids), dtype=np.int64)}
+    n_triggers_before = np.searchsorted(trigger_index['word_index'], index)
+    if n_triggers_before:
+        last_trigger = trigger_index[n_triggers_before - 1]
+        offsets['event_number'] = get_event_numbers(trigger_index[:n_triggers_before], add_missing_events=add_missing_events)[-1] - state['event_number']
+        offsets['trigger_number'] = _get_carry_offset(last_trigger['trigger_number'], state['trigger_number'], parallel_interpreter.TRIGGER_NUMBER_CARRY)
+        offsets['time_stamp'] = _get_carry_offset(last_trigger['trigger_time_stamp'], state['trigger_timestamp'], parallel_interpreter.TIMESTAMP_CARRY)
+    for plane_index, plane_id in enumerate(analyze_m26_header_ids):
+        plane_frames = frame_index[frame_index['plane'] == plane_id]
+        n_frames_before = np.searchsorted(plane_frames['word_index'], index)
+        if n_frames_before:
+            offsets['frame_id'][plane_index] = _get_carry_offset(plane_frames[n_frames_before - 1]['frame_id'], state['m26_frame_ids'][plane_index], parallel_interpreter.FRAME_ID_CARRY)
+            if not n_triggers_before and plane_index == 0:
+                offsets['time_stamp'] = _get_carry_offset(plane_frames[n_frames_before - 1]['time_stamp'], state['m26_timestamps'][plane_index], parallel_interpreter.TIMESTAMP_CARRY)
+    return offsets
+
+
+def check_state(state, trigger_index, frame_index, resync_index, index, analyze_m26_header_ids, n_frames=parallel_interpreter.RESYNC_N_FRAMES):
+    ''' Checking the interpreter state at index after a warm-up from resync_index (with the offsets applied, see get_state_offsets()) with the index.
+    The trigger number of the first trigger of the warm-up is not checked (see raw_data_interpreter._interpret_trigger_word()), thus this trigger
+    must be built. The last trigger and the buffered triggers must be the last trigger words in front of index (trigger number, trigger timestamp
+    and event number) and each Mimosa26 plane must have at least n_frames frame headers between the resync point and the first buffered trigger word
+    (or index, if no trigger is buffered). Returns False if the warm-up is too short.
+    '''
+    if resync_index == 0:  # No warm-up, interpretation from the beginning
+        return True
+    trigger_data = state['trigger_data']
+    n_triggers_before = np.searchsorted(trigger_index['word_index'], index)
+    if trigger_data.shape[0] >= n_triggers_before - np.searchsorted(trigger_index['word_index'], resync_index):
+        return False
+    if state['trigger_number'] != trigger_index['trigger_number'][n_triggers_before - 1] or state['trigger_timestamp'] != trigger_index['trigger_time_stamp'][n_triggers_before - 1]:
+        return False
+    buffered_triggers = trigger_index[n_triggers_before - trigger_data.shape[0]:n_triggers_before]
+    if not np.array_equal(trigger_data['trigger_number'], buffered_triggers['trigger_number']) or not np.array_equal(trigger_data['trigger_time_stamp'], buffered_triggers['trigger_time_stamp']):
+        return False
+    if not np.array_equal(trigger_data['event_number'], np.arange(n_triggers_before - trigger_data.shape[0], n_triggers_before)):
+        return False
+    first_word_index = buffered_triggers['word_index'][0] if buffered_triggers.shape[0] else index  # The hits of the next triggers are in front of index
+    for plane_id in analyze_m26_header_ids:
+        plane_frames = frame_index['word_index'][frame_index['plane'] == plane_id]
+        if np.searchsorted(plane_frames, first_word_index) - np.searchsorted(plane_frames, resync_index) < n_frames:
+            return False
+    return True
+
+
+def _get_carry_offset(value, state_value, carry):
+    ''' Returning the multiple of the carry closest to the difference of the values. '''
+    return np.int64(np.round((np.int64(value) - np.int64(state_value)) / carry)) * carry
+
+
+def main(args=None):
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - [%(levelname)-8s] (%(threadName)-10s) %(message)s")
+    parser = argparse.ArgumentParser(description='Create the seek index of Mimosa26 raw data files.')
+    parser.add_argument('files', nargs='+', help='Raw data files or glob patterns')
+    parser.add_argument('--in-raw-data-file', action='store_true', help='Store the index in the raw data file (default: sidecar file <raw data file>_index.h5)')
+    parser.add_argument('--header-ids', type=int, nargs='+', default=None, help='Mimosa26 header IDs to index')
+    args = parser.parse_args(args)
+
+    for pattern in args.files:
+        for raw_data_file in sorted(glob.glob(pattern)):
+            create_index(raw_data_file, index_file=raw_data_file if args.in_raw_data_file else None, analyze_m26_header_ids=args.header_ids)
+
+
+if __name__ == "__main__":
+    main()
@@ -17,8 +17,13 @@ The raw data structure of Mimosa26 data looks as follows:
  - Frame trailer HIGH and LOW (indicates end of Mimosa26 frame) [word index 6 + 7]
 
 '''
+import collections
+import time
+
 import numba
-from numba import njit
+from numba import njit, types
+from numba.experimental import structref
+from numba.extending import overload
 import numpy as np
 
 
@@ -29,6 +34,7 @@ FRAME_UNIT_CYCLE = int(MIMOSA_FRAME_CYCLE * MIMOSA_FREQ)  # = 4608, time for one
 ROW_UNIT_CYCLE = int(MIMOSA_FRAME_CYCLE * MIMOSA_FREQ / N_ROWS_MIMOSA)  # = 8, time to read one row in units of 40 MHz clock cycles
 TIMING_OFFSET = -112  # Correct for offset between M26 40 MHz clock and 40 MHz from R/O system. Offset determined by maximum correlation between the time reference and Mimosa26 telescope.
 MAX_BUFFER_TIME_SLIP = 5  # max. time (in seconds) for storing hits in buffer before they get removed if no trigger appears
+DECODER_VERSION = 3  # Increase if the decoded telescope data or trigger data changes, outdated caches of the decoded data are created again (see decoded_data_cache)
 DEFAULT_PYMOSA_M26_HEADER_IDS = [1, 2, 3, 4, 5, 6]  # Default header IDs for the Mimosa26 data generated by the pymosa software. The header IDs are set in the pymosa readout software.
 
 hits_dtype = np.dtype([
@@ -42,6 +48,23 @@ hits_dtype = np.dtype([
     ('row', '<u2'),
     ('event_status', '<u4')])
 
+# Compact hit format (see get_hits_dtype()): the trigger data and the timestamps of the event are omitted, narrow integer types are used
+compact_hits_dtype = np.dtype([
+    ('plane', '<u1'),
+    ('event_number', '<i8'),
+    ('column', '<u2'),
+    ('row', '<u2'),
+    ('event_status', '<u2')])
+
+# Slim hit format (see get_hits_dtype()) for the normalized layout with an event table (see get_events_dtype()): only the data of each hit
+slim_hits_dtype = np.dtype([
+    ('plane', '<u1'),
+    ('event_number', '<i8'),
+    ('row_time_stamp', '<i8'),
+    ('frame_id', '<i8'),
+    ('column', '<u2'),
+    ('row', '<u2')])
+
 telescope_data_dtype = np.dtype([
     ('plane', '<u1'),
     ('time_stamp', '<i8'),
@@ -66,116 +89,153 @@ TIMESTAMP_OVERFLOW = 0x00000020  # Indicating the overflow of the Mimosa26 times
 FRAME_ID_OVERFLOW = 0x00000040  # Indicating the overflow of the Mimosa26 frame ID
 OVERFLOW_FLAG = 0x00000080  # Indicating the occurrence of the overflow flag for a particular Mimosa26 row
 
+NEW_FRAME = -1  # Return value of _interpret_m26_word() for a frame header
+TRIGGER_WORD = -1  # Demultiplexing of the raw data words (in addition to the plane index)
+UNKNOWN_WORD = -2
+SKIPPED_WORD = -3
+
+# Placeholder of the output array which is passed to the kernels if no output array is given (see RawDataInterpreter.interpret_raw_data())
+_no_telescope_data = np.zeros(shape=0, dtype=telescope_data_dtype)
+
+# Interpreter state variables (in addition to the trigger and telescope data buffers)
+_state_arrays = ('m26_frame_ids', 'm26_frame_length', 'm26_data_loss', 'm26_word_index', 'm26_timestamps', 'last_m26_timestamps', 'm26_n_words', 'm26_rows', 'm26_frame_status', 'last_completed_m26_frame_ids')
+_state_scalars = ('event_number', 'trigger_number', 'trigger_timestamp')
+# Fields of the interpreter state which is passed to the kernels (see _InterpreterState), the buffers and the scalars are replaced by the kernels
+_state_buffers = ('trigger_data', 'trigger_data_index', 'telescope_data', 'telescope_data_start_index', 'telescope_data_index', 'hits', 'hits_index', 'events', 'events_index') + _state_scalars
+_state_fields = _state_buffers + _state_arrays + ('m26_frame_start_indices', 'analyze_m26_header_ids', 'plane_id_to_index')
+
+
+@structref.register
+class _InterpreterStateType(types.StructRef):
+    ''' Numba type of the interpreter state (see _InterpreterState).
+    '''
+
+    def preprocess_fields(self, fields):
+        return tuple((name, types.unliteral(typ)) for name, typ in fields)
+
+
+class _InterpreterState(structref.StructRefProxy):
+    ''' Interpreter state (buffers, per plane and per event variables) in a numba structref. The state is passed to the kernels as a single object
+    and is modified in place (see _decode_state(), _interpret_state() and _decode_chunk_state()), thus the arguments and the results of the kernels
+    are not converted for each raw data chunk. The per plane arrays are shared with the interpreter, the buffers and the scalars are accessed with
+    _get_state_buffers() and _set_state_buffers().
+    '''
+    pass
+
+
+structref.define_constructor(_InterpreterState, _InterpreterStateType, _state_fields)
+structref.define_boxing(_InterpreterStateType, _InterpreterState)
+
 
 # Mimosa26 raw data
-@njit
+@njit(cache=True)
 def is_mimosa_data(word):  # Check for Mimosa data word
     return (0xff000000 & word) == 0x20000000
 
 
-@njit
+@njit(cache=True)
 def get_plane_number(word):  # There are 6 planes in the stream, starting from 1; return plane number
     return (word >> 20) & 0xf
 
 
 # Frame header
-@njit
+@njit(cache=True)
 def is_frame_header(word):  # Check if frame header high word (frame start flag is set by R/0)
     return (0x00010000 & word) == 0x00010000
 
 
-@njit
+@njit(cache=True)
 def is_data_loss(word):  # Indicates data loss
     return (0x00020000 & word) == 0x00020000
 
 
-@njit
+@njit(cache=True)
 def get_m26_timestamp_low(word):  # Timestamp of Mimosa26 data from frame header low (generated by R/0)
     return 0x0000ffff & word
 
 
-@njit
+@njit(cache=True)
 def get_m26_timestamp_high(word):  # Timestamp of Mimosa26 data from frame header high (generated by R/0)
     return (0x0000ffff & word) << 16
 
 
-@njit
+@njit(cache=True)
 def is_frame_header0(word):  # Check if frame header0 word
     return (0x0000ffff & word) == 0x00005555
 
 
-@njit
+@njit(cache=True)
 def is_frame_header1(word, plane):  # Check if frame header1 word for the actual plane
     return (0x0000ffff & word) == (0x00005550 | plane)
 
 
 # Frame counter
-@njit
+@njit(cache=True)
 def get_frame_id_low(word):  # Get the frame id from the frame id low word
     return 0x0000ffff & word
 
 
-@njit
+@njit(cache=True)
 def get_frame_id_high(word):  # Get the frame id from the frame id high word
     return (0x0000ffff & word) << 16
 
 
 # Data length
-@njit
+@njit(cache=True)
 def get_frame_length(word):  # Get length of Mimosa26 frame
     return (0x0000ffff & word)
 
 
 # Status / line word
-@njit
+@njit(cache=True)
 def get_n_words(word):  # Return the number of data words for the actual row
     return 0x0000000f & word
 
 
-@njit
+@njit(cache=True)
 def get_row(word):  # Extract row from Mimosa26 hit word
     return (0x00007ff0 & word) >> 4
 
 
-@njit
+@njit(cache=True)
 def has_overflow(word):
     return (0x00008000 & word) != 0
 
 
 # State word
-@njit
+@njit(cache=True)
 def get_n_hits(word):  # Returns the number of hits given by actual column word
     return 0x00000003 & word
 
 
-@njit
+@njit(cache=True)
 def get_column(word):  # Extract column from Mimosa26 hit word
     return (0x00001ffc & word) >> 2
 
 
 # Frame trailer
-@njit
+@njit(cache=True)
 def is_frame_trailer0(word):  # Check if frame trailer0 word
     return (0x0000ffff & word) == 0xaa50
 
 
-@njit
+@njit(cache=True)
 def is_frame_trailer1(word, plane):  # Check if frame trailer1 word for the actual plane
     return (0x0000ffff & word) == (0xaa50 | plane)
 
 
 # Trigger words
-@njit
+@njit(cache=True)
 def is_trigger_word(word):  # Check if TLU word (trigger)
     return (0x80000000 & word) == 0x80000000
 
 
-@njit
+@njit(cache=True)
 def get_trigger_timestamp(word):  # Get timestamp of TLU word
     return (word & 0x7fff0000) >> 16
 
 
-@njit
+@njit(cache=True)
 def get_trigger_number(word, trigger_data_format):  # Get trigger number of TLU word
     if trigger_data_format == 2:
         return word & 0x0000ffff
@@ -183,8 +243,132 @@ def get_trigger_number(word, trigger_data_format):  # Get trigger number of TLU
         return word & 0x7fffffff
 
 
-class RawDataInterpreter(object):
-    ''' Class to convert the raw data chunks to hits'''
+# Output of Decoder.decode() and input of EventBuilder.build_events()
+DecodedData = collections.namedtuple('DecodedData', ['telescope_data', 'trigger_data', 'telescope_data_index', 'last_completed_m26_frame_ids', 'm26_timestamps'])
+
+
+def get_plane_id_to_index(analyze_m26_header_ids=None):
+    ''' Returning the Mimosa26 header IDs and the array which maps the header ID to the plane index.
+
+    Parameters:
+    -----------
+    analyze_m26_header_ids : list
+        List of Mimosa26 header IDs that will be interpreted.
+        If None, the value defaults to the global value raw_data_interpreter.DEFAULT_PYMOSA_M26_HEADER_IDS.
+    '''
+    if analyze_m26_header_ids is None:
+        analyze_m26_header_ids = DEFAULT_PYMOSA_M26_HEADER_IDS
+    for analyze_m26_header_id in analyze_m26_header_ids:
+        if analyze_m26_header_id < 0 or analyze_m26_header_id >= 2**16:
+            raise ValueError('Invalid header ID.')
+    analyze_m26_header_ids = np.asarray(analyze_m26_header_ids, dtype=np.uint16)
+    plane_id_to_index = -1 * np.ones(shape=max(analyze_m26_header_ids) + 1, dtype=np.int32)
+    for plane_index, plane_id in enumerate(analyze_m26_header_ids):
+        plane_id_to_index[plane_id] = plane_index
+    return analyze_m26_header_ids, plane_id_to_index
+
+
+def get_hits_dtype(hits_format=None):
+    ''' Returning the dtype of the hits for a hit format. Only the columns of the dtype are written by the event building (see _set_hit_field()).
+
+    Parameters:
+    -----------
+    hits_format : string, list or np.dtype
+        'default' or None: all columns (hits_dtype).
+        'compact': hits without the trigger data and the timestamps, narrow integer types (compact_hits_dtype).
+        'slim': hits without the data of the event (slim_hits_dtype), the event data is stored in the event table (see get_events_dtype()).
+        List of column names: the selected columns of hits_dtype.
+        np.dtype: a subset of the columns of hits_dtype with arbitrary integer types (e.g., narrower types). Values which do not fit into the type are truncated.
+        The columns plane and event_number are required.
+    '''
+    if hits_format is None or (isinstance(hits_format, str) and hits_format == 'default'):
+        return hits_dtype
+    if isinstance(hits_format, str) and hits_format == 'compact':
+        return compact_hits_dtype
+    if isinstance(hits_format, str) and hits_format == 'slim':
+        return slim_hits_dtype
+    if isinstance(hits_format, np.dtype):
+        dtype = hits_format
+    else:
+        if isinstance(hits_format, str) or any(name not in hits_dtype.names for name in hits_format):
+            raise ValueError('Invalid hit format %s.' % str(hits_format))
+        dtype = np.dtype([(name, hits_dtype[name]) for name in hits_format])
+    if dtype.names is None or any(name not in hits_dtype.names or dtype[name].kind not in 'iu' for name in dtype.names):
+        raise ValueError('The hit format must contain only columns of hits_dtype with integer types.')
+    if 'plane' not in dtype.names or 'event_number' not in dtype.names:
+        raise ValueError('The hit format must contain the columns plane and event_number.')
+    return dtype
+
+
+def get_events_dtype(n_planes):
+    ''' Returning the dtype of the events (one row per event, see RawDataInterpreter.interpret_raw_data() with return_events=True).
+    The event contains the trigger data, the number of hits and the event status of each plane (in the order of the header IDs) and
+    the rows of the hits of the event (from hit_start_row to hit_stop_row, excluding hit_stop_row).
+
+    Parameters:
+    -----------
+    n_planes : int
+        The number of Mimosa26 planes.
+    '''
+    return np.dtype([
+        ('event_number', '<i8'),
+        ('trigger_number', '<i8'),
+        ('trigger_time_stamp', '<i8'),
+        ('trigger_status', '<u4'),
+        ('n_hits', '<u4', (n_planes,)),
+        ('event_status', '<u4', (n_planes,)),
+        ('hit_start_row', '<i8'),
+        ('hit_stop_row', '<i8')])
+
+
+def _check_output_array(out, dtype, placeholder=None):
+    ''' Checking an output array which is given by the caller (e.g., hits_out of RawDataInterpreter.interpret_raw_data()).
+    Returns the placeholder if out is None.
+    '''
+    if out is None:
+        return placeholder
+    if not isinstance(out, np.ndarray) or out.dtype != dtype or out.ndim != 1 or not out.flags.c_contiguous or not out.flags.writeable:
+        raise ValueError('The output array must be a writeable C-contiguous 1-dimensional array with dtype %s.' % str(dtype))
+    return out
+
+
+def _state_buffer_property(name):
+    ''' Returning the property for a buffer or a scalar of the interpreter state (see _InterpreterState).
+    '''
+    index = _state_buffers.index(name)
+
+    def getter(self):
+        return _get_state_buffers(self._state)[index]
+
+    def setter(self, value):
+        buffers = list(_get_state_buffers(self._state))
+        buffers[index] = value
+        _set_state_buffers(self._state, *buffers)
+
+    return property(getter, setter)
+
+
+class _RawDataDecoder(object):
+    ''' Decoding of the raw data words into the trigger buffer and the telescope data ring buffer (base class of Decoder and RawDataInterpreter).
+
+    The interpreter state is stored in a numba structref (see _InterpreterState) which is passed to the kernels. The buffers and the scalars
+    (e.g., trigger_data, telescope_data_index, event_number) are properties which access the interpreter state.
+    '''
+
+    trigger_data = _state_buffer_property('trigger_data')
+    trigger_data_index = _state_buffer_property('trigger_data_index')
+    telescope_data = _state_buffer_property('telescope_data')  # Ring buffer, see _extend_ring_buffer()
+    telescope_data_start_index = _state_buffer_property('telescope_data_start_index')
+    telescope_data_index = _state_buffer_property('telescope_data_index')
+    hits = _state_buffer_property('hits')
+    hits_index = _state_buffer_property('hits_index')
+    events = _state_buffer_property('events')  # Event buffer, see get_events_dtype()
+    events_index = _state_buffer_property('events_index')
+    event_number = _state_buffer_property('event_number')  # The event number of the actual trigger, event number starts at 0
+    trigger_number = _state_buffer_property('trigger_number')  # The trigger number of the actual trigger
+    trigger_timestamp = _state_buffer_property('trigger_timestamp')  # The trigger timestamp of the actual trigger
+
+    hits_dtype = hits_dtype  # The dtype of the hit buffer (see RawDataInterpreter)
 
     def __init__(self, analyze_m26_header_ids=None):
         '''
@@ -194,26 +378,13 @@ class RawDataInterpreter(object):
             List of Mimosa26 header IDs that will be interpreted.
             If None, the value defaults to the global value raw_data_interpreter.DEFAULT_PYMOSA_M26_HEADER_IDS.
         '''
-        if analyze_m26_header_ids is None:
-            self.analyze_m26_header_ids = DEFAULT_PYMOSA_M26_HEADER_IDS
-        else:
-            self.analyze_m26_header_ids = analyze_m26_header_ids
-        for analyze_m26_header_id in self.analyze_m26_header_ids:
-            if analyze_m26_header_id < 0 or analyze_m26_header_id >= 2**16:
-                raise ValueError('Invalid header ID.')
-        self.analyze_m26_header_ids = np.asarray(self.analyze_m26_header_ids, dtype=np.uint16)
-        self.plane_id_to_index = -1 * np.ones(shape=max(self.analyze_m26_header_ids) + 1, dtype=np.int32)
-        for plane_index, plane_id in enumerate(self.analyze_m26_header_ids):
-            self.plane_id_to_index[plane_id] = plane_index
+        self.analyze_m26_header_ids, self.plane_id_to_index = get_plane_id_to_index(analyze_m26_header_ids)
         self.reset()
 
     def reset(self):  # Reset variables
-        # Temporary arrays
-        self.trigger_data = np.zeros(shape=0, dtype=trigger_data_dtype)
-        self.trigger_data_index = np.int64(-1)
-        self.telescope_data = np.zeros(shape=0, dtype=telescope_data_dtype)
-        self.telescope_data_index = np.int64(-1)
+        self._reset_decoder()
 
+    def _reset_decoder(self):
         # Raw data interpreter
         # Per frame variables
         self.m26_frame_ids = np.zeros(shape=len(self.analyze_m26_header_ids), dtype=np.int64)  # The Mimosa26 frame ID of the actual frame
@@ -226,14 +397,72 @@ class RawDataInterpreter(object):
         self.m26_rows = np.zeros(shape=len(self.analyze_m26_header_ids), dtype=np.uint32)  # The actual readout row (rolling shutter)
         self.m26_frame_status = np.zeros(shape=len(self.analyze_m26_header_ids), dtype=np.uint32)  # The status flags for the actual frames
         self.last_completed_m26_frame_ids = -1 * np.ones(shape=len(self.analyze_m26_header_ids), dtype=np.int64)  # The status if the frame is complete for the actual frame
-        # Per event variables
-        self.event_number = np.int64(-1)  # The event number of the actual trigger, event number starts at 0
-        self.trigger_number = np.int64(-1)  # The trigger number of the actual trigger
-        self.trigger_timestamp = np.int64(0)  # The trigger timestamp of the actual trigger
+        self.m26_frame_start_indices = np.zeros(shape=len(self.analyze_m26_header_ids), dtype=np.int64)  # The telescope data index of the first hit of the actual frame
+
+        # Temporary arrays and per event variables
+        self._create_state(
+            trigger_data=np.zeros(shape=0, dtype=trigger_data_dtype),
+            trigger_data_index=-1,
+            telescope_data=np.zeros(shape=0, dtype=telescope_data_dtype),
+            telescope_data_start_index=0,
+            telescope_data_index=-1,
+            hits=np.zeros(shape=0, dtype=self.hits_dtype),
+            hits_index=-1,
+            events=np.zeros(shape=0, dtype=get_events_dtype(len(self.analyze_m26_header_ids))),
+            events_index=-1,
+            event_number=-1,
+            trigger_number=-1,
+            trigger_timestamp=0)
+
+        self._multithreading = False
+
+    def _create_state(self, **buffers):
+        ''' Creating the interpreter state (see _InterpreterState) from the buffers and scalars and the per plane arrays of the interpreter.
+        '''
+        # The kernels taking the state call the multithreaded kernels (see _interpret_raw_data_planes()). If such a kernel is compiled for a new state type
+        # while the multithreaded kernels are loaded from the cache, numba does not start the threading layer when loading it from the cache later on
+        # (the cached kernel crashes). Starting the threading layer before the first call avoids this (get_num_threads() starts the threads).
+        numba.get_num_threads()
+        self._state = _new_interpreter_state(*[buffers[name] if name in _state_buffers else getattr(self, name) for name in _state_fields])
 
-        # Event builder
-        self.hits = np.zeros(shape=0, dtype=hits_dtype)
-        self.hits_index = np.int64(-1)
+    @property
+    def multithreading(self):
+        return self._multithreading
+
+    @multithreading.setter
+    def multithreading(self, value):
+        self._multithreading = bool(value)
+
+    def _decode_raw_data(self, raw_data, build_all_events, add_missing_events):
+        ''' Interpreting the raw data words. The triggers and the hits are added to the trigger buffer and to the telescope data ring buffer.
+        '''
+        if raw_data is None:
+            raw_data = np.zeros(shape=0, dtype=np.uint32)
+        _decode_state(self._state, raw_data, add_missing_events, build_all_events, self.multithreading)
+
+
+class RawDataInterpreter(_RawDataDecoder):
+    ''' Class to convert the raw data chunks to hits (decoding of the raw data and event building in one step, see also Decoder and EventBuilder)'''
+
+    def __init__(self, analyze_m26_header_ids=None, hits_format=None):
+        '''
+        Parameters:
+        -----------
+        analyze_m26_header_ids : list
+            List of Mimosa26 header IDs that will be interpreted.
+            If None, the value defaults to the global value raw_data_interpreter.DEFAULT_PYMOSA_M26_HEADER_IDS.
+        hits_format : string, list or np.dtype
+            The columns and types of the hits (see get_hits_dtype()).
+        '''
+        self.hits_dtype = get_hits_dtype(hits_format)
+        self._no_hits = np.zeros(shape=0, dtype=self.hits_dtype)  # Placeholder of the output array, see interpret_raw_data()
+        super(RawDataInterpreter, self).__init__(analyze_m26_header_ids=analyze_m26_header_ids)
+
+    def reset(self):  # Reset variables
+        self._reset_decoder()
+
+        # Event builder (the hit buffer is part of the interpreter state)
+        self._timing_offset_event_builders = {}  # Event builder for each timing offset, see interpret_raw_data_timing_offsets()
 
         # Properties
         self._add_missing_events = False
@@ -255,7 +484,48 @@ class RawDataInterpreter(object):
     def timing_offset(self, value):
         self._timing_offset = int(value)
 
-    def interpret_raw_data(self, raw_data=None, build_all_events=False):
+    def get_state(self):
+        ''' Returning a copy of the interpreter state (buffered trigger and telescope data, per plane and per event variables).
+        The state can be restored with set_state().
+        '''
+        state = {}
+        state['trigger_data'] = self.trigger_data[:self.trigger_data_index + 1].copy()
+        state['telescope_data'] = _get_ring_buffer_data(self.telescope_data, self.telescope_data_start_index, self.telescope_data_index)
+        for name in _state_arrays:
+            state[name] = getattr(self, name).copy()
+        state['m26_frame_start_indices'] = np.maximum(self.m26_frame_start_indices - self.telescope_data_start_index, 0)  # Relative to the buffered telescope data
+        for name in _state_scalars:
+            state[name] = np.int64(getattr(self, name))
+        return state
+
+    def set_state(self, state):
+        ''' Restoring the interpreter state from a state obtained by get_state().
+
+        Parameters:
+        -----------
+        state : dict
+            The interpreter state.
+        '''
+        for name in _state_arrays:
+            setattr(self, name, state[name].copy())
+        self.m26_frame_start_indices = state['m26_frame_start_indices'].copy()
+        telescope_data = _extend_ring_buffer(np.zeros(shape=0, dtype=telescope_data_dtype), 0, -1, size=state['telescope_data'].shape[0])
+        telescope_data[:state['telescope_data'].shape[0]] = state['telescope_data']
+        self._create_state(
+            trigger_data=state['trigger_data'].copy(),
+            trigger_data_index=state['trigger_data'].shape[0] - 1,
+            telescope_data=telescope_data,
+            telescope_data_start_index=0,
+            telescope_data_index=state['telescope_data'].shape[0] - 1,
+            hits=self.hits,
+            hits_index=self.hits_index,
+            events=self.events,
+            events_index=self.events_index,
+            event_number=np.int64(state['event_number']),
+            trigger_number=np.int64(state['trigger_number']),
+            trigger_timestamp=np.int64(state['trigger_timestamp']))
+
+    def interpret_raw_data(self, raw_data=None, build_all_events=False, copy=True, hits_out=None, telescope_data_out=None, return_events=False):
         ''' Converting the raw data array to a hit array.
         The is the only function that needs to be called to convert the raw data.
 
@@ -266,63 +536,651 @@ class RawDataInterpreter(object):
         build_all_events : bool
             If True, build all events from the remaining trigger_data and telescope_data_array.
             Use this only after the last raw data chunk to receive the the remaining events in the buffers.
+        copy : bool
+            If False, the returned arrays are read-only views of the internal buffers (if possible) which are only valid until the next call.
+            This avoids copying the data for small raw data chunks (e.g., online monitoring).
+        hits_out : np.array
+            Preallocated array (hits_dtype, see hits_format) for the hits. If the array is large enough, the hits are written to the beginning of the array
+            and a view of the valid rows is returned, otherwise a new array (or a view, see copy) is returned. The array can be reused for the next call.
+        telescope_data_out : np.array
+            Preallocated array (telescope_data_dtype) for the telescope data, see hits_out.
+        return_events : bool
+            If True, the built events are returned in addition (one row per event, see get_events_dtype()).
+
+        Returns
+        -------
+        hits : np.array
+            Array with the hits (hits_dtype, see hits_format) assigned to events. The number of valid rows is given by the length of the array.
+        telescope_data : np.array
+            Array with the hits of the Mimosa26 planes without assignment to events.
+        events : np.array
+            Array with the events (see get_events_dtype()), the hit rows refer to the returned hits. Only returned if return_events is True.
         '''
         if raw_data is None:
             raw_data = np.zeros(shape=0, dtype=np.uint32)
-        if self.telescope_data_index != -1:
-            telescope_data_index_start = self.telescope_data_index + 1
-        else:
-            telescope_data_index_start = 0
-        # Analyze raw data
-        self.trigger_data, self.trigger_data_index, self.telescope_data, self.telescope_data_index, self.m26_frame_ids, self.m26_frame_length, self.m26_data_loss, self.m26_word_index, self.m26_timestamps, self.last_m26_timestamps, self.m26_n_words, self.m26_rows, self.m26_frame_status, self.last_completed_m26_frame_ids, self.event_number, self.trigger_number, self.trigger_timestamp = _interpret_raw_data(
-            raw_data=raw_data,
-            trigger_data=self.trigger_data,
-            trigger_data_index=self.trigger_data_index,
-            telescope_data=self.telescope_data,
-            telescope_data_index=self.telescope_data_index,
-            m26_frame_ids=self.m26_frame_ids,
-            m26_frame_length=self.m26_frame_length,
-            m26_data_loss=self.m26_data_loss,
-            m26_word_index=self.m26_word_index,
-            m26_timestamps=self.m26_timestamps,
-            last_m26_timestamps=self.last_m26_timestamps,
-            m26_n_words=self.m26_n_words,
-            m26_rows=self.m26_rows,
-            m26_frame_status=self.m26_frame_status,
-            last_completed_m26_frame_ids=self.last_completed_m26_frame_ids,
-            event_number=self.event_number,
-            trigger_number=self.trigger_number,
-            trigger_timestamp=self.trigger_timestamp,
-            add_missing_events=self.add_missing_events,
-            build_all_events=build_all_events,
-            analyze_m26_header_ids=self.analyze_m26_header_ids,
-            plane_id_to_index=self.plane_id_to_index)
+        hits_out = _check_output_array(hits_out, self.hits_dtype, placeholder=self._no_hits)
+        telescope_data_out = _check_output_array(telescope_data_out, telescope_data_dtype, placeholder=_no_telescope_data)
+        hits, telescope_data, events = _interpret_state(self._state, raw_data, self.timing_offset, self.add_missing_events, build_all_events, self.multithreading, bool(copy), hits_out, telescope_data_out, bool(return_events))
+        if not copy:
+            hits.flags.writeable = False
+            telescope_data.flags.writeable = False
+            events.flags.writeable = False
+        if return_events:
+            return hits, telescope_data, events
+        return hits, telescope_data
+
+    def interpret_raw_data_timing_offsets(self, timing_offsets, raw_data=None, build_all_events=False):
+        ''' Converting the raw data array to hit arrays for several timing offsets.
+        The raw data is decoded once and the events are built for each timing offset (only the event building depends on the timing offset).
+        Each timing offset has its own event builder with its own trigger buffer and event number, the buffered hits are shared. The triggers are
+        added to the trigger buffer of each event builder as done by the EventBuilder (see _add_triggers()). Thus, the hits are identical to the hits
+        of interpret_raw_data() with the respective timing offset. The same timing offsets must be used for all raw data chunks.
+
+        Parameters:
+        -----------
+        timing_offsets : list
+            The timing offsets.
+        raw_data : np.array
+            The array with the raw data words.
+        build_all_events : bool
+            If True, build all events from the remaining trigger_data and telescope_data_array.
+
+        Returns
+        -------
+        list
+            Hit array for each timing offset.
+        telescope_data : np.array
+            Array with the hits of the Mimosa26 planes without assignment to events.
+        '''
+        timing_offsets = [int(timing_offset) for timing_offset in timing_offsets]
+        self._timing_offset_event_builders = {timing_offset: self._timing_offset_event_builders.get(timing_offset, _EventBuilderState(trigger_data=self.trigger_data[:self.trigger_data_index + 1].copy(), event_number=self.event_number, telescope_data_start_index=self.telescope_data_start_index, hits_dtype=self.hits_dtype)) for timing_offset in timing_offsets}
+        n_buffered_triggers = self.trigger_data_index + 1
+        telescope_data_index_start = self.telescope_data_index + 1
+        self._decode_raw_data(raw_data=raw_data, build_all_events=build_all_events, add_missing_events=False)  # The missing triggers are added by the event builders
+        telescope_data = _get_ring_buffer_data(self.telescope_data, max(telescope_data_index_start, self.telescope_data_start_index), self.telescope_data_index)
+        triggers = self.trigger_data[n_buffered_triggers:self.trigger_data_index + 1].copy()
+        # The last trigger is kept in the trigger buffer, since the trigger number is checked only if the trigger buffer is not empty (see _decode_chunk_state())
+        self.trigger_data = self.trigger_data[max(self.trigger_data_index, 0):]
+        self.trigger_data_index = min(self.trigger_data_index, 0)
+
+        hits = []
+        for timing_offset in timing_offsets:
+            event_builder = self._timing_offset_event_builders[timing_offset]
+            event_builder.trigger_data, event_builder.trigger_data_index, event_builder.event_number = _add_triggers(event_builder.trigger_data, event_builder.trigger_data_index, triggers, event_builder.event_number, self.add_missing_events)
+            event_builder.trigger_data, event_builder.trigger_data_index, event_builder.telescope_data_start_index, event_builder.hits, hits_index, _, _ = _build_events(
+                trigger_data=event_builder.trigger_data,
+                trigger_data_index=event_builder.trigger_data_index,
+                telescope_data=self.telescope_data,
+                telescope_data_start_index=max(event_builder.telescope_data_start_index, self.telescope_data_start_index),
+                telescope_data_index=self.telescope_data_index,
+                hits=event_builder.hits,
+                hits_index=-1,
+                events=self.events[:0],
+                events_index=-1,
+                create_events=False,
+                last_completed_m26_frame_ids=self.last_completed_m26_frame_ids,
+                timing_offset=timing_offset,
+                build_all_events=build_all_events,
+                analyze_m26_header_ids=self.analyze_m26_header_ids,
+                plane_id_to_index=self.plane_id_to_index)
+            hits.append(event_builder.hits[:hits_index + 1].copy())
+
+        # Remove the hits which are not buffered by any event builder
+        self.telescope_data_start_index = min([event_builder.telescope_data_start_index for event_builder in self._timing_offset_event_builders.values()] + [self.telescope_data_index + 1])
+
+        return hits, telescope_data
+
+    def _decode(self, raw_data=None, build_all_events=False):
+        ''' Interpreting the raw data words. The triggers and the hits are added to the trigger buffer and to the telescope data ring buffer.
+        Returns a copy of the new hits (telescope data).
+        '''
+        telescope_data_index_start = self.telescope_data_index + 1
+        self._decode_raw_data(raw_data=raw_data, build_all_events=build_all_events, add_missing_events=self.add_missing_events)
 
         # Get data from telescope (just hit data, no assignment to events or data multiplication)
-        telescope_data = self.telescope_data[telescope_data_index_start:self.telescope_data_index + 1].copy()
+        return _get_ring_buffer_data(self.telescope_data, max(telescope_data_index_start, self.telescope_data_start_index), self.telescope_data_index)
+
+
+class Decoder(_RawDataDecoder):
+    ''' First stage of the interpretation: decoding the raw data words into the hits of the Mimosa26 planes (telescope data) and the triggers (trigger data).
+
+    The result of decode() only contains copies of the data and can be passed to an event builder in another thread or process (e.g., through a queue),
+    or it is used directly if no events are needed (e.g., occupancy of noise runs). The hits are returned when their frame is finished, thus the frame
+    status of the returned hits is final. The missing triggers are not added (see EventBuilder). The counters (see get_counters()) give the amount
+    of decoded data and the time spent in decode().
+    '''
+
+    def reset(self):  # Reset variables
+        self._reset_decoder()
+        self.reset_counters()
+
+    def reset_counters(self):
+        self.n_calls = 0  # Number of calls of decode()
+        self.n_words = 0  # Number of decoded raw data words
+        self.n_hits = 0  # Number of returned hits
+        self.n_triggers = 0  # Number of returned triggers
+        self.processing_time = 0.0  # Time spent in decode() (in seconds)
+
+    def get_counters(self):
+        ''' Returning the counters and the decoding rate (raw data words per second).
+        '''
+        return {'n_calls': self.n_calls,
+                'n_words': self.n_words,
+                'n_hits': self.n_hits,
+                'n_triggers': self.n_triggers,
+                'processing_time': self.processing_time,
+                'words_per_second': self.n_words / self.processing_time if self.processing_time > 0.0 else 0.0}
+
+    def decode(self, raw_data=None, flush=False, telescope_data_out=None):
+        ''' Decoding the raw data array.
+
+        Parameters:
+        -----------
+        raw_data : np.array
+            The array with the raw data words.
+        flush : bool
+            If True, the actual frames are finished and all remaining hits are returned.
+            Use this only after the last raw data chunk.
+        telescope_data_out : np.array
+            Preallocated array (telescope_data_dtype) for the telescope data. If the array is large enough, the telescope data of the decoded data
+            is a view of the beginning of the array, otherwise a new array. The decoded data is only valid until the array is reused.
+
+        Returns
+        -------
+        DecodedData
+            The hits of the finished frames (telescope_data), the new triggers (trigger_data), the index of the last decoded hit (telescope_data_index),
+            the last completed frame ID of each plane (last_completed_m26_frame_ids) and the actual timestamp of each plane (m26_timestamps).
+        '''
+        start_time = time.time()
+        if raw_data is None:
+            raw_data = np.zeros(shape=0, dtype=np.uint32)
+        telescope_data_out = _check_output_array(telescope_data_out, telescope_data_dtype, placeholder=_no_telescope_data)
+        telescope_data, trigger_data, telescope_data_index = _decode_chunk_state(self._state, raw_data, flush, self.multithreading, telescope_data_out)
+
+        self.n_calls += 1
+        self.n_words += raw_data.shape[0]
+        self.n_hits += telescope_data.shape[0]
+        self.n_triggers += trigger_data.shape[0]
+        self.processing_time += time.time() - start_time
+        return DecodedData(telescope_data=telescope_data, trigger_data=trigger_data, telescope_data_index=np.int64(telescope_data_index), last_completed_m26_frame_ids=self.last_completed_m26_frame_ids.copy(), m26_timestamps=self.m26_timestamps.copy())
+
 
-        # Build events
-        self.trigger_data, self.trigger_data_index, self.telescope_data, self.telescope_data_index, self.hits, self.hits_index = _build_events(
+class EventBuilder(object):
+    ''' Second stage of the interpretation: building the events from the decoded data (see Decoder).
+
+    The decoded data of each raw data chunk is passed to build_events() in the order of the raw data. The event building of the RawDataInterpreter
+    is replayed for each raw data chunk: a chunk is processed as soon as all hits which were decoded up to the end of the chunk are available
+    (telescope_data_index of the decoded data). Thus, the hits are identical to the hits of RawDataInterpreter.interpret_raw_data() with the same settings
+    and the same raw data chunks. The counters (see get_counters()) give the amount of processed data and the time spent in build_events().
+
+    Note: If there is no trigger for more than MAX_BUFFER_TIME_SLIP seconds, the RawDataInterpreter removes the outdated hits from its buffer when the
+    buffer is full. This depends on the buffer size during the decoding and cannot be replayed, outdated_hits is set to True if the buffer contains outdated hits.
+    '''
+
+    def __init__(self, analyze_m26_header_ids=None, timing_offset=None, add_missing_events=False, hits_format=None):
+        '''
+        Parameters:
+        -----------
+        analyze_m26_header_ids : list
+            List of Mimosa26 header IDs that will be interpreted.
+            If None, the value defaults to the global value raw_data_interpreter.DEFAULT_PYMOSA_M26_HEADER_IDS.
+        timing_offset : int
+            Offset between Mimosa26 40 MHz clock and 40 MHz from R/O system. If None, the default value is used.
+        add_missing_events : bool
+            If True, add missing events (due to missing trigger words).
+        hits_format : string, list or np.dtype
+            The columns and types of the hits (see get_hits_dtype()).
+        '''
+        self.analyze_m26_header_ids, self.plane_id_to_index = get_plane_id_to_index(analyze_m26_header_ids)
+        self.hits_dtype = get_hits_dtype(hits_format)
+        self.timing_offset = TIMING_OFFSET if timing_offset is None else int(timing_offset)
+        self.add_missing_events = bool(add_missing_events)
+        self.reset()
+
+    def reset(self):  # Reset variables
+        self.trigger_data = np.zeros(shape=0, dtype=trigger_data_dtype)
+        self.trigger_data_index = np.int64(-1)
+        self.telescope_data = np.zeros(shape=0, dtype=telescope_data_dtype)  # Ring buffer, see _extend_ring_buffer()
+        self.telescope_data_start_index = np.int64(0)
+        self.telescope_data_index = np.int64(-1)  # Index of the last received hit
+        self.last_completed_m26_frame_ids = -1 * np.ones(shape=len(self.analyze_m26_header_ids), dtype=np.int64)
+        self.hits = np.zeros(shape=0, dtype=self.hits_dtype)
+        self.events = np.zeros(shape=0, dtype=get_events_dtype(len(self.analyze_m26_header_ids)))
+        self.event_number = np.int64(-1)  # The event number of the last trigger
+        self.pending_decoded_data = []  # Decoded data of the raw data chunks which are not yet processed
+        self.outdated_hits = False  # True if the buffer contained outdated hits, the hits may differ from the RawDataInterpreter
+        self.reset_counters()
+
+    def reset_counters(self):
+        self.n_calls = 0  # Number of calls of build_events()
+        self.n_hits = 0  # Number of received hits (telescope data)
+        self.n_triggers = 0  # Number of received triggers
+        self.n_events = 0  # Number of built events
+        self.n_event_hits = 0  # Number of returned hits (assigned to events)
+        self.processing_time = 0.0  # Time spent in build_events() (in seconds)
+
+    def get_counters(self):
+        ''' Returning the counters and the event building rate (events per second).
+        '''
+        return {'n_calls': self.n_calls,
+                'n_hits': self.n_hits,
+                'n_triggers': self.n_triggers,
+                'n_events': self.n_events,
+                'n_event_hits': self.n_event_hits,
+                'processing_time': self.processing_time,
+                'events_per_second': self.n_events / self.processing_time if self.processing_time > 0.0 else 0.0}
+
+    def build_events(self, decoded_data=None, build_all_events=False, copy=True, hits_out=None, return_events=False):
+        ''' Adding the decoded data to the buffers and building the events.
+
+        Parameters:
+        -----------
+        decoded_data : DecodedData
+            The result of Decoder.decode().
+        build_all_events : bool
+            If True, build all events from the remaining trigger_data and telescope_data_array.
+            Use this only after the decoded data of the last raw data chunk (decoded with flush=True).
+        copy : bool
+            If False, a read-only view of the internal hit buffer is returned which is only valid until the next call.
+        hits_out : np.array
+            Preallocated array (hits_dtype, see hits_format) for the hits, see RawDataInterpreter.interpret_raw_data().
+        return_events : bool
+            If True, the built events are returned in addition (one row per event, see get_events_dtype()).
+
+        Returns
+        -------
+        hits : np.array
+            Array with the hits (hits_dtype, see hits_format) assigned to events. The number of valid rows is given by the length of the array.
+        events : np.array
+            Array with the events (see get_events_dtype()), the hit rows refer to the returned hits. Only returned if return_events is True.
+        '''
+        hits_out = _check_output_array(hits_out, self.hits_dtype)
+        start_time = time.time()
+        if decoded_data is not None:
+            self._add_telescope_data(decoded_data.telescope_data, decoded_data.m26_timestamps)
+            self.pending_decoded_data.append(decoded_data)
+            self.n_hits += decoded_data.telescope_data.shape[0]
+            self.n_triggers += decoded_data.trigger_data.shape[0]
+        elif build_all_events:
+            self.pending_decoded_data.append(DecodedData(telescope_data=np.zeros(shape=0, dtype=telescope_data_dtype), trigger_data=np.zeros(shape=0, dtype=trigger_data_dtype), telescope_data_index=self.telescope_data_index, last_completed_m26_frame_ids=self.last_completed_m26_frame_ids, m26_timestamps=np.zeros(shape=len(self.analyze_m26_header_ids), dtype=np.int64)))
+        hits_index, events_index = -1, -1  # The hits and events of all processed chunks are collected in the buffers
+        while self.pending_decoded_data and self.pending_decoded_data[0].telescope_data_index <= self.telescope_data_index:
+            pending_decoded_data = self.pending_decoded_data.pop(0)
+            hits_index, events_index = self._build_chunk_events(pending_decoded_data, hits_index, events_index, build_all_events=build_all_events and not self.pending_decoded_data, create_events=bool(return_events))
+        hits = self.hits[:hits_index + 1]
+        events = self.events[:events_index + 1]
+        if hits_out is not None and hits_out.shape[0] >= hits.shape[0]:
+            hits_out[:hits.shape[0]] = hits
+            hits = hits_out[:hits.shape[0]]
+        elif copy:
+            hits = hits.copy()
+        else:
+            hits.flags.writeable = False
+        if copy:
+            events = events.copy()
+        else:
+            events.flags.writeable = False
+
+        self.n_calls += 1
+        self.n_event_hits += hits.shape[0]
+        self.processing_time += time.time() - start_time
+        if return_events:
+            return hits, events
+        return hits
+
+    def _build_chunk_events(self, decoded_data, hits_index, events_index, build_all_events, create_events):
+        ''' Building the events of a raw data chunk with the hits which were decoded up to the end of the chunk.
+        The hits (events) are added to the hit (event) buffer after hits_index (events_index), returns the index of the last hit and of the last event.
+        '''
+        self.trigger_data, self.trigger_data_index, self.event_number = _add_triggers(self.trigger_data, self.trigger_data_index, decoded_data.trigger_data, self.event_number, self.add_missing_events)
+        self.last_completed_m26_frame_ids = np.asarray(decoded_data.last_completed_m26_frame_ids, dtype=np.int64)
+        if self.telescope_data_start_index <= decoded_data.telescope_data_index and _remove_outdated_hits(self.telescope_data, self.telescope_data_start_index, decoded_data.telescope_data_index, decoded_data.m26_timestamps, self.plane_id_to_index) != self.telescope_data_start_index:
+            self.outdated_hits = True  # The RawDataInterpreter may have removed these hits while decoding the chunk, the buffer is not changed here
+        n_triggers = self.trigger_data_index + 1
+        self.trigger_data, self.trigger_data_index, self.telescope_data_start_index, self.hits, hits_index, self.events, events_index = _build_events(
             trigger_data=self.trigger_data,
             trigger_data_index=self.trigger_data_index,
             telescope_data=self.telescope_data,
-            telescope_data_index=self.telescope_data_index,
+            telescope_data_start_index=self.telescope_data_start_index,
+            telescope_data_index=np.int64(decoded_data.telescope_data_index),
             hits=self.hits,
-            hits_index=self.hits_index,
+            hits_index=np.int64(hits_index),
+            events=self.events,
+            events_index=np.int64(events_index),
+            create_events=create_events,
             last_completed_m26_frame_ids=self.last_completed_m26_frame_ids,
             timing_offset=self.timing_offset,
             build_all_events=build_all_events,
             analyze_m26_header_ids=self.analyze_m26_header_ids,
             plane_id_to_index=self.plane_id_to_index)
-        # Create a copy of the hits array that is returned
-        hits = self.hits[:self.hits_index + 1].copy()
-        self.hits_index -= (self.hits_index + 1)
+        self.n_events += n_triggers - (self.trigger_data_index + 1)
+        return hits_index, events_index
 
-        return hits, telescope_data
+    def _add_telescope_data(self, telescope_data, m26_timestamps):
+        ''' Adding the hits to the telescope data ring buffer. If the ring buffer is full, outdated hits are removed or the ring buffer is extended.
+        '''
+        n_telescope_data = self.telescope_data_index - self.telescope_data_start_index + 1 + telescope_data.shape[0]
+        if n_telescope_data > self.telescope_data.shape[0]:
+            telescope_data_start_index = _remove_outdated_hits(self.telescope_data, self.telescope_data_start_index, self.telescope_data_index, m26_timestamps, self.plane_id_to_index)
+            if telescope_data_start_index != self.telescope_data_start_index:
+                self.outdated_hits = True
+                self.telescope_data_start_index = telescope_data_start_index
+            n_telescope_data = self.telescope_data_index - self.telescope_data_start_index + 1 + telescope_data.shape[0]
+            if n_telescope_data > self.telescope_data.shape[0]:
+                self.telescope_data = _extend_ring_buffer(self.telescope_data, self.telescope_data_start_index, self.telescope_data_index, size=n_telescope_data)
+        self.telescope_data[np.arange(self.telescope_data_index + 1, self.telescope_data_index + 1 + telescope_data.shape[0]) & (self.telescope_data.shape[0] - 1)] = telescope_data
+        self.telescope_data_index += telescope_data.shape[0]
+
+
+class _EventBuilderState(object):
+    ''' State of the event building for a timing offset (see RawDataInterpreter.interpret_raw_data_timing_offsets()).
+    '''
+
+    def __init__(self, trigger_data, event_number, telescope_data_start_index, hits_dtype):
+        self.trigger_data = trigger_data  # The buffered triggers, see _add_triggers()
+        self.trigger_data_index = np.int64(trigger_data.shape[0] - 1)
+        self.event_number = np.int64(event_number)  # The event number of the last trigger
+        self.telescope_data_start_index = telescope_data_start_index  # First buffered hit in the telescope data ring buffer
+        self.hits = np.zeros(shape=0, dtype=hits_dtype)
 
 
-@njit(locals={'trigger_data_index': numba.int64, 'telescope_data_index': numba.int64, 'trigger_status': numba.uint32, 'last_trigger_number': numba.int64, 'last_trigger_timestamp': numba.int64, 'n_missing_events': numba.uint32})
-def _interpret_raw_data(raw_data, trigger_data, trigger_data_index, telescope_data, telescope_data_index, m26_frame_ids, m26_frame_length, m26_data_loss, m26_word_index, m26_timestamps, last_m26_timestamps, m26_n_words, m26_rows, m26_frame_status, last_completed_m26_frame_ids, event_number, trigger_number, trigger_timestamp, add_missing_events, build_all_events, analyze_m26_header_ids, plane_id_to_index):
+@njit(cache=True)
+def _new_interpreter_state(trigger_data, trigger_data_index, telescope_data, telescope_data_start_index, telescope_data_index, hits, hits_index, events, events_index, event_number, trigger_number, trigger_timestamp, m26_frame_ids, m26_frame_length, m26_data_loss, m26_word_index, m26_timestamps, last_m26_timestamps, m26_n_words, m26_rows, m26_frame_status, last_completed_m26_frame_ids, m26_frame_start_indices, analyze_m26_header_ids, plane_id_to_index):
+    ''' Creating the interpreter state (see _InterpreterState). The arrays are not copied.
+    '''
+    return _InterpreterState(trigger_data, trigger_data_index, telescope_data, telescope_data_start_index, telescope_data_index, hits, hits_index, events, events_index, event_number, trigger_number, trigger_timestamp, m26_frame_ids, m26_frame_length, m26_data_loss, m26_word_index, m26_timestamps, last_m26_timestamps, m26_n_words, m26_rows, m26_frame_status, last_completed_m26_frame_ids, m26_frame_start_indices, analyze_m26_header_ids, plane_id_to_index)
+
+
+@njit(cache=True)
+def _get_state_buffers(state):
+    ''' Returning the buffers and the scalars of the interpreter state (in the order of _state_buffers).
+    '''
+    return state.trigger_data, state.trigger_data_index, state.telescope_data, state.telescope_data_start_index, state.telescope_data_index, state.hits, state.hits_index, state.events, state.events_index, state.event_number, state.trigger_number, state.trigger_timestamp
+
+
+@njit(cache=True)
+def _set_state_buffers(state, trigger_data, trigger_data_index, telescope_data, telescope_data_start_index, telescope_data_index, hits, hits_index, events, events_index, event_number, trigger_number, trigger_timestamp):
+    ''' Setting the buffers and the scalars of the interpreter state (in the order of _state_buffers).
+    '''
+    state.trigger_data = trigger_data
+    state.trigger_data_index = trigger_data_index
+    state.telescope_data = telescope_data
+    state.telescope_data_start_index = telescope_data_start_index
+    state.telescope_data_index = telescope_data_index
+    state.hits = hits
+    state.hits_index = hits_index
+    state.events = events
+    state.events_index = events_index
+    state.event_number = event_number
+    state.trigger_number = trigger_number
+    state.trigger_timestamp = trigger_timestamp
+
+
+@njit(cache=True, nogil=True)
+def _decode_state(state, raw_data, add_missing_events, build_all_events, multithreading):
+    ''' Interpreting the raw data words (see _interpret_raw_data()) and updating the interpreter state. If multithreading is True,
+    the Mimosa26 planes are interpreted in parallel threads (see _interpret_raw_data_planes()). The per plane arrays are modified in place.
+    '''
+    if multithreading:
+        result = _interpret_raw_data_planes(raw_data, state.trigger_data, state.trigger_data_index, state.telescope_data, state.telescope_data_start_index, state.telescope_data_index, state.m26_frame_ids, state.m26_frame_length, state.m26_data_loss, state.m26_word_index, state.m26_timestamps, state.last_m26_timestamps, state.m26_n_words, state.m26_rows, state.m26_frame_status, state.last_completed_m26_frame_ids, state.m26_frame_start_indices, state.event_number, state.trigger_number, state.trigger_timestamp, add_missing_events, build_all_events, state.analyze_m26_header_ids, state.plane_id_to_index)
+    else:
+        result = _interpret_raw_data(raw_data, state.trigger_data, state.trigger_data_index, state.telescope_data, state.telescope_data_start_index, state.telescope_data_index, state.m26_frame_ids, state.m26_frame_length, state.m26_data_loss, state.m26_word_index, state.m26_timestamps, state.last_m26_timestamps, state.m26_n_words, state.m26_rows, state.m26_frame_status, state.last_completed_m26_frame_ids, state.m26_frame_start_indices, state.event_number, state.trigger_number, state.trigger_timestamp, add_missing_events, build_all_events, state.analyze_m26_header_ids, state.plane_id_to_index)
+    state.trigger_data, state.trigger_data_index, state.telescope_data, state.telescope_data_start_index, state.telescope_data_index = result[0], result[1], result[2], result[3], result[4]
+    state.event_number, state.trigger_number, state.trigger_timestamp = result[16], result[17], result[18]
+
+
+@njit(cache=True, nogil=True)
+def _interpret_state(state, raw_data, timing_offset, add_missing_events, build_all_events, multithreading, copy, hits_out, telescope_data_out, create_events):
+    ''' Interpreting the raw data words and building the events with the interpreter state (see RawDataInterpreter.interpret_raw_data()).
+    Returns the hits assigned to events and the new hits of the Mimosa26 planes, written to the output arrays if they are large enough.
+    Otherwise, copies are returned or, if copy is False, views of the buffers (if possible). The events are returned if create_events is True.
+    '''
+    telescope_data_index_start = state.telescope_data_index + 1
+    _decode_state(state, raw_data, add_missing_events, build_all_events, multithreading)
+    # Get data from telescope (just hit data, no assignment to events or data multiplication)
+    telescope_data_start_index = max(telescope_data_index_start, state.telescope_data_start_index)
+    if telescope_data_out.shape[0] >= state.telescope_data_index - telescope_data_start_index + 1:
+        telescope_data = _copy_ring_buffer_data(state.telescope_data, telescope_data_start_index, state.telescope_data_index, telescope_data_out)
+    elif copy:
+        telescope_data = _get_ring_buffer_data(state.telescope_data, telescope_data_start_index, state.telescope_data_index)
+    else:
+        telescope_data = _get_ring_buffer_view(state.telescope_data, telescope_data_start_index, state.telescope_data_index)
+
+    # Build events
+    state.trigger_data, state.trigger_data_index, state.telescope_data_start_index, state.hits, hits_index, state.events, events_index = _build_events(
+        trigger_data=state.trigger_data,
+        trigger_data_index=state.trigger_data_index,
+        telescope_data=state.telescope_data,
+        telescope_data_start_index=state.telescope_data_start_index,
+        telescope_data_index=state.telescope_data_index,
+        hits=state.hits,
+        hits_index=state.hits_index,
+        events=state.events,
+        events_index=state.events_index,
+        create_events=create_events,
+        last_completed_m26_frame_ids=state.last_completed_m26_frame_ids,
+        timing_offset=timing_offset,
+        build_all_events=build_all_events,
+        analyze_m26_header_ids=state.analyze_m26_header_ids,
+        plane_id_to_index=state.plane_id_to_index)
+    state.hits_index = -1  # The hit and event buffers are reused for the next raw data chunk
+    state.events_index = -1
+    if copy:
+        events = state.events[:events_index + 1].copy()
+    else:
+        events = state.events[:events_index + 1]
+    if hits_out.shape[0] >= hits_index + 1:
+        for index in range(hits_index + 1):
+            hits_out[index] = state.hits[index]
+        return hits_out[:hits_index + 1], telescope_data, events
+    if copy:
+        return state.hits[:hits_index + 1].copy(), telescope_data, events
+    return state.hits[:hits_index + 1], telescope_data, events
+
+
+@njit(cache=True, nogil=True)
+def _decode_chunk_state(state, raw_data, flush, multithreading, telescope_data_out):
+    ''' Decoding the raw data words with the interpreter state (see Decoder.decode()).
+    Returns the hits of the finished frames (written to the output array if it is large enough), the new triggers and the index of the last decoded hit.
+    '''
+    n_buffered_triggers = state.trigger_data_index + 1
+    _decode_state(state, raw_data, np.bool_(False), flush, multithreading)  # The missing triggers are added by the event builder
+    trigger_data = state.trigger_data[n_buffered_triggers:state.trigger_data_index + 1].copy()
+    # The last trigger is kept in the trigger buffer, since the trigger number is checked only if the trigger buffer is not empty (see _interpret_trigger_word()).
+    # The check is undone by the event builder if its trigger buffer is empty (see _add_triggers()).
+    state.trigger_data = state.trigger_data[max(state.trigger_data_index, 0):]
+    state.trigger_data_index = min(state.trigger_data_index, 0)
+    # The status of the hits of the actual frame is set when the frame is finished (see _set_incomplete_frames_status())
+    if flush:
+        telescope_data_stop_index = state.telescope_data_index + 1
+    else:
+        telescope_data_stop_index = _get_frame_start_index(state.telescope_data, state.telescope_data_start_index, state.telescope_data_index, state.m26_frame_start_indices, state.plane_id_to_index)
+    if telescope_data_out.shape[0] >= telescope_data_stop_index - state.telescope_data_start_index:
+        telescope_data = _copy_ring_buffer_data(state.telescope_data, state.telescope_data_start_index, telescope_data_stop_index - 1, telescope_data_out)
+    else:
+        telescope_data = _get_ring_buffer_data(state.telescope_data, state.telescope_data_start_index, telescope_data_stop_index - 1)
+    state.telescope_data_start_index = telescope_data_stop_index
+    return telescope_data, trigger_data, state.telescope_data_index
+
+
+@njit(cache=True, locals={'n_hits': numba.uint32})
+def _interpret_m26_word(raw_data_word, plane_id, plane_index, m26_frame_ids, m26_frame_length, m26_data_loss, m26_word_index, m26_timestamps, last_m26_timestamps, m26_n_words, m26_rows, m26_frame_status, last_completed_m26_frame_ids):
+    ''' This function is interpreting a Mimosa26 raw data word and updates the state of the Mimosa26 plane.
+
+    Returns NEW_FRAME if the raw data word is a frame header (the hits of previously incomplete frames must be flagged by the caller).
+    Otherwise, the number of hits of the column data word is returned (starting at column get_column(raw_data_word)).
+    '''
+    # Check for data loss bit set by the M26 RX FSM
+    if is_data_loss(raw_data_word):
+        # Setting the data loss flag to true.
+        # The data loss bit is set by the M26 RX FSM.
+        # The bit is set only once after each data loss, i.e.,
+        # the first data word after the lost data words.
+        m26_data_loss[plane_index] = True
+    if is_frame_header(raw_data_word):  # New frame for actual plane, M26 timestamp (LSB), frame header0
+        # Get Mimosa26 timestamp from raw data word (LSB)
+        last_m26_timestamps[plane_index] = m26_timestamps[plane_index]
+        m26_timestamps[plane_index] = (m26_timestamps[plane_index] & 0x7fffffffffff0000) | get_m26_timestamp_low(raw_data_word)
+        m26_word_index[plane_index] = 0
+        # Reset parameters after header
+        m26_frame_length[plane_index] = 0
+        m26_n_words[plane_index] = 0
+        m26_data_loss[plane_index] = False
+        m26_frame_status[plane_index] = 0
+        return NEW_FRAME
+    elif m26_data_loss[plane_index] is True:  # Trash data
+        # Nothing to do, do not trust data
+        return 0
+    else:  # Interpreting M26 raw data
+        m26_word_index[plane_index] += 1
+        if m26_word_index[plane_index] == 1:  # Mimosa26 timestamp, M26 timestamp (MSB), frame header1
+            # Check for 32bit timestamp overflow
+            if m26_timestamps[plane_index] >= 0 and get_m26_timestamp_high(raw_data_word) < (m26_timestamps[plane_index] & 0x00000000ffff0000):
+                m26_frame_status[plane_index] |= TIMESTAMP_OVERFLOW
+                m26_timestamps[plane_index] = np.int64(2**32) + m26_timestamps[plane_index]
+            # Get Mimosa26 timestamp from raw data word (MSB)
+            m26_timestamps[plane_index] = get_m26_timestamp_high(raw_data_word) | (m26_timestamps[plane_index] & 0x7fffffff0000ffff)
+        elif m26_word_index[plane_index] == 2:  # Mimosa26 frame ID
+            # Get Mimosa26 frame ID from raw data word (LSB)
+            m26_frame_ids[plane_index] = (m26_frame_ids[plane_index] & 0x7fffffffffff0000) | get_frame_id_low(raw_data_word)
+        elif m26_word_index[plane_index] == 3:  # Mimosa26 frame ID
+            # Check for 32bit frame ID overflow
+            if m26_frame_ids[plane_index] >= 0 and get_frame_id_high(raw_data_word) < (m26_frame_ids[plane_index] & 0x00000000ffff0000):
+                m26_frame_status[plane_index] |= FRAME_ID_OVERFLOW
+                m26_frame_ids[plane_index] = np.int64(2**32) + m26_frame_ids[plane_index]
+            # Get Mimosa26 frame ID from raw data word (MSB)
+            m26_frame_ids[plane_index] = get_frame_id_high(raw_data_word) | (m26_frame_ids[plane_index] & 0x7fffffff0000ffff)
+        elif m26_word_index[plane_index] == 4:  # Mimosa26 frame length
+            m26_frame_length[plane_index] = get_frame_length(raw_data_word)
+            if m26_frame_length[plane_index] > 570:  # Defined in the Mimosa26 protocol, no more than 570 "useful" data words
+                m26_data_loss[plane_index] = True
+                return 0
+        elif m26_word_index[plane_index] == 5:  # Mimosa26 frame length, a second time
+            if m26_frame_length[plane_index] != get_frame_length(raw_data_word):  # DO0 & DO1 should always have the same data length
+                m26_data_loss[plane_index] = True
+                return 0
+            else:
+                m26_frame_length[plane_index] += get_frame_length(raw_data_word)
+        elif m26_word_index[plane_index] == 5 + m26_frame_length[plane_index] + 1:  # Frame trailer0
+            if not is_frame_trailer0(raw_data_word):
+                m26_data_loss[plane_index] = True
+                return 0
+        elif m26_word_index[plane_index] == 5 + m26_frame_length[plane_index] + 2:  # Frame trailer1
+            if not is_frame_trailer1(raw_data_word, plane=plane_id):
+                m26_data_loss[plane_index] = True
+                return 0
+            else:
+                last_completed_m26_frame_ids[plane_index] = m26_frame_ids[plane_index]
+        elif m26_word_index[plane_index] > 5 + m26_frame_length[plane_index] + 2:  # Ignore any occurrence of additional raw data words
+            m26_data_loss[plane_index] = True
+            return 0
+        else:  # Column / Row words (actual data word with hits)
+            if m26_n_words[plane_index] == 0:  # First word contains the row info and the number of data words for this row
+                if m26_word_index[plane_index] == 5 + m26_frame_length[plane_index]:  # Always even amount of words or this fill word is used
+                    # Ignore this fill word
+                    return 0
+                else:
+                    m26_n_words[plane_index] = get_n_words(raw_data_word)
+                    m26_rows[plane_index] = get_row(raw_data_word)  # Get row from data word
+                    if m26_rows[plane_index] >= 576:  # Row overflow
+                        m26_data_loss[plane_index] = True
+                        return 0
+                if has_overflow(raw_data_word):
+                    m26_frame_status[plane_index] |= OVERFLOW_FLAG  # set overflow bit
+                else:
+                    m26_frame_status[plane_index] & ~OVERFLOW_FLAG  # unset overflow bit
+            else:
+                m26_n_words[plane_index] = m26_n_words[plane_index] - 1  # Count down the words
+                n_hits = get_n_hits(raw_data_word) + 1
+                column = get_column(raw_data_word)  # Get column from data word
+                if column >= 1152:  # Column overflow
+                    m26_data_loss[plane_index] = True
+                    return 0
+                if column + n_hits > 1152:
+                    m26_data_loss[plane_index] = True
+                    n_hits = 1152 - column
+                return n_hits
+    return 0
+
+
+@njit(cache=True, locals={'trigger_data_index': numba.int64, 'trigger_status': numba.uint32, 'last_trigger_number': numba.int64, 'last_trigger_timestamp': numba.int64, 'n_missing_events': numba.uint32})
+def _interpret_trigger_word(raw_data_word, trigger_data, trigger_data_index, last_m26_timestamps, event_number, trigger_number, trigger_timestamp, add_missing_events, n_raw_data_words):
+    ''' This function is interpreting a trigger word and adds the trigger (and missing triggers) to the temporary trigger data array.
+    '''
+    # Reset trigger status
+    trigger_status = 0
+    # Get latest telescope timestamp and set trigger timestamp
+    last_trigger_timestamp = trigger_timestamp
+    # Get largest M26 timestamp
+    for tmp_plane_index in range(last_m26_timestamps.shape[0]):
+        if last_m26_timestamps[tmp_plane_index] > trigger_timestamp:
+            trigger_timestamp = last_m26_timestamps[tmp_plane_index]
+    # Calculating 63bit timestamp from 15bit trigger timestamp
+    # and last telescope timestamp (frame header timestamp).
+    # Assumption: the telescope timestamp is updated more frequent than
+    # the 15bit trigger timestamp can overflow. The frame is occurring
+    # every 4608 clock cycles (115.2 us).
+    # Get trigger timestamp from raw data word
+    trigger_timestamp = (0x7fffffffffff8000 & trigger_timestamp) | get_trigger_timestamp(raw_data_word)
+    # Check for 15bit trigger timestamp overflow
+    if last_trigger_timestamp >= 0 and trigger_timestamp <= last_trigger_timestamp:
+        trigger_status |= TRIGGER_TIMESTAMP_OVERFLOW
+        trigger_timestamp = np.int64(2**15) + trigger_timestamp
+    # Copy of trigger number
+    last_trigger_number = trigger_number
+    # Check for 16bit trigger number overflow
+    if trigger_number >= 0 and get_trigger_number(raw_data_word, trigger_data_format=2) <= (trigger_number & 0x000000000000ffff):
+        trigger_status |= TRIGGER_NUMBER_OVERFLOW
+        trigger_number = np.int64(2**16) + trigger_number
+    # Get trigger number from raw data word
+    if trigger_number < 0:
+        trigger_number = get_trigger_number(raw_data_word, trigger_data_format=2)
+    else:
+        trigger_number = (0x7fffffffffff0000 & trigger_number) | get_trigger_number(raw_data_word, trigger_data_format=2)
+    # Check validity of trigger number
+    # Trigger number has to increase by 1
+    if trigger_data_index >= 0:
+        # Check if trigger number has increased by 1
+        if last_trigger_number < 0:
+            n_missing_events = 0
+        else:
+            n_missing_events = trigger_number - (last_trigger_number + 1)
+        if n_missing_events != 0:
+            if n_missing_events > 0 and add_missing_events:
+                for i in range(n_missing_events):
+                    # Increase index
+                    trigger_data_index += 1
+                    # extend trigger data array if neccessary
+                    if trigger_data_index >= trigger_data.shape[0]:
+                        trigger_data_tmp = np.zeros(shape=max(1, int(n_raw_data_words / 6)), dtype=trigger_data_dtype)
+                        trigger_data = np.concatenate((trigger_data, trigger_data_tmp))
+                    # Increase event number
+                    event_number += 1
+                    # Store trigger data
+                    trigger_data[trigger_data_index]['event_number'] = event_number  # Timestamp of TLU word
+                    trigger_data[trigger_data_index]['trigger_time_stamp'] = -1  # Timestamp of TLU word
+                    trigger_data[trigger_data_index]['trigger_number'] = trigger_data[trigger_data_index - 1]['trigger_number'] + 1 + i
+                    trigger_data[trigger_data_index]['trigger_status'] = NO_TRIGGER_WORD_ERROR  # Trigger status
+            else:
+                trigger_status |= TRIGGER_NUMBER_ERROR
+    # Increase index
+    trigger_data_index += 1
+    # extend trigger data array if neccessary
+    if trigger_data_index >= trigger_data.shape[0]:
+        trigger_data_tmp = np.zeros(shape=max(1, int(n_raw_data_words / 6)), dtype=trigger_data_dtype)
+        trigger_data = np.concatenate((trigger_data, trigger_data_tmp))
+    # Increase event number
+    event_number += 1
+    # Store trigger data
+    trigger_data[trigger_data_index]['event_number'] = event_number  # Timestamp of TLU word
+    trigger_data[trigger_data_index]['trigger_number'] = trigger_number
+    trigger_data[trigger_data_index]['trigger_time_stamp'] = trigger_timestamp  # Timestamp of TLU word
+    trigger_data[trigger_data_index]['trigger_status'] = trigger_status  # Trigger status
+    return trigger_data, trigger_data_index, event_number, trigger_number, trigger_timestamp
+
+
+@njit(cache=True, nogil=True, locals={'trigger_data_index': numba.int64, 'telescope_data_start_index': numba.int64, 'telescope_data_index': numba.int64})
+def _interpret_raw_data(raw_data, trigger_data, trigger_data_index, telescope_data, telescope_data_start_index, telescope_data_index, m26_frame_ids, m26_frame_length, m26_data_loss, m26_word_index, m26_timestamps, last_m26_timestamps, m26_n_words, m26_rows, m26_frame_status, last_completed_m26_frame_ids, m26_frame_start_indices, event_number, trigger_number, trigger_timestamp, add_missing_events, build_all_events, analyze_m26_header_ids, plane_id_to_index):
     ''' This function is interpreting the Mimosa26 telescope raw data and creates temporary trigger and telescope data arrays.
     The interpreter checks for trigger and Mimosa26 data errors.
 
@@ -330,6 +1188,8 @@ def _interpret_raw_data(raw_data, trigger_data, trigger_data_index, telescope_da
     -----------
     raw_data : np.array
         The array with the raw data words.
+    telescope_data : np.array
+        Ring buffer for the hits (see _extend_ring_buffer()). The buffered hits are stored from telescope_data_start_index to telescope_data_index.
     TBD
     '''
     # Loop over the raw data words
@@ -344,197 +1204,33 @@ def _interpret_raw_data(raw_data, trigger_data, trigger_data_index, telescope_da
                 continue  # Do not interpret data of planes which should be skipped
             plane_index = plane_id_to_index[plane_id]
             # In the following, interpretation of the raw data words of the actual plane
-            # Check for data loss bit set by the M26 RX FSM
-            if is_data_loss(raw_data_word):
-                # Setting the data loss flag to true.
-                # The data loss bit is set by the M26 RX FSM.
-                # The bit is set only once after each data loss, i.e.,
-                # the first data word after the lost data words.
-                m26_data_loss[plane_index] = True
-            if is_frame_header(raw_data_word):  # New frame for actual plane, M26 timestamp (LSB), frame header0
-                # Get Mimosa26 timestamp from raw data word (LSB)
-                last_m26_timestamps[plane_index] = m26_timestamps[plane_index]
-                m26_timestamps[plane_index] = (m26_timestamps[plane_index] & 0x7fffffffffff0000) | get_m26_timestamp_low(raw_data_word)
-                m26_word_index[plane_index] = 0
-                # Reset parameters after header
-                m26_frame_length[plane_index] = 0
-                m26_n_words[plane_index] = 0
-                # Set the status bits for priviously incomplete frames
-                index = telescope_data_index
-                while index >= 0:
-                    if telescope_data[index]['plane'] == plane_id:
-                        if telescope_data[index]['frame_id'] > last_completed_m26_frame_ids[plane_index]:
-                            telescope_data[index]['frame_status'] |= DATA_ERROR
-                        else:
-                            break
-                    index -= 1
-                m26_data_loss[plane_index] = False
-                m26_frame_status[plane_index] = 0
-            elif m26_data_loss[plane_index] is True:  # Trash data
-                # Nothing to do, do not trust data
-                continue
-            else:  # Interpreting M26 raw data
-                m26_word_index[plane_index] += 1
-                if m26_word_index[plane_index] == 1:  # Mimosa26 timestamp, M26 timestamp (MSB), frame header1
-                    # Check for 32bit timestamp overflow
-                    if m26_timestamps[plane_index] >= 0 and get_m26_timestamp_high(raw_data_word) < (m26_timestamps[plane_index] & 0x00000000ffff0000):
-                        m26_frame_status[plane_index] |= TIMESTAMP_OVERFLOW
-                        m26_timestamps[plane_index] = np.int64(2**32) + m26_timestamps[plane_index]
-                    # Get Mimosa26 timestamp from raw data word (MSB)
-                    m26_timestamps[plane_index] = get_m26_timestamp_high(raw_data_word) | (m26_timestamps[plane_index] & 0x7fffffff0000ffff)
-                elif m26_word_index[plane_index] == 2:  # Mimosa26 frame ID
-                    # Get Mimosa26 frame ID from raw data word (LSB)
-                    m26_frame_ids[plane_index] = (m26_frame_ids[plane_index] & 0x7fffffffffff0000) | get_frame_id_low(raw_data_word)
-                elif m26_word_index[plane_index] == 3:  # Mimosa26 frame ID
-                    # Check for 32bit frame ID overflow
-                    if m26_frame_ids[plane_index] >= 0 and get_frame_id_high(raw_data_word) < (m26_frame_ids[plane_index] & 0x00000000ffff0000):
-                        m26_frame_status[plane_index] |= FRAME_ID_OVERFLOW
-                        m26_frame_ids[plane_index] = np.int64(2**32) + m26_frame_ids[plane_index]
-                    # Get Mimosa26 frame ID from raw data word (MSB)
-                    m26_frame_ids[plane_index] = get_frame_id_high(raw_data_word) | (m26_frame_ids[plane_index] & 0x7fffffff0000ffff)
-                elif m26_word_index[plane_index] == 4:  # Mimosa26 frame length
-                    m26_frame_length[plane_index] = get_frame_length(raw_data_word)
-                    if m26_frame_length[plane_index] > 570:  # Defined in the Mimosa26 protocol, no more than 570 "useful" data words
-                        m26_data_loss[plane_index] = True
-                        continue
-                elif m26_word_index[plane_index] == 5:  # Mimosa26 frame length, a second time
-                    if m26_frame_length[plane_index] != get_frame_length(raw_data_word):  # DO0 & DO1 should always have the same data length
-                        m26_data_loss[plane_index] = True
-                        continue
-                    else:
-                        m26_frame_length[plane_index] += get_frame_length(raw_data_word)
-                elif m26_word_index[plane_index] == 5 + m26_frame_length[plane_index] + 1:  # Frame trailer0
-                    if not is_frame_trailer0(raw_data_word):
-                        m26_data_loss[plane_index] = True
-                        continue
-                elif m26_word_index[plane_index] == 5 + m26_frame_length[plane_index] + 2:  # Frame trailer1
-                    if not is_frame_trailer1(raw_data_word, plane=plane_id):
-                        m26_data_loss[plane_index] = True
-                        continue
-                    else:
-                        last_completed_m26_frame_ids[plane_index] = m26_frame_ids[plane_index]
-                elif m26_word_index[plane_index] > 5 + m26_frame_length[plane_index] + 2:  # Ignore any occurrence of additional raw data words
-                    m26_data_loss[plane_index] = True
-                    continue
-                else:  # Column / Row words (actual data word with hits)
-                    if m26_n_words[plane_index] == 0:  # First word contains the row info and the number of data words for this row
-                        if m26_word_index[plane_index] == 5 + m26_frame_length[plane_index]:  # Always even amount of words or this fill word is used
-                            # Ignore this fill word
-                            continue
-                        else:
-                            m26_n_words[plane_index] = get_n_words(raw_data_word)
-                            m26_rows[plane_index] = get_row(raw_data_word)  # Get row from data word
-                            if m26_rows[plane_index] >= 576:  # Row overflow
-                                m26_data_loss[plane_index] = True
-                                continue
-                        if has_overflow(raw_data_word):
-                            m26_frame_status[plane_index] |= OVERFLOW_FLAG  # set overflow bit
-                        else:
-                            m26_frame_status[plane_index] & ~OVERFLOW_FLAG  # unset overflow bit
-                    else:
-                        m26_n_words[plane_index] = m26_n_words[plane_index] - 1  # Count down the words
-                        n_hits = get_n_hits(raw_data_word)
-                        column = get_column(raw_data_word)  # Get column from data word
-                        if column >= 1152:  # Column overflow
-                            m26_data_loss[plane_index] = True
-                            continue
-                        for k in range(n_hits + 1):
-                            if column + k >= 1152:
-                                m26_data_loss[plane_index] = True
-                                break
-                            # Increase index
-                            telescope_data_index += 1
-                            # extend telescope data array if neccessary
-                            if telescope_data_index >= telescope_data.shape[0]:
-                                # remove old hit data from array for each plane individually. Prevents the case that telescope data array gets too big in case
-                                # time until next trigger is very large, since telescope data has to be buffered until next trigger.
-                                select = (telescope_data['plane'] == plane_id)
-                                select &= (telescope_data['time_stamp'] < (m26_timestamps[plane_index] - MAX_BUFFER_TIME_SLIP * MIMOSA_FREQ * 10**6))
-                                count_outdated = np.sum(select)
-                                if count_outdated:
-                                    telescope_data = telescope_data[~select]
-                                    telescope_data_index = telescope_data_index - count_outdated
-                                # extend telescope data array if neccessary
-                                telescope_data_tmp = np.zeros(shape=max(1, int(raw_data.shape[0] / 2)), dtype=telescope_data_dtype)
-                                telescope_data = np.concatenate((telescope_data, telescope_data_tmp))
-
-                            # Store hits
-                            telescope_data[telescope_data_index]['plane'] = plane_id
-                            telescope_data[telescope_data_index]['time_stamp'] = m26_timestamps[plane_index]
-                            telescope_data[telescope_data_index]['frame_id'] = m26_frame_ids[plane_index]
-                            telescope_data[telescope_data_index]['column'] = column + k
-                            telescope_data[telescope_data_index]['row'] = m26_rows[plane_index]
-                            telescope_data[telescope_data_index]['frame_status'] = m26_frame_status[plane_index]
+            n_hits = _interpret_m26_word(raw_data_word, plane_id, plane_index, m26_frame_ids, m26_frame_length, m26_data_loss, m26_word_index, m26_timestamps, last_m26_timestamps, m26_n_words, m26_rows, m26_frame_status, last_completed_m26_frame_ids)
+            if n_hits == NEW_FRAME:
+                # Set the status bits for the hits of the previous frame if the frame is incomplete
+                _set_incomplete_frames_status(telescope_data, max(m26_frame_start_indices[plane_index], telescope_data_start_index), telescope_data_index, plane_id, last_completed_m26_frame_ids[plane_index])
+                m26_frame_start_indices[plane_index] = telescope_data_index + 1
+            elif n_hits > 0:
+                column = get_column(raw_data_word)  # Get column from data word
+                for k in range(n_hits):
+                    # extend telescope data array if neccessary
+                    if telescope_data_index - telescope_data_start_index + 1 >= telescope_data.shape[0]:
+                        # remove old hit data from the ring buffer. Prevents the case that telescope data array gets too big in case
+                        # time until next trigger is very large, since telescope data has to be buffered until next trigger.
+                        telescope_data_start_index = _remove_outdated_hits(telescope_data, telescope_data_start_index, telescope_data_index, m26_timestamps, plane_id_to_index)
+                        if telescope_data_index - telescope_data_start_index + 1 >= telescope_data.shape[0]:
+                            telescope_data = _extend_ring_buffer(telescope_data, telescope_data_start_index, telescope_data_index, size=raw_data.shape[0] // 2)
+                    # Increase index
+                    telescope_data_index += 1
+                    buffer_index = telescope_data_index & (telescope_data.shape[0] - 1)
+                    # Store hits
+                    telescope_data[buffer_index]['plane'] = plane_id
+                    telescope_data[buffer_index]['time_stamp'] = m26_timestamps[plane_index]
+                    telescope_data[buffer_index]['frame_id'] = m26_frame_ids[plane_index]
+                    telescope_data[buffer_index]['column'] = column + k
+                    telescope_data[buffer_index]['row'] = m26_rows[plane_index]
+                    telescope_data[buffer_index]['frame_status'] = m26_frame_status[plane_index]
         elif is_trigger_word(raw_data_word):  # Raw data word is TLU/trigger word
-            # Reset trigger status
-            trigger_status = 0
-            # Get latest telescope timestamp and set trigger timestamp
-            last_trigger_timestamp = trigger_timestamp
-            # Get largest M26 timestamp
-            for tmp_plane_index, _ in enumerate(analyze_m26_header_ids):
-                if last_m26_timestamps[tmp_plane_index] > trigger_timestamp:
-                    trigger_timestamp = last_m26_timestamps[tmp_plane_index]
-            # Calculating 63bit timestamp from 15bit trigger timestamp
-            # and last telescope timestamp (frame header timestamp).
-            # Assumption: the telescope timestamp is updated more frequent than
-            # the 15bit trigger timestamp can overflow. The frame is occurring
-            # every 4608 clock cycles (115.2 us).
-            # Get trigger timestamp from raw data word
-            trigger_timestamp = (0x7fffffffffff8000 & trigger_timestamp) | get_trigger_timestamp(raw_data_word)
-            # Check for 15bit trigger timestamp overflow
-            if last_trigger_timestamp >= 0 and trigger_timestamp <= last_trigger_timestamp:
-                trigger_status |= TRIGGER_TIMESTAMP_OVERFLOW
-                trigger_timestamp = np.int64(2**15) + trigger_timestamp
-            # Copy of trigger number
-            last_trigger_number = trigger_number
-            # Check for 16bit trigger number overflow
-            if trigger_number >= 0 and get_trigger_number(raw_data_word, trigger_data_format=2) <= (trigger_number & 0x000000000000ffff):
-                trigger_status |= TRIGGER_NUMBER_OVERFLOW
-                trigger_number = np.int64(2**16) + trigger_number
-            # Get trigger number from raw data word
-            if trigger_number < 0:
-                trigger_number = get_trigger_number(raw_data_word, trigger_data_format=2)
-            else:
-                trigger_number = (0x7fffffffffff0000 & trigger_number) | get_trigger_number(raw_data_word, trigger_data_format=2)
-            # Check validity of trigger number
-            # Trigger number has to increase by 1
-            if trigger_data_index >= 0:
-                # Check if trigger number has increased by 1
-                if last_trigger_number < 0:
-                    n_missing_events = 0
-                else:
-                    n_missing_events = trigger_number - (last_trigger_number + 1)
-                if n_missing_events != 0:
-                    if n_missing_events > 0 and add_missing_events:
-                        for i in range(n_missing_events):
-                            # Increase index
-                            trigger_data_index += 1
-                            # extend trigger data array if neccessary
-                            if trigger_data_index >= trigger_data.shape[0]:
-                                trigger_data_tmp = np.zeros(shape=max(1, int(raw_data.shape[0] / 6)), dtype=trigger_data_dtype)
-                                trigger_data = np.concatenate((trigger_data, trigger_data_tmp))
-                            # Increase event number
-                            event_number += 1
-                            # Store trigger data
-                            trigger_data[trigger_data_index]['event_number'] = event_number  # Timestamp of TLU word
-                            trigger_data[trigger_data_index]['trigger_time_stamp'] = -1  # Timestamp of TLU word
-                            trigger_data[trigger_data_index]['trigger_number'] = trigger_data[trigger_data_index - 1]['trigger_number'] + 1 + i
-                            trigger_data[trigger_data_index]['trigger_status'] = NO_TRIGGER_WORD_ERROR  # Trigger status
-                    else:
-                        trigger_status |= TRIGGER_NUMBER_ERROR
-            # Increase index
-            trigger_data_index += 1
-            # extend trigger data array if neccessary
-            if trigger_data_index >= trigger_data.shape[0]:
-                trigger_data_tmp = np.zeros(shape=max(1, int(raw_data.shape[0] / 6)), dtype=trigger_data_dtype)
-                trigger_data = np.concatenate((trigger_data, trigger_data_tmp))
-            # Increase event number
-            event_number += 1
-            # Store trigger data
-            trigger_data[trigger_data_index]['event_number'] = event_number  # Timestamp of TLU word
-            trigger_data[trigger_data_index]['trigger_number'] = trigger_number
-            trigger_data[trigger_data_index]['trigger_time_stamp'] = trigger_timestamp  # Timestamp of TLU word
-            trigger_data[trigger_data_index]['trigger_status'] = trigger_status  # Trigger status
+            trigger_data, trigger_data_index, event_number, trigger_number, trigger_timestamp = _interpret_trigger_word(raw_data_word, trigger_data, trigger_data_index, last_m26_timestamps, event_number, trigger_number, trigger_timestamp, add_missing_events, raw_data.shape[0])
         else:  # Raw data contains unknown word, neither M26 nor TLU word
             for tmp_plane_index, _ in enumerate(analyze_m26_header_ids):
                 m26_data_loss[tmp_plane_index] = True
@@ -542,107 +1238,466 @@ def _interpret_raw_data(raw_data, trigger_data, trigger_data_index, telescope_da
     # Set the status bits for priviously incomplete frames
     if build_all_events:
         for tmp_plane_index, tmp_plane_id in enumerate(analyze_m26_header_ids):
-            index = telescope_data_index
-            while index >= 0:
-                if telescope_data[index]['plane'] == tmp_plane_id:
-                    if telescope_data[index]['frame_id'] > last_completed_m26_frame_ids[tmp_plane_index]:
-                        telescope_data[index]['frame_status'] |= DATA_ERROR
-                    else:
-                        break
-                index -= 1
+            _set_incomplete_frames_status(telescope_data, max(m26_frame_start_indices[tmp_plane_index], telescope_data_start_index), telescope_data_index, tmp_plane_id, last_completed_m26_frame_ids[tmp_plane_index])
+
+    return trigger_data, trigger_data_index, telescope_data, telescope_data_start_index, telescope_data_index, m26_frame_ids, m26_frame_length, m26_data_loss, m26_word_index, m26_timestamps, last_m26_timestamps, m26_n_words, m26_rows, m26_frame_status, last_completed_m26_frame_ids, m26_frame_start_indices, event_number, trigger_number, trigger_timestamp
+
+
+@njit(cache=True, nogil=True, locals={'trigger_data_index': numba.int64, 'telescope_data_start_index': numba.int64, 'telescope_data_index': numba.int64})
+def _interpret_raw_data_planes(raw_data, trigger_data, trigger_data_index, telescope_data, telescope_data_start_index, telescope_data_index, m26_frame_ids, m26_frame_length, m26_data_loss, m26_word_index, m26_timestamps, last_m26_timestamps, m26_n_words, m26_rows, m26_frame_status, last_completed_m26_frame_ids, m26_frame_start_indices, event_number, trigger_number, trigger_timestamp, add_missing_events, build_all_events, analyze_m26_header_ids, plane_id_to_index):
+    ''' Multithreaded version of _interpret_raw_data() with identical parameters and results.
+
+    The raw data words are demultiplexed by plane and the Mimosa26 planes are interpreted in parallel threads.
+    The trigger words are interpreted afterwards, using the frame header timestamps of each plane at the position of the trigger word.
+    Finally, the hits of all planes are merged (ordered by raw data word index) into the telescope data array in parallel threads (see _merge_plane_hits()).
+    '''
+    n_planes = analyze_m26_header_ids.shape[0]
+    # Demultiplex raw data words by plane
+    word_plane_index = np.empty(shape=raw_data.shape[0], dtype=np.int32)
+    n_plane_words = np.zeros(shape=n_planes, dtype=np.int64)
+    n_plane_max_hits = np.zeros(shape=n_planes, dtype=np.int64)
+    n_plane_frames = np.zeros(shape=n_planes, dtype=np.int64)
+    n_trigger_words = 0
+    n_unknown_words = 0
+    for word_index in range(raw_data.shape[0]):
+        raw_data_word = raw_data[word_index]
+        if is_mimosa_data(raw_data_word):
+            plane_id = get_plane_number(raw_data_word)
+            if plane_id < plane_id_to_index.shape[0] and plane_id_to_index[plane_id] >= 0:
+                plane_index = plane_id_to_index[plane_id]
+                word_plane_index[word_index] = plane_index
+                n_plane_words[plane_index] += 1
+                n_plane_max_hits[plane_index] += get_n_hits(raw_data_word) + 1
+                if is_frame_header(raw_data_word):
+                    n_plane_frames[plane_index] += 1
+            else:
+                word_plane_index[word_index] = SKIPPED_WORD  # Do not interpret data of planes which should be skipped
+        elif is_trigger_word(raw_data_word):
+            word_plane_index[word_index] = TRIGGER_WORD
+            n_trigger_words += 1
+        else:
+            word_plane_index[word_index] = UNKNOWN_WORD
+            n_unknown_words += 1
+    # Word indices for each plane (unknown words are added to every plane, since they indicate data loss)
+    plane_word_offsets = np.zeros(shape=n_planes + 1, dtype=np.int64)
+    plane_hit_offsets = np.zeros(shape=n_planes + 1, dtype=np.int64)
+    plane_frame_offsets = np.zeros(shape=n_planes + 1, dtype=np.int64)
+    for plane_index in range(n_planes):
+        plane_word_offsets[plane_index + 1] = plane_word_offsets[plane_index] + n_plane_words[plane_index] + n_unknown_words
+        plane_hit_offsets[plane_index + 1] = plane_hit_offsets[plane_index] + n_plane_max_hits[plane_index]
+        plane_frame_offsets[plane_index + 1] = plane_frame_offsets[plane_index] + n_plane_frames[plane_index]
+    plane_word_indices = np.empty(shape=plane_word_offsets[n_planes], dtype=np.int64)
+    trigger_word_indices = np.empty(shape=n_trigger_words, dtype=np.int64)
+    curr_plane_word_offsets = plane_word_offsets[:n_planes].copy()
+    n_trigger_words = 0
+    for word_index in range(raw_data.shape[0]):
+        plane_index = word_plane_index[word_index]
+        if plane_index >= 0:
+            plane_word_indices[curr_plane_word_offsets[plane_index]] = word_index
+            curr_plane_word_offsets[plane_index] += 1
+        elif plane_index == TRIGGER_WORD:
+            trigger_word_indices[n_trigger_words] = word_index
+            n_trigger_words += 1
+        elif plane_index == UNKNOWN_WORD:
+            for tmp_plane_index in range(n_planes):
+                plane_word_indices[curr_plane_word_offsets[tmp_plane_index]] = word_index
+                curr_plane_word_offsets[tmp_plane_index] += 1
+
+    # Interpret Mimosa26 planes in parallel
+    plane_hits = np.empty(shape=plane_hit_offsets[n_planes], dtype=telescope_data_dtype)
+    plane_hit_word_indices = np.empty(shape=plane_hit_offsets[n_planes], dtype=np.int64)
+    frame_word_indices = np.empty(shape=plane_frame_offsets[n_planes], dtype=np.int64)
+    frame_last_m26_timestamps = np.empty(shape=plane_frame_offsets[n_planes], dtype=np.int64)
+    start_last_m26_timestamps = last_m26_timestamps.copy()
+    n_plane_hits = _interpret_planes(raw_data, plane_word_indices, plane_word_offsets, plane_hits, plane_hit_word_indices, plane_hit_offsets, frame_word_indices, frame_last_m26_timestamps, plane_frame_offsets, telescope_data, telescope_data_start_index, telescope_data_index, m26_frame_ids, m26_frame_length, m26_data_loss, m26_word_index, m26_timestamps, last_m26_timestamps, m26_n_words, m26_rows, m26_frame_status, last_completed_m26_frame_ids, m26_frame_start_indices, build_all_events, analyze_m26_header_ids)
+
+    # Interpret trigger words using the Mimosa26 timestamps of the last frame headers in front of the trigger word
+    curr_last_m26_timestamps = start_last_m26_timestamps
+    curr_frame_indices = plane_frame_offsets[:n_planes].copy()
+    for trigger_word_index in trigger_word_indices:
+        for plane_index in range(n_planes):
+            while curr_frame_indices[plane_index] < plane_frame_offsets[plane_index + 1] and frame_word_indices[curr_frame_indices[plane_index]] < trigger_word_index:
+                curr_last_m26_timestamps[plane_index] = frame_last_m26_timestamps[curr_frame_indices[plane_index]]
+                curr_frame_indices[plane_index] += 1
+        trigger_data, trigger_data_index, event_number, trigger_number, trigger_timestamp = _interpret_trigger_word(raw_data[trigger_word_index], trigger_data, trigger_data_index, curr_last_m26_timestamps, event_number, trigger_number, trigger_timestamp, add_missing_events, raw_data.shape[0])
+
+    # Merge hits of all planes ordered by raw data word index
+    n_hits = np.sum(n_plane_hits)
+    if telescope_data_index - telescope_data_start_index + 1 + n_hits > telescope_data.shape[0]:
+        # remove old hit data from the ring buffer. Prevents the case that telescope data array gets too big in case
+        # time until next trigger is very large, since telescope data has to be buffered until next trigger.
+        telescope_data_start_index = _remove_outdated_hits(telescope_data, telescope_data_start_index, telescope_data_index, m26_timestamps, plane_id_to_index)
+        if telescope_data_index - telescope_data_start_index + 1 + n_hits > telescope_data.shape[0]:
+            telescope_data = _extend_ring_buffer(telescope_data, telescope_data_start_index, telescope_data_index, size=max(telescope_data_index - telescope_data_start_index + 1 + n_hits, raw_data.shape[0] // 2))
+    # Telescope data index of the first hit of the actual frame (number of hits in front of the last frame header)
+    for plane_index in range(n_planes):
+        if n_plane_frames[plane_index] > 0:
+            m26_frame_start_indices[plane_index] = telescope_data_index + 1
+            for tmp_plane_index in range(n_planes):
+                m26_frame_start_indices[plane_index] += np.searchsorted(plane_hit_word_indices[plane_hit_offsets[tmp_plane_index]:plane_hit_offsets[tmp_plane_index] + n_plane_hits[tmp_plane_index]], frame_word_indices[plane_frame_offsets[plane_index + 1] - 1])
+    _merge_plane_hits(plane_hits, plane_hit_word_indices, plane_hit_offsets, n_plane_hits, raw_data.shape[0], telescope_data, telescope_data_index)
+    telescope_data_index += n_hits
+
+    return trigger_data, trigger_data_index, telescope_data, telescope_data_start_index, telescope_data_index, m26_frame_ids, m26_frame_length, m26_data_loss, m26_word_index, m26_timestamps, last_m26_timestamps, m26_n_words, m26_rows, m26_frame_status, last_completed_m26_frame_ids, m26_frame_start_indices, event_number, trigger_number, trigger_timestamp
+
+
+@njit(cache=True, parallel=True)
+def _interpret_planes(raw_data, plane_word_indices, plane_word_offsets, plane_hits, plane_hit_word_indices, plane_hit_offsets, frame_word_indices, frame_last_m26_timestamps, plane_frame_offsets, telescope_data, telescope_data_start_index, telescope_data_index, m26_frame_ids, m26_frame_length, m26_data_loss, m26_word_index, m26_timestamps, last_m26_timestamps, m26_n_words, m26_rows, m26_frame_status, last_completed_m26_frame_ids, m26_frame_start_indices, build_all_events, analyze_m26_header_ids):
+    ''' Interpreting the raw data words of each Mimosa26 plane in a parallel thread (see _interpret_plane_words()). Returns the number of hits for each plane.
+    '''
+    n_planes = analyze_m26_header_ids.shape[0]
+    n_plane_hits = np.zeros(shape=n_planes, dtype=np.int64)
+    for plane_index in numba.prange(n_planes):
+        n_plane_hits[plane_index] = _interpret_plane_words(
+            raw_data=raw_data,
+            word_indices=plane_word_indices[plane_word_offsets[plane_index]:plane_word_offsets[plane_index + 1]],
+            plane_id=analyze_m26_header_ids[plane_index],
+            plane_index=plane_index,
+            hits=plane_hits[plane_hit_offsets[plane_index]:plane_hit_offsets[plane_index + 1]],
+            hit_word_indices=plane_hit_word_indices[plane_hit_offsets[plane_index]:plane_hit_offsets[plane_index + 1]],
+            frame_word_indices=frame_word_indices[plane_frame_offsets[plane_index]:plane_frame_offsets[plane_index + 1]],
+            frame_last_m26_timestamps=frame_last_m26_timestamps[plane_frame_offsets[plane_index]:plane_frame_offsets[plane_index + 1]],
+            telescope_data=telescope_data,
+            telescope_data_start_index=telescope_data_start_index,
+            telescope_data_index=telescope_data_index,
+            m26_frame_ids=m26_frame_ids,
+            m26_frame_length=m26_frame_length,
+            m26_data_loss=m26_data_loss,
+            m26_word_index=m26_word_index,
+            m26_timestamps=m26_timestamps,
+            last_m26_timestamps=last_m26_timestamps,
+            m26_n_words=m26_n_words,
+            m26_rows=m26_rows,
+            m26_frame_status=m26_frame_status,
+            last_completed_m26_frame_ids=last_completed_m26_frame_ids,
+            m26_frame_start_indices=m26_frame_start_indices,
+            build_all_events=build_all_events)
+    return n_plane_hits
+
+
+@njit(cache=True, parallel=True)
+def _merge_plane_hits(plane_hits, plane_hit_word_indices, plane_hit_offsets, n_plane_hits, n_words, telescope_data, telescope_data_index):
+    ''' Merging the hits of all planes (ordered by raw data word index) into the telescope data ring buffer behind telescope_data_index.
+    The position of a hit is given by the number of hits in front of its raw data word (cumulative sum of the number of hits per raw data word)
+    and by the position of the hit within the raw data word. The hits of each plane are counted and copied in a parallel thread.
+    '''
+    n_planes = n_plane_hits.shape[0]
+    n_word_hits = np.zeros(shape=n_words + 1, dtype=np.int64)
+    for plane_index in numba.prange(n_planes):  # A raw data word belongs to a single plane
+        for hit_index in range(plane_hit_offsets[plane_index], plane_hit_offsets[plane_index] + n_plane_hits[plane_index]):
+            n_word_hits[plane_hit_word_indices[hit_index] + 1] += 1
+    word_hit_offsets = np.cumsum(n_word_hits)  # Number of hits in front of each raw data word
+    for plane_index in numba.prange(n_planes):
+        word_index = -1
+        word_hit_index = 0  # Index of the first hit of the actual raw data word
+        for hit_index in range(plane_hit_offsets[plane_index], plane_hit_offsets[plane_index] + n_plane_hits[plane_index]):
+            if plane_hit_word_indices[hit_index] != word_index:
+                word_index = plane_hit_word_indices[hit_index]
+                word_hit_index = hit_index
+            position = telescope_data_index + 1 + word_hit_offsets[word_index] + hit_index - word_hit_index
+            telescope_data[position & (telescope_data.shape[0] - 1)] = plane_hits[hit_index]
+
+
+@njit(cache=True)
+def _interpret_plane_words(raw_data, word_indices, plane_id, plane_index, hits, hit_word_indices, frame_word_indices, frame_last_m26_timestamps, telescope_data, telescope_data_start_index, telescope_data_index, m26_frame_ids, m26_frame_length, m26_data_loss, m26_word_index, m26_timestamps, last_m26_timestamps, m26_n_words, m26_rows, m26_frame_status, last_completed_m26_frame_ids, m26_frame_start_indices, build_all_events):
+    ''' This function is interpreting the raw data words of a single Mimosa26 plane. The hits are stored in the hits array together with the index of the raw data word.
+    For each frame header, the index of the raw data word and the timestamp of the previous frame is stored.
+    The hits of incomplete frames are flagged in the hits array and in the telescope data array (only hits of the actual plane are modified).
+    '''
+    n_hits = 0
+    n_frames = 0
+    frame_start_hit_index = -1  # Index of the first hit of the actual frame in the hits array, -1 if the frame has started before the actual raw data
+    for word_index in word_indices:
+        raw_data_word = raw_data[word_index]
+        if not is_mimosa_data(raw_data_word):  # Raw data contains unknown word, neither M26 nor TLU word
+            m26_data_loss[plane_index] = True
+            continue
+        n_word_hits = _interpret_m26_word(raw_data_word, plane_id, plane_index, m26_frame_ids, m26_frame_length, m26_data_loss, m26_word_index, m26_timestamps, last_m26_timestamps, m26_n_words, m26_rows, m26_frame_status, last_completed_m26_frame_ids)
+        if n_word_hits == NEW_FRAME:
+            frame_word_indices[n_frames] = word_index
+            frame_last_m26_timestamps[n_frames] = last_m26_timestamps[plane_index]
+            n_frames += 1
+            # Set the status bits for the hits of the previous frame if the frame is incomplete
+            _set_incomplete_frames_status_plane(hits, frame_start_hit_index, n_hits, telescope_data, max(m26_frame_start_indices[plane_index], telescope_data_start_index), telescope_data_index, plane_id, last_completed_m26_frame_ids[plane_index])
+            frame_start_hit_index = n_hits
+        elif n_word_hits > 0:
+            column = get_column(raw_data_word)  # Get column from data word
+            for k in range(n_word_hits):
+                # Store hits
+                hits[n_hits]['plane'] = plane_id
+                hits[n_hits]['time_stamp'] = m26_timestamps[plane_index]
+                hits[n_hits]['frame_id'] = m26_frame_ids[plane_index]
+                hits[n_hits]['column'] = column + k
+                hits[n_hits]['row'] = m26_rows[plane_index]
+                hits[n_hits]['frame_status'] = m26_frame_status[plane_index]
+                hit_word_indices[n_hits] = word_index
+                n_hits += 1
+    # Set the status bits for the hits of the actual frame if the frame is incomplete
+    if build_all_events:
+        _set_incomplete_frames_status_plane(hits, frame_start_hit_index, n_hits, telescope_data, max(m26_frame_start_indices[plane_index], telescope_data_start_index), telescope_data_index, plane_id, last_completed_m26_frame_ids[plane_index])
+    return n_hits
+
+
+@njit(cache=True)
+def _set_incomplete_frames_status_plane(hits, frame_start_hit_index, n_hits, telescope_data, start_index, stop_index, plane_id, last_completed_m26_frame_id):
+    ''' Setting the DATA_ERROR status bit for the hits of the actual frame if the frame is incomplete. The hits array contains only hits of the actual plane,
+    the hits in the telescope data array (from start_index to stop_index) are preceding the hits array and are only considered if the frame has started
+    before the hits array (frame_start_hit_index is -1).
+    '''
+    if frame_start_hit_index < 0:
+        _set_incomplete_frames_status(telescope_data, start_index, stop_index, plane_id, last_completed_m26_frame_id)
+        frame_start_hit_index = 0
+    for index in range(frame_start_hit_index, n_hits):
+        if hits[index]['frame_id'] > last_completed_m26_frame_id:
+            hits[index]['frame_status'] |= DATA_ERROR
+
+
+@njit(cache=True)
+def _set_incomplete_frames_status(telescope_data, start_index, stop_index, plane_id, last_completed_m26_frame_id):
+    ''' Setting the DATA_ERROR status bit for the hits of a plane from start_index to stop_index which belong to an incomplete frame (frame ID larger than the last completed frame ID).
+    The range contains the hits of the actual frame of the plane (see m26_frame_start_indices), the hits of previous frames have already been flagged.
+    '''
+    for index in range(start_index, stop_index + 1):
+        buffer_index = index & (telescope_data.shape[0] - 1)
+        if telescope_data[buffer_index]['plane'] == plane_id and telescope_data[buffer_index]['frame_id'] > last_completed_m26_frame_id:
+            telescope_data[buffer_index]['frame_status'] |= DATA_ERROR
+
+
+@njit(cache=True)
+def _extend_ring_buffer(data, start_index, stop_index, size):
+    ''' Returning a ring buffer with at least twice the capacity (and at least size) containing the elements from start_index to stop_index.
+
+    The capacity of a ring buffer is a power of two. The elements are addressed by a continuously increasing index,
+    the element with index i is located at data[i & (data.shape[0] - 1)]. Thus, removing elements from the beginning
+    of the buffer only requires increasing the start index and the indices stay valid when the buffer is extended.
+    '''
+    capacity = max(1, 2 * data.shape[0])
+    while capacity < size:
+        capacity *= 2
+    new_data = np.zeros(shape=capacity, dtype=data.dtype)
+    for index in range(start_index, stop_index + 1):
+        new_data[index & (capacity - 1)] = data[index & (data.shape[0] - 1)]
+    return new_data
+
+
+@njit(cache=True, nogil=True)
+def _get_ring_buffer_data(data, start_index, stop_index):
+    ''' Returning a copy of the elements from start_index to stop_index of a ring buffer (see _extend_ring_buffer()).
+    '''
+    return _copy_ring_buffer_data(data, start_index, stop_index, np.empty(shape=max(0, stop_index - start_index + 1), dtype=data.dtype))
+
+
+@njit(cache=True, nogil=True)
+def _copy_ring_buffer_data(data, start_index, stop_index, out):
+    ''' Copying the elements from start_index to stop_index of a ring buffer (see _extend_ring_buffer()) to the beginning of the output array.
+    Returns the view of the copied elements.
+    '''
+    for index in range(start_index, stop_index + 1):
+        out[index - start_index] = data[index & (data.shape[0] - 1)]
+    return out[:max(0, stop_index - start_index + 1)]
+
+
+@njit(cache=True, nogil=True)
+def _get_ring_buffer_view(data, start_index, stop_index):
+    ''' Returning a view of the elements from start_index to stop_index of a ring buffer (see _extend_ring_buffer()).
+    A copy is returned if the elements wrap around the end of the buffer.
+    '''
+    if stop_index < start_index:
+        return data[:0]
+    if (start_index & (data.shape[0] - 1)) <= (stop_index & (data.shape[0] - 1)):
+        return data[start_index & (data.shape[0] - 1):(stop_index & (data.shape[0] - 1)) + 1]
+    return _get_ring_buffer_data(data, start_index, stop_index)
 
-    return trigger_data, trigger_data_index, telescope_data, telescope_data_index, m26_frame_ids, m26_frame_length, m26_data_loss, m26_word_index, m26_timestamps, last_m26_timestamps, m26_n_words, m26_rows, m26_frame_status, last_completed_m26_frame_ids, event_number, trigger_number, trigger_timestamp
+
+@njit(cache=True)
+def _remove_outdated_hits(telescope_data, telescope_data_start_index, telescope_data_index, m26_timestamps, plane_id_to_index):
+    ''' Removing the hits from the beginning of the ring buffer which are older than MAX_BUFFER_TIME_SLIP with respect to the actual timestamp of the plane.
+    Returns the new start index.
+    '''
+    while telescope_data_start_index <= telescope_data_index:
+        buffer_index = telescope_data_start_index & (telescope_data.shape[0] - 1)
+        if telescope_data[buffer_index]['time_stamp'] >= (m26_timestamps[plane_id_to_index[telescope_data[buffer_index]['plane']]] - MAX_BUFFER_TIME_SLIP * MIMOSA_FREQ * 10**6):
+            break
+        telescope_data_start_index += 1
+    return telescope_data_start_index
+
+
+@njit(cache=True)
+def _get_frame_start_index(telescope_data, start_index, stop_index, m26_frame_start_indices, plane_id_to_index):
+    ''' Returning the index of the first hit of the actual (not finished) frame of any plane. The status of the hits of the actual frame
+    is set if the frame is incomplete (see _set_incomplete_frames_status()).
+    '''
+    for index in range(start_index, stop_index + 1):
+        if index >= m26_frame_start_indices[plane_id_to_index[telescope_data[index & (telescope_data.shape[0] - 1)]['plane']]]:
+            return index
+    return stop_index + 1
+
+
+@njit(cache=True)
+def _add_triggers(trigger_data, trigger_data_index, triggers, event_number, add_missing_events):
+    ''' Adding the decoded triggers (see Decoder) to the trigger buffer and assigning the event numbers as done by _interpret_trigger_word():
+    the trigger number is not checked if the trigger buffer is empty. If add_missing_events is True, the missing triggers are added.
+    '''
+    if trigger_data_index + 1 + triggers.shape[0] >= trigger_data.shape[0]:
+        trigger_data = np.concatenate((trigger_data, np.zeros(shape=triggers.shape[0] + 1, dtype=trigger_data.dtype)))
+    for index in range(triggers.shape[0]):
+        trigger_number = triggers[index]['trigger_number']
+        trigger_status = triggers[index]['trigger_status']
+        if trigger_status & TRIGGER_NUMBER_ERROR:
+            if trigger_data_index < 0:
+                trigger_status &= ~TRIGGER_NUMBER_ERROR
+            elif add_missing_events and trigger_number > trigger_data[trigger_data_index]['trigger_number'] + 1:
+                n_missing_events = trigger_number - (trigger_data[trigger_data_index]['trigger_number'] + 1)
+                if trigger_data_index + 1 + n_missing_events + triggers.shape[0] - index >= trigger_data.shape[0]:
+                    trigger_data = np.concatenate((trigger_data, np.zeros(shape=n_missing_events + triggers.shape[0] - index + 1, dtype=trigger_data.dtype)))
+                for i in range(n_missing_events):
+                    trigger_data_index += 1
+                    event_number += 1
+                    trigger_data[trigger_data_index]['event_number'] = event_number
+                    trigger_data[trigger_data_index]['trigger_time_stamp'] = -1
+                    trigger_data[trigger_data_index]['trigger_number'] = trigger_data[trigger_data_index - 1]['trigger_number'] + 1 + i
+                    trigger_data[trigger_data_index]['trigger_status'] = NO_TRIGGER_WORD_ERROR
+                trigger_status &= ~TRIGGER_NUMBER_ERROR
+        trigger_data_index += 1
+        event_number += 1
+        trigger_data[trigger_data_index]['event_number'] = event_number
+        trigger_data[trigger_data_index]['trigger_number'] = trigger_number
+        trigger_data[trigger_data_index]['trigger_time_stamp'] = triggers[index]['trigger_time_stamp']
+        trigger_data[trigger_data_index]['trigger_status'] = trigger_status
+    return trigger_data, trigger_data_index, event_number
+
+
+def _set_hit_field(hits, index, name, value):
+    ''' Setting a column of a hit if the column is part of the hit format (see get_hits_dtype()), otherwise nothing is done.
+    The column is selected at compile time (see _set_hit_field_overload()).
+    '''
+    hits[index][name] = value
+
+
+@overload(_set_hit_field, prefer_literal=True)
+def _set_hit_field_overload(hits, index, name, value):
+    if not isinstance(name, types.StringLiteral):
+        return None
+    field_name = name.literal_value
+    if field_name in hits.dtype.fields:
+        def set_hit_field(hits, index, name, value):
+            hits[index][field_name] = value
+    else:
+        def set_hit_field(hits, index, name, value):
+            pass
+    return set_hit_field
 
 
-@njit(locals={'hits_index': numba.int64, 'curr_trigger_data_index': numba.int64, 'curr_telescope_data_index': numba.int64})
-def _build_events(trigger_data, trigger_data_index, telescope_data, telescope_data_index, hits, hits_index, last_completed_m26_frame_ids, timing_offset, build_all_events, analyze_m26_header_ids, plane_id_to_index):
+@njit(cache=True, nogil=True, locals={'hits_index': numba.int64, 'events_index': numba.int64, 'telescope_data_start_index': numba.int64, 'curr_telescope_data_index': numba.int64, 'trigger_status': numba.uint32})
+def _build_events(trigger_data, trigger_data_index, telescope_data, telescope_data_start_index, telescope_data_index, hits, hits_index, events, events_index, create_events, last_completed_m26_frame_ids, timing_offset, build_all_events, analyze_m26_header_ids, plane_id_to_index):
     ''' This function is builds events from the temporary trigger and telescope data arrays.
 
+    The hits of each plane are processed with a separate cursor. Since the hits of each plane are ordered in time,
+    the hits before the readout window of the actual trigger are not processed again for the following triggers.
+    The hits within the readout window are added to the event (a hit can be assigned to several triggers).
+    The event is complete when for each plane the first hit after the readout window is found.
+    Thus, the event building scales with the number of hits and triggers.
+    If create_events is True, a row is added to the events array for each built event (see get_events_dtype()), the hit rows refer to the hits array.
+
     Parameters:
     -----------
     TBD
     '''
+    n_planes = analyze_m26_header_ids.shape[0]
+    n_telescope_data = telescope_data_index - telescope_data_start_index + 1
+    # Telescope data indices of the hits of each plane
+    plane_hit_offsets = np.zeros(shape=n_planes + 1, dtype=np.int64)
+    for curr_telescope_data_index in range(telescope_data_start_index, telescope_data_index + 1):
+        plane_hit_offsets[plane_id_to_index[telescope_data[curr_telescope_data_index & (telescope_data.shape[0] - 1)]['plane']] + 1] += 1
+    for plane_index in range(n_planes):
+        plane_hit_offsets[plane_index + 1] += plane_hit_offsets[plane_index]
+    plane_hit_indices = np.empty(shape=n_telescope_data, dtype=np.int64)
+    plane_cursors = plane_hit_offsets[:n_planes].copy()
+    for curr_telescope_data_index in range(telescope_data_start_index, telescope_data_index + 1):
+        plane_index = plane_id_to_index[telescope_data[curr_telescope_data_index & (telescope_data.shape[0] - 1)]['plane']]
+        plane_hit_indices[plane_cursors[plane_index]] = curr_telescope_data_index
+        plane_cursors[plane_index] += 1
+    # For each plane, the cursor points to the first hit which is not before the readout window of the actual trigger
+    plane_cursors[:] = plane_hit_offsets[:n_planes]
+    finished_telescope_data_indices = (telescope_data_start_index - 1) * np.ones(shape=n_planes, dtype=np.int64)  # Last hit before the readout window
+    last_event_telescope_data_indices = (telescope_data_start_index - 1) * np.ones(shape=n_planes, dtype=np.int64)
     latest_trigger_data_index = -1
-    finished_telescope_data_indices = -1 * np.ones(shape=len(analyze_m26_header_ids), dtype=np.int64)
-    last_event_trigger_data_indices = -1 * np.ones(shape=len(analyze_m26_header_ids), dtype=np.int64)
-    finished_event = np.ones(shape=len(analyze_m26_header_ids), dtype=np.bool_)
-    curr_event_status = np.zeros(shape=len(analyze_m26_header_ids), dtype=np.uint32)
-
-    curr_trigger_data_index = 0
-    curr_hits_index = hits_index
-    # adding hits
-    while curr_trigger_data_index <= trigger_data_index and np.all(finished_event):
+    event_hit_indices = np.empty(shape=n_telescope_data, dtype=np.int64)
+    curr_event_status = np.zeros(shape=n_planes, dtype=np.uint32)
+
+    for curr_trigger_data_index in range(trigger_data_index + 1):
         trigger_event_number = trigger_data[curr_trigger_data_index]['event_number']
         trigger_number = trigger_data[curr_trigger_data_index]['trigger_number']
         trigger_timestamp = trigger_data[curr_trigger_data_index]['trigger_time_stamp']
         trigger_status = trigger_data[curr_trigger_data_index]['trigger_status']
-        curr_telescope_data_index = np.min(finished_telescope_data_indices) + 1
-        # Reset status
-        for tmp_plane_index, _ in enumerate(analyze_m26_header_ids):
-            finished_event[tmp_plane_index] = False
-            curr_event_status[tmp_plane_index] = 0
-        while curr_telescope_data_index <= telescope_data_index:
-            curr_plane_id = telescope_data[curr_telescope_data_index]['plane']
-            curr_plane_index = plane_id_to_index[curr_plane_id]
-            curr_frame_id = telescope_data[curr_telescope_data_index]['frame_id']
-            if not finished_event[curr_plane_index] and (build_all_events or curr_frame_id <= last_completed_m26_frame_ids[curr_plane_index]):
-                hit_timestamp_start = telescope_data[curr_telescope_data_index]['time_stamp'] + telescope_data[curr_telescope_data_index]['row'] * ROW_UNIT_CYCLE - 2 * FRAME_UNIT_CYCLE - timing_offset
-                hit_timestamp_stop = hit_timestamp_start + FRAME_UNIT_CYCLE + ROW_UNIT_CYCLE
-                if hit_timestamp_start <= trigger_timestamp and trigger_timestamp < hit_timestamp_stop:
-                    curr_hits_index += 1
-                    # extend hits array if neccessary
-                    if curr_hits_index >= hits.shape[0]:
-                        hits_tmp = np.zeros(shape=telescope_data.shape[0], dtype=hits_dtype)
-                        hits = np.concatenate((hits, hits_tmp))
-                    # Adding hits to event
-                    hits[curr_hits_index]['plane'] = curr_plane_id
-                    hits[curr_hits_index]['event_number'] = trigger_event_number
-                    hits[curr_hits_index]['trigger_number'] = trigger_number
-                    hits[curr_hits_index]['trigger_time_stamp'] = trigger_timestamp
-                    hits[curr_hits_index]['row_time_stamp'] = hit_timestamp_start
-                    hits[curr_hits_index]['frame_id'] = curr_frame_id
-                    hits[curr_hits_index]['column'] = telescope_data[curr_telescope_data_index]['column']
-                    hits[curr_hits_index]['row'] = telescope_data[curr_telescope_data_index]['row']
-                    hits[curr_hits_index]['event_status'] = 0
-                    curr_event_status[curr_plane_index] |= telescope_data[curr_telescope_data_index]['frame_status'] | trigger_status
-                elif hit_timestamp_start > trigger_timestamp:
-                    # latest_trigger_data_indices[plane_id_to_index[telescope_data[curr_telescope_data_index]['plane']]] = curr_trigger_data_index
-                    finished_event[plane_id_to_index[telescope_data[curr_telescope_data_index]['plane']]] = True
-                    if np.all(finished_event):
-                        latest_trigger_data_index = curr_trigger_data_index
-                        for tmp_plane_index, _ in enumerate(analyze_m26_header_ids):
-                            last_event_trigger_data_indices[tmp_plane_index] = finished_telescope_data_indices[tmp_plane_index]
-                        hits_index = curr_hits_index
-                        # Set event status for complete event
-                        index = curr_hits_index
-                        while trigger_event_number == hits[index]['event_number'] and index >= 0:
-                            hits[index]['event_status'] = curr_event_status[plane_id_to_index[hits[index]['plane']]]
-                            index -= 1
+        n_event_hits = 0
+        n_finished_planes = 0
+        for plane_index in range(n_planes):
+            curr_event_status[plane_index] = 0
+            before_readout_window = True  # All processed hits of the plane are before the readout window
+            for plane_hit_index in range(plane_cursors[plane_index], plane_hit_offsets[plane_index + 1]):
+                curr_telescope_data_index = plane_hit_indices[plane_hit_index]
+                buffer_index = curr_telescope_data_index & (telescope_data.shape[0] - 1)
+                if build_all_events or telescope_data[buffer_index]['frame_id'] <= last_completed_m26_frame_ids[plane_index]:
+                    hit_timestamp_start = telescope_data[buffer_index]['time_stamp'] + telescope_data[buffer_index]['row'] * ROW_UNIT_CYCLE - 2 * FRAME_UNIT_CYCLE - timing_offset
+                    hit_timestamp_stop = hit_timestamp_start + FRAME_UNIT_CYCLE + ROW_UNIT_CYCLE
+                    if hit_timestamp_start <= trigger_timestamp and trigger_timestamp < hit_timestamp_stop:
+                        before_readout_window = False
+                        event_hit_indices[n_event_hits] = curr_telescope_data_index
+                        n_event_hits += 1
+                        curr_event_status[plane_index] |= telescope_data[buffer_index]['frame_status'] | trigger_status
+                        continue
+                    elif hit_timestamp_start > trigger_timestamp:
+                        n_finished_planes += 1
                         break
-                else:  # trigger_timestamp >= hit_timestamp_stop
-                    finished_telescope_data_indices[plane_id_to_index[telescope_data[curr_telescope_data_index]['plane']]] = curr_telescope_data_index
-            curr_telescope_data_index += 1
-        # special case
-        if build_all_events:
-            hits_index = curr_hits_index
-            # Set event status for complete event
-            index = curr_hits_index
-            while index >= 0:
-                if hits[index]['event_number'] == trigger_event_number:
-                    hits[index]['event_status'] = curr_event_status[plane_id_to_index[hits[index]['plane']]]
-                elif hits[index]['event_number'] < trigger_event_number:
-                    break
-                index -= 1
-            for tmp_plane_index, _ in enumerate(analyze_m26_header_ids):
-                finished_event[tmp_plane_index] = True
-        curr_trigger_data_index += 1
-
+                    else:  # trigger_timestamp >= hit_timestamp_stop
+                        finished_telescope_data_indices[plane_index] = curr_telescope_data_index
+                if before_readout_window:  # Hit before the readout window or hit of an incomplete frame
+                    plane_cursors[plane_index] = plane_hit_index + 1
+        if n_finished_planes == n_planes:
+            latest_trigger_data_index = curr_trigger_data_index
+            last_event_telescope_data_indices[:] = finished_telescope_data_indices
+        elif not build_all_events:
+            break  # Event is not complete, waiting for more data
+        # Adding hits to event (ordered by telescope data index)
+        if hits_index + n_event_hits >= hits.shape[0]:
+            hits_tmp = np.zeros(shape=max(n_event_hits, n_telescope_data), dtype=hits.dtype)
+            hits = np.concatenate((hits, hits_tmp))
+        if create_events:
+            if events_index + 1 >= events.shape[0]:
+                events = np.concatenate((events, np.zeros(shape=trigger_data_index + 1, dtype=events.dtype)))
+            events_index += 1
+            events[events_index]['event_number'] = trigger_event_number
+            events[events_index]['trigger_number'] = trigger_number
+            events[events_index]['trigger_time_stamp'] = trigger_timestamp
+            events[events_index]['trigger_status'] = trigger_status
+            for plane_index in range(n_planes):
+                events[events_index]['n_hits'][plane_index] = 0
+                events[events_index]['event_status'][plane_index] = curr_event_status[plane_index]
+            events[events_index]['hit_start_row'] = hits_index + 1
+            events[events_index]['hit_stop_row'] = hits_index + 1 + n_event_hits
+        for curr_telescope_data_index in np.sort(event_hit_indices[:n_event_hits]):
+            buffer_index = curr_telescope_data_index & (telescope_data.shape[0] - 1)
+            plane_index = plane_id_to_index[telescope_data[buffer_index]['plane']]
+            hits_index += 1
+            # Only the columns of the hit format are written (see get_hits_dtype())
+            _set_hit_field(hits, hits_index, 'plane', telescope_data[buffer_index]['plane'])
+            _set_hit_field(hits, hits_index, 'event_number', trigger_event_number)
+            _set_hit_field(hits, hits_index, 'trigger_number', trigger_number)
+            _set_hit_field(hits, hits_index, 'trigger_time_stamp', trigger_timestamp)
+            _set_hit_field(hits, hits_index, 'row_time_stamp', telescope_data[buffer_index]['time_stamp'] + telescope_data[buffer_index]['row'] * ROW_UNIT_CYCLE - 2 * FRAME_UNIT_CYCLE - timing_offset)
+            _set_hit_field(hits, hits_index, 'frame_id', telescope_data[buffer_index]['frame_id'])
+            _set_hit_field(hits, hits_index, 'column', telescope_data[buffer_index]['column'])
+            _set_hit_field(hits, hits_index, 'row', telescope_data[buffer_index]['row'])
+            _set_hit_field(hits, hits_index, 'event_status', curr_event_status[plane_index])
+            if create_events:
+                events[events_index]['n_hits'][plane_index] += 1
+
+    # Remove the hits and triggers of finished events from the buffers
     if build_all_events:
         telescope_data_start_index = telescope_data_index + 1
     else:
-        telescope_data_start_index = np.min(last_event_trigger_data_indices) + 1
-    telescope_data = telescope_data[telescope_data_start_index:]
-    telescope_data_index -= telescope_data_start_index
+        telescope_data_start_index = np.min(last_event_telescope_data_indices) + 1
     if build_all_events:
         trigger_data_start_index = trigger_data_index + 1
     else:
@@ -650,4 +1705,4 @@ def _build_events(trigger_data, trigger_data_index, telescope_data, telescope_da
     trigger_data = trigger_data[trigger_data_start_index:]
     trigger_data_index -= trigger_data_start_index
 
-    return trigger_data, trigger_data_index, telescope_data, telescope_data_index, hits, hits_index
+    return trigger_data, trigger_data_index, telescope_data_start_index, hits, hits_index, events, events_index
@@ -0,0 +1,60 @@
+import csv
+import os
+import shutil
+import tempfile
+import unittest
+
+from pymosa_mimosa26_interpreter import batch_interpreter
+from pymosa_mimosa26_interpreter import data_interpreter
+from pymosa_mimosa26_interpreter.testing.tools.test_tools import compare_h5_files, create_raw_data_file
+
+
+class TestBatchInterpreter(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.temp_folder = tempfile.mkdtemp()
+        cls.raw_data_files = []
+        for index, n_frames in enumerate((300, 1000)):
+            raw_data_file = os.path.join(cls.temp_folder, 'run_%d.h5' % index)
+            create_raw_data_file(raw_data_file, n_frames=n_frames, seed=index)
+            cls.raw_data_files.append(raw_data_file)
+        cls.corrupt_file = os.path.join(cls.temp_folder, 'run_corrupt.h5')
+        with open(cls.corrupt_file, 'w') as f:
+            f.write('no raw data')
+
+    @classmethod
+    def tearDownClass(cls):  # Remove created files
+        shutil.rmtree(cls.temp_folder)
+
+    def test_get_raw_data_files(self):
+        file_list = os.path.join(self.temp_folder, 'files.txt')
+        with open(file_list, 'w') as f:
+            f.write('# raw data files\n%s\n' % self.raw_data_files[0])
+        raw_data_files = batch_interpreter.get_raw_data_files([os.path.join(self.temp_folder, 'run_?.h5')], file_lists=[file_list])
+        self.assertEqual(raw_data_files, self.raw_data_files[::-1])  # largest file first, no duplicates
+
+    def test_interpret_files(self):
+        output_folder = os.path.join(self.temp_folder, 'output')
+        summary_file = os.path.join(self.temp_folder, 'summary.csv')
+        return_code = batch_interpreter.main(['--jobs', '2', '--output-folder', output_folder, '--summary', summary_file, '--chunk-size', '10007', self.corrupt_file, os.path.join(self.temp_folder, 'run_?.h5')])
+        self.assertEqual(return_code, 1)
+        with open(summary_file, 'r') as f:
+            summaries = {os.path.basename(row['raw_data_file']): row for row in csv.DictReader(f)}
+        self.assertEqual(summaries['run_corrupt.h5']['status'], 'failed')
+        for raw_data_file in self.raw_data_files:
+            summary = summaries[os.path.basename(raw_data_file)]
+            self.assertEqual(summary['status'], 'ok')
+            self.assertGreater(int(summary['n_hits']), 0)
+            reference_file = os.path.join(self.temp_folder, os.path.splitext(os.path.basename(raw_data_file))[0] + '_reference.h5')
+            with data_interpreter.DataInterpreter(raw_data_file=raw_data_file, analyzed_data_file=reference_file, trigger_data_format=2, create_pdf=False, chunk_size=10007) as interpreter:
+                interpreter.create_occupancy_hist = True
+                interpreter.create_error_hist = True
+                interpreter.interpret_word_table()
+            checks_passed, error_msg = compare_h5_files(reference_file, summary['analyzed_data_file'], node_names=None, detailed_comparison=True, exact=True, chunk_size=1000000)
+            self.assertTrue(checks_passed, msg=error_msg)
+
+
+if __name__ == '__main__':
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestBatchInterpreter)
+    unittest.TextTestRunner(verbosity=2).run(suite)
@@ -0,0 +1,99 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import tables as tb
+
+from pymosa_mimosa26_interpreter import data_interpreter
+from pymosa_mimosa26_interpreter import decoded_data_cache
+from pymosa_mimosa26_interpreter import raw_data_interpreter
+from pymosa_mimosa26_interpreter.testing.tools.test_tools import compare_h5_files, create_raw_data, create_raw_data_file
+
+
+class TestDecodedDataCache(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.temp_folder = tempfile.mkdtemp()
+        cls.raw_data_file = os.path.join(cls.temp_folder, 'raw_data.h5')
+        create_raw_data_file(cls.raw_data_file, n_frames=2000)
+
+    @classmethod
+    def tearDownClass(cls):  # Remove created files
+        shutil.rmtree(cls.temp_folder)
+
+    def interpret(self, output_file, **kwargs):
+        with data_interpreter.DataInterpreter(raw_data_file=self.raw_data_file, analyzed_data_file=output_file, chunk_size=997, **kwargs) as interpreter:
+            interpreter.create_occupancy_hist = True
+            interpreter.create_error_hist = True
+            interpreter.interpret_word_table()
+
+    def test_build_events(self):
+        cache_file = decoded_data_cache.create_cache(self.raw_data_file, cache_file=os.path.join(self.temp_folder, 'cache.h5'), chunk_size=997)
+        for timing_offset, add_missing_events in ((-112, False), (-112, True), (600, True)):
+            hits = np.concatenate([hits for hits, _ in decoded_data_cache.build_events(cache_file, timing_offset=timing_offset, add_missing_events=add_missing_events)])
+            with data_interpreter.DataInterpreter(raw_data_file=self.raw_data_file, chunk_size=997, timing_offset=timing_offset, add_missing_events=add_missing_events) as interpreter:
+                reference_hits = np.concatenate([hits for hits, _ in interpreter.iter_hits()])
+            self.assertTrue(np.array_equal(hits, reference_hits))
+
+    def test_data_interpreter(self):
+        cache_file = decoded_data_cache.get_cache_file(self.raw_data_file)
+        for timing_offset, add_missing_events in ((None, False), (300, False), (None, True)):
+            reference_file = os.path.join(self.temp_folder, 'reference.h5')
+            self.interpret(reference_file, timing_offset=timing_offset, add_missing_events=add_missing_events)
+            output_file = os.path.join(self.temp_folder, 'cached.h5')
+            self.interpret(output_file, timing_offset=timing_offset, add_missing_events=add_missing_events, decoded_data_cache=True)
+            if timing_offset is None and not add_missing_events:
+                modification_time = os.path.getmtime(cache_file)
+            else:  # The raw data is not decoded again
+                self.assertEqual(os.path.getmtime(cache_file), modification_time)
+            checks_passed, error_msg = compare_h5_files(reference_file, output_file, node_names=None, detailed_comparison=True, exact=True, chunk_size=1000000)
+            self.assertTrue(checks_passed, msg=error_msg)
+        with self.assertRaises(ValueError):
+            data_interpreter.DataInterpreter(raw_data_file=self.raw_data_file, n_workers=2, decoded_data_cache=True)
+
+    def test_outdated_hits(self):
+        ''' No trigger for more than MAX_BUFFER_TIME_SLIP seconds, the raw data is interpreted '''
+        raw_data = create_raw_data(n_frames=300, error_rate=0.0, trigger_rate=0.05)
+        n_triggers = np.count_nonzero(raw_data & 0x80000000)
+        m26_timestamp_start = 2**32 - 200 * 4608 + (raw_data_interpreter.MAX_BUFFER_TIME_SLIP + 1) * raw_data_interpreter.MIMOSA_FREQ * 10**6
+        raw_data = np.concatenate([raw_data, create_raw_data(n_frames=300, error_rate=0.0, m26_timestamp_start=m26_timestamp_start, m26_frame_id_start=2**32 - 400, trigger_number_start=2**16 - 300 + n_triggers, seed=1)])
+        raw_data_file = os.path.join(self.temp_folder, 'raw_data_outdated_hits.h5')
+        with tb.open_file(raw_data_file, 'w') as out_file_h5:
+            out_file_h5.create_earray(out_file_h5.root, name='raw_data', obj=raw_data)
+        cache_file = decoded_data_cache.create_cache(raw_data_file, chunk_size=997)
+        with self.assertRaises(decoded_data_cache.OutdatedHitsError):
+            for _ in decoded_data_cache.build_events(cache_file):
+                pass
+        output_files = []
+        for use_cache in (False, True):
+            output_files.append(os.path.join(self.temp_folder, 'outdated_hits_%d.h5' % use_cache))
+            with data_interpreter.DataInterpreter(raw_data_file=raw_data_file, analyzed_data_file=output_files[-1], chunk_size=997, decoded_data_cache=use_cache) as interpreter:
+                interpreter.create_occupancy_hist = True
+                interpreter.create_error_hist = True
+                interpreter.interpret_word_table()
+        checks_passed, error_msg = compare_h5_files(output_files[0], output_files[1], node_names=None, detailed_comparison=True, exact=True, chunk_size=1000000)
+        self.assertTrue(checks_passed, msg=error_msg)
+
+    def test_outdated_cache(self):
+        raw_data_file = os.path.join(self.temp_folder, 'raw_data_outdated.h5')
+        shutil.copy(self.raw_data_file, raw_data_file)
+        decoded_data_cache.get_cache(raw_data_file, chunk_size=997)
+        self.assertTrue(decoded_data_cache.is_valid_cache(raw_data_file, chunk_size=997))
+        self.assertFalse(decoded_data_cache.is_valid_cache(raw_data_file, chunk_size=1000))
+        self.assertFalse(decoded_data_cache.is_valid_cache(raw_data_file, analyze_m26_header_ids=[1, 2, 3]))
+        decoder_version = raw_data_interpreter.DECODER_VERSION
+        raw_data_interpreter.DECODER_VERSION += 1
+        try:
+            self.assertFalse(decoded_data_cache.is_valid_cache(raw_data_file, chunk_size=997))
+        finally:
+            raw_data_interpreter.DECODER_VERSION = decoder_version
+        with tb.open_file(raw_data_file, 'a') as in_file_h5:  # Changed raw data
+            in_file_h5.root.raw_data[-1] = in_file_h5.root.raw_data[-1] ^ 1
+        self.assertFalse(decoded_data_cache.is_valid_cache(raw_data_file, chunk_size=997))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+from pymosa_mimosa26_interpreter import data_interpreter
+from pymosa_mimosa26_interpreter import distributed_interpreter
+from pymosa_mimosa26_interpreter.testing.tools.test_tools import compare_h5_files, create_raw_data_file
+
+
+class TestDistributedInterpreter(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.temp_folder = tempfile.mkdtemp()
+        cls.raw_data_files = []
+        for index in range(3):
+            raw_data_file = os.path.join(cls.temp_folder, 'run_%d.h5' % index)
+            create_raw_data_file(raw_data_file, n_frames=300, seed=index)
+            cls.raw_data_files.append(raw_data_file)
+
+    @classmethod
+    def tearDownClass(cls):  # Remove created files
+        shutil.rmtree(cls.temp_folder)
+
+    def test_distributed_interpretation(self):
+        job_folder = os.path.join(self.temp_folder, 'jobs')
+        output_folder = os.path.join(self.temp_folder, 'output')
+        self.assertEqual(distributed_interpreter.main(['create', job_folder] + self.raw_data_files + ['--output-folder', output_folder, '--chunk-size', '10007', '--max-attempts', '2']), 0)
+        manifest = distributed_interpreter.read_manifest(job_folder)
+        self.assertEqual(distributed_interpreter.main(['merge', job_folder]), 1)  # no job is done
+        # Claims of dead workers: job 0 can be claimed again, job 1 exceeds the maximum number of attempts
+        for job, attempt in ((manifest['jobs'][0], 1), (manifest['jobs'][1], 2)):
+            claim_file = os.path.join(job_folder, 'claims', '%s.%d.claim' % (job['job_id'], attempt))
+            with open(claim_file, 'w') as f:
+                f.write('dead worker')
+            os.utime(claim_file, (time.time() - 1000, time.time() - 1000))
+        self.assertEqual(distributed_interpreter.run_worker(job_folder, stale_timeout=100.0, heartbeat_interval=0.1), 2)
+        self.assertEqual(distributed_interpreter.run_worker(job_folder), 0)  # all jobs are done
+        self.assertFalse([claim_file for claim_file in os.listdir(os.path.join(job_folder, 'claims')) if claim_file.endswith('.clock')])
+        with open(os.path.join(job_folder, 'done', '%s.json' % manifest['jobs'][0]['job_id']), 'r') as f:
+            self.assertEqual(json.load(f)['attempt'], 2)
+
+        summaries = {summary['job_id']: summary for summary in distributed_interpreter.merge(job_folder)}
+        self.assertEqual(summaries[manifest['jobs'][1]['job_id']]['status'], 'failed')
+        for job in (manifest['jobs'][0], manifest['jobs'][2]):
+            self.assertEqual(summaries[job['job_id']]['status'], 'ok')
+            reference_file = os.path.join(self.temp_folder, '%s_reference.h5' % job['job_id'])
+            with data_interpreter.DataInterpreter(raw_data_file=job['raw_data_file'], analyzed_data_file=reference_file, trigger_data_format=2, create_pdf=False, chunk_size=10007) as interpreter:
+                interpreter.create_occupancy_hist = True
+                interpreter.create_error_hist = True
+                interpreter.interpret_word_table()
+            checks_passed, error_msg = compare_h5_files(reference_file, job['analyzed_data_file'], node_names=None, detailed_comparison=True, exact=True, chunk_size=1000000)
+            self.assertTrue(checks_passed, msg=error_msg)
+        self.assertEqual(sorted(os.listdir(output_folder)), sorted(os.path.basename(job['analyzed_data_file']) for job in (manifest['jobs'][0], manifest['jobs'][2])))
+
+        # Verification of a corrupted output file
+        os.remove(manifest['jobs'][2]['analyzed_data_file'])
+        self.assertEqual(distributed_interpreter.merge(job_folder)[2]['status'], 'invalid')
+
+    def test_claim_job(self):
+        ''' The open jobs are counted in the whole manifest, also if a job is claimed. '''
+        job_folder = os.path.join(self.temp_folder, 'jobs_claim')
+        self.assertEqual(distributed_interpreter.main(['create', job_folder] + self.raw_data_files), 0)
+        manifest = distributed_interpreter.read_manifest(job_folder)
+        for index in range(3):
+            job, attempt, n_open_jobs = distributed_interpreter._claim_job(job_folder, manifest, stale_timeout=100.0, worker_name='worker')
+            self.assertEqual(job['job_id'], manifest['jobs'][index]['job_id'])
+            self.assertEqual(attempt, 1)
+            self.assertEqual(n_open_jobs, 3)
+        self.assertEqual(distributed_interpreter._claim_job(job_folder, manifest, stale_timeout=100.0, worker_name='worker'), (None, None, 3))  # All jobs are running
+
+    def test_heartbeat(self):
+        ''' Failed heartbeats are logged. '''
+        claim_file = os.path.join(self.temp_folder, 'heartbeat.1.claim')
+        stop_event = threading.Event()
+        threading.Timer(0.5, stop_event.set).start()
+        with self.assertLogs(level='ERROR') as logs:
+            n_failed_heartbeats = distributed_interpreter._heartbeat(claim_file, 0.1, stop_event)  # claim file does not exist
+        self.assertGreater(n_failed_heartbeats, 0)
+        self.assertEqual(len(logs.records), n_failed_heartbeats)
+
+
+if __name__ == '__main__':
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestDistributedInterpreter)
+    unittest.TextTestRunner(verbosity=2).run(suite)
@@ -0,0 +1,107 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import tables as tb
+
+from pymosa_mimosa26_interpreter import data_interpreter
+from pymosa_mimosa26_interpreter import event_index
+from pymosa_mimosa26_interpreter.testing.tools.test_tools import create_raw_data_file
+
+
+class TestEventIndex(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.temp_folder = tempfile.mkdtemp()
+        cls.raw_data_file = os.path.join(cls.temp_folder, 'raw_data.h5')
+        create_raw_data_file(cls.raw_data_file, n_frames=2000)
+        cls.output_file = os.path.join(cls.temp_folder, 'interpreted.h5')
+        interpreter = data_interpreter.DataInterpreter(raw_data_file=cls.raw_data_file, analyzed_data_file=cls.output_file, chunk_size=9973)
+        interpreter.create_event_table = True
+        interpreter.create_event_index = True
+        interpreter.interpret_word_table()
+        cls.n_events = interpreter.interpreter.event_number + 1
+        with tb.open_file(cls.output_file, 'r') as in_file_h5:
+            cls.hits = in_file_h5.root.Hits[:]
+            cls.events = in_file_h5.root.Events[:]
+            cls.index = in_file_h5.root.EventIndex[:]
+
+    @classmethod
+    def tearDownClass(cls):  # Remove created files
+        shutil.rmtree(cls.temp_folder)
+
+    def interpret(self, analyzed_data_file, resume=False, **kwargs):
+        interpreter = data_interpreter.DataInterpreter(raw_data_file=self.raw_data_file, analyzed_data_file=analyzed_data_file, chunk_size=9973, **kwargs)
+        interpreter.create_event_index = True
+        interpreter.interpret_word_table(resume=resume)
+        with tb.open_file(analyzed_data_file, 'r') as in_file_h5:
+            return in_file_h5.root.EventIndex[:]
+
+    def test_event_index(self):
+        # Dense index of all events (also events without hits), the rows are the rows of the event table
+        self.assertTrue(np.array_equal(self.index['event_number'], np.arange(self.n_events)))
+        self.assertTrue(np.array_equal(self.index['start_row'], self.events['hit_start_row']))
+        self.assertTrue(np.array_equal(self.index['stop_row'], self.events['hit_stop_row']))
+        self.assertTrue(np.any(self.index['start_row'] == self.index['stop_row']))
+        self.assertTrue(np.array_equal(np.repeat(self.index['event_number'], self.index['stop_row'] - self.index['start_row']), self.hits['event_number']))
+        # The hits of an event can be split between the hits which are appended at once (n_workers > 1)
+        for kwargs in (dict(prefetch_depth=2), dict(decoded_data_cache=True), dict(n_workers=2), dict(hits_format='compact')):
+            self.assertTrue(np.array_equal(self.interpret(os.path.join(self.temp_folder, 'interpreted_other.h5'), **kwargs), self.index), msg=str(kwargs))
+        # Selected event range: the index starts at the first selected event
+        interpreter = data_interpreter.DataInterpreter(raw_data_file=self.raw_data_file, analyzed_data_file=os.path.join(self.temp_folder, 'interpreted_range.h5'), chunk_size=9973)
+        interpreter.create_event_index = True
+        interpreter.select_range(event_numbers=(100, 500))
+        interpreter.interpret_word_table()
+        with tb.open_file(interpreter.analyzed_data_file, 'r') as in_file_h5:
+            index = in_file_h5.root.EventIndex[:]
+        self.assertTrue(np.array_equal(index['event_number'], np.arange(100, 500)))
+        self.assertTrue(np.array_equal(index['stop_row'] - index['start_row'], self.index['stop_row'][100:500] - self.index['start_row'][100:500]))
+        self.assertEqual(index[0]['start_row'], 0)
+        # The event index requires the hit table
+        interpreter = data_interpreter.DataInterpreter(raw_data_file=self.raw_data_file, analyzed_data_file=os.path.join(self.temp_folder, 'interpreted_other.h5'), chunk_size=9973)
+        interpreter.create_event_index = True
+        interpreter.create_hit_table = False
+        with self.assertRaises(ValueError):
+            interpreter.interpret_word_table()
+
+    def test_resume(self):
+        output_file = os.path.join(self.temp_folder, 'interpreted_resume.h5')
+        interpreter = data_interpreter.DataInterpreter(raw_data_file=self.raw_data_file, analyzed_data_file=output_file, chunk_size=9973, checkpoint_interval=3)
+        interpreter.create_event_index = True
+        original_interpret_chunk = interpreter._interpret_chunk
+
+        def interrupted_interpret_chunk(raw_data_chunk, *args, **kwargs):
+            original_interpret_chunk(raw_data_chunk, *args, **kwargs)
+            if interpreter._event_index.index_table.nrows > 600:
+                raise KeyboardInterrupt
+        interpreter._interpret_chunk = interrupted_interpret_chunk
+        try:
+            interpreter.interpret_word_table()
+        except KeyboardInterrupt:
+            pass
+        # The index rows written after the checkpoint are removed when resuming
+        self.assertTrue(np.array_equal(self.interpret(output_file, resume=True, checkpoint_interval=3), self.index))
+
+    def test_event_reader(self):
+        with event_index.EventReader(self.output_file) as reader:
+            self.assertEqual((reader.start_event_number, reader.stop_event_number), (0, self.n_events))
+            for event_number in (0, 1, 2, 100, self.n_events - 1):
+                self.assertTrue(np.array_equal(reader.read_event(event_number), self.hits[self.hits['event_number'] == event_number]))
+            self.assertTrue(np.array_equal(reader.read_events(100, 200), self.hits[(self.hits['event_number'] >= 100) & (self.hits['event_number'] < 200)]))
+            self.assertTrue(np.array_equal(reader.read_events(self.n_events - 10, self.n_events + 10), self.hits[self.hits['event_number'] >= self.n_events - 10]))
+            # Events outside of the index have no hits
+            self.assertEqual(reader.read_event(self.n_events + 10).shape[0], 0)
+            self.assertEqual(reader.read_events(-10, 0).shape[0], 0)
+            self.assertEqual(reader.read_events(200, 100).shape[0], 0)
+        # The file needs an event index
+        output_file = os.path.join(self.temp_folder, 'interpreted_no_index.h5')
+        data_interpreter.DataInterpreter(raw_data_file=self.raw_data_file, analyzed_data_file=output_file, chunk_size=9973).interpret_word_table()
+        with self.assertRaises(ValueError):
+            event_index.EventReader(output_file)
+
+
+if __name__ == '__main__':
+    unittest.main()
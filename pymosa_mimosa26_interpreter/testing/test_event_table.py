@@ -0,0 +1,142 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import tables as tb
+
+from pymosa_mimosa26_interpreter import data_interpreter
+from pymosa_mimosa26_interpreter import raw_data_interpreter
+from pymosa_mimosa26_interpreter.testing.tools.test_tools import create_raw_data, create_raw_data_file
+
+
+class TestEventTable(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.temp_folder = tempfile.mkdtemp()
+        cls.raw_data = create_raw_data(n_frames=2000)
+        cls.chunks = [cls.raw_data[i:i + 997] for i in range(0, cls.raw_data.shape[0], 997)]
+        cls.raw_data_file = os.path.join(cls.temp_folder, 'raw_data.h5')
+        create_raw_data_file(cls.raw_data_file, n_frames=2000)
+
+    @classmethod
+    def tearDownClass(cls):  # Remove created files
+        shutil.rmtree(cls.temp_folder)
+
+    def assert_events_valid(self, events, hits, n_events):
+        ''' Each built event has one row (also events without hits) and the hit rows of the event are the hits with its event number '''
+        n_planes = len(raw_data_interpreter.DEFAULT_PYMOSA_M26_HEADER_IDS)
+        self.assertEqual(events.dtype, raw_data_interpreter.get_events_dtype(n_planes))
+        self.assertEqual(events.shape[0], n_events)
+        self.assertTrue(np.array_equal(events['event_number'], np.arange(n_events)))
+        self.assertTrue(np.any(np.sum(events['n_hits'], axis=1) == 0))
+        self.assertTrue(np.array_equal(events['hit_start_row'][1:], events['hit_stop_row'][:-1]))
+        self.assertEqual(events[0]['hit_start_row'], 0)
+        self.assertEqual(events[-1]['hit_stop_row'], hits.shape[0])
+        self.assertTrue(np.array_equal(np.sum(events['n_hits'], axis=1), events['hit_stop_row'] - events['hit_start_row']))
+        self.assertTrue(np.array_equal(np.repeat(events['event_number'], events['hit_stop_row'] - events['hit_start_row']), hits['event_number']))
+        for plane_index, plane in enumerate(raw_data_interpreter.DEFAULT_PYMOSA_M26_HEADER_IDS):
+            self.assertEqual(np.sum(events['n_hits'][:, plane_index]), np.count_nonzero(hits['plane'] == plane))
+        event_indices = np.repeat(np.arange(n_events), events['hit_stop_row'] - events['hit_start_row'])
+        for plane_index, plane in enumerate(raw_data_interpreter.DEFAULT_PYMOSA_M26_HEADER_IDS):
+            selection = hits['plane'] == plane
+            self.assertTrue(np.array_equal(events['event_status'][event_indices[selection], plane_index], hits['event_status'][selection]))
+
+    @staticmethod
+    def concatenate(hits_chunks, events_chunks):
+        ''' Concatenating the hits and the events of the chunks, the hit rows are shifted to refer to the concatenated hits '''
+        n_hits = 0
+        for hits, events in zip(hits_chunks, events_chunks):
+            events['hit_start_row'] += n_hits
+            events['hit_stop_row'] += n_hits
+            n_hits += hits.shape[0]
+        return np.concatenate(hits_chunks), np.concatenate(events_chunks)
+
+    def test_interpret_raw_data(self):
+        interpreter = raw_data_interpreter.RawDataInterpreter()
+        results = [interpreter.interpret_raw_data(raw_data=chunk, build_all_events=index == len(self.chunks) - 1, return_events=True) for index, chunk in enumerate(self.chunks)]
+        hits, events = self.concatenate([result[0] for result in results], [result[2] for result in results])
+        self.assert_events_valid(events, hits, interpreter.event_number + 1)
+        # The hits do not depend on the events
+        reference_interpreter = raw_data_interpreter.RawDataInterpreter()
+        reference_hits = np.concatenate([reference_interpreter.interpret_raw_data(raw_data=chunk, build_all_events=index == len(self.chunks) - 1)[0] for index, chunk in enumerate(self.chunks)])
+        self.assertTrue(np.array_equal(hits, reference_hits))
+        # Decoder and event builder
+        decoder = raw_data_interpreter.Decoder()
+        event_builder = raw_data_interpreter.EventBuilder()
+        results = [event_builder.build_events(decoder.decode(raw_data=chunk, flush=index == len(self.chunks) - 1), build_all_events=index == len(self.chunks) - 1, return_events=True) for index, chunk in enumerate(self.chunks)]
+        event_builder_hits, event_builder_events = self.concatenate([result[0] for result in results], [result[1] for result in results])
+        self.assertTrue(np.array_equal(event_builder_hits, hits))
+        self.assertTrue(np.array_equal(event_builder_events, events))
+
+    def test_event_table(self):
+        output_files = []
+        for kwargs in (dict(), dict(prefetch_depth=2), dict(decoded_data_cache=True), dict(hits_format='slim')):
+            output_files.append(os.path.join(self.temp_folder, 'interpreted_%d.h5' % len(output_files)))
+            interpreter = data_interpreter.DataInterpreter(raw_data_file=self.raw_data_file, analyzed_data_file=output_files[-1], chunk_size=9973, **kwargs)
+            interpreter.create_event_table = True
+            interpreter.interpret_word_table()
+        with tb.open_file(output_files[0], 'r') as in_file_h5:
+            hits = in_file_h5.root.Hits[:]
+            events = in_file_h5.root.Events[:]
+        self.assert_events_valid(events, hits, interpreter.interpreter.event_number + 1)
+        for output_file in output_files[1:]:
+            with tb.open_file(output_file, 'r') as in_file_h5:
+                self.assertTrue(np.array_equal(in_file_h5.root.Events[:], events))
+                for name in in_file_h5.root.Hits.dtype.names:
+                    self.assertTrue(np.array_equal(in_file_h5.root.Hits.col(name), hits[name]), msg=name)
+        # The slim hit format omits the event data
+        self.assertLess(raw_data_interpreter.slim_hits_dtype.itemsize, raw_data_interpreter.hits_dtype.itemsize)
+        self.assertNotIn('trigger_time_stamp', raw_data_interpreter.get_hits_dtype('slim').names)
+        # Selected event range: the hit rows refer to the selected hits
+        interpreter = data_interpreter.DataInterpreter(raw_data_file=self.raw_data_file, analyzed_data_file=os.path.join(self.temp_folder, 'interpreted_range.h5'), chunk_size=9973)
+        interpreter.create_event_table = True
+        interpreter.select_range(event_numbers=(100, 500))
+        interpreter.interpret_word_table()
+        with tb.open_file(interpreter.analyzed_data_file, 'r') as in_file_h5:
+            selected_events = in_file_h5.root.Events[:]
+            selected_hits = in_file_h5.root.Hits[:]
+        self.assertTrue(np.array_equal(selected_events['event_number'], np.arange(100, 500)))
+        self.assertTrue(np.array_equal(selected_hits, hits[events[100]['hit_start_row']:events[499]['hit_stop_row']]))
+        self.assertTrue(np.array_equal(selected_events['hit_stop_row'] - selected_events['hit_start_row'], events[100:500]['hit_stop_row'] - events[100:500]['hit_start_row']))
+        self.assertEqual(selected_events[0]['hit_start_row'], 0)
+        # The event table requires the hit table
+        interpreter = data_interpreter.DataInterpreter(raw_data_file=self.raw_data_file, analyzed_data_file=output_files[0], chunk_size=9973)
+        interpreter.create_event_table = True
+        interpreter.create_hit_table = False
+        with self.assertRaises(ValueError):
+            interpreter.interpret_word_table()
+
+    def test_resume(self):
+        output_file = os.path.join(self.temp_folder, 'interpreted_resume.h5')
+        reference_file = os.path.join(self.temp_folder, 'interpreted_reference.h5')
+        interpreter = data_interpreter.DataInterpreter(raw_data_file=self.raw_data_file, analyzed_data_file=reference_file, chunk_size=9973)
+        interpreter.create_event_table = True
+        interpreter.interpret_word_table()
+        # Interrupting the interpretation after a checkpoint, the events written after the checkpoint are removed when resuming
+        interpreter = data_interpreter.DataInterpreter(raw_data_file=self.raw_data_file, analyzed_data_file=output_file, chunk_size=9973, checkpoint_interval=2)
+        interpreter.create_event_table = True
+        original_interpret_chunk = interpreter._interpret_chunk
+
+        def interrupted_interpret_chunk(raw_data_chunk, *args, **kwargs):
+            original_interpret_chunk(raw_data_chunk, *args, **kwargs)
+            if interpreter._event_table.nrows > 600:
+                raise KeyboardInterrupt
+        interpreter._interpret_chunk = interrupted_interpret_chunk
+        try:
+            interpreter.interpret_word_table()
+        except KeyboardInterrupt:
+            pass
+        interpreter = data_interpreter.DataInterpreter(raw_data_file=self.raw_data_file, analyzed_data_file=output_file, chunk_size=9973, checkpoint_interval=2)
+        interpreter.create_event_table = True
+        interpreter.interpret_word_table(resume=True)
+        with tb.open_file(reference_file, 'r') as reference_file_h5:
+            with tb.open_file(output_file, 'r') as out_file_h5:
+                self.assertTrue(np.array_equal(out_file_h5.root.Events[:], reference_file_h5.root.Events[:]))
+                self.assertTrue(np.array_equal(out_file_h5.root.Hits[:], reference_file_h5.root.Hits[:]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import tables as tb
+
+from pymosa_mimosa26_interpreter import data_interpreter
+from pymosa_mimosa26_interpreter import raw_data_interpreter
+from pymosa_mimosa26_interpreter.testing.tools.test_tools import create_raw_data, create_raw_data_file
+
+
+class TestHitsFormat(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.temp_folder = tempfile.mkdtemp()
+        cls.raw_data = create_raw_data(n_frames=2000)
+        cls.chunks = [cls.raw_data[i:i + 997] for i in range(0, cls.raw_data.shape[0], 997)]
+        cls.reference_hits = cls.interpret(cls.chunks)
+
+    @classmethod
+    def tearDownClass(cls):  # Remove created files
+        shutil.rmtree(cls.temp_folder)
+
+    @staticmethod
+    def interpret(chunks, hits_format=None, multithreading=False):
+        interpreter = raw_data_interpreter.RawDataInterpreter(hits_format=hits_format)
+        interpreter.multithreading = multithreading
+        return np.concatenate([interpreter.interpret_raw_data(raw_data=chunk, build_all_events=index == len(chunks) - 1)[0] for index, chunk in enumerate(chunks)])
+
+    def assert_hits_equal(self, hits, reference_hits):
+        ''' The hits must be equal to the selected columns of the reference hits (converted to the types of the hit format) '''
+        self.assertEqual(hits.shape, reference_hits.shape)
+        for name in hits.dtype.names:
+            self.assertTrue(np.array_equal(hits[name], reference_hits[name].astype(hits.dtype[name])), msg=name)
+
+    def test_get_hits_dtype(self):
+        self.assertEqual(raw_data_interpreter.get_hits_dtype(), raw_data_interpreter.hits_dtype)
+        self.assertEqual(raw_data_interpreter.get_hits_dtype('default'), raw_data_interpreter.hits_dtype)
+        self.assertEqual(raw_data_interpreter.get_hits_dtype('compact'), raw_data_interpreter.compact_hits_dtype)
+        self.assertLess(raw_data_interpreter.compact_hits_dtype.itemsize, raw_data_interpreter.hits_dtype.itemsize)
+        self.assertEqual(raw_data_interpreter.get_hits_dtype(['plane', 'event_number', 'row']), np.dtype([('plane', '<u1'), ('event_number', '<i8'), ('row', '<u2')]))
+        for hits_format in ('small', ['plane', 'event_number', 'charge'], ['plane', 'column'], np.dtype([('plane', '<u1'), ('event_number', '<f8')]), np.dtype('<i8')):
+            with self.assertRaises(ValueError):
+                raw_data_interpreter.get_hits_dtype(hits_format)
+
+    def test_interpret_raw_data(self):
+        for hits_format in ('compact', ['plane', 'event_number', 'frame_id', 'trigger_time_stamp'], np.dtype([('row', '<i4'), ('plane', '<u1'), ('event_number', '<u4')])):
+            for multithreading in (False, True):
+                hits = self.interpret(self.chunks, hits_format=hits_format, multithreading=multithreading)
+                self.assertEqual(hits.dtype, raw_data_interpreter.get_hits_dtype(hits_format))
+                self.assert_hits_equal(hits, self.reference_hits)
+            # Decoder and event builder
+            decoder = raw_data_interpreter.Decoder()
+            event_builder = raw_data_interpreter.EventBuilder(hits_format=hits_format)
+            hits = [event_builder.build_events(decoder.decode(raw_data=chunk, flush=index == len(self.chunks) - 1), build_all_events=index == len(self.chunks) - 1) for index, chunk in enumerate(self.chunks)]
+            self.assert_hits_equal(np.concatenate(hits), self.reference_hits)
+        # The output array must have the dtype of the hit format
+        with self.assertRaises(ValueError):
+            raw_data_interpreter.RawDataInterpreter(hits_format='compact').interpret_raw_data(raw_data=self.chunks[0], hits_out=np.zeros(shape=10000, dtype=raw_data_interpreter.hits_dtype))
+
+    def test_hit_table(self):
+        raw_data_file = os.path.join(self.temp_folder, 'raw_data.h5')
+        create_raw_data_file(raw_data_file, n_frames=2000)
+        output_files = []
+        for kwargs in (dict(), dict(hits_format='compact'), dict(hits_format='compact', prefetch_depth=2), dict(hits_format='compact', decoded_data_cache=True), dict(hits_format='compact', n_workers=2)):
+            output_files.append(os.path.join(self.temp_folder, 'interpreted_%d.h5' % len(output_files)))
+            interpreter = data_interpreter.DataInterpreter(raw_data_file=raw_data_file, analyzed_data_file=output_files[-1], chunk_size=9973, **kwargs)
+            interpreter.create_hit_table = True
+            interpreter.create_occupancy_hist = True
+            interpreter.create_error_hist = True
+            interpreter.interpret_word_table()
+        with tb.open_file(output_files[0], 'r') as in_file_h5:
+            reference_hits = in_file_h5.root.Hits[:]
+            reference_occupancy_hist = in_file_h5.root.HistOcc_plane1[:]
+        for output_file in output_files[1:]:
+            with tb.open_file(output_file, 'r') as in_file_h5:
+                self.assertEqual(in_file_h5.root.Hits.dtype, raw_data_interpreter.compact_hits_dtype)
+                self.assert_hits_equal(in_file_h5.root.Hits[:], reference_hits)
+                self.assertTrue(np.array_equal(in_file_h5.root.HistOcc_plane1[:], reference_occupancy_hist))
+        # The error histogram requires the event status
+        interpreter = data_interpreter.DataInterpreter(raw_data_file=raw_data_file, analyzed_data_file=output_files[-1], chunk_size=9973, hits_format=['plane', 'event_number', 'column', 'row'])
+        interpreter.create_error_hist = True
+        with self.assertRaises(ValueError):
+            interpreter.interpret_word_table()
+
+
+if __name__ == '__main__':
+    unittest.main()
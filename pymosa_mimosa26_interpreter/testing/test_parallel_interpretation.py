@@ -0,0 +1,218 @@
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+import unittest
+
+import numpy as np
+import tables as tb
+
+from pymosa_mimosa26_interpreter import data_interpreter
+from pymosa_mimosa26_interpreter.data_interpreter import h5py
+from pymosa_mimosa26_interpreter import parallel_interpreter
+from pymosa_mimosa26_interpreter.testing.tools.test_tools import compare_h5_files, create_raw_data_file
+
+testing_path = os.path.dirname(__file__)  # Get file path
+tests_data_folder = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(testing_path)) + r'/testing/'))  # Set test data path
+
+
+class TestParallelInterpretation(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.raw_data_file = os.path.join(tests_data_folder, 'generated_raw_data_parallel.h5')
+        create_raw_data_file(cls.raw_data_file, n_frames=3000)
+        cls.temp_output_files = [cls.raw_data_file]
+
+    @classmethod
+    def tearDownClass(cls):  # Remove created files
+        for temp_output_file in cls.temp_output_files:
+            os.remove(temp_output_file)
+
+    def interpret(self, chunk_size, n_workers, multithreading=False, prefetch_depth=0):
+        output_file = os.path.join(tests_data_folder, 'generated_raw_data_parallel_interpreted_%d_%d%s%s.h5' % (chunk_size, n_workers, '_multithreading' if multithreading else '', '_prefetch_%d' % prefetch_depth if prefetch_depth else ''))
+        if output_file not in self.temp_output_files:
+            self.temp_output_files.append(output_file)
+        with data_interpreter.DataInterpreter(raw_data_file=self.raw_data_file, analyzed_data_file=output_file, trigger_data_format=2, create_pdf=False, chunk_size=chunk_size, n_workers=n_workers, multithreading=multithreading, prefetch_depth=prefetch_depth) as interpreter:
+            interpreter.create_hit_table = True
+            interpreter.create_occupancy_hist = True
+            interpreter.create_error_hist = True
+            interpreter.interpret_word_table()
+            self.assertEqual(interpreter.n_segment_reruns, 0)  # No fallback to the serial interpretation of a segment
+        return output_file
+
+    def test_parallel_interpretation(self):
+        for chunk_size in (997, 10007):
+            reference_file = self.interpret(chunk_size=chunk_size, n_workers=1)
+            for n_workers in (2, 7):
+                output_file = self.interpret(chunk_size=chunk_size, n_workers=n_workers)
+                checks_passed, error_msg = compare_h5_files(reference_file, output_file, node_names=None, detailed_comparison=True, exact=True, chunk_size=1000000)
+                self.assertTrue(checks_passed, msg=error_msg)
+
+    def test_stitching_error(self):
+        ''' The worker processes are terminated before the temporary segment files are removed if the stitching fails. '''
+        output_file = os.path.join(tests_data_folder, 'generated_raw_data_parallel_stitching_error.h5')
+        self.temp_output_files.append(output_file)
+        original_apply_hits_offsets = parallel_interpreter.apply_hits_offsets
+
+        def failing_apply_hits_offsets(*args, **kwargs):
+            raise RuntimeError('Stitching failed')
+        parallel_interpreter.apply_hits_offsets = failing_apply_hits_offsets
+        try:
+            interpreter = data_interpreter.DataInterpreter(raw_data_file=self.raw_data_file, analyzed_data_file=output_file, chunk_size=997, n_workers=7)
+            with self.assertRaises(RuntimeError):
+                interpreter.interpret_word_table()
+        finally:
+            parallel_interpreter.apply_hits_offsets = original_apply_hits_offsets
+        self.assertEqual(multiprocessing.active_children(), [])
+        self.assertFalse(any(name.startswith('tmp') and os.path.isdir(os.path.join(tests_data_folder, name)) for name in os.listdir(tests_data_folder)))
+
+    def test_resync_index(self):
+        ''' The warm-up contains the trigger words and the frame headers of all planes in front of the trigger words. '''
+        with tb.open_file(self.raw_data_file, 'r') as in_file_h5:
+            raw_data = in_file_h5.root.raw_data[:]
+        for index in (100000, 200000, raw_data.shape[0]):
+            resync_index = parallel_interpreter.get_resync_index(raw_data, index, analyze_m26_header_ids=[1, 2, 3, 4, 5, 6])
+            trigger_indices = np.flatnonzero(raw_data[resync_index:index] & 0x80000000) + resync_index
+            self.assertGreaterEqual(trigger_indices.shape[0], parallel_interpreter.RESYNC_N_TRIGGERS)
+            warm_up_data = raw_data[resync_index:trigger_indices[-parallel_interpreter.RESYNC_N_TRIGGERS]]
+            for plane in range(1, 7):
+                n_frame_headers = np.count_nonzero(((warm_up_data & 0xfff00000) == (0x20000000 | (plane << 20))) & ((warm_up_data & 0x00010000) != 0))
+                self.assertGreaterEqual(n_frame_headers, parallel_interpreter.RESYNC_N_FRAMES)
+        self.assertEqual(parallel_interpreter.get_resync_index(raw_data, 1000, analyze_m26_header_ids=[1, 2, 3, 4, 5, 6]), 0)
+
+    def test_multithreading(self):
+        for chunk_size in (997, 1000000):
+            reference_file = self.interpret(chunk_size=chunk_size, n_workers=1)
+            output_file = self.interpret(chunk_size=chunk_size, n_workers=1, multithreading=True)
+            checks_passed, error_msg = compare_h5_files(reference_file, output_file, node_names=None, detailed_comparison=True, exact=True, chunk_size=1000000)
+            self.assertTrue(checks_passed, msg=error_msg)
+
+    def test_pipeline(self):
+        for chunk_size in (997, 1000000):
+            reference_file = self.interpret(chunk_size=chunk_size, n_workers=1)
+            for prefetch_depth in (1, 4):
+                output_file = self.interpret(chunk_size=chunk_size, n_workers=1, prefetch_depth=prefetch_depth)
+                checks_passed, error_msg = compare_h5_files(reference_file, output_file, node_names=None, detailed_comparison=True, exact=True, chunk_size=1000000)
+                self.assertTrue(checks_passed, msg=error_msg)
+
+    def test_iter_hits(self):
+        reference_file = self.interpret(chunk_size=997, n_workers=1)
+        with tb.open_file(reference_file, 'r') as in_file_h5:
+            reference_hits = in_file_h5.root.Hits[:]
+            n_telescope_data = sum(node.read().sum() for node in in_file_h5.list_nodes(in_file_h5.root) if node.name.startswith('HistOcc'))
+        for max_batch_size in (None, 100):
+            with data_interpreter.DataInterpreter(raw_data_file=self.raw_data_file, trigger_data_format=2, create_pdf=False, chunk_size=997) as interpreter:
+                batches = list(interpreter.iter_hits(max_batch_size=max_batch_size))
+            if max_batch_size is not None:
+                self.assertTrue(all(hits.shape[0] <= max_batch_size and telescope_data.shape[0] <= max_batch_size for hits, telescope_data in batches))
+            self.assertTrue(np.array_equal(np.concatenate([hits for hits, _ in batches]), reference_hits))
+            self.assertEqual(sum(telescope_data.shape[0] for _, telescope_data in batches), n_telescope_data)
+
+    @unittest.skipIf(h5py is None, 'h5py is required for the follow mode')
+    def test_follow(self):
+        ''' Interpreting the raw data file while it is written by another process (SWMR), the output is identical for the same chunk size. '''
+        reference_file = self.interpret(chunk_size=10007, n_workers=1)
+        growing_raw_data_file = os.path.join(tests_data_folder, 'generated_raw_data_parallel_growing.h5')
+        output_file = os.path.join(tests_data_folder, 'generated_raw_data_parallel_growing_interpreted.h5')
+        self.temp_output_files.extend([growing_raw_data_file, output_file])
+        writer = subprocess.Popen([sys.executable, '-c', write_raw_data_script, self.raw_data_file, growing_raw_data_file, 'swmr'])
+        try:
+            with data_interpreter.DataInterpreter(raw_data_file=growing_raw_data_file, analyzed_data_file=output_file, trigger_data_format=2, create_pdf=False, chunk_size=10007) as interpreter:
+                interpreter.create_hit_table = True
+                interpreter.create_occupancy_hist = True
+                interpreter.create_error_hist = True
+                interpreter.follow_word_table(poll_interval=0.05, timeout=5.0)
+        finally:
+            self.assertEqual(writer.wait(), 0)
+        checks_passed, error_msg = compare_h5_files(reference_file, output_file, node_names=None, detailed_comparison=True, exact=True, chunk_size=1000000)
+        self.assertTrue(checks_passed, msg=error_msg)
+
+    @unittest.skipIf(h5py is None, 'h5py is required for the follow mode')
+    def test_follow_no_swmr(self):
+        ''' The follow mode fails if the raw data file is not written in SWMR mode. '''
+        growing_raw_data_file = os.path.join(tests_data_folder, 'generated_raw_data_parallel_growing_no_swmr.h5')
+        output_file = os.path.join(tests_data_folder, 'generated_raw_data_parallel_growing_no_swmr_interpreted.h5')
+        self.temp_output_files.extend([growing_raw_data_file, output_file])
+        writer = subprocess.Popen([sys.executable, '-c', write_raw_data_script, self.raw_data_file, growing_raw_data_file, 'no_swmr'])
+        try:
+            while not os.path.isfile(growing_raw_data_file):  # The raw data file is locked while it is written
+                time.sleep(0.01)
+            with data_interpreter.DataInterpreter(raw_data_file=growing_raw_data_file, analyzed_data_file=output_file, trigger_data_format=2, create_pdf=False, chunk_size=10007) as interpreter:
+                with self.assertRaises(IOError):
+                    interpreter.follow_word_table(poll_interval=0.05, timeout=0.5)
+        finally:
+            self.assertEqual(writer.wait(), 0)
+
+    def test_resume(self):
+        ''' Resuming an interrupted interpretation from the last checkpoint. '''
+        reference_file = self.interpret(chunk_size=997, n_workers=1)
+        output_file = os.path.join(tests_data_folder, 'generated_raw_data_parallel_interpreted_resumed.h5')
+        self.temp_output_files.append(output_file)
+        for n_chunks in (2, 10, 50):  # Interrupt after n_chunks raw data chunks
+            with data_interpreter.DataInterpreter(raw_data_file=self.raw_data_file, analyzed_data_file=output_file, trigger_data_format=2, create_pdf=False, chunk_size=997, checkpoint_interval=4) as interpreter:
+                interpreter.create_occupancy_hist = True
+                interpreter.create_error_hist = True
+                interpret_raw_data = interpreter.interpreter.interpret_raw_data
+                chunk_indices = iter(range(n_chunks))
+
+                def interrupted_interpret_raw_data(raw_data=None, build_all_events=False, **kwargs):
+                    next(chunk_indices)  # raises StopIteration
+                    return interpret_raw_data(raw_data=raw_data, build_all_events=build_all_events, **kwargs)
+                interpreter.interpreter.interpret_raw_data = interrupted_interpret_raw_data
+                with self.assertRaises(StopIteration):
+                    interpreter.interpret_word_table()
+            with data_interpreter.DataInterpreter(raw_data_file=self.raw_data_file, analyzed_data_file=output_file, trigger_data_format=2, create_pdf=False, chunk_size=997, checkpoint_interval=4) as interpreter:
+                interpreter.create_occupancy_hist = True
+                interpreter.create_error_hist = True
+                interpreter.interpret_word_table(resume=True)
+            checks_passed, error_msg = compare_h5_files(reference_file, output_file, node_names=None, detailed_comparison=True, exact=True, chunk_size=1000000)
+            self.assertTrue(checks_passed, msg=error_msg)
+
+    def test_timing_offset_sweep(self):
+        ''' Building the events for several timing offsets in one pass. '''
+        timing_offsets = [0, -112, -1000, 2000]
+        output_file = os.path.join(tests_data_folder, 'generated_raw_data_parallel_interpreted_sweep.h5')
+        self.temp_output_files.append(output_file)
+        with data_interpreter.DataInterpreter(raw_data_file=self.raw_data_file, analyzed_data_file=output_file, trigger_data_format=2, create_pdf=False, chunk_size=997, flush_interval=3) as interpreter:
+            summary = interpreter.sweep_timing_offsets(timing_offsets=timing_offsets, create_hit_tables=True)
+        self.assertEqual(summary['timing_offset'][np.argmax(summary['correlation'])], -112)  # timing offset of the generated data
+        with tb.open_file(output_file, 'r') as in_file_h5:
+            self.assertTrue(np.array_equal(in_file_h5.root.TimingOffsetSweep[:], summary))
+            for index, timing_offset in enumerate(timing_offsets):
+                hits = in_file_h5.get_node(in_file_h5.root, 'Hits_%d' % index)[:]
+                with data_interpreter.DataInterpreter(raw_data_file=self.raw_data_file, trigger_data_format=2, create_pdf=False, chunk_size=997, timing_offset=timing_offset) as interpreter:
+                    reference_hits = np.concatenate([hits for hits, _ in interpreter.iter_hits()])
+                self.assertTrue(np.array_equal(hits, reference_hits))
+                self.assertEqual(summary['n_hits'][index], reference_hits.shape[0])
+                self.assertAlmostEqual(summary['empty_events'][index], 1.0 - np.unique(reference_hits['event_number']).shape[0] / summary['n_events'][index])
+        with self.assertRaises(ValueError):
+            interpreter.sweep_timing_offsets(timing_offsets=[0, 0])
+
+
+# Copying the raw data in small pieces to a new file, emulating the DAQ
+# Writing the raw data file in SWMR mode like the DAQ (h5py), argv[3] == 'no_swmr' writes without SWMR
+write_raw_data_script = '''
+import sys
+import time
+import h5py
+import tables as tb
+with tb.open_file(sys.argv[1], 'r') as in_file_h5:
+    raw_data = in_file_h5.root.raw_data[:]
+with h5py.File(sys.argv[2], 'w', libver='latest') as out_file_h5:
+    raw_data_dataset = out_file_h5.create_dataset('raw_data', shape=(0,), maxshape=(None,), chunks=(50000,), dtype='<u4')
+    if sys.argv[3] == 'swmr':
+        out_file_h5.swmr_mode = True
+    for i in range(0, raw_data.shape[0], 5003):
+        raw_data_chunk = raw_data[i:i + 5003]
+        raw_data_dataset.resize((i + raw_data_chunk.shape[0],))
+        raw_data_dataset[i:] = raw_data_chunk
+        out_file_h5.flush()
+        time.sleep(0.01)
+'''
+
+
+if __name__ == '__main__':
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestParallelInterpretation)
+    unittest.TextTestRunner(verbosity=2).run(suite)
@@ -0,0 +1,207 @@
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import unittest
+
+import numpy as np
+import tables as tb
+
+from pymosa_mimosa26_interpreter import data_interpreter
+from pymosa_mimosa26_interpreter import raw_data_interpreter
+from pymosa_mimosa26_interpreter.testing.tools.test_tools import create_raw_data, create_raw_data_file
+
+tests_data_folder = os.path.dirname(os.path.realpath(__file__))
+
+
+class TestPipelineStages(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.temp_folder = tempfile.mkdtemp()
+        cls.raw_data = create_raw_data(n_frames=2000)
+
+    @classmethod
+    def tearDownClass(cls):  # Remove created files
+        shutil.rmtree(cls.temp_folder)
+
+    def get_chunks(self, raw_data, chunk_size):
+        return [raw_data[i:i + chunk_size] for i in range(0, raw_data.shape[0], chunk_size)]
+
+    def interpret(self, chunks, timing_offset=-112, add_missing_events=False):
+        interpreter = raw_data_interpreter.RawDataInterpreter()
+        interpreter.timing_offset = timing_offset
+        interpreter.add_missing_events = add_missing_events
+        return np.concatenate([interpreter.interpret_raw_data(raw_data=chunk, build_all_events=index == len(chunks) - 1)[0] for index, chunk in enumerate(chunks)])
+
+    def test_decoder_event_builder(self):
+        for chunk_size in (997, 50000):
+            chunks = self.get_chunks(self.raw_data, chunk_size)
+            for timing_offset, add_missing_events in ((-112, False), (-112, True), (600, True)):
+                decoder = raw_data_interpreter.Decoder()
+                event_builder = raw_data_interpreter.EventBuilder(timing_offset=timing_offset, add_missing_events=add_missing_events)
+                hits = []
+                for index, chunk in enumerate(chunks):
+                    is_last_chunk = index == len(chunks) - 1
+                    hits.append(event_builder.build_events(decoder.decode(raw_data=chunk, flush=is_last_chunk), build_all_events=is_last_chunk))
+                self.assertTrue(np.array_equal(np.concatenate(hits), self.interpret(chunks, timing_offset=timing_offset, add_missing_events=add_missing_events)))
+                # Counters
+                self.assertEqual(decoder.get_counters()['n_words'], self.raw_data.shape[0])
+                self.assertEqual(decoder.get_counters()['n_hits'], event_builder.get_counters()['n_hits'])
+                self.assertEqual(event_builder.get_counters()['n_event_hits'], np.concatenate(hits).shape[0])
+                self.assertEqual(event_builder.get_counters()['n_events'], event_builder.event_number + 1)
+
+    def test_timing_offsets(self):
+        ''' The hits of each timing offset are identical to the hits of a separate interpretation, also if the trigger buffer of a timing offset is empty '''
+        raw_data = create_raw_data(n_frames=2000, trigger_rate=0.1, error_rate=0.05)  # Low trigger rate: the trigger buffers are often empty
+        timing_offsets = [-112, -3000, 0, 2000]
+        for chunk_size in (97, 997):
+            chunks = self.get_chunks(raw_data, chunk_size)
+            for add_missing_events in (False, True):
+                interpreter = raw_data_interpreter.RawDataInterpreter()
+                interpreter.add_missing_events = add_missing_events
+                hits = [[] for _ in timing_offsets]
+                for index, chunk in enumerate(chunks):
+                    for timing_offset_hits, chunk_hits in zip(hits, interpreter.interpret_raw_data_timing_offsets(timing_offsets=timing_offsets, raw_data=chunk, build_all_events=index == len(chunks) - 1)[0]):
+                        timing_offset_hits.append(chunk_hits)
+                for timing_offset, timing_offset_hits in zip(timing_offsets, hits):
+                    self.assertTrue(np.array_equal(np.concatenate(timing_offset_hits), self.interpret(chunks, timing_offset=timing_offset, add_missing_events=add_missing_events)), msg=str((chunk_size, add_missing_events, timing_offset)))
+
+    def test_no_copy(self):
+        ''' Views of the internal buffers instead of copies (valid until the next call) '''
+        chunks = self.get_chunks(self.raw_data, 997)
+        for multithreading in (False, True):
+            interpreter = raw_data_interpreter.RawDataInterpreter()
+            interpreter.multithreading = multithreading
+            reference_interpreter = raw_data_interpreter.RawDataInterpreter()
+            for index, chunk in enumerate(chunks):
+                hits, telescope_data = interpreter.interpret_raw_data(raw_data=chunk, build_all_events=index == len(chunks) - 1, copy=False)
+                reference_hits, reference_telescope_data = reference_interpreter.interpret_raw_data(raw_data=chunk, build_all_events=index == len(chunks) - 1)
+                self.assertTrue(np.array_equal(hits, reference_hits))
+                self.assertTrue(np.array_equal(telescope_data, reference_telescope_data))
+                self.assertFalse(hits.flags.writeable)
+                self.assertFalse(telescope_data.flags.writeable)
+            self.assertEqual(interpreter.event_number, reference_interpreter.event_number)
+
+    def test_output_arrays(self):
+        ''' Hits and telescope data written to preallocated output arrays '''
+        chunks = self.get_chunks(self.raw_data, 997)
+        interpreter = raw_data_interpreter.RawDataInterpreter()
+        reference_interpreter = raw_data_interpreter.RawDataInterpreter()
+        for index, chunk in enumerate(chunks):
+            build_all_events = index == len(chunks) - 1
+            size = 0 if index % 3 == 0 else 10000  # The output arrays are not used if they are too small
+            hits_out = np.zeros(shape=size, dtype=raw_data_interpreter.hits_dtype)
+            telescope_data_out = np.zeros(shape=size, dtype=raw_data_interpreter.telescope_data_dtype)
+            hits, telescope_data = interpreter.interpret_raw_data(raw_data=chunk, build_all_events=build_all_events, hits_out=hits_out, telescope_data_out=telescope_data_out)
+            reference_hits, reference_telescope_data = reference_interpreter.interpret_raw_data(raw_data=chunk, build_all_events=build_all_events)
+            self.assertTrue(np.array_equal(hits, reference_hits))
+            self.assertTrue(np.array_equal(telescope_data, reference_telescope_data))
+            if size and hits.shape[0]:
+                self.assertTrue(np.shares_memory(hits, hits_out))
+                self.assertTrue(np.array_equal(hits_out[:hits.shape[0]], reference_hits))
+            if size and telescope_data.shape[0]:
+                self.assertTrue(np.shares_memory(telescope_data, telescope_data_out))
+        with self.assertRaises(ValueError):
+            interpreter.interpret_raw_data(raw_data=chunks[0], hits_out=np.zeros(shape=10000, dtype=raw_data_interpreter.telescope_data_dtype))
+        with self.assertRaises(ValueError):
+            interpreter.interpret_raw_data(raw_data=chunks[0], telescope_data_out=np.zeros(shape=(10000, 2), dtype=raw_data_interpreter.telescope_data_dtype))
+        # Decoder and event builder
+        decoder = raw_data_interpreter.Decoder()
+        event_builder = raw_data_interpreter.EventBuilder()
+        telescope_data_out = np.zeros(shape=10000, dtype=raw_data_interpreter.telescope_data_dtype)
+        hits_out = np.zeros(shape=10000, dtype=raw_data_interpreter.hits_dtype)
+        hits = []
+        for index, chunk in enumerate(chunks):
+            is_last_chunk = index == len(chunks) - 1
+            decoded_data = decoder.decode(raw_data=chunk, flush=is_last_chunk, telescope_data_out=telescope_data_out)
+            if decoded_data.telescope_data.shape[0]:
+                self.assertTrue(np.shares_memory(decoded_data.telescope_data, telescope_data_out))
+            if index % 2:
+                chunk_hits = event_builder.build_events(decoded_data, build_all_events=is_last_chunk, hits_out=hits_out)
+                if chunk_hits.shape[0]:
+                    self.assertTrue(np.shares_memory(chunk_hits, hits_out))
+            else:
+                chunk_hits = event_builder.build_events(decoded_data, build_all_events=is_last_chunk, copy=False)
+                self.assertFalse(chunk_hits.flags.writeable)
+            hits.append(chunk_hits.copy())
+        self.assertTrue(np.array_equal(np.concatenate(hits), self.interpret(chunks)))
+
+    def test_threads(self):
+        ''' Decoder and event builder in separate threads connected by a queue '''
+        chunks = self.get_chunks(self.raw_data, 997)
+        decoded_data_queue = queue.Queue(maxsize=4)
+
+        def decode():
+            decoder = raw_data_interpreter.Decoder()
+            for index, chunk in enumerate(chunks):
+                decoded_data_queue.put(decoder.decode(raw_data=chunk, flush=index == len(chunks) - 1))
+            decoded_data_queue.put(None)
+
+        decoder_thread = threading.Thread(target=decode)
+        decoder_thread.start()
+        event_builder = raw_data_interpreter.EventBuilder()
+        hits = []
+        decoded_data = decoded_data_queue.get()
+        while decoded_data is not None:
+            next_decoded_data = decoded_data_queue.get()
+            hits.append(event_builder.build_events(decoded_data, build_all_events=next_decoded_data is None))
+            decoded_data = next_decoded_data
+        decoder_thread.join()
+        self.assertTrue(np.array_equal(np.concatenate(hits), self.interpret(chunks)))
+
+    def test_missing_triggers(self):
+        ''' Consecutive missing trigger words '''
+        raw_data = create_raw_data(n_frames=500, error_rate=0.0)
+        trigger_word_indices = np.flatnonzero(raw_data & 0x80000000)
+        raw_data = np.delete(raw_data, trigger_word_indices[[10, 11, 12, 20]])
+        hits = self.interpret([raw_data], add_missing_events=True)
+        interpreter = raw_data_interpreter.RawDataInterpreter()
+        interpreter.add_missing_events = True
+        interpreter._decode(raw_data=raw_data)
+        trigger_data = interpreter.trigger_data[:interpreter.trigger_data_index + 1]
+        self.assertEqual(trigger_data.shape[0], trigger_word_indices.shape[0])
+        self.assertTrue(np.all(np.diff(trigger_data['event_number']) == 1))
+        self.assertEqual(np.count_nonzero(trigger_data['trigger_status'] & raw_data_interpreter.NO_TRIGGER_WORD_ERROR), 4)
+        for chunk_size in (997, 50000):
+            chunks = self.get_chunks(raw_data, chunk_size)
+            decoder = raw_data_interpreter.Decoder()
+            event_builder = raw_data_interpreter.EventBuilder(add_missing_events=True)
+            pipeline_hits = [event_builder.build_events(decoder.decode(raw_data=chunk, flush=index == len(chunks) - 1), build_all_events=index == len(chunks) - 1) for index, chunk in enumerate(chunks)]
+            self.assertTrue(np.array_equal(np.concatenate(pipeline_hits), hits))
+
+    def test_reference_data(self):
+        ''' Compare the hits with the hits of the original interpreter (reference data) '''
+        with tb.open_file(os.path.join(tests_data_folder, 'reference_missing_triggers.h5'), 'r') as in_file_h5:
+            raw_data = in_file_h5.root.raw_data[:]
+            self.assertTrue(np.array_equal(self.interpret([raw_data]), in_file_h5.root.Hits[:]))
+            self.assertTrue(np.array_equal(self.interpret([raw_data], add_missing_events=True), in_file_h5.root.HitsMissingEvents[:]))
+            raw_data = in_file_h5.root.raw_data_errors[:]
+            chunks = self.get_chunks(raw_data, 997)
+            self.assertTrue(np.array_equal(self.interpret(chunks, add_missing_events=True), in_file_h5.root.HitsErrorsChunked[:]))
+            decoder = raw_data_interpreter.Decoder()
+            event_builder = raw_data_interpreter.EventBuilder(add_missing_events=True)
+            hits = [event_builder.build_events(decoder.decode(raw_data=chunk, flush=index == len(chunks) - 1), build_all_events=index == len(chunks) - 1) for index, chunk in enumerate(chunks)]
+            self.assertTrue(np.array_equal(np.concatenate(hits), in_file_h5.root.HitsErrorsChunked[:]))
+
+    def test_decode_only(self):
+        raw_data_file = os.path.join(self.temp_folder, 'raw_data.h5')
+        create_raw_data_file(raw_data_file, n_frames=2000)
+        output_files = []
+        for create_hit_table in (True, False):
+            output_files.append(os.path.join(self.temp_folder, 'interpreted_%d.h5' % create_hit_table))
+            with data_interpreter.DataInterpreter(raw_data_file=raw_data_file, analyzed_data_file=output_files[-1], chunk_size=9973) as interpreter:
+                interpreter.create_hit_table = create_hit_table
+                interpreter.create_occupancy_hist = True
+                interpreter.create_error_hist = False
+                interpreter.interpret_word_table()
+        with tb.open_file(output_files[0], 'r') as in_file_h5:
+            with tb.open_file(output_files[1], 'r') as decoded_file_h5:
+                self.assertNotIn('Hits', decoded_file_h5.root)
+                for plane in raw_data_interpreter.DEFAULT_PYMOSA_M26_HEADER_IDS:
+                    self.assertTrue(np.array_equal(in_file_h5.get_node('/HistOcc_plane%d' % plane)[:], decoded_file_h5.get_node('/HistOcc_plane%d' % plane)[:]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import tables as tb
+
+from pymosa_mimosa26_interpreter import data_interpreter
+from pymosa_mimosa26_interpreter import plane_hits
+from pymosa_mimosa26_interpreter import raw_data_interpreter
+from pymosa_mimosa26_interpreter.testing.tools.test_tools import create_raw_data_file
+
+
+class TestPlaneHits(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.temp_folder = tempfile.mkdtemp()
+        cls.raw_data_file = os.path.join(cls.temp_folder, 'raw_data.h5')
+        create_raw_data_file(cls.raw_data_file, n_frames=2000)
+        cls.output_file = os.path.join(cls.temp_folder, 'interpreted.h5')
+        interpreter = data_interpreter.DataInterpreter(raw_data_file=cls.raw_data_file, analyzed_data_file=cls.output_file, chunk_size=9973)
+        interpreter.interpret_word_table()
+        with tb.open_file(cls.output_file, 'r') as in_file_h5:
+            cls.hits = in_file_h5.root.Hits[:]
+
+    @classmethod
+    def tearDownClass(cls):  # Remove created files
+        shutil.rmtree(cls.temp_folder)
+
+    def assert_plane_hits_valid(self, plane_hit_files):
+        ''' The plane hit files must contain the hits of each plane with column and row starting at 1 '''
+        self.assertEqual(len(plane_hit_files), len(raw_data_interpreter.DEFAULT_PYMOSA_M26_HEADER_IDS))
+        for plane, plane_hit_file in zip(raw_data_interpreter.DEFAULT_PYMOSA_M26_HEADER_IDS, plane_hit_files):
+            with tb.open_file(plane_hit_file, 'r') as in_file_h5:
+                hits = in_file_h5.root.Hits[:]
+            selected_hits = self.hits[self.hits['plane'] == plane]
+            self.assertEqual(hits.dtype, plane_hits.plane_hits_dtype)
+            self.assertGreater(hits.shape[0], 0)
+            self.assertTrue(np.array_equal(hits['event_number'], selected_hits['event_number']))
+            self.assertTrue(np.array_equal(hits['column'], selected_hits['column'] + 1))
+            self.assertTrue(np.array_equal(hits['row'], selected_hits['row'] + 1))
+            self.assertTrue(np.all(hits['frame'] == 0))
+            self.assertTrue(np.all(hits['charge'] == 0))
+
+    def test_split_hits_by_plane(self):
+        plane_id_to_index = -1 * np.ones(shape=max(raw_data_interpreter.DEFAULT_PYMOSA_M26_HEADER_IDS) + 1, dtype=np.int32)
+        for plane_index, plane_id in enumerate(raw_data_interpreter.DEFAULT_PYMOSA_M26_HEADER_IDS):
+            plane_id_to_index[plane_id] = plane_index
+        n_planes = len(raw_data_interpreter.DEFAULT_PYMOSA_M26_HEADER_IDS)
+        hits, plane_start_indices = plane_hits.split_hits_by_plane(self.hits, plane_id_to_index, n_planes, np.zeros(shape=self.hits.shape[0] + 10, dtype=plane_hits.plane_hits_dtype))
+        self.assertEqual(hits.shape[0], self.hits.shape[0])
+        self.assertEqual(plane_start_indices[0], 0)
+        for plane_index, plane in enumerate(raw_data_interpreter.DEFAULT_PYMOSA_M26_HEADER_IDS):
+            selected_hits = self.hits[self.hits['plane'] == plane]
+            self.assertTrue(np.array_equal(hits[plane_start_indices[plane_index]:plane_start_indices[plane_index + 1]]['event_number'], selected_hits['event_number']))
+            self.assertTrue(np.array_equal(hits[plane_start_indices[plane_index]:plane_start_indices[plane_index + 1]]['column'], selected_hits['column'] + 1))
+        hits, plane_start_indices = plane_hits.split_hits_by_plane(self.hits[:0], plane_id_to_index, n_planes, np.zeros(shape=0, dtype=plane_hits.plane_hits_dtype))
+        self.assertEqual(hits.shape[0], 0)
+        self.assertTrue(np.all(plane_start_indices == 0))
+
+    def test_plane_hit_files(self):
+        for index, kwargs in enumerate((dict(), dict(prefetch_depth=2), dict(decoded_data_cache=True), dict(n_workers=2), dict(hits_format=['plane', 'event_number', 'column', 'row']))):
+            output_file = os.path.join(self.temp_folder, 'interpreted_%d.h5' % index)
+            interpreter = data_interpreter.DataInterpreter(raw_data_file=self.raw_data_file, analyzed_data_file=output_file, chunk_size=9973, **kwargs)
+            interpreter.create_plane_hit_files = True
+            interpreter.create_hit_table = index != 0  # The plane hit files do not require the hit table
+            interpreter.interpret_word_table()
+            self.assert_plane_hits_valid(plane_hits.get_plane_hit_files(output_file, interpreter.analyze_m26_header_ids))
+        # Given filenames
+        plane_hit_files = [os.path.join(self.temp_folder, 'plane_%d.h5' % index) for index in range(len(raw_data_interpreter.DEFAULT_PYMOSA_M26_HEADER_IDS))]
+        interpreter = data_interpreter.DataInterpreter(raw_data_file=self.raw_data_file, analyzed_data_file=os.path.join(self.temp_folder, 'interpreted_other.h5'), chunk_size=9973)
+        interpreter.create_plane_hit_files = True
+        interpreter.plane_hit_files = plane_hit_files
+        interpreter.interpret_word_table()
+        self.assert_plane_hits_valid(plane_hit_files)
+        # The plane hit files require the columns plane, event_number, column and row
+        interpreter = data_interpreter.DataInterpreter(raw_data_file=self.raw_data_file, analyzed_data_file=os.path.join(self.temp_folder, 'interpreted_other.h5'), chunk_size=9973, hits_format=['plane', 'event_number', 'row'])
+        interpreter.create_plane_hit_files = True
+        with self.assertRaises(ValueError):
+            interpreter.interpret_word_table()
+        interpreter = data_interpreter.DataInterpreter(raw_data_file=self.raw_data_file, analyzed_data_file=os.path.join(self.temp_folder, 'interpreted_other.h5'), chunk_size=9973)
+        interpreter.create_plane_hit_files = True
+        interpreter.plane_hit_files = plane_hit_files[1:]
+        with self.assertRaises(ValueError):
+            interpreter.interpret_word_table()
+
+    def test_resume(self):
+        output_file = os.path.join(self.temp_folder, 'interpreted_resume.h5')
+        interpreter = data_interpreter.DataInterpreter(raw_data_file=self.raw_data_file, analyzed_data_file=output_file, chunk_size=9973, checkpoint_interval=3)
+        interpreter.create_plane_hit_files = True
+        original_interpret_chunk = interpreter._interpret_chunk
+
+        def interrupted_interpret_chunk(raw_data_chunk, *args, **kwargs):
+            original_interpret_chunk(raw_data_chunk, *args, **kwargs)
+            if interpreter._plane_hits_writer.nrows[0] > self.hits.shape[0] // 12:
+                raise KeyboardInterrupt
+        interpreter._interpret_chunk = interrupted_interpret_chunk
+        try:
+            interpreter.interpret_word_table()
+        except KeyboardInterrupt:
+            pass
+        # The plane hits written after the checkpoint are removed when resuming
+        interpreter = data_interpreter.DataInterpreter(raw_data_file=self.raw_data_file, analyzed_data_file=output_file, chunk_size=9973, checkpoint_interval=3)
+        interpreter.create_plane_hit_files = True
+        interpreter.interpret_word_table(resume=True)
+        self.assert_plane_hits_valid(plane_hits.get_plane_hit_files(output_file, interpreter.analyze_m26_header_ids))
+        # The hit table is written as before
+        with tb.open_file(output_file, 'r') as in_file_h5:
+            self.assertTrue(np.array_equal(in_file_h5.root.Hits[:], self.hits))
+
+
+if __name__ == '__main__':
+    unittest.main()
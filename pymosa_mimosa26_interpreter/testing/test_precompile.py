@@ -0,0 +1,65 @@
+import os
+import subprocess
+import sys
+import unittest
+
+from pymosa_mimosa26_interpreter.testing.tools.test_tools import create_raw_data_file
+
+testing_path = os.path.dirname(__file__)  # Get file path
+tests_data_folder = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(testing_path)) + r'/testing/'))  # Set test data path
+
+
+class TestPrecompile(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.raw_data_file = os.path.join(tests_data_folder, 'generated_raw_data_precompile.h5')
+        create_raw_data_file(cls.raw_data_file, n_frames=200)
+        cls.temp_output_files = [cls.raw_data_file]
+
+    @classmethod
+    def tearDownClass(cls):  # Remove created files
+        for temp_output_file in cls.temp_output_files:
+            if os.path.isfile(temp_output_file):
+                os.remove(temp_output_file)
+
+    def test_precompiled_signatures(self):
+        ''' The interpretation must not compile the kernels for other signatures than the precompiled ones.
+        The kernels are checked in a new process, independent of the kernels compiled by other tests. '''
+        output_file = os.path.join(tests_data_folder, 'generated_raw_data_precompile_interpreted.h5')
+        self.temp_output_files.extend([output_file, os.path.splitext(self.raw_data_file)[0] + '_decoded.h5'])
+        process = subprocess.Popen([sys.executable, '-c', check_signatures_script, self.raw_data_file, output_file], stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        output = process.communicate()[0].decode()
+        self.assertEqual(process.returncode, 0, msg=output)
+
+
+# Precompiling the kernels and using all interpretation modes, afterwards each kernel must have the precompiled signature only
+check_signatures_script = '''
+import sys
+from pymosa_mimosa26_interpreter import data_interpreter
+from pymosa_mimosa26_interpreter import precompile
+precompile.precompile()
+raw_data_file, output_file = sys.argv[1], sys.argv[2]
+for kwargs in (dict(multithreading=False), dict(multithreading=True), dict(decoded_data_cache=True), dict(timing_offset='auto')):
+    with data_interpreter.DataInterpreter(raw_data_file=raw_data_file, analyzed_data_file=output_file, trigger_data_format=2, create_pdf=False, chunk_size=997, **kwargs) as interpreter:
+        interpreter.create_hit_table = True
+        interpreter.create_occupancy_hist = True
+        interpreter.create_error_hist = True
+        interpreter.interpret_word_table()
+with data_interpreter.DataInterpreter(raw_data_file=raw_data_file, analyzed_data_file=output_file, trigger_data_format=2, create_pdf=False, chunk_size=997) as interpreter:
+    interpreter.sweep_timing_offsets(timing_offsets=[-112, 0])
+    interpreter.create_hit_table = False
+    interpreter.create_error_hist = False
+    interpreter.interpret_word_table()  # Decoding only
+failed = False
+for kernel, signature in precompile.signatures:
+    if kernel.signatures != [signature]:
+        print('%s: %s' % (kernel.py_func.__name__, kernel.signatures))
+        failed = True
+sys.exit(1 if failed else 0)
+'''
+
+
+if __name__ == '__main__':
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestPrecompile)
+    unittest.TextTestRunner(verbosity=2).run(suite)
@@ -0,0 +1,129 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import tables as tb
+
+from pymosa_mimosa26_interpreter import data_interpreter
+from pymosa_mimosa26_interpreter import parallel_interpreter
+from pymosa_mimosa26_interpreter import raw_data_index
+from pymosa_mimosa26_interpreter.testing.tools.test_tools import create_raw_data_file
+
+
+class TestRawDataIndex(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.temp_folder = tempfile.mkdtemp()
+        cls.raw_data_file = os.path.join(cls.temp_folder, 'raw_data.h5')
+        create_raw_data_file(cls.raw_data_file, n_frames=2000)
+        cls.reference_file = os.path.join(cls.temp_folder, 'raw_data_interpreted.h5')
+        with data_interpreter.DataInterpreter(raw_data_file=cls.raw_data_file, analyzed_data_file=cls.reference_file, chunk_size=997) as interpreter:
+            interpreter.interpret_word_table()
+        with tb.open_file(cls.reference_file, 'r') as in_file_h5:
+            cls.reference_hits = in_file_h5.root.Hits[:]
+
+    @classmethod
+    def tearDownClass(cls):  # Remove created files
+        shutil.rmtree(cls.temp_folder)
+
+    def test_index(self):
+        with tb.open_file(self.raw_data_file, 'r') as in_file_h5:
+            raw_data = in_file_h5.root.raw_data[:]
+        trigger_index, frame_index = raw_data_index.build_index(raw_data)
+        self.assertTrue(np.all(raw_data[trigger_index['word_index']] & 0x80000000))
+        self.assertTrue(np.all(raw_data[frame_index['word_index']] & 0x00010000))
+        # Decoded trigger numbers and timestamps (including overflows) are identical to the interpreter
+        events = np.unique(self.reference_hits[['event_number', 'trigger_number', 'trigger_time_stamp']])
+        self.assertTrue(np.array_equal(trigger_index[events['event_number']]['trigger_number'], events['trigger_number']))
+        self.assertTrue(np.array_equal(trigger_index[events['event_number']]['trigger_time_stamp'], events['trigger_time_stamp']))
+        self.assertGreater(trigger_index['trigger_number'][-1], 2**16)  # overflow of the 16 bit trigger number
+        # Same index if the frame headers are split at the block boundaries
+        for block_size in (1000, 4999):
+            other_trigger_index, other_frame_index = raw_data_index.build_index(raw_data, block_size=block_size)
+            self.assertTrue(np.array_equal(other_trigger_index, trigger_index))
+            self.assertTrue(np.array_equal(other_frame_index, frame_index))
+
+    def test_seek(self):
+        index_file = raw_data_index.create_index(self.raw_data_file)
+        self.assertEqual(index_file, raw_data_index.get_index_file(self.raw_data_file))
+        trigger_index, _ = raw_data_index.read_index(self.raw_data_file)
+        output_file = os.path.join(self.temp_folder, 'raw_data_seek.h5')
+        for trigger in (3, 400, 950):
+            for kwargs in ({'trigger_number': trigger_index['trigger_number'][trigger]}, {'timestamp': trigger_index['trigger_time_stamp'][trigger] - 1}):
+                with data_interpreter.DataInterpreter(raw_data_file=self.raw_data_file, analyzed_data_file=output_file, chunk_size=997) as interpreter:
+                    event_number = interpreter.seek(**kwargs)
+                    interpreter.interpret_word_table()
+                self.assertEqual(event_number, trigger)
+                with tb.open_file(output_file, 'r') as in_file_h5:
+                    self.assertTrue(np.array_equal(in_file_h5.root.Hits[:], self.reference_hits[self.reference_hits['event_number'] >= event_number]))
+        with self.assertRaises(ValueError):
+            raw_data_index.get_trigger(trigger_index, trigger_number=trigger_index['trigger_number'][-1] + 1)
+
+    def test_select_range(self):
+        trigger_index, _ = raw_data_index.get_index(self.raw_data_file)
+        output_file = os.path.join(self.temp_folder, 'raw_data_range.h5')
+        for kwargs in ({'event_numbers': (100, 200)}, {'event_numbers': (None, 50)}, {'trigger_numbers': (trigger_index['trigger_number'][300], trigger_index['trigger_number'][310])},
+                       {'timestamps': (trigger_index['trigger_time_stamp'][700] - 5, None)}):
+            for prefetch_depth in (0, 2):
+                with data_interpreter.DataInterpreter(raw_data_file=self.raw_data_file, analyzed_data_file=output_file, chunk_size=997, prefetch_depth=prefetch_depth) as interpreter:
+                    start, stop = interpreter.select_range(**kwargs)
+                    n_words = []
+                    interpret_raw_data = interpreter.interpreter.interpret_raw_data
+
+                    def counting_interpret_raw_data(raw_data=None, build_all_events=False, **kwargs):
+                        n_words.append(0 if raw_data is None else raw_data.shape[0])
+                        return interpret_raw_data(raw_data=raw_data, build_all_events=build_all_events, **kwargs)
+                    interpreter.interpreter.interpret_raw_data = counting_interpret_raw_data
+                    interpreter.interpret_word_table()
+                with tb.open_file(output_file, 'r') as in_file_h5:
+                    hits = in_file_h5.root.Hits[:]
+                selection = (self.reference_hits['event_number'] >= start) & ((self.reference_hits['event_number'] < stop) if stop is not None else True)
+                self.assertTrue(np.array_equal(hits, self.reference_hits[selection]))
+                if stop is not None:  # Interpretation stops after the range
+                    self.assertLess(sum(n_words), trigger_index['word_index'][stop] + 10 * 997)
+        with self.assertRaises(ValueError):
+            interpreter.select_range(event_numbers=(200, 100))
+
+    def test_select_range_missing_triggers(self):
+        ''' The warm-up reproduces the interpretation from the beginning also with missing trigger words and corrupted data '''
+        raw_data_file = os.path.join(self.temp_folder, 'raw_data_missing_triggers.h5')
+        create_raw_data_file(raw_data_file, n_frames=1500, trigger_rate=0.3, error_rate=0.3, seed=4)
+        with data_interpreter.DataInterpreter(raw_data_file=raw_data_file, chunk_size=53) as interpreter:  # Small chunks: many triggers are buffered after the warm-up
+            reference_hits = np.concatenate([hits for hits, _ in interpreter.iter_hits()])
+            n_events = interpreter.interpreter.event_number + 1
+        resync_n_triggers = parallel_interpreter.RESYNC_N_TRIGGERS
+        try:
+            for parallel_interpreter.RESYNC_N_TRIGGERS in (resync_n_triggers, 1):
+                with self.assertLogs(level='WARNING'):  # The warm-up is repeated if the buffered triggers are not recovered
+                    for start_event_number in range(1, n_events, 11):
+                        with data_interpreter.DataInterpreter(raw_data_file=raw_data_file, chunk_size=53) as interpreter:
+                            start, stop = interpreter.select_range(event_numbers=(start_event_number, start_event_number + 20))
+                            hits = np.concatenate([hits for hits, _ in interpreter.iter_hits()])
+                        selection = (reference_hits['event_number'] >= start) & ((reference_hits['event_number'] < stop) if stop is not None else True)
+                        self.assertTrue(np.array_equal(hits, reference_hits[selection]), msg=str((parallel_interpreter.RESYNC_N_TRIGGERS, start_event_number)))
+        finally:
+            parallel_interpreter.RESYNC_N_TRIGGERS = resync_n_triggers
+        # The event numbers depend on the event building of all earlier triggers if the missing triggers are added
+        interpreter = data_interpreter.DataInterpreter(raw_data_file=raw_data_file, chunk_size=997, add_missing_events=True)
+        with self.assertRaises(ValueError):
+            interpreter.select_range(event_numbers=(100, 200))
+        with self.assertRaises(ValueError):
+            interpreter.seek(trigger_number=reference_hits['trigger_number'][100])
+
+    def test_index_in_raw_data_file(self):
+        raw_data_file = os.path.join(self.temp_folder, 'raw_data_with_index.h5')
+        shutil.copy(self.raw_data_file, raw_data_file)
+        raw_data_index.main([raw_data_file, '--in-raw-data-file'])
+        self.assertFalse(os.path.isfile(raw_data_index.get_index_file(raw_data_file)))
+        with data_interpreter.DataInterpreter(raw_data_file=raw_data_file, chunk_size=997) as interpreter:
+            event_number = interpreter.seek(trigger_number=self.reference_hits['trigger_number'][-1])
+            hits = np.concatenate([hits for hits, _ in interpreter.iter_hits()])
+        self.assertFalse(os.path.isfile(raw_data_index.get_index_file(raw_data_file)))  # index from raw data file is used
+        self.assertTrue(np.array_equal(hits, self.reference_hits[self.reference_hits['event_number'] >= event_number]))
+
+
+if __name__ == '__main__':
+    unittest.main()
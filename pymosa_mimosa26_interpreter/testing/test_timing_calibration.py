@@ -0,0 +1,42 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from pymosa_mimosa26_interpreter import data_interpreter
+from pymosa_mimosa26_interpreter import timing_calibration
+from pymosa_mimosa26_interpreter.testing.tools.test_tools import create_raw_data, create_raw_data_file
+
+
+class TestTimingCalibration(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.temp_folder = tempfile.mkdtemp()
+
+    @classmethod
+    def tearDownClass(cls):  # Remove created files
+        shutil.rmtree(cls.temp_folder)
+
+    def test_calibrate_timing_offset(self):
+        for timing_offset in (-112, 0, 700, -3000, 4000):
+            raw_data = create_raw_data(n_frames=3000, timing_offset=timing_offset)
+            self.assertLess(abs(timing_calibration.calibrate_timing_offset(raw_data) - timing_offset), 50)
+        # No triggers
+        raw_data = create_raw_data(n_frames=500, trigger_rate=0.0)
+        self.assertIsNone(timing_calibration.calibrate_timing_offset(raw_data))
+
+    def test_data_interpreter(self):
+        raw_data_file = os.path.join(self.temp_folder, 'raw_data.h5')
+        create_raw_data_file(raw_data_file, n_frames=3000, timing_offset=500)
+        with data_interpreter.DataInterpreter(raw_data_file=raw_data_file, timing_offset='auto', chunk_size=9973) as interpreter:
+            self.assertLess(abs(interpreter.interpreter.timing_offset - 500), 50)
+        with data_interpreter.DataInterpreter(raw_data_file=raw_data_file) as interpreter:
+            self.assertLess(abs(interpreter.calibrate_timing_offset(n_words=100000) - 500), 50)
+            interpreter.select_range(event_numbers=(10, 20))
+            with self.assertRaises(ValueError):
+                interpreter.calibrate_timing_offset()
+
+
+if __name__ == '__main__':
+    unittest.main()
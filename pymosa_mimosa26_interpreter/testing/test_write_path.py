@@ -0,0 +1,119 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import tables as tb
+
+from pymosa_mimosa26_interpreter import data_interpreter
+from pymosa_mimosa26_interpreter import event_index
+from pymosa_mimosa26_interpreter import plane_hits
+from pymosa_mimosa26_interpreter.testing.tools.test_tools import create_raw_data_file
+
+
+class TestWritePath(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.temp_folder = tempfile.mkdtemp()
+        cls.raw_data_file = os.path.join(cls.temp_folder, 'raw_data.h5')
+        cls.n_words = create_raw_data_file(cls.raw_data_file, n_frames=2000).shape[0]
+        cls.output_file = os.path.join(cls.temp_folder, 'interpreted.h5')
+        interpreter = data_interpreter.DataInterpreter(raw_data_file=cls.raw_data_file, analyzed_data_file=cls.output_file, chunk_size=9973)
+        interpreter.create_occupancy_hist = True
+        interpreter.interpret_word_table()
+        with tb.open_file(cls.output_file, 'r') as in_file_h5:
+            cls.hits = in_file_h5.root.Hits[:]
+            cls.occupancy_hist = in_file_h5.root.HistOcc_plane1[:]
+
+    @classmethod
+    def tearDownClass(cls):  # Remove created files
+        shutil.rmtree(cls.temp_folder)
+
+    def test_write_settings(self):
+        # The expected number of hits is estimated from the number of raw data words
+        with tb.open_file(self.output_file, 'r') as in_file_h5:
+            default_chunkshape = in_file_h5.root.Hits.chunkshape
+            self.assertEqual(in_file_h5.root.Hits.filters.complib, 'blosc')
+            self.assertEqual(in_file_h5.root.Hits.filters.complevel, 5)
+        with tb.open_file(os.path.join(self.temp_folder, 'expected_rows.h5'), 'w') as out_file_h5:
+            self.assertEqual(out_file_h5.create_table(out_file_h5.root, 'Hits', description=self.hits.dtype, expectedrows=self.n_words).chunkshape, default_chunkshape)
+            default_index_chunkshape = out_file_h5.create_table(out_file_h5.root, 'EventIndex', description=event_index.event_index_dtype).chunkshape
+        for kwargs in (dict(filters=tb.Filters(complib='blosc:lz4', complevel=1, shuffle=True)), dict(filters=tb.Filters(complib='blosc:zstd', complevel=3, bitshuffle=True), blosc_threads=2),
+                       dict(chunkshape=(1024,), flush_interval=4), dict(expected_rows=10**8), dict(prefetch_depth=2, flush_interval=3), dict(n_workers=2, flush_interval=3)):
+            output_file = os.path.join(self.temp_folder, 'interpreted_other.h5')
+            interpreter = data_interpreter.DataInterpreter(raw_data_file=self.raw_data_file, analyzed_data_file=output_file, chunk_size=9973, **kwargs)
+            interpreter.create_occupancy_hist = True
+            interpreter.create_event_index = True
+            interpreter.create_plane_hit_files = True
+            blosc_threads = tb.set_blosc_max_threads(1)
+            interpreter.interpret_word_table()
+            self.assertEqual(tb.set_blosc_max_threads(blosc_threads), 1)  # The number of Blosc threads is restored
+            with tb.open_file(output_file, 'r') as in_file_h5:
+                self.assertTrue(np.array_equal(in_file_h5.root.Hits[:], self.hits), msg=str(kwargs))
+                self.assertTrue(np.array_equal(in_file_h5.root.HistOcc_plane1[:], self.occupancy_hist), msg=str(kwargs))
+                self.assertEqual(in_file_h5.root.EventIndex[-1]['stop_row'], self.hits.shape[0])
+                if 'filters' in kwargs:
+                    self.assertEqual(in_file_h5.root.Hits.filters, kwargs['filters'])
+                    self.assertEqual(in_file_h5.root.HistOcc_plane1.filters, kwargs['filters'])
+                if 'chunkshape' in kwargs:
+                    self.assertEqual(in_file_h5.root.Hits.chunkshape, kwargs['chunkshape'])
+                if 'expected_rows' in kwargs:
+                    self.assertGreater(in_file_h5.root.Hits.chunkshape, default_chunkshape)
+                    self.assertGreater(in_file_h5.root.EventIndex.chunkshape, default_index_chunkshape)  # The expected number of events is estimated from the expected number of hits
+            n_plane_hits = 0
+            for plane_hit_file in plane_hits.get_plane_hit_files(output_file, interpreter.analyze_m26_header_ids):
+                with tb.open_file(plane_hit_file, 'r') as in_file_h5:
+                    n_plane_hits += in_file_h5.root.Hits.nrows
+            self.assertEqual(n_plane_hits, self.hits.shape[0])
+        for kwargs in (dict(expected_rows=0), dict(blosc_threads=0), dict(flush_interval=0)):
+            with self.assertRaises(ValueError):
+                data_interpreter.DataInterpreter(raw_data_file=self.raw_data_file, analyzed_data_file=os.path.join(self.temp_folder, 'interpreted_other.h5'), **kwargs)
+
+    def test_resume(self):
+        ''' The outputs are flushed before storing a checkpoint, independent of the flush interval '''
+        output_file = os.path.join(self.temp_folder, 'interpreted_resume.h5')
+        filters = tb.Filters(complib='blosc:lz4', complevel=1, shuffle=True)
+        interpreter = data_interpreter.DataInterpreter(raw_data_file=self.raw_data_file, analyzed_data_file=output_file, chunk_size=9973, checkpoint_interval=3, flush_interval=5, filters=filters)
+        interpreter.create_occupancy_hist = True
+        original_interpret_chunk = interpreter._interpret_chunk
+
+        def interrupted_interpret_chunk(raw_data_chunk, hit_table, *args, **kwargs):
+            original_interpret_chunk(raw_data_chunk, hit_table, *args, **kwargs)
+            if hit_table.nrows > self.hits.shape[0] // 2:
+                raise KeyboardInterrupt
+        interpreter._interpret_chunk = interrupted_interpret_chunk
+        try:
+            interpreter.interpret_word_table()
+        except KeyboardInterrupt:
+            pass
+        with tb.open_file(output_file, 'r') as in_file_h5:  # The checkpoint histograms are written with the same filters
+            self.assertEqual(in_file_h5.root.Checkpoint.occupancy_hist.filters, filters)
+        interpreter = data_interpreter.DataInterpreter(raw_data_file=self.raw_data_file, analyzed_data_file=output_file, chunk_size=9973, checkpoint_interval=3, flush_interval=5, filters=filters)
+        interpreter.create_occupancy_hist = True
+        interpreter.interpret_word_table(resume=True)
+        with tb.open_file(output_file, 'r') as in_file_h5:
+            self.assertTrue(np.array_equal(in_file_h5.root.Hits[:], self.hits))
+            self.assertTrue(np.array_equal(in_file_h5.root.HistOcc_plane1[:], self.occupancy_hist))
+
+    def test_segment_write_settings(self):
+        ''' The temporary hit tables of the raw data segments (n_workers > 1) are written with the write settings '''
+        filters = tb.Filters(complib='blosc:lz4', complevel=1, shuffle=True)
+        segment_file = os.path.join(self.temp_folder, 'segment.h5')
+        interpreter = data_interpreter.DataInterpreter(raw_data_file=self.raw_data_file, chunk_size=9973)
+        segment_result = data_interpreter.interpret_segment(raw_data_file=self.raw_data_file, output_file=segment_file, start=0, stop=self.n_words, chunk_size=9973,
+                                                            analyze_m26_header_ids=interpreter.analyze_m26_header_ids, add_missing_events=False, timing_offset=interpreter.interpreter.timing_offset,
+                                                            build_all_events=True, resync=False, filters=filters, chunkshape=(1024,))
+        with tb.open_file(segment_file, 'r') as in_file_h5:
+            self.assertEqual(in_file_h5.root.Hits.filters, filters)
+            self.assertEqual(in_file_h5.root.Hits.chunkshape, (1024,))
+            self.assertTrue(np.array_equal(in_file_h5.root.Hits[:], self.hits))
+        self.assertEqual(segment_result['n_hits'], self.hits.shape[0])
+        self.assertEqual(interpreter._get_segment_expected_rows(10000, 0, 5000), 5000)  # Estimated from the number of raw data words
+        interpreter.expected_rows = 1000
+        self.assertEqual(interpreter._get_segment_expected_rows(10000, 0, 5000), 500)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -279,3 +279,147 @@ def compare_h5_files(first_file, second_file, node_names=None, detailed_comparis
     else:
         error_msg = 'Comparing files %s and %s: FAILED\n%s' % (first_file, second_file, error_msg)
     return checks_passed, error_msg
+
+
+def create_raw_data(n_frames=1000, m26_header_ids=(1, 2, 3, 4, 5, 6), trigger_rate=0.5, n_noise_hits=2.0, error_rate=0.01, m26_timestamp_start=2**32 - 500 * 4608, m26_frame_id_start=2**32 - 700, trigger_number_start=2**16 - 300, timing_offset=-112, seed=0):
+    ''' Create synthetic pymosa raw data (Mimosa26 frames and trigger words with format 2).
+
+    The continuous readout of the Mimosa26 planes is emulated frame by frame. The words of the planes and the trigger words are
+    interleaved by their time of arrival. The hits of a trigger are at the same position in all planes (track). The start values of the timestamps, frame IDs and trigger numbers can be set close to their
+    overflow in order to test the overflow handling. Data errors (data loss, corrupted frames, missing trigger words and unknown words)
+    are injected randomly.
+
+    Parameters
+    ----------
+    n_frames : int
+        Number of Mimosa26 frames for each plane.
+    m26_header_ids : iterable
+        Mimosa26 header IDs.
+    trigger_rate : float
+        Mean number of triggers per Mimosa26 frame.
+    n_noise_hits : float
+        Mean number of additional (noise) hits per Mimosa26 frame and plane.
+    error_rate : float
+        Probability of a data error per Mimosa26 frame and plane.
+    m26_timestamp_start, m26_frame_id_start, trigger_number_start : int
+        Start values of the Mimosa26 timestamp, Mimosa26 frame ID and trigger number.
+    timing_offset : int
+        Timing offset between the Mimosa26 clock and the clock of the R/O system (trigger timestamps).
+    seed : int
+        Seed of the random number generator.
+
+    Returns
+    -------
+    numpy.ndarray
+        Array with the raw data words (uint32).
+    '''
+    frame_unit_cycle = 4608
+    row_unit_cycle = 8
+    rng = np.random.RandomState(seed)
+    header = 0x20000000
+
+    # Create trigger timestamps and assign hits of each plane to the triggers
+    n_triggers = rng.poisson(trigger_rate * n_frames)
+    trigger_timestamps = np.unique(rng.randint(3 * frame_unit_cycle, (n_frames - 3) * frame_unit_cycle, size=n_triggers)).astype(np.int64) + m26_timestamp_start
+    n_triggers = trigger_timestamps.shape[0]
+    trigger_numbers = trigger_number_start + np.arange(n_triggers, dtype=np.int64)
+    trigger_numbers += np.cumsum(rng.uniform(size=n_triggers) < error_rate)  # missing trigger words
+    frame_hits = [[[] for _ in range(n_frames)] for _ in m26_header_ids]
+    for trigger_timestamp in trigger_timestamps:
+        # Track position, the hits of the planes are correlated
+        track_row = rng.randint(2, 574)
+        track_column = rng.randint(2, 1148)
+        for plane_index in range(len(m26_header_ids)):
+            if rng.uniform() < 0.1:  # inefficiency
+                continue
+            row = track_row + rng.randint(-2, 3)
+            column = track_column + rng.randint(-2, 3)
+            # Frame which contains the hit for the trigger
+            frame_timestamp_min = trigger_timestamp + frame_unit_cycle + timing_offset - row * row_unit_cycle
+            frame = (frame_timestamp_min - m26_timestamp_start) // frame_unit_cycle + 1
+            if frame < n_frames:
+                frame_hits[plane_index][frame].append((row, column, rng.randint(0, 3)))
+
+    # Create Mimosa26 frames, each word has a time of arrival
+    words = []
+    times = []
+    for plane_index, plane in enumerate(m26_header_ids):
+        plane_header = header | (plane << 20)
+        for frame in range(n_frames):
+            frame_timestamp = (m26_timestamp_start + frame * frame_unit_cycle + plane_index) & 0xffffffff
+            frame_id = (m26_frame_id_start + frame) & 0xffffffff
+            hits = frame_hits[plane_index][frame]
+            for _ in range(rng.poisson(n_noise_hits)):
+                hits.append((rng.randint(0, 576), rng.randint(0, 1152), 0))
+            data_words = []
+            rows = {}
+            for row, column, n_hits in hits:
+                rows.setdefault(row, set()).add((column, n_hits))
+            for row in sorted(rows):
+                columns = sorted(rows[row])[:15]
+                data_words.append(plane_header | (row << 4) | len(columns))
+                for column, n_hits in columns:
+                    data_words.append(plane_header | (column << 2) | min(n_hits, 1151 - column))
+            if len(data_words) % 2:
+                data_words.append(plane_header)  # fill word
+            frame_length = len(data_words) // 2
+            frame_words = [
+                plane_header | 0x00010000 | (frame_timestamp & 0xffff),
+                plane_header | (frame_timestamp >> 16),
+                plane_header | (frame_id & 0xffff),
+                plane_header | (frame_id >> 16),
+                plane_header | frame_length,
+                plane_header | frame_length] + data_words + [
+                plane_header | 0xaa50,
+                plane_header | (0xaa50 | plane)]
+            if rng.uniform() < error_rate:
+                error_type = rng.randint(0, 3)
+                position = rng.randint(1, len(frame_words))
+                if error_type == 0:  # data loss, the following words are lost
+                    frame_words = frame_words[:position]
+                    if rng.uniform() < 0.5:
+                        frame_words[-1] |= 0x00020000
+                elif error_type == 1:  # corrupted frame length
+                    frame_words[5] = plane_header | (frame_length + 1)
+                else:  # missing frame trailer
+                    frame_words = frame_words[:-2]
+            arrival_time = m26_timestamp_start + (frame + 1) * frame_unit_cycle + plane_index * 11
+            for word_index, word in enumerate(frame_words):
+                words.append(word)
+                times.append(arrival_time + word_index * 16)
+    # Trigger words
+    for trigger_timestamp, trigger_number in zip(trigger_timestamps, trigger_numbers):
+        words.append(0x80000000 | ((int(trigger_timestamp) & 0x7fff) << 16) | (int(trigger_number) & 0xffff))
+        times.append(trigger_timestamp + 100)
+    # Unknown words
+    for time in rng.randint(m26_timestamp_start, m26_timestamp_start + n_frames * frame_unit_cycle, size=rng.poisson(error_rate * n_frames)):
+        words.append(0x00000000)
+        times.append(time)
+    order = np.argsort(np.array(times, dtype=np.int64), kind='stable')
+    return np.array(words, dtype=np.uint32)[order]
+
+
+def create_raw_data_file(filename, **kwargs):
+    ''' Create synthetic pymosa raw data file. The keyword arguments are passed to create_raw_data().
+
+    Parameters
+    ----------
+    filename : string
+        Filename of the raw data file.
+
+    Returns
+    -------
+    numpy.ndarray
+        Array with the raw data words.
+    '''
+    raw_data = create_raw_data(**kwargs)
+    with tb.open_file(filename, 'w') as out_file_h5:
+        raw_data_earray = out_file_h5.create_earray(
+            where=out_file_h5.root,
+            name='raw_data',
+            atom=tb.UIntAtom(),
+            shape=(0,),
+            title='raw_data',
+            filters=tb.Filters(complib='blosc', complevel=5, fletcher32=False))
+        raw_data_earray.append(raw_data)
+    return raw_data
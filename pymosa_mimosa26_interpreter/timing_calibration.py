@@ -0,0 +1,131 @@
+''' Calibration of the timing offset between the Mimosa26 40 MHz clock and the 40 MHz clock of the R/O system.
+
+The hits of a trigger are expected in a readout window of one Mimosa26 frame (see _build_events()): the time difference between the trigger timestamp
+and the time of the row (time_stamp + row * ROW_UNIT_CYCLE) is in [-2 * FRAME_UNIT_CYCLE - timing_offset, -FRAME_UNIT_CYCLE - timing_offset).
+The histogram of the time differences of all trigger and hit pairs of a raw data sample therefore shows a box of the width of one frame on top of
+a flat background of uncorrelated hits. The edges of the box are obtained by a least squares fit of a box with the width of one frame
+on a flat background, which is the maximum of the histogram filtered with the same box (matched filter).
+'''
+
+import logging
+
+import numpy as np
+from numba import njit
+
+from pymosa_mimosa26_interpreter import raw_data_interpreter
+from pymosa_mimosa26_interpreter.raw_data_interpreter import FRAME_UNIT_CYCLE, ROW_UNIT_CYCLE
+
+
+logger = logging.getLogger(__name__)
+
+
+def get_time_difference_range(timing_offset_range):
+    ''' Returning the range of the time differences (start, stop) of the histogram for the timing offsets in timing_offset_range
+    (with a margin of one frame on both sides).
+    '''
+    return -2 * FRAME_UNIT_CYCLE - timing_offset_range[1] - FRAME_UNIT_CYCLE, -2 * FRAME_UNIT_CYCLE - timing_offset_range[0] + 2 * FRAME_UNIT_CYCLE
+
+
+def create_time_difference_hist(raw_data, analyze_m26_header_ids=None, timing_offset_range=(-FRAME_UNIT_CYCLE, FRAME_UNIT_CYCLE), chunk_size=1000000):
+    ''' Creating the histogram of the time differences between the trigger timestamps and the row timestamps of the hits.
+
+    Parameters
+    ----------
+    raw_data : np.array, tables.EArray
+        The raw data words (sample of a run).
+    analyze_m26_header_ids : list
+        List of Mimosa26 header IDs that will be interpreted.
+    timing_offset_range : tuple
+        Range of the timing offsets (min, max).
+    chunk_size : int
+        Number of raw data words which are decoded at once.
+
+    Returns
+    -------
+    hist : np.array
+        Histogram of the time differences (bin width of one clock cycle), starting at get_time_difference_range(timing_offset_range)[0].
+    '''
+    decoder = raw_data_interpreter.Decoder(analyze_m26_header_ids=analyze_m26_header_ids)
+    trigger_timestamps, hit_timestamps = [], []
+    for i in list(range(0, raw_data.shape[0], chunk_size)) + [None]:
+        # Only decode the raw data, the events are not built
+        decoded_data = decoder.decode(raw_data=raw_data[i:i + chunk_size] if i is not None else None, flush=i is None)
+        trigger_timestamps.append(decoded_data.trigger_data['trigger_time_stamp'])
+        hit_timestamps.append(decoded_data.telescope_data['time_stamp'] + decoded_data.telescope_data['row'].astype(np.int64) * ROW_UNIT_CYCLE)
+    time_difference_start, time_difference_stop = get_time_difference_range(timing_offset_range)
+    hist = np.zeros(shape=time_difference_stop - time_difference_start, dtype=np.int64)
+    fill_time_difference_hist(hist, np.sort(np.concatenate(trigger_timestamps)), np.concatenate(hit_timestamps), time_difference_start)
+    return hist
+
+
+@njit(cache=True, nogil=True)
+def fill_time_difference_hist(hist, trigger_timestamps, hit_timestamps, time_difference_start):
+    ''' Filling the time differences of all trigger and hit pairs into the histogram. The trigger timestamps have to be sorted.
+    '''
+    for hit_index in range(hit_timestamps.shape[0]):
+        trigger_index = np.searchsorted(trigger_timestamps, hit_timestamps[hit_index] + time_difference_start)
+        while trigger_index < trigger_timestamps.shape[0]:
+            time_difference = trigger_timestamps[trigger_index] - hit_timestamps[hit_index] - time_difference_start
+            if time_difference >= hist.shape[0]:
+                break
+            hist[time_difference] += 1
+            trigger_index += 1
+    return hist
+
+
+def get_timing_offset(hist, timing_offset_range=(-FRAME_UNIT_CYCLE, FRAME_UNIT_CYCLE), min_significance=5.0):
+    ''' Returning the timing offset from the time difference histogram (see create_time_difference_hist()).
+
+    Parameters
+    ----------
+    hist : np.array
+        Histogram of the time differences.
+    timing_offset_range : tuple
+        Range of the timing offsets (min, max), the same range as for create_time_difference_hist().
+    min_significance : float
+        Minimum significance of the readout window (number of hits in the window above the background in units of the standard deviation of the background).
+
+    Returns
+    -------
+    timing_offset : int
+        The timing offset. None, if the readout window was not found.
+    '''
+    time_difference_start, _ = get_time_difference_range(timing_offset_range)
+    # Box filter with the width of the readout window, the index is the start of the window
+    cumulative_hist = np.concatenate([[0], np.cumsum(hist)])
+    window_hist = cumulative_hist[FRAME_UNIT_CYCLE:] - cumulative_hist[:-FRAME_UNIT_CYCLE]
+    # Start of the readout window for the timing offsets in timing_offset_range
+    window_indices = np.arange(-2 * FRAME_UNIT_CYCLE - timing_offset_range[1], -2 * FRAME_UNIT_CYCLE - timing_offset_range[0] + 1) - time_difference_start
+    max_window_hist = np.max(window_hist[window_indices])
+    background = np.median(window_hist)
+    signal = max_window_hist - background
+    if signal <= 0 or signal < min_significance * np.sqrt(background):
+        logger.warning('Cannot find the readout window in the time difference histogram')
+        return None
+    window_index = np.mean(window_indices[window_hist[window_indices] == max_window_hist])  # center of a plateau
+    timing_offset = int(round(-2 * FRAME_UNIT_CYCLE - (time_difference_start + window_index)))
+    logger.info('Timing offset: %d (significance of the readout window: %.1f)' % (timing_offset, signal / np.sqrt(max(background, 1.0))))
+    return timing_offset
+
+
+def calibrate_timing_offset(raw_data, analyze_m26_header_ids=None, timing_offset_range=(-FRAME_UNIT_CYCLE, FRAME_UNIT_CYCLE), chunk_size=1000000):
+    ''' Obtaining the timing offset from a raw data sample (see create_time_difference_hist() and get_timing_offset()).
+
+    Parameters
+    ----------
+    raw_data : np.array, tables.EArray
+        The raw data words (sample of a run).
+    analyze_m26_header_ids : list
+        List of Mimosa26 header IDs that will be interpreted.
+    timing_offset_range : tuple
+        Range of the timing offsets (min, max).
+    chunk_size : int
+        Number of raw data words which are decoded at once.
+
+    Returns
+    -------
+    timing_offset : int
+        The timing offset. None, if the readout window was not found.
+    '''
+    hist = create_time_difference_hist(raw_data=raw_data, analyze_m26_header_ids=analyze_m26_header_ids, timing_offset_range=timing_offset_range, chunk_size=chunk_size)
+    return get_timing_offset(hist=hist, timing_offset_range=timing_offset_range)
@@ -24,8 +24,16 @@ setup(
     maintainer_email=author_email,
     install_requires=install_requires,
     packages=find_packages(),
+    entry_points={
+        'console_scripts': [
+            'pymosa-interpret = pymosa_mimosa26_interpreter.batch_interpreter:main',
+            'pymosa-distributed = pymosa_mimosa26_interpreter.distributed_interpreter:main',
+            'pymosa-precompile = pymosa_mimosa26_interpreter.precompile:main',
+            'pymosa-index = pymosa_mimosa26_interpreter.raw_data_index:main',
+        ]
+    },
     include_package_data=True,  # accept all data files and directories matched by MANIFEST.in or found in source control
     keywords=['mimosa26', 'test-beam', 'pixel', 'telescope'],
-    python_requires='>=2.7',
+    python_requires='>=3.6',
     platforms='any'
 )